@@ -1,7 +1,9 @@
+import math
 import numpy as np
 from copy import deepcopy
+from itertools import product
 
-from ..util.util import myArrayEq, myPointsEq, ListHasPoint
+from ..util.util import myArrayEq, myPointsEq
 from .parsers.PDB import readPointsAndAtomsFromPDB
 from .parsers.XYZ import readPointsAndAtomsFromXYZ
 from .parsers.CFG import readPointsAndAtomsFromCFG
@@ -16,8 +18,15 @@ class Canvas(object):
     materials as graphs to the geometry of the material lattice. The list of points and neighbor
     connections necessary to create a ``Canvas`` object can be obtained from the combination of
     ``Lattice``, ``Shape``, and ``Tiling`` objects.
+
+    Points are looked up through a spatial hash that groups them in cubic
+    buckets of edge BUCKET_SIZE, so finding a point only compares it
+    against the few Points in the buckets within DBL_TOL of it.
+    BUCKET_SIZE must be larger than DBL_TOL and should be smaller than
+    the distance between Points.
     """
     DBL_TOL = 1e-5
+    BUCKET_SIZE = 1e-2
 
     # === STANDARD CONSTRUCTOR
     def __init__(self, Points=None, NeighborhoodIndexes=None, DefaultNN=0):
@@ -31,6 +40,8 @@ class Canvas(object):
         self._Points = Points
         self._NeighborhoodIndexes = NeighborhoodIndexes
         self.__DefaultNN = DefaultNN
+        self._PointBuckets = None  # NOTE: The spatial hash is built on first use
+        self._NIndexedPoints = 0
         assert (self.isConsistentWithDesign())
 
     # === CONSTRUCTOR - From PDB File
@@ -145,6 +156,9 @@ class Canvas(object):
         This constructor takes advantage of methods in Lattice to
         efficiently scan over sites. This requires the Lattice.Scan
         method to produce a generator object.
+        For lattices with a ScanArray method (i.e., UnitCellLattice), all
+        sites are scanned and tested at once, and neighbors are found from
+        unit cell offsets.
 
         Args:
             DefaultNN:
@@ -161,14 +175,45 @@ class Canvas(object):
             Canvas: A new Canvas object.
 
         """
-        result = cls(DefaultNN=DefaultNN)
         BBox = RectPrism.fromPointsBBox(argPolyhedron.getBounds())
+        if hasattr(Lat, 'ScanArray'):
+            return cls._fromUnitCellLatticeAndShapeScan(Lat, argPolyhedron, BBox, DefaultNN)
+        result = cls(DefaultNN=DefaultNN)
         for P in Lat.Scan(BBox):
             if P in argPolyhedron:
                 result.addLocation(P, len(Lat.getNeighbors(P)))
         result.setNeighborsFromFunc(Lat.getNeighbors)
         return result
 
+    @classmethod
+    def _fromUnitCellLatticeAndShapeScan(cls, Lat, argPolyhedron, BBox, DefaultNN):
+        Points, Cells, Types = Lat.ScanArray(BBox)
+        Inside = argPolyhedron.areInShape(Points)
+        Points, Cells, Types = Points[Inside], Cells[Inside], Types[Inside]
+        if len(Points) == 0:
+            return cls(DefaultNN=DefaultNN)
+        # NOTE: Sites are found from their unit cell and type through a
+        #       dense table over the unit cells that contain sites
+        NTypes = len(Lat.RefUnitCell.FracPositions)
+        CellMin = Cells.min(axis=0)
+        CellDims = Cells.max(axis=0) - CellMin + 1
+        SiteIndexes = np.full(np.prod(CellDims) * NTypes, -1, dtype=int)
+        SiteIndexes[np.ravel_multi_index((Cells - CellMin).T, CellDims) * NTypes + Types] = np.arange(len(Points))
+        NeighborhoodIndexes = [None] * len(Points)
+        for t, Offsets in enumerate(Lat.getRefNeighborOffsets()):
+            Sites = np.flatnonzero(Types == t)
+            Neighborhoods = np.full((len(Sites), len(Offsets)), -1, dtype=int)
+            for l, (CellOffset, NeighType) in enumerate(Offsets):
+                NeighCells = Cells[Sites] + CellOffset - CellMin
+                InRange = ((NeighCells >= 0) & (NeighCells < CellDims)).all(axis=1)
+                Neighborhoods[InRange, l] = SiteIndexes[np.ravel_multi_index(NeighCells[InRange].T, CellDims) * NTypes +
+                                                        NeighType]
+            Neighborhoods = Neighborhoods.astype(object)
+            Neighborhoods[Neighborhoods == -1] = None
+            for i, Neighborhood in zip(Sites.tolist(), Neighborhoods.tolist()):
+                NeighborhoodIndexes[i] = Neighborhood
+        return cls(Points=list(Points), NeighborhoodIndexes=NeighborhoodIndexes, DefaultNN=DefaultNN)
+
     @classmethod
     def fromLatticeAndTiling(cls, Lat, T, Seed=np.array([0, 0, 0], dtype=float), DefaultNN=0):
         """Make Canvas by iterating over Lattice points that fit in Tiling.
@@ -241,6 +286,7 @@ class Canvas(object):
         """
         assert (not self.hasPoint(P))
         self._Points.append(P)
+        self._indexPoint(len(self._Points) - 1)
         self._NeighborhoodIndexes.append([None] * (NNeighbors or self.__DefaultNN))
         assert (self.isConsistentWithDesign())
 
@@ -306,8 +352,9 @@ class Canvas(object):
         """
         assert (i < len(self._NeighborhoodIndexes))
         assert (l < len(self._NeighborhoodIndexes[i]))
-        if self.hasPoint(PN):
-            self._NeighborhoodIndexes[i][l] = self.getPointIndex(PN)
+        j = self.getPointIndex(PN)
+        if j is not None:
+            self._NeighborhoodIndexes[i][l] = j
         elif blnSetNoneOtherwise:
             self._NeighborhoodIndexes[i][l] = None
         assert (self.isConsistentWithDesign())
@@ -362,9 +409,9 @@ class Canvas(object):
                 if Index is None:
                     assert (not self.hasPoint(LatNeighbors[l]))  # else, Canvas constructed incorrectly
                     for TilingDirection in argTiling.TilingDirections:
-                        PtoTry = LatNeighbors[l] + TilingDirection
-                        if self.hasPoint(PtoTry):
-                            self._NeighborhoodIndexes[i][l] = self.getPointIndex(PtoTry)
+                        j = self.getPointIndex(LatNeighbors[l] + TilingDirection)
+                        if j is not None:
+                            self._NeighborhoodIndexes[i][l] = j
                             break
 
     def addShells(self, n, NeighborsFunc):
@@ -410,6 +457,7 @@ class Canvas(object):
         """
         for P in self._Points:
             TransF.transform(P)
+        self._PointBuckets = None
 
     def getTransformed(self, TransF):
         """Copy and transform this Canvas.
@@ -443,6 +491,13 @@ class Canvas(object):
                 assert (not self.hasPoint(P))
             self.addLocation(P)
 
+    def __getstate__(self):
+        """Get the state to copy or pickle, without the spatial hash."""
+        State = self.__dict__.copy()
+        State['_PointBuckets'] = None
+        State['_NIndexedPoints'] = 0
+        return State
+
     # === PROPERTY EVALUATION METHODS
     def __len__(self):
         """Get the number of Points for this Canvas."""
@@ -463,12 +518,7 @@ class Canvas(object):
             bool) True if Points has P.
 
         """
-        for Q in self.Points:
-            # NOTE: There are several ways to test point membership.
-            #       This is optimized for speed.
-            if myArrayEq(P, Q, Canvas.DBL_TOL):
-                return True
-        return False
+        return self.getPointIndex(P) is not None
 
     def getPointIndex(self, P):
         """Identify the index of a point in the Canvas.
@@ -480,12 +530,21 @@ class Canvas(object):
             int) Index of P in Points.
 
         """
-        for i, Q in enumerate(self.Points):
-            # NOTE: There are several ways to test point membership.
-            #       This is optimized for speed.
-            if myArrayEq(P, Q, Canvas.DBL_TOL):
-                return i
-        return None
+        if self._PointBuckets is None or self._NIndexedPoints != len(self._Points):
+            # NOTE: The spatial hash is built on first use, and rebuilt if
+            #       Points were added or removed through the Points property
+            self._rebuildPointIndex()
+        result = None
+        for Key in Canvas._getNearbyBucketKeys(P):
+            for i in self._PointBuckets.get(Key, ()):
+                if result is not None and i > result:
+                    break
+                if myArrayEq(P, self._Points[i], Canvas.DBL_TOL):
+                    # NOTE: Buckets list indexes in increasing order, keep
+                    #       the first matching Point as a linear scan would
+                    result = i
+                    break
+        return result
 
     def getNeighbors(self, P):
         """Identify set of neighbors to a point in Canvas.
@@ -526,14 +585,56 @@ class Canvas(object):
             neighboring shell.
 
         """
-        result = []
+        result = Canvas()
         for i, P in enumerate(self.Points):
             Neighs = NeighborsFunc(P)
             for Neigh in Neighs:
-                if (not self.hasPoint(Neigh) and
-                        not ListHasPoint(result, Neigh, Canvas.DBL_TOL)):
-                    result.append(Neigh)
-        return result
+                if not self.hasPoint(Neigh) and not result.hasPoint(Neigh):
+                    result.addLocation(Neigh)
+        return result.Points
+
+    # === SPATIAL HASH METHODS
+    @staticmethod
+    def _getBucketKey(P):
+        """Get the key of the bucket that contains a point."""
+        return tuple(math.floor(x / Canvas.BUCKET_SIZE) for x in np.asarray(P).tolist())
+
+    @staticmethod
+    def _getNearbyBucketKeys(P):
+        """Get the keys of the buckets that can hold points within DBL_TOL of a point.
+
+        Along each axis, the neighboring bucket is only considered if P lies
+        within DBL_TOL of the face they share.
+        """
+        Options = []
+        for x in np.asarray(P).tolist():
+            Key = math.floor(x / Canvas.BUCKET_SIZE)
+            Offset = x - Key * Canvas.BUCKET_SIZE
+            if Offset <= Canvas.DBL_TOL:
+                Options.append((Key, Key - 1))
+            elif Offset >= Canvas.BUCKET_SIZE - Canvas.DBL_TOL:
+                Options.append((Key, Key + 1))
+            else:
+                Options.append((Key,))
+        return product(*Options)
+
+    def _indexPoint(self, i):
+        """Add the point at index i to the spatial hash."""
+        if self._PointBuckets is None:
+            # NOTE: Building the spatial hash indexes all Points, including i
+            self._rebuildPointIndex()
+            return
+        P = self._Points[i]
+        if P is not None:
+            self._PointBuckets.setdefault(Canvas._getBucketKey(P), []).append(i)
+        self._NIndexedPoints += 1
+
+    def _rebuildPointIndex(self):
+        """Build the spatial hash from scratch."""
+        self._PointBuckets = {}
+        self._NIndexedPoints = 0
+        for i in range(len(self._Points)):
+            self._indexPoint(i)
 
     # === BASIC QUERY METHODS
     @property
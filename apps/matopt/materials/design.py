@@ -3,6 +3,7 @@ from copy import deepcopy
 
 from .atom import Atom
 from .canvas import Canvas
+from ..util.util import getPointKeys
 from .parsers.PDB import readPointsAndAtomsFromPDB, writeDesignToPDB
 from .parsers.XYZ import readPointsAndAtomsFromXYZ, writeDesignToXYZ
 from .parsers.CFG import readPointsAndAtomsFromCFG, writeDesignToCFG
@@ -221,14 +222,29 @@ class Design(object):
         if blnPreserveIndexing:
             return self == other
         for i, P in enumerate(self.Canvas.Points):
-            if not other.Canvas.hasPoint(P):
+            j = other.Canvas.getPointIndex(P)
+            if j is None or self.Contents[i] != other.Contents[j]:
                 return False
-            else:
-                j = other.Canvas.getPointIndex(P)
-                if self.Contents[i] != other.Contents[j]:
-                    return False
         return True
 
+    def getCanonicalKey(self, DBL_TOL=Canvas.DBL_TOL):
+        """Get a hashable key for the Design, independent of index order.
+
+        The key is the set of points, rounded to multiples of DBL_TOL,
+        paired with their contents. Designs with the same key have the same
+        points and contents, so they are equivalent, regardless of
+        blnPreserveIndexing and blnIgnoreVoid.
+
+        Args:
+            DBL_TOL(float, optional): Optional, tolerance to round points
+        with. (Default value = Canvas.DBL_TOL)
+
+        Returns:
+            (frozenset) Key of this Design.
+
+        """
+        return frozenset(zip(getPointKeys(self.Canvas.Points, DBL_TOL), self.Contents))
+
     @property
     def NonVoidCount(self):
         """Count number of contents that are not considered void."""
@@ -267,6 +267,21 @@ class Polyhedron(Shape, ABC):
 
     __contains__ = isInShape
 
+    def areInShape(self, Ps, tol=Shape.DBL_TOL):
+        """Vectorized version of isInShape.
+
+        Args:
+            Ps(numpy.ndarray): Points to test, one per row.
+            tol: Default value = Shape.DBL_TOL)
+
+        Returns:
+            numpy.ndarray: Boolean mask of the points inside the Shape.
+
+        """
+        FacetNorms = np.array(self.FacetNorms)
+        FacetOffsets = np.array([np.inner(self.V[Facet[0]], Norm) for Facet, Norm in zip(self.F, self.FacetNorms)])
+        return (Ps.dot(FacetNorms.T) - FacetOffsets < tol).all(axis=1)
+
     def satisfiesFacet(self, P, f, tol=Shape.DBL_TOL):
         """
 
@@ -87,3 +87,10 @@ class Lattice(object):
         result = deepcopy(P)
         self._convertToReference(result)
         return result
+
+    def _getConvertFromReferenceArray(self, RefPs):
+        # NOTE: All transformation functions are affine, so their combination
+        #       is found by converting the origin and the unit vectors
+        Origin = self._getConvertFromReference(np.zeros(3))
+        Axes = np.array([self._getConvertFromReference(e) for e in np.eye(3)]) - Origin
+        return RefPs.dot(Axes) + Origin
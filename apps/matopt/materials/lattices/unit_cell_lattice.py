@@ -76,7 +76,7 @@ class UnitCellLattice(Lattice):
                                n3 * self.RefUnitCell.Tiling.TileShape.Vz +
                                FracPart)
 
-    def Scan(self, argPolyhedron):
+    def _getRefScanBounds(self, argPolyhedron):
         RefScanMin = self._getConvertToReference(argPolyhedron.V[0])
         RefScanMax = self._getConvertToReference(argPolyhedron.V[0])
         for v in argPolyhedron.V:
@@ -84,9 +84,65 @@ class UnitCellLattice(Lattice):
             RefScanMax = np.maximum(RefScanMax, self._getConvertToReference(v))
         RefScanMin = RefScanMin.astype(int) + np.array([-1, -1, -1], dtype=int)
         RefScanMax = RefScanMax.astype(int) + np.array([1, 1, 1], dtype=int)
+        return RefScanMin, RefScanMax
+
+    def _getRefCellVectors(self):
+        TileShape = self.RefUnitCell.Tiling.TileShape
+        return np.array([TileShape.Vx, TileShape.Vy, TileShape.Vz])
+
+    def _getRefCellAndType(self, RefP):
+        CellVectors = self._getRefCellVectors()
+        for i, FracPart in enumerate(self.RefUnitCell.FracPositions):
+            Cell = np.linalg.solve(CellVectors.T, RefP - FracPart)
+            if myArrayEq(Cell, np.round(Cell), UnitCell.DBL_TOL):
+                return np.round(Cell).astype(int), i
+        raise ValueError('UnitCellLattice: Point is not on the lattice')
+
+    def Scan(self, argPolyhedron):
+        RefScanMin, RefScanMax = self._getRefScanBounds(argPolyhedron)
         for RefP in self.ScanRef(RefScanMin, RefScanMax):
             yield self._getConvertFromReference(RefP)
 
+    def ScanArray(self, argPolyhedron):
+        """Get all the points of Scan at once.
+
+        Args:
+            argPolyhedron(Polyhedron): Shape to scan over.
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray, numpy.ndarray): Points (one per
+            row) in the order of Scan, the unit cell (n1, n2, n3) of each
+            point and the index of each point in FracPositions.
+
+        """
+        RefScanMin, RefScanMax = self._getRefScanBounds(argPolyhedron)
+        Cells = np.indices(RefScanMax - RefScanMin + 1).reshape(3, -1).T + RefScanMin
+        FracPositions = np.array(self.RefUnitCell.FracPositions)
+        RefPs = Cells.dot(self._getRefCellVectors())[:, np.newaxis, :] + FracPositions[np.newaxis, :, :]
+        return (self._getConvertFromReferenceArray(RefPs.reshape(-1, 3)),
+                np.repeat(Cells, len(FracPositions), axis=0),
+                np.tile(np.arange(len(FracPositions)), len(Cells)))
+
+    def getRefNeighborOffsets(self):
+        """Get the neighbors of each position in the unit cell as offsets.
+
+        Neighborhoods only depend on the position in the unit cell, so
+        neighbor l of a point in unit cell n is the point at position t in
+        unit cell n + dn, where (dn, t) is found from the neighbors of the
+        same position in the unit cell at the origin.
+
+        Returns:
+            list<list<(numpy.ndarray, int)>>: For each of FracPositions, the
+            unit cell offset and FracPositions index of each neighbor, in the
+            order of getNeighbors.
+
+        """
+        result = []
+        for FracPart in self.RefUnitCell.FracPositions:
+            result.append([self._getRefCellAndType(self._getConvertToReference(NeighP))
+                           for NeighP in self.getNeighbors(self._getConvertFromReference(FracPart))])
+        return result
+
     # === STANDARD CONSTRUCTOR
     def __init__(self, RefUnitCell):
         self._RefUnitCell = RefUnitCell
@@ -1,5 +1,5 @@
 from copy import deepcopy
-from ..util.util import myPointEq
+from ..util.util import getPointKeys
 
 
 def areMotifViaTransF(D1, D2, TransF,
@@ -62,17 +62,22 @@ def getEnumConfs(Motifs, TransFs, MotifToConfMap=None, blnPreserveMotifLocs=True
         # del MotifToConfMap[:]
         MotifToConfMap.clear()
     result = []
+    # NOTE: Configurations with the same points and contents are found
+    #       from their canonical keys. Only configurations with more points
+    #       can contain a configuration otherwise, and need to be compared.
+    ResultKeys = set()
+    MaxResultLen = 0
     for iMotif, Motif in enumerate(Motifs):
         if MotifToConfMap is not None:
             MotifToConfMap.append([len(result)])
         result.append(Motif)
+        ResultKeys.add(Motif.getCanonicalKey(DBL_TOL))
+        MaxResultLen = max(MaxResultLen, len(Motif))
         for TransF in TransFs:
             Conf = Motif.getTransformed(TransF)
-            blnUniqueConf = True
-            for r in result:
-                if Conf.isEquivalentTo(r):
-                    blnUniqueConf = False
-                    break
+            blnUniqueConf = Conf.getCanonicalKey(DBL_TOL) not in ResultKeys
+            if blnUniqueConf and len(Conf) < MaxResultLen:
+                blnUniqueConf = not any(len(r) > len(Conf) and Conf.isEquivalentTo(r) for r in result)
             if blnUniqueConf:
                 if MotifToConfMap is not None:
                     MotifToConfMap[iMotif].append(len(result))
@@ -82,10 +87,12 @@ def getEnumConfs(Motifs, TransFs, MotifToConfMap=None, blnPreserveMotifLocs=True
                 if blnPreserveMotifLocs:
                     ConfCopy = Conf
                     Conf = deepcopy(Motif)  # So they have the same points<->indexes
-                    for l in range(len(Motif)):
-                        for l2 in range(len(ConfCopy)):
-                            if myPointEq(Motif.Canvas.Points[l], ConfCopy.Canvas.Points[l2], DBL_TOL):
-                                Conf.setContent(l, ConfCopy.Contents[l2])
-                                break
+                    ConfCopyIndexes = {}
+                    for l2, Key in enumerate(getPointKeys(ConfCopy.Canvas.Points, DBL_TOL)):
+                        ConfCopyIndexes.setdefault(Key, l2)
+                    for l, Key in enumerate(getPointKeys(Motif.Canvas.Points, DBL_TOL)):
+                        if Key in ConfCopyIndexes:
+                            Conf.setContent(l, ConfCopy.Contents[ConfCopyIndexes[Key]])
                 result.append(Conf)
+                ResultKeys.add(Conf.getCanonicalKey(DBL_TOL))
     return result
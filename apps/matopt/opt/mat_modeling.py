@@ -1,3 +1,4 @@
+import time
 from abc import abstractmethod
 from itertools import product
 
@@ -1268,17 +1269,30 @@ class SimpleDescriptorRule(DescriptorRule):
         DescriptorRule.__init__(self, **kwargs)
 
     # === PROPERTY EVALUATION METHODS
-    def _pyomo_cons(self, var):
+    def _pyomo_cons(self, var, blnReferencedOnly=False):
         """Method to create a Pyomo constraint from this rule.
 
         Args:
         var (MaterialDescriptor): The descriptor to be defined by this rule.
+        blnReferencedOnly (bool): Optional, flag to skip the indices of the
+            descriptor that are not yet referenced in the model.
+            Default: False
 
         Returns:
         (list<Constraint>) list of Pyomo constraint objects.
         """
         ConIndexes = IndexedElem.fromComb(var, self)
-        return [Constraint(*ConIndexes.index_sets, rule=self._pyomo_rule(var))]
+        rule = self._pyomo_rule(var)
+        if blnReferencedOnly:
+            full_rule = rule
+
+            def rule(m, *args):
+                index = var.mask(args, ConIndexes)
+                if (index[0] if len(index) == 1 else index) not in var._pyomo_var:
+                    return Constraint.Skip
+                return full_rule(m, *args)
+
+        return [Constraint(*ConIndexes.index_sets, rule=rule)]
 
     def _pyomo_rule(self, LHS, operator, RHS):
         """Method to create a function for a Pyomo constraint rule.
@@ -1997,6 +2011,31 @@ class ImpliesNeighbors(DescriptorRule):
         return result
 
 
+def _findDescriptors(elem):
+    """Find the descriptors that an expression or rule depends on.
+
+    Args:
+    elem (IndexedElem/list/tuple): Expression, rule or descriptor to search.
+
+    Returns:
+    (list<MaterialDescriptor>) Descriptors found, possibly repeated.
+    """
+    if isinstance(elem, MaterialDescriptor):
+        return [elem]
+    if isinstance(elem, (list, tuple)):
+        children = elem
+    elif isinstance(elem, IndexedElem):
+        # NOTE: Index information is kept in private attributes, while
+        #       descriptors and nested expressions are public attributes
+        children = [v for k, v in vars(elem).items() if not k.startswith('_')]
+    else:
+        return []
+    result = []
+    for child in children:
+        result.extend(_findDescriptors(child))
+    return result
+
+
 class MaterialDescriptor(IndexedElem):
     """A class to represent material geometric and energetic descriptors. 
 
@@ -2105,6 +2144,31 @@ class MaterialDescriptor(IndexedElem):
                 result.extend(rule._pyomo_cons(self))
         return result
 
+    def _pyomo_referenced_cons(self, m):
+        """Create Pyomo constraints defining only the referenced indices.
+
+        Note: Only valid for descriptors that are definitions (see
+              _is_definition).
+        """
+        return self.rules[0]._pyomo_cons(self, blnReferencedOnly=True)
+
+    @property
+    def _is_definition(self):
+        """Flag to indicate if the rules only define the descriptor.
+
+        Continuous, unbounded descriptors with a single EqualTo rule over
+        all of their indices can take any value the rule gives them, so
+        they do not restrict the design space, unless the rule refers to
+        the descriptor itself. Their constraints are only needed for indices
+        that other parts of the model refer to.
+        """
+        if (self.name in ('Yik', 'Yi', 'Xijkl', 'Xij', 'Cikl', 'Ci', 'Zic') or
+                not self.continuous or self.bounds != (None, None) or
+                len(self.rules) != 1 or not isinstance(self.rules[0], EqualTo)):
+            return False
+        return (IndexedElem.fromComb(self, self.rules[0]).dims == self.dims and
+                not any(desc is self for desc in _findDescriptors(self.rules[0])))
+
     @property
     def _pyomo_bounds(self):
         """Creates a bound rule/tuple that can interpreted by Pyomo."""
@@ -2138,9 +2202,12 @@ class MaterialDescriptor(IndexedElem):
               optimization of a model. 
 
         Returns:
-        (dict) Dictionary of keys to values after optimization. 
+        (dict) Dictionary of keys to values after optimization. The value
+            is None for the indices that were pruned from the model.
         """
-        return {index: value(self._pyomo_var[index]) for index in self.keys()}
+        return {index: (value(self._pyomo_var[index])
+                        if index in self._pyomo_var else None)
+                for index in self.keys()}
 
     # === BASIC QUERY METHODS
     @property
@@ -2193,7 +2260,29 @@ class MatOptModel(object):
         atoms (list<``BBlock``>): The list of building blocks to consider.
             Note: This list does not need to include a void-atom type. We use 'None' to represent the absence of any building block at a given site.
         confDs (list<``Design``>): The list of conformations to consider.
+        populate_timings (list<dict>): The time (in seconds) spent writing
+            the model to the solver ('write', None if it is not written
+            separately from the solve) and solving it ('solve') for each
+            iteration of the last call to populate.
+        pruned_counts (dict): The number of descriptors ('descriptors'),
+            descriptor variables ('variables') and constraints
+            ('constraints') that the last model left out, because neither
+            the objective nor the design space depends on them.
     """
+    # NOTE: Names of the options that set the absolute and relative MIP
+    #       gaps, the time limit and the tree memory limit of each solver
+    #       (None if the solver does not have the option)
+    SOLVER_OPTION_NAMES = {
+        'cplex': ('mip_tolerances_absmipgap', 'mip_tolerances_mipgap', 'timelimit', 'mip_limits_treememory'),
+        'cplex_persistent': ('mip_tolerances_absmipgap', 'mip_tolerances_mipgap', 'timelimit',
+                             'mip_limits_treememory'),
+        'gurobi': ('MIPGapAbs', 'MIPGap', 'TimeLimit', None),
+        'gurobi_persistent': ('MIPGapAbs', 'MIPGap', 'TimeLimit', None),
+        'cbc': ('allowableGap', 'ratioGap', 'sec', None),
+        'appsi_cbc': ('allowableGap', 'ratioGap', 'sec', None),
+        'glpk': (None, 'mipgap', 'tmlim', None),
+        'appsi_highs': ('mip_abs_gap', 'mip_rel_gap', 'time_limit', None),
+    }
 
     # === STANDARD CONSTRUCTOR
     def __init__(self, canv, atoms=None, confDs=None):
@@ -2209,6 +2298,8 @@ class MatOptModel(object):
         self._atoms = atoms
         self._confDs = confDs
         self._descriptors = []
+        self._populate_timings = []
+        self._pruned_counts = {'descriptors': 0, 'variables': 0, 'constraints': 0}
         self.addSitesDescriptor('Yi', binary=True, rules=None)
         self.addBondsDescriptor('Xij', binary=True, rules=None)
         self.addNeighborsDescriptor('Ci', integer=True, rules=None)
@@ -2523,7 +2614,7 @@ class MatOptModel(object):
             (``Design``/list<``Design``>) Optimal designs.
 
         Raises:
-            ``pyutilib.ApplicationError`` if MatOpt can not find usable solver (CPLEX or NEOS-CPLEX)
+            ``pyutilib.ApplicationError`` if MatOpt can not find the solver
 
         See ``MatOptModel.optimize`` method for details.
         """
@@ -2540,7 +2631,7 @@ class MatOptModel(object):
             (``Design``/list<``Design``>) Optimal designs.
 
         Raises:
-            ``pyutilib.ApplicationError`` if MatOpt can not find usable solver (CPLEX or NEOS-CPLEX)
+            ``pyutilib.ApplicationError`` if MatOpt can not find the solver
 
         See ``MatOptModel.optimize`` method for details.
         """
@@ -2549,7 +2640,7 @@ class MatOptModel(object):
     def optimize(self, func, sense, nSolns=1,
                  tee=True, disp=1, keepfiles=False,
                  tilim=3600, trelim=None,
-                 solver='cplex'):
+                 solver='cplex', prune=False):
         """Method to create and optimize the materials design problem.
     
         This method automatically creates a new optimization model every 
@@ -2577,28 +2668,33 @@ class MatOptModel(object):
                 Default: 3600
             trelim (float): Optional, solver tree memeory limit (in MB).
                 Default: None (i.e., Pyomo/CPLEX default)
-            solver (str): Solver choice. Currently only cplex or neos-cplex are supported
+            solver (str): Solver choice. Currently cplex, gurobi, cbc, glpk, the persistent interfaces
+                cplex_persistent, gurobi_persistent, appsi_cbc and appsi_highs, or neos-cplex are supported
                 Default: cplex
+            prune (bool): Optional, flag to leave out the descriptors, or the indices of descriptors, that are only defined by an ``EqualTo`` rule and that neither the objective nor the design space depends on.
+                Their values are None after optimization.
+                Default: False
 
         Returns:
             (``Design``/list<``Design``>) Optimal design or designs, depending on the number of solutions requested by argument ``nSolns``.
 
         Raises:
-            ``pyutilib.ApplicationError`` if MatOpt can not find usable solver (CPLEX or NEOS-CPLEX)
+            ``pyutilib.ApplicationError`` if MatOpt can not find the solver
         """
         if nSolns > 1:
             return self.populate(func, sense=sense, nSolns=nSolns,
                                  tee=tee, disp=disp, keepfiles=keepfiles,
-                                 tilim=tilim, trelim=trelim, solver=solver)
+                                 tilim=tilim, trelim=trelim, solver=solver,
+                                 prune=prune)
         elif nSolns == 1:
-            self._pyomo_m = self._make_pyomo_model(func, sense)
+            self._pyomo_m = self._make_pyomo_model(func, sense, prune=prune)
             return self.__solve_pyomo_model(tee, disp, keepfiles, tilim, trelim,
                                             solver)
 
     def populate(self, func, sense, nSolns,
                  tee=True, disp=1, keepfiles=False,
                  tilim=3600, trelim=None,
-                 solver='cplex'):
+                 solver='cplex', prune=False):
         """Method to a pool of solutions that optimize the material model.
 
         This method automatically creates a new optimization model every 
@@ -2611,6 +2707,12 @@ class MatOptModel(object):
         of Designs that are gauranteed to be the nSolns-best solutions in the
         material design space. 
 
+        With a persistent solver interface, the model is written to the
+        solver once, only the new constraint is added in each iteration, and
+        each solve is warm-started from the previous design. Other solvers
+        write the whole model in each iteration. The time spent in each
+        iteration is recorded in populate_timings.
+
         Args:
             func (``MaterialDescriptor``/``Expr``): Material functionality to optimize.
             sense (int): flag to indicate the choice to minimize or maximize the functionality of interest.
@@ -2628,16 +2730,20 @@ class MatOptModel(object):
                 Default: 3600
             trelim (float): Optional, solver tree memeory limit (in MB).
                 Default: None (i.e., Pyomo/CPLEX default)
-            solver (str): Solver choice. Currently only cplex or neos-cplex are supported
+            solver (str): Solver choice. Currently cplex, gurobi, cbc, glpk, the persistent interfaces
+                cplex_persistent, gurobi_persistent, appsi_cbc and appsi_highs, or neos-cplex are supported
                 Default: cplex
+            prune (bool): Optional, flag to leave out the descriptors, or the indices of descriptors, that are only defined by an ``EqualTo`` rule and that neither the objective nor the design space depends on.
+                Their values are None after optimization.
+                Default: False
 
         Returns:
             (list<``Design``>) A list of optimal Designs in order of decreasing optimality.
 
         Raises:
-            ``pyutilib.ApplicationError`` if MatOpt can not find usable solver (CPLEX or NEOS-CPLEX)
+            ``pyutilib.ApplicationError`` if MatOpt can not find the solver
         """
-        self._pyomo_m = self._make_pyomo_model(func, sense)
+        self._pyomo_m = self._make_pyomo_model(func, sense, prune=prune)
         self._pyomo_m.iSolns = Set(initialize=list(range(nSolns)))
         self._pyomo_m.IntCuts = Constraint(self._pyomo_m.iSolns)
 
@@ -2647,10 +2753,23 @@ class MatOptModel(object):
             else:
                 pass
 
+        opt = (self.__make_solver(tilim, trelim, solver)
+               if solver != 'neos-cplex' else None)
+        blnPersistent = MatOptModel.__is_persistent(opt)
+        write_time = None
+        if blnPersistent:
+            start_time = time.time()
+            opt.set_instance(self._pyomo_m)
+            write_time = time.time() - start_time
+        self._populate_timings = []
         Ds = []
         for iSoln in range(nSolns):
             dispPrint('Starting populate for solution #{}... '.format(iSoln))
-            D = self.__solve_pyomo_model(tee, disp - 1, keepfiles, tilim, trelim, solver)
+            start_time = time.time()
+            D = self.__solve_pyomo_model(tee, disp - 1, keepfiles, tilim, trelim, solver,
+                                         opt=opt, warmstart=(iSoln > 0))
+            self._populate_timings.append({'write': write_time,
+                                           'solve': time.time() - start_time})
             if D is not None:
                 dispPrint('Found solution with objective: {}'.
                           format(value(self._pyomo_m.obj)))
@@ -2666,13 +2785,17 @@ class MatOptModel(object):
                 else:
                     raise NotImplementedError('Decide what to do '
                                               'in this case...')
+                if blnPersistent:
+                    start_time = time.time()
+                    MatOptModel.__add_constraint(opt, self._pyomo_m.IntCuts[iSoln])
+                    write_time = time.time() - start_time
             else:
                 dispPrint('No solution found. Terminating populate.')
                 break
         dispPrint('Identified {} solutions via populate.'.format(len(Ds)))
         return Ds
 
-    def _make_pyomo_model(self, obj_expr, sense):
+    def _make_pyomo_model(self, obj_expr, sense, prune=False):
         """Method to create a Pyomo concrete model object.
 
         This method creates a Pyomo model and also modifies several objects
@@ -2680,12 +2803,23 @@ class MatOptModel(object):
         attches references to those variables on each of the 
         MaterialDescriptors attached to the MatOptModel. 
 
+        When pruning, the constraints of descriptors that are definitions
+        (see MaterialDescriptor._is_definition) are written last, and only
+        for the indices that the objective or other constraints refer to.
+        Variables are created sparsely, so the basic variables that only
+        those constraints would refer to are not created either. The number
+        of descriptor variables and constraints left out is recorded in
+        pruned_counts.
+
         Args:
         obj_expr (MaterialDescriptor/Expr): Material functionality to 
             optimize.
         sense (int): flag to indicate the choice to minimize or maximize the
             functionality of interest. 
             Choices: minimize/maximize (Pyomo constants 1,-1 respectively)
+        prune (bool): Optional, flag to leave out the parts of definitions
+            that nothing depends on.
+            Default: False
 
         Returns:
         (ConcreteModel) Pyomo model object. 
@@ -2707,28 +2841,92 @@ class MatOptModel(object):
                         dense=False)
                 setattr(m, desc.name, v)
                 setattr(desc, '_pyomo_var', v)
+        Defs = ([desc for desc in self._descriptors if desc._is_definition]
+                if prune else [])
         for desc in self._descriptors:
-            for c, pyomo_con in enumerate(desc._pyomo_cons(m)):
-                setattr(m, 'Assign{}_{}'.format(desc.name, c), pyomo_con)
+            if desc not in Defs:
+                for c, pyomo_con in enumerate(desc._pyomo_cons(m)):
+                    setattr(m, 'Assign{}_{}'.format(desc.name, c), pyomo_con)
         if sum(obj_expr.dims) == 0:
             m.obj = Objective(expr=obj_expr._pyomo_expr(index=(None,)),
                               sense=sense)
         else:
             raise TypeError('The MaterialDescriptor chosen is not supported to be an objective, please contact MatOpt '
                             'developer for potential fix')
+        self._pruned_counts = {'descriptors': 0, 'variables': 0, 'constraints': 0}
+        # NOTE: A definition can only be written once every definition that
+        #       refers to it is written. Definitions that refer to each other
+        #       in a cycle are written in full.
+        DefDeps = {desc: set(_findDescriptors(desc.rules[0])) & set(Defs)
+                   for desc in Defs}
+        while Defs:
+            Ready = [desc for desc in Defs
+                     if not any(desc in DefDeps[other] for other in Defs if other is not desc)]
+            for desc in (Ready if Ready else Defs):
+                if Ready:
+                    pyomo_con, = desc._pyomo_referenced_cons(m)
+                else:
+                    pyomo_con, = desc._pyomo_cons(m)
+                setattr(m, 'Assign{}_{}'.format(desc.name, 0), pyomo_con)
+                nPrunedVars = sum(1 for _ in desc.keys()) - len(desc._pyomo_var)
+                self._pruned_counts['descriptors'] += (len(desc._pyomo_var) == 0)
+                self._pruned_counts['variables'] += nPrunedVars
+                self._pruned_counts['constraints'] += len(pyomo_con.index_set()) - len(pyomo_con)
+            Defs = ([desc for desc in Defs if desc not in Ready] if Ready else [])
         # NOTE: The timing of the call to addConsForGeneralVars is important
         #       We need to call it after all user-defined descriptors are
         #       encoded.
         #       Else, lots of constraints for basic variables that are not
         #       necessary will be written.
-        addConsForGeneralVars(m)
+        addConsForGeneralVars(m, prune=prune)
         for desc in self._descriptors:
             for r in desc.rules:
                 if isinstance(r, FixedTo):
                     desc._fix_pyomo_var_by_rule(r, m)
         return m
 
-    def __solve_pyomo_model(self, tee, disp, keepfiles, tilim, trelim, solver):
+    def __make_solver(self, tilim, trelim, solver):
+        """Method to create a Pyomo solver with MatOpt settings.
+
+        Args:
+        tilim (float): Solver time limit (in seconds). 
+        trelim (float): Solver tree memeory limit (in MB).
+        solver (str): Solver choice, one of SOLVER_OPTION_NAMES.
+
+        Returns:
+        (OptSolver) The solver, with zero MIP gaps and the given limits.
+        """
+        if solver not in MatOptModel.SOLVER_OPTION_NAMES:
+            raise NotImplementedError('MatOpt is tailored to perform best with CPLEX (locally or through NEOS), '
+                                      'please contact MatOpt developer for additional solver support ')
+        opt = SolverFactory(solver)
+        abs_gap, rel_gap, time_limit, tree_memory = MatOptModel.SOLVER_OPTION_NAMES[solver]
+        if abs_gap is not None:
+            opt.options[abs_gap] = 0.0
+        opt.options[rel_gap] = 0.0
+        if tilim is not None:
+            opt.options[time_limit] = tilim
+        if trelim is not None and tree_memory is not None:
+            opt.options[tree_memory] = trelim
+        return opt
+
+    @staticmethod
+    def __is_persistent(opt):
+        """Determine if a solver keeps the model between solves."""
+        # NOTE: Both the Pyomo persistent solvers and the APPSI solvers
+        #       provide set_instance
+        return opt is not None and hasattr(opt, 'set_instance')
+
+    @staticmethod
+    def __add_constraint(opt, con):
+        """Method to add a constraint to the model kept by a persistent solver."""
+        if hasattr(opt, 'add_constraint'):
+            opt.add_constraint(con)
+        else:
+            opt.add_constraints([con])
+
+    def __solve_pyomo_model(self, tee, disp, keepfiles, tilim, trelim, solver,
+                            opt=None, warmstart=False):
         """Method to solve the formulated Pyomo optimization model.
 
         This function is intended to standardize the printout and 
@@ -2741,8 +2939,12 @@ class MatOptModel(object):
         keepfiles (bool): Flag to save temporary pyomo files. 
         tilim (float): Solver time limit (in seconds). 
         trelim (float): Solver tree memeory limit (in MB).
-        solver (str): Solver choice. Currently only cplex or 
-            neos-cplex are supported 
+        solver (str): Solver choice. See optimize for the supported 
+            solvers.
+        opt (OptSolver): Optional, solver to use instead of creating a
+            new one. Persistent solvers must have the model already.
+        warmstart (bool): Optional, flag to start the solver from the 
+            current values of the variables, if it is capable.
 
         Returns:
         (Design) The best design identified by the solver, if any. 
@@ -2751,17 +2953,7 @@ class MatOptModel(object):
             In the case that the model was infeasible or no solution
             could be identified, the method returns 'None'.
         """
-        if solver == 'cplex':
-            opt = SolverFactory('cplex')
-            opt.options['mip_tolerances_absmipgap'] = 0.0
-            opt.options['mip_tolerances_mipgap'] = 0.0
-            if tilim is not None:
-                opt.options['timelimit'] = tilim
-            if trelim is not None:
-                opt.options['mip_limits_treememory'] = trelim
-            res = opt.solve(self._pyomo_m, tee=tee,
-                            symbolic_solver_labels=True, keepfiles=keepfiles)
-        elif solver == 'neos-cplex':
+        if solver == 'neos-cplex':
             with SolverManagerFactory('neos') as manager:
                 opt = SolverFactory('cplex')
                 opt.options['absmipgap'] = 0.0  # NOTE: different option names
@@ -2772,8 +2964,16 @@ class MatOptModel(object):
                     opt.options['treememory'] = trelim
                 res = manager.solve(self._pyomo_m, opt=opt)
         else:
-            raise NotImplementedError('MatOpt is tailored to perform best with CPLEX (locally or through NEOS), '
-                                      'please contact MatOpt developer for additional solver support ')
+            if opt is None:
+                opt = self.__make_solver(tilim, trelim, solver)
+                if MatOptModel.__is_persistent(opt):
+                    opt.set_instance(self._pyomo_m)
+            kwargs = {'tee': tee, 'keepfiles': keepfiles}
+            if not MatOptModel.__is_persistent(opt):
+                kwargs['symbolic_solver_labels'] = True
+            if warmstart and (MatOptModel.__is_persistent(opt) or opt.warm_start_capable()):
+                kwargs['warmstart'] = True
+            res = opt.solve(self._pyomo_m, **kwargs)
         solver_status = res.solver.status
         solver_term = res.solver.termination_condition
         soln_status = res.solution.status
@@ -2842,3 +3042,11 @@ class MatOptModel(object):
     @property
     def descriptors(self):
         return self._descriptors
+
+    @property
+    def populate_timings(self):
+        return self._populate_timings
+
+    @property
+    def pruned_counts(self):
+        return self._pruned_counts
@@ -267,14 +267,20 @@ def _addConsYiFromYik(m):
                                                    if k is not None)))
 
 
-def _addConsYikSOS1(m):
+def _addConsYikSOS1(m, prune=False):
     m.AssignYikSOS1 = Constraint(m.I)
-    for i in m.Yik.index_set().set_tuple[0]:
+    if prune:
+        # NOTE: Only sites with Yik variables in the model need the constraint.
+        #       Looping over all sites would create every Yik variable.
+        Sites = sorted(set(i for i, _ in m.Yik.keys()))
+    else:
+        Sites = m.Yik.index_set().set_tuple[0]
+    for i in Sites:
         m.AssignYikSOS1.add(index=i,
                             expr=(sum(m.Yik[i, k] for k in m.K) <= 1))
 
 
-def addConsForGeneralVars(m):
+def addConsForGeneralVars(m, prune=False):
     """Scan over the model and encode constraints for all basic variables present.
 
     Encodes variables in a chain from derived to most basc:
@@ -288,6 +294,9 @@ def addConsForGeneralVars(m):
 
     Args:
         m (ConcreteModel): Model to encode basic constraints.
+        prune (bool, optional): Flag to only restrict the Yik variables
+            already in the model to be SOS1. Else, Yik variables are created
+            for all sites and types. (Default value = False)
 
     Returns:
         None.
@@ -345,8 +354,8 @@ def addConsForGeneralVars(m):
             pass
     # Define Yik
     # Still need to restrict Yik to be SOS1
-    if len(m.K) > 1:
-        _addConsYikSOS1(m)
+    if len(m.K) > 1 and (not prune or len(m.Yik) > 0):
+        _addConsYikSOS1(m, prune=prune)
 
 
 def fixYik(m, i, k, val):
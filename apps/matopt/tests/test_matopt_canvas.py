@@ -0,0 +1,96 @@
+import os
+import subprocess
+import sys
+from itertools import product
+
+import numpy as np
+
+from apps.matopt.materials import Canvas
+from apps.matopt.materials.geometry import Cuboctahedron, RectPrism
+from apps.matopt.materials.lattices import FCCLattice, CubicLattice, PerovskiteLattice
+from apps.matopt.materials.transform_func import ShiftFunc
+from apps.matopt.util.util import myArrayEq
+
+
+def _linearPointIndex(canvas, P):
+    for i, Q in enumerate(canvas.Points):
+        if myArrayEq(P, Q, Canvas.DBL_TOL):
+            return i
+    return None
+
+
+def test_Canvas_getPointIndex():
+    lattice = FCCLattice(2.77)
+    canvas = Canvas.fromLatticeAndShapeScan(lattice, RectPrism(6, 6, 6, np.array([-3, -3, -3], dtype=float)))
+    for i, P in enumerate(canvas.Points):
+        assert (canvas.getPointIndex(P) == i)
+        # Points just inside the tolerance are found, points just outside are not
+        for Offset in (0.9, -0.9, 1.1, -1.1):
+            for d in range(3):
+                Q = P.copy()
+                Q[d] += Offset * Canvas.DBL_TOL
+                assert (canvas.getPointIndex(Q) == _linearPointIndex(canvas, Q))
+                assert (canvas.hasPoint(Q) == (abs(Offset) < 1))
+    assert (not canvas.hasPoint(np.array([0.5, 0.5, 0.5])))
+
+
+def test_Canvas_getPointIndex_BucketBoundary():
+    canvas = Canvas()
+    canvas.addLocation(np.array([0, 0, 0], dtype=float))
+    canvas.addLocation(np.array([Canvas.BUCKET_SIZE, -Canvas.BUCKET_SIZE, 1.0]))
+    for P in canvas.Points:
+        for Offset in product([-0.5 * Canvas.DBL_TOL, 0, 0.5 * Canvas.DBL_TOL], repeat=3):
+            Offset = np.array(Offset)
+            assert (canvas.getPointIndex(P + Offset) == _linearPointIndex(canvas, P + Offset))
+            assert (canvas.hasPoint(P + Offset))
+
+
+def test_Canvas_getPointIndex_AfterModification():
+    lattice = FCCLattice(2.77)
+    canvas = Canvas.fromLatticeAndShapeScan(lattice, RectPrism(4, 4, 4, np.array([-2, -2, -2], dtype=float)))
+    Shift = np.array([0.3, -0.7, 1.1])
+    shifted = canvas.getTransformed(ShiftFunc(Shift))
+    for i, P in enumerate(canvas.Points):
+        assert (not shifted.hasPoint(P) or myArrayEq(P, shifted.Points[shifted.getPointIndex(P)], Canvas.DBL_TOL))
+        assert (shifted.getPointIndex(P + Shift) == i)
+    # Points appended directly to the list are still found
+    P = np.array([10.0, 10.0, 10.0])
+    shifted.Points.append(P)
+    shifted.NeighborhoodIndexes.append([])
+    assert (shifted.getPointIndex(P) == len(shifted) - 1)
+
+
+def test_Canvas_addLocation_WithoutAsserts():
+    # Under python -O, addLocation cannot rely on its assertion to build the spatial hash
+    Code = """
+import numpy as np
+from apps.matopt.materials import Canvas
+from apps.matopt.materials.transform_func import ShiftFunc
+canvas = Canvas()
+canvas.addLocation(np.array([0.0, 0.0, 0.0]))
+canvas.transform(ShiftFunc(np.array([1.0, 0.0, 0.0])))
+canvas.addLocation(np.array([0.0, 0.0, 0.0]))
+if canvas.getPointIndex(np.array([1.0, 0.0, 0.0])) != 0 or canvas.getPointIndex(np.array([0.0, 0.0, 0.0])) != 1:
+    raise SystemExit('Point not found')
+"""
+    RootDir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    subprocess.check_call([sys.executable, '-O', '-c', Code], cwd=RootDir)
+
+
+def test_Canvas_fromLatticeAndShapeScan():
+    shape = Cuboctahedron(9.0, np.array([20, 20, 20], dtype=float))
+    for lattice in (FCCLattice.alignedWith111(2.77), CubicLattice(1.5), PerovskiteLattice(4, 4, 4)):
+        canvas = Canvas.fromLatticeAndShapeScan(lattice, shape)
+        expected = Canvas()
+        for P in lattice.Scan(RectPrism.fromPointsBBox(shape.getBounds())):
+            if P in shape:
+                expected.addLocation(P)
+        expected.setNeighborsFromFunc(lattice.getNeighbors)
+        assert (len(canvas) > 0)
+        assert (canvas == expected)
+
+
+def test_Polyhedron_areInShape():
+    shape = Cuboctahedron(3.0)
+    Ps = np.random.RandomState(0).uniform(-4, 4, (1000, 3))
+    assert ((shape.areInShape(Ps) == [P in shape for P in Ps]).all())
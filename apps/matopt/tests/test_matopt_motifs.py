@@ -0,0 +1,45 @@
+from copy import deepcopy
+
+import numpy as np
+
+from apps.matopt.materials import Atom, Canvas, Design, getEnumConfs
+from apps.matopt.materials.lattices import FCCLattice
+from apps.matopt.materials.transform_func import RotateFunc
+
+
+def _getFCCDesign(Contents):
+    lattice = FCCLattice(2.77)
+    canvas = Canvas()
+    canvas.addLocation(np.array([0, 0, 0], dtype=float))
+    canvas.addShell(lattice.getNeighbors)
+    return Design(canvas, Contents)
+
+
+def _getRotationsAroundZ():
+    return [RotateFunc.fromXYZAngles(0, 0, np.pi * 0.5 * k) for k in range(1, 4)]
+
+
+def test_Design_getCanonicalKey():
+    design = _getFCCDesign([Atom('Cu')] * 7 + [None] * 6)
+    reordered = Design(Canvas(Points=design.Canvas.Points[::-1]), design.Contents[::-1])
+    assert (design.getCanonicalKey() == reordered.getCanonicalKey())
+    shifted = deepcopy(design)
+    shifted.Canvas.Points[0] += 0.1 * Canvas.DBL_TOL
+    assert (design.getCanonicalKey() == shifted.getCanonicalKey())
+    other = _getFCCDesign([Atom('Cu')] * 6 + [None] * 7)
+    assert (design.getCanonicalKey() != other.getCanonicalKey())
+
+
+def test_getEnumConfs():
+    Cu, Ag = Atom('Cu'), Atom('Ag')
+    design = _getFCCDesign(Cu)
+    Motifs = [_getFCCDesign(Cu),
+              Design(design.Canvas, [Cu if P[0] > 0.1 else Ag for P in design.Canvas.Points])]
+    MotifToConfMap = []
+    Confs = getEnumConfs(Motifs, _getRotationsAroundZ(), MotifToConfMap)
+    assert (MotifToConfMap == [[0], [1, 2, 3, 4]])
+    for Conf in Confs:
+        assert (Conf.Canvas == design.Canvas)
+    for k, Conf in enumerate(Confs[1:]):
+        Expected = Motifs[1].getTransformed(RotateFunc.fromXYZAngles(0, 0, np.pi * 0.5 * k))
+        assert (Conf.isEquivalentTo(Expected))
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from pyomo.environ import SolverFactory, maximize
+
+from apps.matopt.materials import Atom, Canvas
+from apps.matopt.materials.lattices import FCCLattice
+from apps.matopt.opt import MatOptModel, SumSites, SumBonds, EqualTo
+
+# NOTE: The first available solver of each kind is used
+shell_solver = next((s for s in ('cbc', 'glpk', 'cplex') if SolverFactory(s).available(exception_flag=False)), None)
+persistent_solver = next((s for s in ('appsi_highs', 'cplex_persistent', 'gurobi_persistent')
+                          if SolverFactory(s).available(exception_flag=False)), None)
+
+
+def _getNanoclusterModel(N=6):
+    lattice = FCCLattice.alignedWith111(2.77)
+    canvas = Canvas()
+    canvas.addLocation(np.array([0, 0, 0], dtype=float))
+    canvas.addShell(lattice.getNeighbors)
+    m = MatOptModel(canvas, [Atom('Pt')])
+    m.addGlobalDescriptor('Ecoh', rules=EqualTo(SumBonds(desc=m.Xij, coefs=1.0 / N)))
+    m.addGlobalDescriptor('Size', bounds=(N, N), rules=EqualTo(SumSites(desc=m.Yi)))
+    return m
+
+
+def _getBondCount(D):
+    canvas = D.Canvas
+    return sum(1 for i in range(len(canvas)) for j in canvas.NeighborhoodIndexes[i]
+               if j is not None and D.Contents[i] is not None and D.Contents[j] is not None)
+
+
+def _checkPopulate(solver, blnPersistent):
+    m = _getNanoclusterModel()
+    Ds = m.populate(m.Ecoh, maximize, 4, tee=False, disp=0, solver=solver)
+    assert (len(Ds) == 4)
+    assert (len(m.populate_timings) == 4)
+    for D, timing in zip(Ds, m.populate_timings):
+        assert (sum(Elem is not None for Elem in D.Contents) == 6)
+        assert ((timing['write'] is not None) == blnPersistent)
+    for i, D in enumerate(Ds):
+        for D2 in Ds[i + 1:]:
+            assert (D.Contents != D2.Contents)
+    BondCounts = [_getBondCount(D) for D in Ds]
+    assert (BondCounts == sorted(BondCounts, reverse=True))
+    return BondCounts
+
+
+@pytest.mark.skipif(shell_solver is None, reason="MILP solver not available")
+def test_populate():
+    _checkPopulate(shell_solver, False)
+
+
+@pytest.mark.skipif(persistent_solver is None, reason="Persistent MILP solver not available")
+def test_populate_persistent():
+    BondCounts = _checkPopulate(persistent_solver, True)
+    if shell_solver is not None:
+        assert (BondCounts == _checkPopulate(shell_solver, False))
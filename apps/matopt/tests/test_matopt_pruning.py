@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from pyomo.environ import SolverFactory, minimize, value
+
+from apps.matopt.materials import Atom, Canvas
+from apps.matopt.materials.lattices import FCCLattice
+from apps.matopt.opt import MatOptModel, LinearExpr, SumSites, SumBondsAndTypes, EqualTo
+
+# NOTE: The first available solver is used
+solver = next((s for s in ('appsi_highs', 'cbc', 'glpk', 'cplex') if SolverFactory(s).available(exception_flag=False)),
+              None)
+
+
+def _getBimetallicModel():
+    lattice = FCCLattice.alignedWith111(2.77)
+    canvas = Canvas()
+    canvas.addLocation(np.array([0, 0, 0], dtype=float))
+    canvas.addShell(lattice.getNeighbors)
+    atoms = [Atom('Cu'), Atom('Ag')]
+    surface = [i for i in range(len(canvas)) if None in canvas.NeighborhoodIndexes[i]]
+    m = MatOptModel(canvas, atoms)
+    m.addGlobalDescriptor('Size', bounds=(5, 5), rules=EqualTo(SumSites(desc=m.Yi)))
+    m.addGlobalDescriptor('nAg', bounds=(2, 2),
+                          rules=EqualTo(SumSites(desc=m.Yik, site_types=[atoms[1]], sites_to_sum=list(range(len(canvas))))))
+    m.addSitesDescriptor('Ei', rules=EqualTo(LinearExpr(descs=m.Ci, coefs=-1.0)))
+    m.addGlobalDescriptor('Esurf', rules=EqualTo(SumSites(desc=m.Ei, sites_to_sum=surface)))
+    m.addGlobalDescriptor('Emix', rules=EqualTo(SumBondsAndTypes(desc=m.Xijkl, bond_types_to_sum=[tuple(atoms)])))
+    return m, surface
+
+
+def test_prune_definitions():
+    m, surface = _getBimetallicModel()
+    pyomo_m = m._make_pyomo_model(m.Esurf, minimize, prune=True)
+    assert (len(pyomo_m.Emix) == 0 and len(pyomo_m.AssignEmix_0) == 0)
+    nXijkl = len(pyomo_m.Xijkl)
+    assert (sorted(pyomo_m.Ei.keys()) == sorted(surface))
+    assert (m.pruned_counts == {'descriptors': 1,
+                                'variables': 1 + len(m.canv) - len(surface),
+                                'constraints': 1 + len(m.canv) - len(surface)})
+    pyomo_m = m._make_pyomo_model(m.Esurf, minimize, prune=False)
+    assert (len(pyomo_m.Emix) == 1 and len(pyomo_m.Xijkl) > nXijkl)
+    assert (len(pyomo_m.Ei) == len(m.canv))
+    assert (m.pruned_counts == {'descriptors': 0, 'variables': 0, 'constraints': 0})
+
+
+def test_prune_yik_sos1():
+    # A multi-atom model that only uses Yi
+    lattice = FCCLattice.alignedWith111(2.77)
+    canvas = Canvas()
+    canvas.addLocation(np.array([0, 0, 0], dtype=float))
+    canvas.addShell(lattice.getNeighbors)
+    m = MatOptModel(canvas, [Atom('Cu'), Atom('Ag')])
+    m.addGlobalDescriptor('Size', bounds=(5, 5), rules=EqualTo(SumSites(desc=m.Yi)))
+    # Without pruning, Yik is still restricted to be SOS1 at all sites
+    pyomo_m = m._make_pyomo_model(m.Size, minimize, prune=False)
+    assert (len(pyomo_m.AssignYikSOS1) == len(canvas))
+    assert (len(pyomo_m.Yik) == 2 * len(canvas))
+    pyomo_m = m._make_pyomo_model(m.Size, minimize, prune=True)
+    assert (not hasattr(pyomo_m, 'AssignYikSOS1'))
+    assert (len(pyomo_m.Yik) == 0)
+
+
+@pytest.mark.skipif(solver is None, reason="MILP solver not available")
+def test_prune_optimize():
+    Objs, Values = [], []
+    for prune in (True, False):
+        m, surface = _getBimetallicModel()
+        D = m.minimize(m.Esurf, tee=False, disp=0, solver=solver, prune=prune)
+        assert (sum(Elem is not None for Elem in D.Contents) == 5)
+        assert (sum(Elem == Atom('Ag') for Elem in D.Contents) == 2)
+        Objs.append(value(m._pyomo_m.obj))
+        Values.append((m.Emix.values, m.Ei.values))
+    assert (Objs[0] == pytest.approx(Objs[1]))
+    # pruned descriptor indices have no value
+    assert (Values[0][0] == {None: None})
+    assert (Values[1][0][None] is not None)
+    assert (all((Values[0][1][i] is None) == (i not in surface) for i in Values[0][1]))
+    assert (sum(Values[0][1][i] for i in surface) == pytest.approx(sum(Values[1][1][i] for i in surface)))
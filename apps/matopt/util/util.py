@@ -64,6 +64,25 @@ def myPointsEq(x, y, atol):
     return True
 
 
+def getPointKeys(L, atol):
+    """Round a list of points to hashable keys.
+
+    Points that have the same key are equal within atol. Points equal within
+    atol usually have the same key, but can round differently if they lie
+    on either side of a rounding boundary.
+
+    Args:
+    L (list<numpy.ndarray>): a list of numpy arrays
+    atol (float): absolute tolerance for equality
+
+    Returns:
+    (list<tuple<int>>) the points, as multiples of atol
+    """
+    if len(L) == 0:
+        return []
+    return [tuple(Key) for Key in np.round(np.array(L) / atol).astype(np.int64).tolist()]
+
+
 def ListHasPoint(L, P, atol):
     """Determine if a list of numpy arrays contains a specific point.
 
@@ -0,0 +1,93 @@
+##############################################################################
+# Institute for the Design of Advanced Energy Systems Process Systems
+# Engineering Framework (IDAES PSE Framework) Copyright (c) 2018-2019, by the
+# software owners: The Regents of the University of California, through
+# Lawrence Berkeley National Laboratory,  National Technology & Engineering
+# Solutions of Sandia, LLC, Carnegie Mellon University, West Virginia
+# University Research Corporation, et al. All rights reserved.
+#
+# Please see the files COPYRIGHT.txt and LICENSE.txt for full copyright and
+# license information, respectively. Both files are also available online
+# at the URL "https://github.com/IDAES/idaes-pse".
+##############################################################################
+"""
+Benchmark loading plant data with dmf.model_data.read_data, converting every
+tag to mks units, for a CSV file with N tags and M rows: all at once, in
+chunks, and from the columnar cache. The CSV file is
+written to a temporary directory first, which takes a while for large files
+(the default is about 5 GB).
+
+Usage: python dmf_model_data.py [number_of_tags [number_of_rows]]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from idaes.dmf import model_data
+
+# historian unit strings, cycled through for the tags
+UNITS = ["PSIG", "DEG F", "KLB/HR", "GPM", "PSIA", "PCT", "AMPS", "FT", "DEG C"]
+
+
+def write_data(path, n_tags, n_rows, chunk=100000):
+    tags = ["TAG{:04d}".format(i) for i in range(n_tags)]
+    with open(path + "_meta.csv", "w") as f:
+        for i, tag in enumerate(tags):
+            f.write("{}, , tag {}, {}\n".format(tag, i, UNITS[i % len(UNITS)]))
+    rng = np.random.RandomState(0)
+    start = pd.Timestamp("2019-01-01")
+    for i in range(0, n_rows, chunk):
+        n = min(chunk, n_rows - i)
+        df = pd.DataFrame(
+            rng.uniform(0, 100, (n, n_tags)),
+            columns=tags,
+            index=pd.date_range(start + pd.Timedelta(seconds=i), periods=n, freq="s"),
+        )
+        df.to_csv(path + ".csv", mode="a" if i else "w", header=not i,
+                  float_format="%.4f")
+
+
+def main(n_tags=500, n_rows=1000000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "data")
+        print("write {} tags x {} rows ...".format(n_tags, n_rows), end="",
+              flush=True)
+        start = time.time()
+        write_data(path, n_tags, n_rows)
+        print(" {:.1f} s ({:.0f} MB)".format(
+            time.time() - start, os.path.getsize(path + ".csv") / 1e6))
+
+        start = time.time()
+        df, _ = model_data.read_data(path + ".csv", path + "_meta.csv")
+        t_read = time.time() - start
+        print("read_data, no conversion: {:.2f} s".format(t_read))
+        start = time.time()
+        df, _ = model_data.read_data(
+            path + ".csv", path + "_meta.csv", unit_system="mks")
+        t_mks = time.time() - start
+        print("read_data, mks units:     {:.2f} s (conversion {:.2f} s)".format(
+            t_mks, t_mks - t_read))
+        del df
+
+        start = time.time()
+        chunks, _ = model_data.read_data_chunks(
+            path + ".csv", path + "_meta.csv", unit_system="mks")
+        rows = sum(len(c) for c in chunks)
+        print("read_data_chunks:         {:.2f} s ({} rows)".format(
+            time.time() - start, rows))
+        cache_dir = os.path.join(tmpdir, "cache")
+        for what in "write", "load":
+            start = time.time()
+            df, _ = model_data.read_data(
+                path + ".csv", path + "_meta.csv", unit_system="mks",
+                cache_dir=cache_dir)
+            print("read_data, cache {}:   {:.2f} s".format(
+                what, time.time() - start))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,98 @@
+##############################################################################
+# Institute for the Design of Advanced Energy Systems Process Systems
+# Engineering Framework (IDAES PSE Framework) Copyright (c) 2018-2019, by the
+# software owners: The Regents of the University of California, through
+# Lawrence Berkeley National Laboratory,  National Technology & Engineering
+# Solutions of Sandia, LLC, Carnegie Mellon University, West Virginia
+# University Research Corporation, et al. All rights reserved.
+#
+# Please see the files COPYRIGHT.txt and LICENSE.txt for full copyright and
+# license information, respectively. Both files are also available online
+# at the URL "https://github.com/IDAES/idaes-pse".
+##############################################################################
+"""
+Benchmark the DMF resource DB backends: put, find by identifier, find by
+alias, find by type and find related, for a DB with N resources (TinyDB only
+for small N, since every put rewrites the whole file).
+
+Usage: python dmf_resourcedb.py [number_of_resources]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from idaes.dmf import resource, resourcedb
+
+
+def make_resource(i):
+    r = resource.Resource(
+        {"name": "sample-{}".format(i), "aliases": ["sample-{}".format(i)],
+         "data": {"iters": i % 50, "solved": True}},
+        type_=resource.TY_DATA if i % 10 else resource.TY_FLOWSHEET,
+    )
+    return r
+
+
+def make_resources(n):
+    """Resources in chains of 10, each derived from the one before."""
+    rsrcs = [make_resource(i) for i in range(n)]
+    for i in range(1, n):
+        if i % 10:
+            resource.create_relation_args(
+                rsrcs[i - 1], resource.PR_DERIVED, rsrcs[i])
+    return rsrcs
+
+
+def timed(func, n):
+    start = time.time()
+    for i in range(n):
+        func(i)
+    return (time.time() - start) / n * 1e3
+
+
+def run(db, n, rsrcs):
+    print("  fill {} resources ...".format(n), end="", flush=True)
+    start = time.time()
+    for r in rsrcs[:n]:
+        db.put(r)
+    print(" {:.1f} s".format(time.time() - start))
+    extra = [make_resource(n + i) for i in range(100)]
+    ids = [r.id for r in random.sample(rsrcs[:n], 100)]
+    m = 100
+    print("  put (ms):          {:.3f}".format(timed(lambda i: db.put(extra[i]), m)))
+    ID = resource.Resource.ID_FIELD
+    print("  find id_only (ms): {:.3f}".format(timed(
+        lambda i: list(db.find({ID: ids[i]}, id_only=True)), m)))
+    print("  find_one (ms):     {:.3f}".format(timed(
+        lambda i: db.find_one({ID: ids[i]}), m)))
+    print("  find alias (ms):   {:.3f}".format(timed(
+        lambda i: list(db.find({"aliases": ["sample-{}".format(i)]})), m)))
+    print("  find type (ms):    {:.1f} ({} resources)".format(
+        timed(lambda i: list(db.find({"type": resource.TY_FLOWSHEET},
+                                     id_only=True)), 3),
+        len(list(db.find({"type": resource.TY_FLOWSHEET}, id_only=True)))))
+    meta = [resource.Resource.ID_FIELD]
+    print("  find_related (ms): {:.3f}".format(timed(
+        lambda i: list(db.find_related(ids[i], meta=meta)), m)))
+    print("  find_related_many, {} ids (ms): {:.3f}".format(m, timed(
+        lambda i: db.find_related_many(ids, meta=meta), 1)))
+
+
+def main(n=100000):
+    random.seed(0)
+    rsrcs = make_resources(n)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        print("SQLite")
+        db = resourcedb.SQLiteResourceDB(os.path.join(tmpdir, "r.sqlite"))
+        run(db, n, rsrcs)
+        db.close()
+        n_tiny = min(n, 500)
+        print("TinyDB")
+        db = resourcedb.ResourceDB(os.path.join(tmpdir, "r.json"))
+        run(db, n_tiny, rsrcs)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,92 @@
+##############################################################################
+# Institute for the Design of Advanced Energy Systems Process Systems
+# Engineering Framework (IDAES PSE Framework) Copyright (c) 2018-2019, by the
+# software owners: The Regents of the University of California, through
+# Lawrence Berkeley National Laboratory,  National Technology & Engineering
+# Solutions of Sandia, LLC, Carnegie Mellon University, West Virginia
+# University Research Corporation, et al. All rights reserved.
+#
+# Please see the files COPYRIGHT.txt and LICENSE.txt for full copyright and
+# license information, respectively. Both files are also available online
+# at the URL "https://github.com/IDAES/idaes-pse".
+##############################################################################
+"""
+Benchmark the build time and memory of a discretized HeatExchanger1D using
+IAPWS-95 with ExternalFunction components shared between state blocks, and
+with a set of ExternalFunction components on every state block data object
+(the old behavior).
+
+Usage: python helmholtz_external_functions.py [finite_elements]
+"""
+import sys
+import time
+import tracemalloc
+
+from pyomo.environ import ConcreteModel, ExternalFunction
+
+from idaes.core import FlowsheetBlock
+from idaes.generic_models.properties import iapws95
+from idaes.generic_models.properties.helmholtz import helmholtz
+from idaes.generic_models.unit_models.heat_exchanger_1D import HeatExchanger1D
+
+
+def _per_block_functions(blk):
+    """Old behavior, every state block data object gets its own functions"""
+    fblk = blk.component("functions")
+    if fblk is None:
+        fblk = helmholtz.Block(concrete=True)
+        blk.add_component("functions", fblk)
+        for f in helmholtz._external_function_names:
+            setattr(
+                fblk,
+                "func_" + f,
+                helmholtz.EF(library=blk.config.parameters.plib, function=f),
+            )
+    return fblk
+
+
+def build(finite_elements):
+    m = ConcreteModel()
+    m.fs = FlowsheetBlock(default={"dynamic": False})
+    m.fs.properties = iapws95.Iapws95ParameterBlock(
+        default={"phase_presentation": iapws95.PhaseType.LG}
+    )
+    m.fs.unit = HeatExchanger1D(
+        default={
+            "shell_side": {"property_package": m.fs.properties},
+            "tube_side": {"property_package": m.fs.properties},
+            "finite_elements": finite_elements,
+        }
+    )
+    return m
+
+
+def run(finite_elements):
+    tracemalloc.start()
+    start = time.time()
+    m = build(finite_elements)
+    build_time = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    n = len(list(m.component_objects(ExternalFunction, descend_into=True)))
+    return build_time, peak / 2 ** 20, n
+
+
+def main(finite_elements=50):
+    shared = helmholtz._external_function_block
+    results = {}
+    try:
+        helmholtz._external_function_block = _per_block_functions
+        results["per block"] = run(finite_elements)
+    finally:
+        helmholtz._external_function_block = shared
+    results["shared"] = run(finite_elements)
+    print("HeatExchanger1D, IAPWS-95, {} finite elements".format(finite_elements))
+    print("{:>10}  {:>10}  {:>12}  {:>10}".format(
+        "functions", "build (s)", "peak (MiB)", "EF count"))
+    for k, (t, mem, n) in results.items():
+        print("{:>10}  {:>10.2f}  {:>12.1f}  {:>10d}".format(k, t, mem, n))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
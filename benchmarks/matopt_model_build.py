@@ -0,0 +1,89 @@
+##############################################################################
+# Institute for the Design of Advanced Energy Systems Process Systems
+# Engineering Framework (IDAES PSE Framework) Copyright (c) 2018-2019, by the
+# software owners: The Regents of the University of California, through
+# Lawrence Berkeley National Laboratory,  National Technology & Engineering
+# Solutions of Sandia, LLC, Carnegie Mellon University, West Virginia
+# University Research Corporation, et al. All rights reserved.
+#
+# Please see the files COPYRIGHT.txt and LICENSE.txt for full copyright and
+# license information, respectively. Both files are also available online
+# at the URL "https://github.com/IDAES/idaes-pse".
+##############################################################################
+"""
+Benchmark building the Pyomo model of a bimetallic nanocluster design
+problem on an FCC canvas of about N sites, with and without pruning the
+definitions that nothing depends on: model build, number of variables and
+constraints, and LP file write. The per-site bond energy is defined on
+every site but the objective only sums it over the surface sites, and the
+mixing energy is defined but not used at all.
+
+Usage: python matopt_model_build.py [number_of_sites]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from pyomo.environ import Var, Constraint, maximize
+
+from apps.matopt.materials import Atom, Canvas
+from apps.matopt.materials.geometry import Cuboctahedron
+from apps.matopt.materials.lattices import FCCLattice
+from apps.matopt.opt import (MatOptModel, EqualTo, LinearExpr, SumSites,
+                             SumNeighborSites, SumBondsAndTypes)
+
+
+def make_canvas(n_sites):
+    lattice = FCCLattice(2.77)
+    size = 2.77
+    while True:
+        canvas = Canvas.fromLatticeAndShapeScan(lattice, Cuboctahedron(size))
+        if len(canvas) >= n_sites:
+            return canvas
+        size += 0.5
+
+
+def make_model(canvas):
+    atoms = [Atom("Cu"), Atom("Ag")]
+    m = MatOptModel(canvas, atoms)
+    surface = [i for i in range(len(canvas))
+               if None in canvas.NeighborhoodIndexes[i]]
+    m.addGlobalDescriptor("Size", bounds=(len(canvas) // 2, len(canvas) // 2),
+                          rules=EqualTo(SumSites(desc=m.Yi)))
+    m.addSitesDescriptor("CNi", integer=True, bounds=(0, 12),
+                         rules=EqualTo(SumNeighborSites(desc=m.Yi)))
+    m.addSitesDescriptor("Ei", rules=EqualTo(LinearExpr(descs=m.Ci, coefs=-1.0)))
+    m.addGlobalDescriptor("Esurf", rules=EqualTo(SumSites(desc=m.Ei, sites_to_sum=surface)))
+    m.addGlobalDescriptor("Emix", rules=EqualTo(SumBondsAndTypes(
+        desc=m.Xijkl, bond_types_to_sum=[(k, l) for k in atoms for l in atoms if k != l])))
+    return m
+
+
+def main(n_sites=2000):
+    canvas = make_canvas(n_sites)
+    print("canvas: {} sites".format(len(canvas)))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for prune in True, False:
+            m = make_model(canvas)
+            start = time.time()
+            pyomo_m = m._make_pyomo_model(m.Esurf, maximize, prune=prune)
+            t_build = time.time() - start
+            n_vars = sum(len(v) for v in pyomo_m.component_objects(Var))
+            n_cons = sum(len(c) for c in pyomo_m.component_objects(Constraint))
+            path = os.path.join(tmpdir, "model.lp")
+            start = time.time()
+            pyomo_m.write(path)
+            t_write = time.time() - start
+            print("{:9s} build {:.2f} s, {} variables, {} constraints, "
+                  "LP write {:.2f} s ({:.1f} MB)".format(
+                      "pruned" if prune else "unpruned", t_build, n_vars, n_cons,
+                      t_write, os.path.getsize(path) / 1e6))
+            if prune:
+                print("          pruned {descriptors} descriptors, {variables} "
+                      "descriptor variables, {constraints} constraints".format(
+                          **m.pruned_counts))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
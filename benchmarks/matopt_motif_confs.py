@@ -0,0 +1,63 @@
+##############################################################################
+# Institute for the Design of Advanced Energy Systems Process Systems
+# Engineering Framework (IDAES PSE Framework) Copyright (c) 2018-2019, by the
+# software owners: The Regents of the University of California, through
+# Lawrence Berkeley National Laboratory,  National Technology & Engineering
+# Solutions of Sandia, LLC, Carnegie Mellon University, West Virginia
+# University Research Corporation, et al. All rights reserved.
+#
+# Please see the files COPYRIGHT.txt and LICENSE.txt for full copyright and
+# license information, respectively. Both files are also available online
+# at the URL "https://github.com/IDAES/idaes-pse".
+##############################################################################
+"""
+Benchmark matopt.materials.getEnumConfs, enumerating the configurations of
+M random motifs under the 48 symmetry operations of the cube, on N shells
+of neighbors around an FCC site and around a perovskite B site (away from
+the origin, where PerovskiteLattice.getNeighbors fails).
+
+Usage: python matopt_motif_confs.py [number_of_motifs [number_of_shells]]
+"""
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from apps.matopt.materials import Atom, Canvas, Design, getEnumConfs
+from apps.matopt.materials.lattices import FCCLattice, PerovskiteLattice
+from apps.matopt.materials.transform_func import RotateFunc
+
+
+def cube_symmetries(origin):
+    result = []
+    for perm in itertools.permutations(range(3)):
+        for signs in itertools.product([1, -1], repeat=3):
+            result.append(RotateFunc(np.eye(3)[list(perm)] * np.array(signs)[:, np.newaxis],
+                                     OriginOfRotation=origin))
+    return result
+
+
+def motifs(canvas, n_motifs, rng):
+    elems = [Atom("Cu"), Atom("Ag"), None]
+    return [Design(canvas, [elems[i] for i in rng.randint(3, size=len(canvas))])
+            for _ in range(n_motifs)]
+
+
+def main(n_motifs=20, n_shells=2):
+    rng = np.random.RandomState(0)
+    for name, lattice, seed in [
+            ("FCC", FCCLattice(2.77), np.zeros(3)),
+            ("perovskite B site", PerovskiteLattice(4, 4, 4), np.array([42.0, 42.0, 42.0]))]:
+        canvas = Canvas()
+        canvas.addLocation(seed)
+        canvas.addShells(n_shells, lattice.getNeighbors)
+        designs = motifs(canvas, n_motifs, rng)
+        start = time.time()
+        confs = getEnumConfs(designs, cube_symmetries(seed))
+        print("{}: {} motifs of {} sites -> {} configurations in {:.2f} s".format(
+            name, n_motifs, len(canvas), len(confs), time.time() - start))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
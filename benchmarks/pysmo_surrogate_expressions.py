@@ -0,0 +1,102 @@
+##############################################################################
+# Institute for the Design of Advanced Energy Systems Process Systems
+# Engineering Framework (IDAES PSE Framework) Copyright (c) 2018-2019, by the
+# software owners: The Regents of the University of California, through
+# Lawrence Berkeley National Laboratory,  National Technology & Engineering
+# Solutions of Sandia, LLC, Carnegie Mellon University, West Virginia
+# University Research Corporation, et al. All rights reserved.
+#
+# Please see the files COPYRIGHT.txt and LICENSE.txt for full copyright and
+# license information, respectively. Both files are also available online
+# at the URL "https://github.com/IDAES/idaes-pse".
+##############################################################################
+"""
+Benchmark embedding a pysmo Kriging surrogate trained on N points in a Pyomo
+model: expression build, NL file write and IPOPT solve (when available) with
+the default and the compact expressions, and batch prediction for M points
+against one point at a time.
+
+Usage: python pysmo_surrogate_expressions.py [training_points [prediction_points]]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from pyomo.environ import (ConcreteModel, Var, Constraint, Objective,
+                           SolverFactory, value)
+
+from idaes.surrogate.pysmo.kriging import KrigingModel
+
+
+def branin(x):
+    return ((x[:, 1] - 5.1 / (4 * np.pi ** 2) * x[:, 0] ** 2 +
+             5 / np.pi * x[:, 0] - 6) ** 2 +
+            10 * (1 - 1 / (8 * np.pi)) * np.cos(x[:, 0]) + 10)
+
+
+def embed(results, compact, tmpdir):
+    m = ConcreteModel()
+    m.x = Var([0, 1], initialize=1)
+    m.x[0].setlb(-5)
+    m.x[0].setub(10)
+    m.x[1].setlb(0)
+    m.x[1].setub(15)
+    m.y = Var()
+    start = time.time()
+    expr = results.kriging_generate_expression([m.x[0], m.x[1]],
+                                               compact=compact)
+    m.surrogate = Constraint(expr=m.y == expr)
+    m.obj = Objective(expr=m.y)
+    t_build = time.time() - start
+    path = os.path.join(tmpdir, "compact.nl" if compact else "default.nl")
+    start = time.time()
+    m.write(path, format="nl")
+    t_write = time.time() - start
+    print("{:8s} build {:.2f} s, NL write {:.2f} s ({:.1f} MB)".format(
+        "compact" if compact else "default", t_build, t_write,
+        os.path.getsize(path) / 1e6), end="")
+    solver = SolverFactory("ipopt")
+    if solver.available(exception_flag=False):
+        start = time.time()
+        solver.solve(m)
+        print(", solve {:.2f} s, y = {:.4f}".format(
+            time.time() - start, value(m.y)), end="")
+    print()
+
+
+def main(n_train=2000, n_pred=100000):
+    rng = np.random.RandomState(0)
+    x = rng.rand(n_train, 2) * [15, 15] - [5, 0]
+    data = np.column_stack([x, branin(x)])
+    start = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        np.random.seed(0)
+        model = KrigingModel(data)
+        results = model.kriging_training()
+    print("training on {} points: {:.2f} s".format(n_train, time.time() - start))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for compact in False, True:
+            embed(results, compact, tmpdir)
+
+    x_pred = rng.rand(n_pred, 2) * [15, 15] - [5, 0]
+    start = time.time()
+    y_pred = model.kriging_predict_output(results, x_pred)
+    t_batch = time.time() - start
+    n_single = min(n_pred, 1000)
+    start = time.time()
+    for i in range(n_single):
+        model.kriging_predict_output(results, x_pred[i, :])
+    t_single = (time.time() - start) * n_pred / n_single
+    print("predict {} points: batch {:.2f} s, point by point {:.2f} s "
+          "(estimated from {}), max error {:.3g}".format(
+              n_pred, t_batch, t_single, n_single,
+              np.max(np.abs(y_pred[:, 0] - branin(x_pred)))))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -30,10 +30,7 @@ from idaes.core.util.exceptions import (ConfigurationError,
                                         DynamicError,
                                         PropertyPackageError)
 from idaes.core.util.tables import stream_table_dataframe_to_string
-from idaes.core.util.model_statistics import (degrees_of_freedom,
-                                              number_variables,
-                                              number_activated_constraints,
-                                              number_activated_blocks)
+from idaes.core.util.model_statistics import ModelStatistics
 
 
 # Some more inforation about this module
@@ -230,10 +227,11 @@ class ProcessBlockData(_BlockData):
 
         # Get DoF and model stats
         if dof:
-            dof_stat = degrees_of_freedom(self)
-            nv = number_variables(self)
-            nc = number_activated_constraints(self)
-            nb = number_activated_blocks(self)
+            stats = ModelStatistics(self)
+            dof_stat = stats.degrees_of_freedom()
+            nv = stats.number_variables()
+            nc = stats.number_activated_constraints()
+            nb = stats.number_activated_blocks()
 
         # Get components to report in performance section
         performance = self._get_performance_contents(time_point=time_point)
@@ -33,10 +33,7 @@ from idaes.core.util.exceptions import (BurntToast,
                                         PropertyNotSupportedError,
                                         PropertyPackageError)
 from idaes.core.util.misc import add_object_reference
-from idaes.core.util.model_statistics import (degrees_of_freedom,
-                                              number_variables,
-                                              number_activated_constraints,
-                                              number_activated_blocks)
+from idaes.core.util.model_statistics import ModelStatistics
 
 # Some more information about this module
 __author__ = "Andrew Lee, John Eslick"
@@ -155,10 +152,11 @@ class StateBlock(ProcessBlock):
 
         # Get DoF and model stats
         if dof:
-            dof_stat = degrees_of_freedom(self[index])
-            nv = number_variables(self[index])
-            nc = number_activated_constraints(self[index])
-            nb = number_activated_blocks(self[index])
+            stats = ModelStatistics(self[index])
+            dof_stat = stats.degrees_of_freedom()
+            nv = stats.number_variables()
+            nc = stats.number_activated_constraints()
+            nb = stats.number_activated_blocks()
 
         # Create stream table
         if true_state:
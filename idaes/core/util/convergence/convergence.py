@@ -56,6 +56,18 @@ installed MPI and mpi4py using a command line like the following::
    $ mpirun -np 4 python ../../../core/util/convergence/convergence.py run-eval
          -s PressureChanger-10.json
 
+or, without MPI, on a pool of local processes, writing each result to a file
+as it finishes::
+
+   $ python ../../../core/util/convergence/convergence.py run-eval
+         -s PressureChanger-10.json -p 4 --results-file results.jsonl
+
+To build and initialize the model only once, and solve the samples in
+nearest-neighbor order starting each solve from the previous solution::
+
+   $ python ../../../core/util/convergence/convergence.py run-eval
+         -s PressureChanger-10.json --nearest-neighbor
+
 """
 import argparse
 import logging
@@ -120,6 +132,32 @@ def _parse_arguments():
     run_report_subparser.add_argument('-v', '--verbose', dest='vb',
                                       action='count', default=0,
                                       help='Increase output verbosity')
+    run_report_subparser.add_argument('-p', '--processes', dest='processes',
+                                      type=int, default=None, metavar='N',
+                                      help='Run the samples on a pool of N '
+                                           'local processes (no MPI needed)')
+    run_report_subparser.add_argument('--results-file', dest='results_file',
+                                      default=None, metavar='filepath',
+                                      help='Write each result to this file '
+                                           '(one JSON object per line) as soon'
+                                           ' as it is finished. Used with -p.')
+    run_report_subparser.add_argument('--retries', dest='retries', type=int,
+                                      default=1, metavar='N',
+                                      help='Number of times to retry failed '
+                                           'samples. Used with -p. '
+                                           '(default=1)')
+    run_report_subparser.add_argument('--warm-start', dest='warm_start',
+                                      action='store_true',
+                                      help='Build and initialize the model '
+                                           'once, and restore the initialized'
+                                           ' state for each sample')
+    run_report_subparser.add_argument('--nearest-neighbor',
+                                      dest='nearest_neighbor',
+                                      action='store_true',
+                                      help='Run the samples in nearest-'
+                                           'neighbor order, starting each '
+                                           'solve from the previous solution.'
+                                           ' Implies --warm-start.')
 
     create_sample_file_subparser.add_argument(
                 '-e',
@@ -218,7 +256,12 @@ def main():
                 return -1
         (inputs, samples, results) = \
             cb.run_convergence_evaluation_from_sample_file(
-                    sample_file=args.sample_file)
+                    sample_file=args.sample_file,
+                    processes=args.processes,
+                    results_file=args.results_file,
+                    retries=args.retries,
+                    warm_start=args.warm_start,
+                    nearest_neighbor=args.nearest_neighbor)
         if results is not None:
             cb.save_convergence_statistics(inputs, results, dmf=dmf)
     return 0
@@ -59,12 +59,15 @@ See the documentation in convergence.py for more information.
 """
 # stdlib
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 import getpass
 import importlib as il
 import json
 import logging
 import numpy as np
 import sys
+import time
 from io import StringIO
 # pyomo
 import pyutilib.services
@@ -74,6 +77,7 @@ from pyomo.opt import TerminationCondition
 from pyomo.common.log import LoggingIntercept
 # idaes
 import idaes.core.util.convergence.mpi_utils as mpiu
+from idaes.core.util.model_serializer import StateCheckpoint
 from idaes.dmf import resource
 
 
@@ -156,15 +160,45 @@ class ConvergenceEvaluation(object):
         values of parameters or variables according to the sampling
         specifications.
 
+        Alternatively, the user can override build_model and initialize_model,
+        in which case the time taken by each is reported separately.
+
         Returns
         -------
            Pyomo model : return a Pyomo model object that is initialized and
                         ready to solve. This is the model object that will be
                         used in the evaluation.
         """
+        model = self.build_model()
+        self.initialize_model(model)
+        return model
+
+    def build_model(self):
+        """
+        Optional alternative to get_initialized_model. User can override
+        this method to build and return the model, which will be initialized
+        by initialize_model.
+
+        Returns
+        -------
+           Pyomo model
+        """
         raise NotImplementedError('Not implemented in the base class. This'
                                   ' should be overridden in the derived class')
 
+    def initialize_model(self, model):
+        """
+        Optional alternative to get_initialized_model. User can override
+        this method to initialize the model returned by build_model. The
+        default does nothing.
+
+        Parameters
+        ----------
+        model : Pyomo model
+           The model returned by build_model
+        """
+        pass
+
     def get_solver(self):
         """
         User should create and return the solver that will be used for the
@@ -220,36 +254,38 @@ def _run_ipopt_with_stats(model, solver, max_iter=500, max_cpu_time=120):
     # ToDo: Check that the "solver" is, in fact, IPOPT
 
     pyutilib.services.TempfileManager.push()
-    tempfile = pyutilib.services.TempfileManager.create_tempfile(
-                        suffix='ipopt_out',
-                        text=True)
-    opts = {'output_file': tempfile,
-            'max_iter': max_iter,
-            'max_cpu_time': max_cpu_time}
-
-    status_obj = solver.solve(model, options=opts, tee=True)
-    solved = True
-    if status_obj.solver.termination_condition != TerminationCondition.optimal:
-        solved = False
-
-    iters = 0
-    time = 0
-    # parse the output file to get the iteration count, solver times, etc.
-    with open(tempfile, 'r') as f:
-        for line in f:
-            if line.startswith('Number of Iterations....:'):
-                tokens = line.split()
-                iters = int(tokens[3])
-            elif line.startswith(
-                    'Total CPU secs in IPOPT (w/o function evaluations)   ='):
-                tokens = line.split()
-                time += float(tokens[9])
-            elif line.startswith(
-                    'Total CPU secs in NLP function evaluations           ='):
-                tokens = line.split()
-                time += float(tokens[8])
-
-    pyutilib.services.TempfileManager.pop(remove=True)
+    try:
+        tempfile = pyutilib.services.TempfileManager.create_tempfile(
+                            suffix='ipopt_out',
+                            text=True)
+        opts = {'output_file': tempfile,
+                'max_iter': max_iter,
+                'max_cpu_time': max_cpu_time}
+
+        status_obj = solver.solve(model, options=opts, tee=True)
+        solved = True
+        if (status_obj.solver.termination_condition !=
+                TerminationCondition.optimal):
+            solved = False
+
+        iters = 0
+        time = 0
+        # parse the output file to get the iteration count, solver times, etc.
+        with open(tempfile, 'r') as f:
+            for line in f:
+                if line.startswith('Number of Iterations....:'):
+                    tokens = line.split()
+                    iters = int(tokens[3])
+                elif line.startswith('Total CPU secs in IPOPT '
+                                     '(w/o function evaluations)   ='):
+                    tokens = line.split()
+                    time += float(tokens[9])
+                elif line.startswith('Total CPU secs in NLP function '
+                                     'evaluations           ='):
+                    tokens = line.split()
+                    time += float(tokens[8])
+    finally:
+        pyutilib.services.TempfileManager.pop(remove=True)
     return status_obj, solved, iters, time
 
 
@@ -383,7 +419,12 @@ def write_sample_file(eval_spec,
         json.dump(jsondict, fd, indent=3)
 
 
-def run_convergence_evaluation_from_sample_file(sample_file):
+def run_convergence_evaluation_from_sample_file(sample_file, **kwargs):
+    """
+    Run a convergence evaluation from a sample file created by
+    write_sample_file. Keyword arguments are passed on to
+    run_convergence_evaluation.
+    """
     # load the sample file
     try:
         with open(sample_file, 'r') as fd:
@@ -408,14 +449,33 @@ def run_convergence_evaluation_from_sample_file(sample_file):
                 '{} in sample file: {}'.format(
                         convergence_evaluation_class_str, sample_file))
 
-    return run_convergence_evaluation(jsondict, conv_eval)
+    return run_convergence_evaluation(jsondict, conv_eval, **kwargs)
 
 
-def run_convergence_evaluation(sample_file_dict, conv_eval):
+def run_convergence_evaluation(sample_file_dict,
+                               conv_eval,
+                               processes=None,
+                               results_file=None,
+                               retries=1,
+                               max_cpu_time=120,
+                               warm_start=False,
+                               nearest_neighbor=False):
     """
     Run convergence evaluation and generate the statistics based on information
     in the sample_file.
 
+    By default, the samples are divided between MPI processes if mpi4py is
+    available, and otherwise run serially, building a new model for every
+    sample. With warm_start, each process builds and initializes the model
+    once, and restores the initialized state before each sample. If
+    processes is given, the samples are run on a pool of local processes
+    instead (no MPI needed), which always works like warm_start.
+
+    Each result includes the wall time in seconds spent building the model
+    (build_time), initializing or restoring it (init_time) and solving it
+    (solve_time). If the evaluation only implements get_initialized_model,
+    the time to build and initialize the model is all in build_time.
+
     Parameters
     ----------
     sample_file_dict : dict
@@ -423,11 +483,38 @@ def run_convergence_evaluation(sample_file_dict, conv_eval):
         the input and sample point information
 
     conv_eval : ConvergenceEvaluation
-        The ConvergenceEvaluation object that should be used
+        The ConvergenceEvaluation object that should be used. For the process
+        pool this must be picklable.
+
+    processes : int or None
+        Number of worker processes to use. If None, use MPI or run serially.
+
+    results_file : str or None
+        If given, write each result as a line of JSON to this file as soon as
+        it is finished (process pool only)
+
+    retries : int
+        Number of times to retry a sample that failed to solve, raised an
+        exception, timed out (hit max_cpu_time) or crashed its worker.
+        Retries use a freshly built model (process pool only).
+
+    max_cpu_time : float
+        The maximum cpu time to allow for ipopt (in seconds)
+
+    warm_start : bool
+        If True, build and initialize the model once rather than for every
+        sample (ignored for the process pool, which always does this)
+
+    nearest_neighbor : bool
+        If True, run the samples along a nearest-neighbor path, and start
+        each solve from the solution of the previous sample rather than the
+        initialized state (which is only restored after a failed solve).
+        Implies warm_start. Not used with the process pool.
 
     Returns
     -------
-       N/A
+       Tuple of (inputs, samples, results), where results is a list of result
+       dictionaries in the order of the samples
     """
     inputs = sample_file_dict['inputs']
     samples = sample_file_dict['samples']
@@ -442,10 +529,27 @@ def run_convergence_evaluation(sample_file_dict, conv_eval):
         samples_list.append(v)
     n_samples = len(samples_list)
 
+    if nearest_neighbor:
+        warm_start = True
+
+    if processes is not None:
+        results = _run_process_pool(samples_list, conv_eval, inputs,
+                                    processes=processes,
+                                    results_file=results_file,
+                                    retries=retries,
+                                    max_cpu_time=max_cpu_time)
+        return inputs, samples, results
+
     task_mgr = mpiu.ParallelTaskManager(n_samples)
     local_samples_list = task_mgr.global_to_local_data(samples_list)
-
-    results = list()
+    if nearest_neighbor:
+        local_samples_list = _nearest_neighbor_order(local_samples_list,
+                                                     inputs)
+
+    runner = _SampleRunner(conv_eval, inputs, max_cpu_time=max_cpu_time,
+                           restore=not nearest_neighbor,
+                           warm_start=warm_start)
+    results = OrderedDict()
     for (si, ss) in enumerate(local_samples_list):
         sample_name = ss['_name']
         # print progress on the rank-0 process
@@ -453,37 +557,231 @@ def run_convergence_evaluation(sample_file_dict, conv_eval):
             _progress_bar(float(si) / float(len(local_samples_list)),
                           'Root Process: {}'.format(sample_name))
 
-        # capture the output
-        # ToDo: make this an option and turn off for single sample execution
+        results_dict = runner.run(ss)
+        if not results_dict['solved']:
+            print('Sample: {} failed to converge.'.format(sample_name))
+        results[sample_name] = results_dict
+
+    # results in the original sample order
+    results = [results[ss['_name']]
+               for ss in task_mgr.global_to_local_data(samples_list)]
+    global_results = task_mgr.gather_global_data(results)
+    return inputs, samples, global_results
+
+
+def _nearest_neighbor_order(samples_list, inputs):
+    """
+    Order samples along a greedy nearest-neighbor path, starting from the
+    sample closest to the input means, so each solve can start from the
+    solution of a nearby sample. Distances are measured in standard
+    deviations of each input.
+    """
+    if len(samples_list) < 2:
+        return list(samples_list)
+    keys = list(inputs.keys())
+    scale = np.array([inputs[k]['std'] if inputs[k]['std'] > 0 else 1.0
+                      for k in keys])
+    x = np.array([[ss[k] for k in keys] for ss in samples_list]) / scale
+    mean = np.array([inputs[k]['mean'] for k in keys]) / scale
+    remaining = np.ones(len(samples_list), dtype=bool)
+    i = int(np.argmin(np.sum((x - mean)**2, axis=1)))
+    order = [i]
+    remaining[i] = False
+    for _ in range(len(samples_list) - 1):
+        d = np.sum((x - x[i])**2, axis=1)
+        d[~remaining] = np.inf
+        i = int(np.argmin(d))
+        order.append(i)
+        remaining[i] = False
+    return [samples_list[i] for i in order]
+
+
+class _SampleRunner(object):
+    """
+    Solves samples on a single model. The model is built and initialized once,
+    and its state is checkpointed, so each sample can start from the
+    initialized state without rebuilding the model.
+
+    If restore is False, each sample starts from the solution of the previous
+    one, and the checkpoint is only restored after a failed solve. If
+    warm_start is False, a new model is built for every sample, and no
+    checkpoint is taken.
+    """
+    def __init__(self, conv_eval, inputs, max_cpu_time=120, restore=True,
+                 warm_start=True):
+        self.conv_eval = conv_eval
+        self.inputs = inputs
+        self.max_cpu_time = max_cpu_time
+        self.restore = restore
+        self.warm_start = warm_start
+        self.model = None
+        self.checkpoint = None
+        self.last_solved = True
+
+    def build(self):
+        """
+        (Re)build and initialize the model, and checkpoint its state if the
+        model is reused. Returns the wall time to build and to initialize the
+        model.
+        """
+        ce = self.conv_eval
+        start = time.time()
+        if type(ce).build_model is ConvergenceEvaluation.build_model:
+            # only get_initialized_model is implemented
+            self.model = ce.get_initialized_model()
+            build_time, init_time = time.time() - start, 0.0
+        else:
+            self.model = ce.build_model()
+            build_time = time.time() - start
+            start = time.time()
+            ce.initialize_model(self.model)
+            init_time = time.time() - start
+        if self.warm_start:
+            self.checkpoint = StateCheckpoint(self.model)
+        return build_time, init_time
+
+    def run(self, ss, rebuild=False):
+        """
+        Solve one sample and return a results dictionary. Exceptions raised
+        while solving are recorded in the results as a failed solve.
+
+        Parameters
+        ----------
+        ss : dict
+           The sample point
+        rebuild : bool
+           If True, build a new model rather than reusing the current one
+           (always the case without warm_start)
+        """
+        rebuild = rebuild or not self.warm_start
+        build_time, init_time = 0.0, 0.0
         output_buffer = StringIO()
         with LoggingIntercept(output_buffer, 'idaes', logging.ERROR):
-            with capture_output():  # as str_out:
-                model = conv_eval.get_initialized_model()
-                _set_model_parameters_from_sample(model, inputs, ss)
-                solver = conv_eval.get_solver()
-                (status_obj, solved, iters, time) = \
-                    _run_ipopt_with_stats(model, solver)
-
-        # run without output capture
-        # model = conv_eval.get_initialized_model()
-        # _set_model_parameters_from_sample(model, inputs, ss)
-        # solver = conv_eval.get_solver()
-        # (status_obj, solved, iters, time) = \
-        #        _run_ipopt_with_stats(model, solver)
-
-        if not solved:
-            print('Sample: {} failed to converge.'.format(sample_name))
+            with capture_output():
+                if rebuild or self.model is None:
+                    build_time, init_time = self.build()
+                elif self.restore or not self.last_solved:
+                    start = time.time()
+                    self.checkpoint.restore()
+                    init_time = time.time() - start
+                # Bad inputs are an error in the evaluation, not a failure
+                # of the sample, so let them through.
+                _set_model_parameters_from_sample(self.model, self.inputs, ss)
+                error = None
+                start = time.time()
+                try:
+                    solver = self.conv_eval.get_solver()
+                    (status_obj, solved, iters, cpu_time) = \
+                        _run_ipopt_with_stats(self.model, solver,
+                                              max_cpu_time=self.max_cpu_time)
+                except Exception as e:
+                    solved, iters, cpu_time = False, 0, 0
+                    error = '{}: {}'.format(type(e).__name__, str(e))
+                solve_time = time.time() - start
+        self.last_solved = solved
 
         results_dict = OrderedDict()
-        results_dict['name'] = sample_name
+        results_dict['name'] = ss['_name']
         results_dict['sample_point'] = ss
         results_dict['solved'] = solved
         results_dict['iters'] = iters
-        results_dict['time'] = time
-        results.append(results_dict)
+        results_dict['time'] = cpu_time
+        results_dict['build_time'] = build_time
+        results_dict['init_time'] = init_time
+        results_dict['solve_time'] = solve_time
+        if error is not None:
+            results_dict['error'] = error
+        return results_dict
+
+
+# The sample runner of a process pool worker, created with the first sample
+# the worker runs. (The pool initializer argument needs Python 3.7.)
+_pool_worker_runner = None
+
+
+def _run_pool_sample(conv_eval, inputs, max_cpu_time, ss, rebuild):
+    global _pool_worker_runner
+    if _pool_worker_runner is None:
+        _pool_worker_runner = _SampleRunner(conv_eval, inputs, max_cpu_time)
+    return _pool_worker_runner.run(ss, rebuild=rebuild)
+
+
+def _failed_result(ss, error):
+    results_dict = OrderedDict()
+    results_dict['name'] = ss['_name']
+    results_dict['sample_point'] = ss
+    results_dict['solved'] = False
+    results_dict['iters'] = 0
+    results_dict['time'] = 0
+    # the wall times of a sample whose worker crashed are not known
+    results_dict['build_time'] = float('nan')
+    results_dict['init_time'] = float('nan')
+    results_dict['solve_time'] = float('nan')
+    results_dict['error'] = error
+    return results_dict
+
+
+def _run_process_pool(samples_list, conv_eval, inputs, processes,
+                      results_file=None, retries=1, max_cpu_time=120):
+    """
+    Run samples on a pool of processes, see run_convergence_evaluation.
+    Returns the list of results in the order of samples_list.
+    """
+    n_samples = len(samples_list)
+    attempts = {ss['_name']: 0 for ss in samples_list}
+    results = {}
+    stream = open(results_file, 'w') if results_file is not None else None
 
-    global_results = task_mgr.gather_global_data(results)
-    return inputs, samples, global_results
+    def finish(r):
+        results[r['name']] = r
+        if not r['solved']:
+            print('Sample: {} failed to converge.'.format(r['name']))
+        if stream is not None:
+            stream.write(json.dumps(r) + '\n')
+            stream.flush()
+        _progress_bar(float(len(results)) / float(n_samples),
+                      'Finished: {}'.format(r['name']))
+
+    # Each worker is a pool of one process running one sample at a time, so
+    # a worker that crashes (e.g. a solver segfault) is charged to the sample
+    # it was running, and only that worker is replaced. A sample counts as
+    # attempted once it has finished or crashed its worker.
+    todo = list(samples_list)
+    idle = [ProcessPoolExecutor(max_workers=1)
+            for _ in range(min(processes, n_samples))]
+    busy = {}
+    try:
+        while todo or busy:
+            while todo and idle:
+                ss = todo.pop(0)
+                pool = idle.pop()
+                f = pool.submit(_run_pool_sample, conv_eval, inputs,
+                                max_cpu_time, ss, attempts[ss['_name']] > 0)
+                busy[f] = (pool, ss)
+            done, _ = wait(busy, return_when=FIRST_COMPLETED)
+            for f in done:
+                pool, ss = busy.pop(f)
+                attempts[ss['_name']] += 1
+                try:
+                    r = f.result()
+                except BrokenProcessPool as e:
+                    r = _failed_result(
+                        ss, 'Worker process crashed: {}'.format(e))
+                    pool.shutdown()
+                    pool = ProcessPoolExecutor(max_workers=1)
+                finally:
+                    idle.append(pool)
+                if r['solved'] or attempts[ss['_name']] > retries:
+                    finish(r)
+                else:
+                    todo.append(ss)
+    finally:
+        for pool in idle + [pool for pool, _ in busy.values()]:
+            pool.shutdown()
+        if stream is not None:
+            stream.close()
+
+    return [results[ss['_name']] for ss in samples_list]
 
 
 def save_convergence_statistics(inputs, results, dmf=None):
@@ -574,13 +872,28 @@ def print_convergence_statistics(inputs, results, s):
              s.time_mean, s.time_mean + s.time_std,
              s.time_max))
 
+    wall_times = 'build_time' in results[0] if len(results) > 0 else False
+    if wall_times:
+        for k in ('build_time', 'init_time', 'solve_time'):
+            print('... Wall Time (s) %-10s (min, mean, max):'
+                  '%5f, %5f, %5f' % (k.split('_')[0].capitalize(),
+                                     np.nanmin([r[k] for r in results]),
+                                     np.nanmean([r[k] for r in results]),
+                                     np.nanmax([r[k] for r in results])))
+
     # print the detailed table
     print()
     print('==== Table of Results ====')
     print()
-    print('%4s %20s %10s %10s %10s' % ('Flag', 'Name', 'Solved',
-                                       'Iters', 'Time'))
-    print('-' * 58)
+    if wall_times:
+        print('%4s %20s %10s %10s %10s %10s %10s %10s' % (
+                'Flag', 'Name', 'Solved', 'Iters', 'Time', 'Build',
+                'Init', 'Solve'))
+        print('-' * 91)
+    else:
+        print('%4s %20s %10s %10s %10s' % ('Flag', 'Name', 'Solved',
+                                           'Iters', 'Time'))
+        print('-' * 58)
     for r in results:
         flag = ''
         if r['solved'] is not True:
@@ -599,15 +912,20 @@ def print_convergence_statistics(inputs, results, s):
             r['flag'] = flag
             s.notable_cases.append(r)
 
-        print('%4s %20s %10s %10.0f %10.2f' % (
-                flag, r['name'], r['solved'], r['iters'], r['time']))
+        if wall_times:
+            print('%4s %20s %10s %10.0f %10.2f %10.2f %10.2f %10.2f' % (
+                    flag, r['name'], r['solved'], r['iters'], r['time'],
+                    r['build_time'], r['init_time'], r['solve_time']))
+        else:
+            print('%4s %20s %10s %10.0f %10.2f' % (
+                    flag, r['name'], r['solved'], r['iters'], r['time']))
         if r['solved'] is not True:
             s.failed_cases.append(r)
         else:
             s.iters_successful.append(r['iters'])
             s.time_successful.append(r['time'])
 
-    print('-' * 58)
+    print('-' * (91 if wall_times else 58))
 
     print()
     print('==== Notable Cases ====')
@@ -690,6 +1008,9 @@ def save_results_to_dmf(dmf, inputs, results, stats):
             'iters': r['iters'],
             'time': r['time']
         }
+        for k in ('build_time', 'init_time', 'solve_time'):
+            if k in r:
+                item[k] = r[k]
         for vtype in 'time', 'iters':
             mean, std = [getattr(stats, a) for a in ('{}_mean'.format(vtype),
                                                      '{}_std'.format(vtype))]
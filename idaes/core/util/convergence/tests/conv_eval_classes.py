@@ -15,7 +15,10 @@ Test classes for the convergence evaluation testing module
 
 Author: Carl Laird
 """
+import os
+import signal
 import pyomo.environ as pe
+from pyomo.opt import SolverResults, TerminationCondition
 import idaes.core.util.convergence.convergence_base as cb
 
 class ConvEvalFixedVarMutableParam(cb.ConvergenceEvaluation):
@@ -95,3 +98,62 @@ class ConvEvalUnfixedVarMutableParam(ConvEvalFixedVarMutableParam):
         return m
 
 
+
+
+class ConvEvalMissingSolver(ConvEvalFixedVarMutableParam):
+    def __init__(self):
+        super(ConvEvalMissingSolver, self).__init__()
+
+    def get_solver(self):
+        # a solver that cannot run, so every solve raises an exception
+        opt = pe.SolverFactory('not_a_solver')
+        return opt
+
+
+class ConvEvalBuildInitialize(ConvEvalMissingSolver):
+    """Builds and initializes the model in separate steps, counting builds"""
+    n_builds = 0
+
+    def __init__(self):
+        super(ConvEvalBuildInitialize, self).__init__()
+
+    def build_model(self):
+        ConvEvalBuildInitialize.n_builds += 1
+        m = pe.ConcreteModel()
+        m.var_a = pe.Var(initialize=1.0)
+        m.var_a.fix(1.0)
+        m.param_b = pe.Param(initialize=100, mutable=True)
+
+        m.x = pe.Var()
+        m.y = pe.Var()
+
+        m.obj = pe.Objective(expr=(m.var_a - m.x)**2 + m.param_b*(m.y - m.x**2)**2)
+        return m
+
+    def initialize_model(self, model):
+        model.x.value = 2.0
+        model.y.value = 2.0
+
+    def get_initialized_model(self):
+        return cb.ConvergenceEvaluation.get_initialized_model(self)
+
+
+class CrashingSolver(object):
+    """Stands in for ipopt: kills its process like a segfault when param_b
+    is 150, and otherwise reports an optimal solve in 3 iterations"""
+    def solve(self, model, options=None, tee=False):
+        if pe.value(model.param_b) == 150:
+            os.kill(os.getpid(), signal.SIGSEGV)
+        with open(options['output_file'], 'w') as f:
+            f.write('Number of Iterations....: 3\n')
+        results = SolverResults()
+        results.solver.termination_condition = TerminationCondition.optimal
+        return results
+
+
+class ConvEvalCrashingSolver(ConvEvalFixedVarMutableParam):
+    def __init__(self):
+        super(ConvEvalCrashingSolver, self).__init__()
+
+    def get_solver(self):
+        return CrashingSolver()
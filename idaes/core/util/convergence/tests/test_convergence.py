@@ -16,12 +16,16 @@ Tests for the convergence testing module
 Author: Carl Laird
 """
 import pytest
+import json
 import os
 import os.path
+from collections import OrderedDict
 from pyutilib.misc import compare_json_files
+import pyutilib.services
 import pyomo.environ as pe
 from pyomo.common.fileutils import this_file_dir
 import idaes.core.util.convergence.convergence_base as cb
+from idaes.core.util.model_serializer import StateCheckpoint
 
 # See if ipopt is available and set up solver
 ipopt_available = pe.SolverFactory('ipopt').available()
@@ -34,6 +38,12 @@ ceval_fixedvar_immutableparam_str = (
 ceval_unfixedvar_mutableparam_str = (
         'idaes.core.util.convergence.tests.'
         'conv_eval_classes.ConvEvalUnfixedVarMutableParam')
+ceval_build_initialize_str = (
+    'idaes.core.util.convergence.tests.conv_eval_classes.'
+    'ConvEvalBuildInitialize')
+ceval_missing_solver_str = (
+        'idaes.core.util.convergence.tests.'
+        'conv_eval_classes.ConvEvalMissingSolver')
 
 currdir = this_file_dir()
 
@@ -158,6 +168,196 @@ def test_convergence_evaluation_fixedvar_mutableparam():
     #     os.remove(results_fname)
 
 
+def test_convergence_evaluation_process_pool_immutableparam():
+    ceval_class = cb._class_import(ceval_fixedvar_immutableparam_str)
+    spec = ceval_class().get_specification()
+    fname = os.path.join(currdir, 'ceval_pool_immutableparam.3.42.json')
+    cb.write_sample_file(spec, fname,
+                         ceval_fixedvar_immutableparam_str,
+                         n_points=3, seed=42)
+
+    # bad inputs are raised from the worker processes
+    with pytest.raises(ValueError):
+        cb.run_convergence_evaluation_from_sample_file(fname, processes=2)
+
+    if os.path.exists(fname):
+        os.remove(fname)
+
+
+def test_convergence_evaluation_process_pool_retries(tmpdir):
+    ceval_class = cb._class_import(ceval_missing_solver_str)
+    spec = ceval_class().get_specification()
+    fname = os.path.join(str(tmpdir), 'ceval_missing_solver.3.42.json')
+    results_fname = os.path.join(str(tmpdir), 'results.jsonl')
+    cb.write_sample_file(spec, fname, ceval_missing_solver_str,
+                         n_points=3, seed=42)
+
+    inputs, samples, global_results = \
+        cb.run_convergence_evaluation_from_sample_file(
+            fname, processes=2, results_file=results_fname, retries=2)
+
+    assert [r['name'] for r in global_results] == \
+        ['Sample-1', 'Sample-2', 'Sample-3']
+    for r in global_results:
+        assert not r['solved']
+        assert 'not_a_solver' in r['error']
+
+    # each sample is written once, after its last attempt
+    with open(results_fname, 'r') as f:
+        streamed = [json.loads(line) for line in f]
+    assert sorted(r['name'] for r in streamed) == \
+        ['Sample-1', 'Sample-2', 'Sample-3']
+
+
+def test_convergence_evaluation_process_pool_crash():
+    import idaes.core.util.convergence.tests.conv_eval_classes as cev
+    conv_eval = cev.ConvEvalCrashingSolver()
+    inputs = conv_eval.get_specification().inputs
+    # Sample-1 kills its worker, and samples queued behind it still run
+    samples_list = [{'_name': 'Sample-{}'.format(i + 1), 'var_a': 1.0,
+                     'param_b': 150 if i == 0 else 100 + i}
+                    for i in range(6)]
+
+    results = cb._run_process_pool(samples_list, conv_eval, inputs,
+                                   processes=2, retries=1)
+
+    assert [r['name'] for r in results] == \
+        ['Sample-{}'.format(i + 1) for i in range(6)]
+    assert not results[0]['solved']
+    assert 'Worker process crashed' in results[0]['error']
+    for r in results[1:]:
+        assert r['solved']
+        assert r['iters'] == 3
+        assert 'error' not in r
+
+
+@pytest.mark.skipif(ipopt_available == False,
+                    reason="Ipopt solver not available")
+def test_convergence_evaluation_process_pool(tmpdir):
+    spec = cb._class_import(ceval_fixedvar_mutableparam_str)()\
+        .get_specification()
+    fname = os.path.join(str(tmpdir), 'ceval_fixedvar_mutableparam.3.43.json')
+    results_fname = os.path.join(str(tmpdir), 'results.jsonl')
+    cb.write_sample_file(spec, fname, ceval_fixedvar_mutableparam_str,
+                         n_points=3, seed=43)
+
+    inputs, samples, global_results = \
+        cb.run_convergence_evaluation_from_sample_file(
+            fname, processes=2, results_file=results_fname)
+
+    # same results as the serial evaluation, in sample order
+    assert [r['name'] for r in global_results] == \
+        ['Sample-1', 'Sample-2', 'Sample-3']
+    assert [r['solved'] for r in global_results] == [True, True, True]
+    assert [r['iters'] for r in global_results] == [14, 15, 12]
+
+    with open(results_fname, 'r') as f:
+        assert len(f.readlines()) == 3
+
+
+def test_run_ipopt_with_stats_pops_tempfile_context():
+    class FailingSolver(object):
+        def solve(self, model, **kwds):
+            raise RuntimeError('solver failed')
+
+    tfm = pyutilib.services.TempfileManager
+    depth = len(tfm._tempfiles)
+    with pytest.raises(RuntimeError):
+        cb._run_ipopt_with_stats(pe.ConcreteModel(), FailingSolver())
+    assert len(tfm._tempfiles) == depth
+
+
+def test_print_convergence_statistics_failed_sample(capsys):
+    ok = OrderedDict([('name', 'Sample-1'),
+                      ('sample_point', {'_name': 'Sample-1', 'x': 1.0}),
+                      ('solved', True), ('iters', 10), ('time', 0.5),
+                      ('build_time', 1.0), ('init_time', 0.2),
+                      ('solve_time', 0.6)])
+    failed = cb._failed_result({'_name': 'Sample-2', 'x': 2.0},
+                               'Worker process crashed')
+    results = [ok, failed]
+    inputs = {'x': {'lower': 0.0, 'upper': 3.0, 'mean': 1.5, 'std': 1.0}}
+    s = cb.Stats(results)
+    cb.print_convergence_statistics(inputs, results, s)
+    out = capsys.readouterr().out
+    assert 'Number of Successful Cases (solved=True): 1/2' in out
+    # wall times of the crashed sample are left out of the summary
+    assert 'Build      (min, mean, max):1.000000, 1.000000, 1.000000' in out
+    assert 'Sample-2 : failed solve' in out
+
+
+def test_nearest_neighbor_order():
+    inputs = {'a': {'mean': 0.0, 'std': 1.0},
+              'b': {'mean': 0.0, 'std': 10.0}}
+    samples_list = [{'_name': 'S1', 'a': 3.0, 'b': 0.0},
+                    {'_name': 'S2', 'a': 0.0, 'b': 25.0},
+                    {'_name': 'S3', 'a': 0.1, 'b': 1.0},
+                    {'_name': 'S4', 'a': 1.0, 'b': 0.0}]
+    ordered = cb._nearest_neighbor_order(samples_list, inputs)
+    # starts closest to the mean, distances scaled by the std
+    assert [ss['_name'] for ss in ordered] == ['S3', 'S4', 'S1', 'S2']
+
+
+@pytest.mark.parametrize('kwargs,n_builds,n_checkpoints', [
+    (dict(), 3, 0),
+    (dict(warm_start=True), 1, 1),
+    (dict(nearest_neighbor=True), 1, 1)])
+def test_convergence_evaluation_warm_start(tmpdir, monkeypatch, kwargs,
+                                           n_builds, n_checkpoints):
+    import idaes.core.util.convergence.tests.conv_eval_classes as cev
+    ceval_class = cb._class_import(ceval_build_initialize_str)
+    spec = ceval_class().get_specification()
+    fname = os.path.join(str(tmpdir), 'ceval_build_initialize.3.42.json')
+    cb.write_sample_file(spec, fname, ceval_build_initialize_str,
+                         n_points=3, seed=42)
+
+    # count the checkpoints, which are only needed when the model is reused
+    checkpoints = []
+
+    def checkpoint(model):
+        checkpoints.append(model)
+        return StateCheckpoint(model)
+    monkeypatch.setattr(cb, 'StateCheckpoint', checkpoint)
+
+    cev.ConvEvalBuildInitialize.n_builds = 0
+    inputs, samples, global_results = \
+        cb.run_convergence_evaluation_from_sample_file(fname, **kwargs)
+    assert cev.ConvEvalBuildInitialize.n_builds == n_builds
+    assert len(checkpoints) == n_checkpoints
+
+    # results are in sample order, with the wall time of each step
+    assert [r['name'] for r in global_results] == \
+        ['Sample-1', 'Sample-2', 'Sample-3']
+    for r in global_results:
+        assert not r['solved']
+        assert 'not_a_solver' in r['error']
+        for k in ('build_time', 'init_time', 'solve_time'):
+            assert r[k] >= 0
+
+    cb.save_convergence_statistics(inputs, global_results)
+
+
+@pytest.mark.skipif(ipopt_available == False,
+                    reason="Ipopt solver not available")
+def test_convergence_evaluation_nearest_neighbor(tmpdir):
+    spec = cb._class_import(ceval_fixedvar_mutableparam_str)()\
+        .get_specification()
+    fname = os.path.join(str(tmpdir), 'ceval_fixedvar_mutableparam.3.43.json')
+    cb.write_sample_file(spec, fname, ceval_fixedvar_mutableparam_str,
+                         n_points=3, seed=43)
+
+    inputs, samples, global_results = \
+        cb.run_convergence_evaluation_from_sample_file(
+            fname, nearest_neighbor=True)
+
+    assert [r['name'] for r in global_results] == \
+        ['Sample-1', 'Sample-2', 'Sample-3']
+    assert [r['solved'] for r in global_results] == [True, True, True]
+    assert global_results[0]['build_time'] + \
+        global_results[1]['build_time'] + \
+        global_results[2]['build_time'] > 0
+
+
 if __name__ == '__main__':
     # test_convergence_evaluation_specification_file_fixedvar_mutableparam()
     # test_convergence_evaluation_specification_file_unfixedvar_mutableparam()
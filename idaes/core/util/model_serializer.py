@@ -22,10 +22,12 @@ import json
 import datetime
 import time
 import gzip
+import numpy as np
 
 # Some more inforation about this module
 __author__ = "John Eslick"
 __format_version__ = 4
+__columnar_format_version__ = 1
 
 
 def _can_serialize(o):
@@ -831,3 +833,421 @@ def from_json(o, sd=None, fname=None, s=None, wts=None, gz=None):
     pdict["etime_read_dict"] = read_time - dict_time
     pdict["etime_read_suffixes"] = suffix_time - read_time
     return pdict
+
+
+def _columnar_components(o, wts):
+    """
+    Walk the components under o in the same way as to_json, but without
+    building a nested dict.
+
+    Args:
+        o: Pyomo component to walk
+        wts: StoreSpec object specifying what to store
+    Returns:
+        A generator yielding tuples of (component, class attribute list, class
+        filter function, list of component data objects).  Suffixes are not
+        included.
+    """
+    stack = [o]
+    while stack:
+        c = stack.pop()
+        alist, ff = wts.get_class_attr_list(c)
+        if alist is None or isinstance(c, Suffix):
+            continue
+        if isinstance(c, Component):
+            datas = list(c.values())
+        else:
+            datas = [c]
+        yield c, alist, ff, datas
+        for el in datas:
+            if _may_have_subcomponents(el):
+                stack.extend(el.component_objects(descend_into=False))
+
+def _columnar_path(c, o, name_buffer):
+    """
+    Get the name of component c relative to the component being serialized o.
+    """
+    if c is o:
+        return ""
+    name = c.getname(fully_qualified=True, name_buffer=name_buffer)
+    if o.parent_block() is None:
+        return name
+    return name[len(o.name) + 1:]
+
+def _to_column(vals):
+    """
+    Convert a list of attribute values to a NumPy array. Boolean attributes are
+    stored as bool arrays, numeric attributes as float arrays with None stored
+    as NaN, and anything else as an object array.
+    """
+    if type(vals[0]) is bool and all(type(v) is bool for v in vals):
+        return np.array(vals, dtype=bool)
+    try:
+        return np.array(
+            [np.nan if v is None else v for v in vals], dtype=float)
+    except (TypeError, ValueError):
+        return np.array(vals, dtype=object)
+
+def _from_column(col):
+    """
+    Convert a column back to a list of Python values, NaN is read as None.
+    """
+    if col.dtype == float:
+        return [None if v != v else v for v in col.tolist()]
+    return col.tolist()
+
+def _get_attr(el, a, wts):
+    """
+    Get an attribute for writing, using a callback if there is one.
+    """
+    cb = wts.write_cbs.get(a, None)
+    if cb is not None:
+        return cb(el)
+    return getattr(el, a, None)
+
+def _write_columns(datas, alist, wts):
+    """
+    Get attributes of a list of component data objects.
+
+    Args:
+        datas: list of component data objects
+        alist: list of attributes to get
+        wts: StoreSpec object specifying how to get attributes
+    Returns:
+        A dict of attribute name to list of values (one for each element of
+        datas)
+    """
+    cols = {}
+    is_var = isinstance(datas[0], pyomo.core.base.var._VarData)
+    for a in alist:
+        cb = wts.write_cbs.get(a, None)
+        if cb is _get_value and is_var:
+            cols[a] = [el.value for el in datas] # skip value() for speed
+        elif cb is not None:
+            cols[a] = [cb(el) for el in datas]
+        else:
+            cols[a] = [getattr(el, a) for el in datas]
+    return cols
+
+def _read_attrs(o, odict, alist, ff, wts, diff_only=False):
+    """
+    Set the attributes of one object from a dict of saved attributes.
+
+    Args:
+        o: object whoes attributes are to be set
+        odict: dictionary of saved attributes
+        alist: list of attributes to read
+        ff: filter function or None
+        wts: StoreSpec object specifying how to read attributes
+        diff_only: if True only set attributes that differ from saved state
+    Returns:
+        Number of attributes set
+    """
+    n = 0
+    if ff is not None:
+        alist = ff(o, odict)
+    for a in alist:
+        if a not in odict:
+            continue
+        cb = wts.read_cbs.get(a, False)
+        if cb is None:
+            continue
+        if diff_only and _get_attr(o, a, wts) == odict[a]:
+            continue
+        if cb is False:
+            setattr(o, a, odict[a])
+        else:
+            cb(o, odict[a])
+        n += 1
+    return n
+
+def _read_columns(datas, cols, ff, wts, diff_only=False):
+    """
+    Set an attribute of a list of component data objects from columns of saved
+    values.
+
+    Args:
+        datas: list of component data objects
+        cols: dict of attribute name to list of values (one for each element
+            of datas)
+        ff: filter function or None
+        wts: StoreSpec object specifying how to read attributes
+        diff_only: if True only set attributes that differ from saved state
+    Returns:
+        Number of attributes set
+    """
+    n = 0
+    if ff is not None:
+        # Filter functions work on one data object at a time, so read in
+        # the same order as from_json
+        alist = list(cols.keys())
+        for i, el in enumerate(datas):
+            edict = {a: vals[i] for a, vals in cols.items()}
+            n += _read_attrs(el, edict, alist, ff, wts, diff_only=diff_only)
+        return n
+    is_var = isinstance(datas[0], pyomo.core.base.var._VarData)
+    for a, vals in cols.items():
+        cb = wts.read_cbs.get(a, False)
+        if cb is None:
+            continue
+        if cb is _set_value and is_var:
+            cb = False # skip the callback for speed
+        if diff_only:
+            if a == "value" and is_var:
+                cur = [el.value for el in datas]
+            else:
+                cur = [_get_attr(el, a, wts) for el in datas]
+            pairs = [(el, v) for el, v, c in zip(datas, vals, cur) if v != c]
+        else:
+            pairs = zip(datas, vals)
+        if cb is False:
+            for el, v in pairs:
+                setattr(el, a, v)
+                n += 1
+        else:
+            for el, v in pairs:
+                cb(el, v)
+                n += 1
+    return n
+
+def to_columnar(o, fname=None, wts=None, metadata={}, compress=False,
+                return_dict=False):
+    """
+    Save the state of a model in a columnar format. This is a faster and more
+    compact alternative to ``to_json()``.  Rather than creating a dictionary
+    for every component data object, the attributes of all the data objects in
+    a component are stored in one NumPy array per attribute (e.g. the values,
+    fixed flags and bounds of an indexed Var are each stored in one array).
+    Arrays are keyed by "<component path>:<attribute>" where the component path
+    is relative to o. Component level attributes (e.g. the active flag of an
+    indexed component) are stored under "<component path>:@<attribute>". None
+    is stored as NaN in numeric arrays.
+
+    Data are matched to a model by component path and the order of the
+    component indexes, so the model state can only be loaded into a model with
+    the same structure. Suffixes are not stored.
+
+    Args:
+        o: The Pyomo component object to save.  Usually a Pyomo model, but could
+            also be a subcomponent of a model (usually a sub-block).
+        fname: file name to save the model state to. The state is written as a
+            NumPy ``.npz`` archive.  If None, no file is written.
+        wts: is What To Save, this is a StoreSpec object that specifies what
+            object types and attributes to save.  If None, the default is used
+            which saves the state of the compelte model state.
+        metadata: addtional metadata to save beyond the standard format_version,
+            date, and time.
+        compress: if True, compress the ``.npz`` file (default is False)
+        return_dict: default is False if true returns a dictionary of arrays
+
+    Returns:
+        If return_dict is True returns a dictionary of NumPy arrays, otherwise
+        None.
+    """
+    start_time = time.time()
+    if wts is None:
+        wts = StoreSpec()
+    name_buffer = {}
+    sd = {}
+    count = 0
+    for c, alist, ff, datas in _columnar_components(o, wts):
+        path = _columnar_path(c, o, name_buffer)
+        count += 1
+        if isinstance(c, Component):
+            for a in alist:
+                sd["{}:@{}".format(path, a)] = _to_column(
+                    [_get_attr(c, a, wts)])
+        if not datas:
+            continue
+        dlist, dff = wts.get_data_class_attr_list(datas[0])
+        if dlist is None:
+            continue
+        count += len(datas)
+        for a, vals in _write_columns(datas, dlist, wts).items():
+            sd["{}:{}".format(path, a)] = _to_column(vals)
+    dict_time = time.time()
+    now = datetime.datetime.now()
+    meta = {
+        "format_version":__columnar_format_version__,
+        "date":datetime.date.isoformat(now.date()),
+        "time":datetime.time.isoformat(now.time()),
+        "other":metadata,
+        "__performance__":{
+            "n_components":count,
+            "etime_make_dict":dict_time - start_time}}
+    sd["__metadata__"] = np.array(json.dumps(meta))
+    if fname is not None:
+        if compress:
+            np.savez_compressed(fname, **sd)
+        else:
+            np.savez(fname, **sd)
+    if return_dict:
+        return sd
+    return None
+
+def from_columnar(o, sd=None, fname=None, wts=None, allow_pickle=False):
+    """
+    Load the state of a Pyomo component from a dictionary or ``.npz`` file
+    written by ``to_columnar()``.  Must only specify one of sd or fname.  If the
+    saved state contains extra information, it is ignored.  If the saved state
+    doesn't contain an entry for a model component that is to be loaded an
+    error will be raised, unless ignore_missing = True.
+
+    Args:
+        o: Pyomo component to for which to load state
+        sd: State dictionary to load, if None, use fname
+        fname: ``.npz`` file to load, only used if sd is None
+        wts: StoreSpec object specifying what to load
+        allow_pickle: allow loading object arrays from fname. Object arrays are
+            only written for attributes that are not numeric or boolean. This
+            should not be used with files from untrusted sources.
+
+    Returns:
+        Dictionary with some perfomance information. The keys are
+        "etime_load_file", how long in seconds it took to open the file and
+        "etime_read_dict", how long in seconds it took to read models state
+    """
+    start_time = time.time()
+    if sd is not None:
+        pass
+    elif fname is not None:
+        # Arrays in an npz file are only read when accessed
+        sd = np.load(fname, allow_pickle=allow_pickle)
+    else:
+        raise Exception("Need to specify a data source to load from")
+    dict_time = time.time()
+    if wts is None:
+        wts = StoreSpec()
+    keys = set(sd.keys())
+    name_buffer = {}
+
+    def _column(key):
+        if key not in keys:
+            if wts.ignore_missing:
+                return None
+            raise KeyError(key)
+        return sd[key]
+
+    for c, alist, ff, datas in _columnar_components(o, wts):
+        path = _columnar_path(c, o, name_buffer)
+        if isinstance(c, Component):
+            odict = {}
+            for a in alist:
+                col = _column("{}:@{}".format(path, a))
+                if col is not None:
+                    odict[a] = _from_column(col)[0]
+            _read_attrs(c, odict, alist, ff, wts)
+        if not datas:
+            continue
+        dlist, dff = wts.get_data_class_attr_list(datas[0])
+        if dlist is None:
+            continue
+        cols = {}
+        for a in dlist:
+            col = _column("{}:{}".format(path, a))
+            if col is None:
+                continue
+            if len(col) != len(datas):
+                raise ValueError(
+                    "Stored state for {}:{} has {} elements, but the model "
+                    "component has {}.".format(
+                        path, a, len(col), len(datas)))
+            cols[a] = _from_column(col)
+        _read_columns(datas, cols, dff, wts)
+    read_time = time.time()
+    pdict = {}
+    pdict["etime_load_file"] = dict_time - start_time
+    pdict["etime_read_dict"] = read_time - dict_time
+    return pdict
+
+
+class StateCheckpoint(object):
+    """
+    An in-memory checkpoint of the state of a Pyomo component, which can be
+    used to roll a model back, e.g. after a failed initialization step.  This
+    is a lighter weight alternative to ``to_json(..., return_dict=True)``
+    followed by ``from_json()``. The attributes a StoreSpec asks for are
+    recorded with direct references to the component data objects, so nothing
+    is converted to names or dictionaries and the state is restored in place.
+
+    A StateCheckpoint can be used as a context manager, in which case the
+    state is restored when leaving the context (or only if an exception was
+    raised, depending on the ``restore`` argument).  Checkpoints are
+    independent of each other so they can be nested.
+
+    Components added to the model after the checkpoint is taken are not
+    affected by restore.
+
+    Args:
+        o: Pyomo component to checkpoint, usually a model or a sub-block
+        wts: StoreSpec object specifying what to record. The default records
+            variable values, whether variables are fixed and whether components
+            are active (``StoreSpec.value_isfixed_isactive(only_fixed=False)``)
+        restore: when to restore the state on leaving a context, "always",
+            "error" (only if an exception was raised) or "never"
+            (default = "always").
+    """
+    def __init__(self, o, wts=None, restore="always"):
+        if restore not in ("always", "error", "never"):
+            raise ValueError(
+                "restore must be 'always', 'error' or 'never', not {}."
+                .format(restore))
+        if wts is None:
+            wts = StoreSpec.value_isfixed_isactive(only_fixed=False)
+        self.component = o
+        self.wts = wts
+        self.restore_on_exit = restore
+        self.save()
+
+    def save(self):
+        """
+        Record the current state of the component, replacing any previously
+        recorded state.
+
+        Returns:
+            None
+        """
+        wts = self.wts
+        self._state = []
+        for c, alist, ff, datas in _columnar_components(self.component, wts):
+            odict = None
+            if isinstance(c, Component):
+                odict = {a: _get_attr(c, a, wts) for a in alist}
+            cols = None
+            dff = None
+            if datas:
+                dlist, dff = wts.get_data_class_attr_list(datas[0])
+                if dlist is not None:
+                    cols = _write_columns(datas, dlist, wts)
+            self._state.append((c, alist, ff, odict, datas, dff, cols))
+
+    def restore(self, diff_only=False):
+        """
+        Restore the recorded state of the component.
+
+        Args:
+            diff_only: if True, compare the current state of each component to
+                the recorded state and only set attributes that have changed.
+                This avoids repeatedly fixing variables and activating
+                components which have not changed.
+
+        Returns:
+            Number of attributes set
+        """
+        wts = self.wts
+        n = 0
+        for c, alist, ff, odict, datas, dff, cols in self._state:
+            if odict is not None:
+                n += _read_attrs(c, odict, alist, ff, wts, diff_only=diff_only)
+            if cols:
+                n += _read_columns(datas, cols, dff, wts, diff_only=diff_only)
+        return n
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if (self.restore_on_exit == "always" or
+                (self.restore_on_exit == "error" and exc_type is not None)):
+            self.restore(diff_only=True)
+        return False
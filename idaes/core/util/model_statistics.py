@@ -24,6 +24,9 @@ from pyomo.environ import Block, Constraint, Expression, Objective, Var, value
 from pyomo.dae import DerivativeVar
 from pyomo.core.expr.current import identify_variables
 from pyomo.core.kernel.component_set import ComponentSet
+from pyomo.core.kernel.component_map import ComponentMap
+
+from idaes.core.util.exceptions import BurntToast
 
 
 # -------------------------------------------------------------------------
@@ -1266,8 +1269,7 @@ def degrees_of_freedom(block):
     Returns:
         Number of degrees of freedom in block.
     """
-    return (number_unfixed_variables_in_activated_equalities(block) -
-            number_activated_equalities(block))
+    return ModelStatistics(block).degrees_of_freedom()
 
 
 def large_residuals_set(block, tol=1e-5):
@@ -1364,72 +1366,7 @@ def report_statistics(block, ostream=None):
     Returns:
         Printed output of the model statistics
     """
-    if ostream is None:
-        ostream = sys.stdout
-
-    tab = " "*4
-    header = '='*72
-
-    if block.name == "unknown":
-        name_str = ""
-    else:
-        name_str = f"-  {block.name}"
-
-    ostream.write("\n")
-    ostream.write(header+"\n")
-    ostream.write(f"Model Statistics  {name_str} \n")
-    ostream.write("\n")
-    ostream.write(f"Degrees of Freedom: "
-                  f"{degrees_of_freedom(block)} \n")
-    ostream.write("\n")
-    ostream.write(f"Total No. Variables: "
-                  f"{number_variables(block)} \n")
-    ostream.write(f"{tab}No. Fixed Variables: "
-                  f"{number_fixed_variables(block)}"
-                  f"\n")
-    ostream.write(
-        f"{tab}No. Unused Variables: "
-        f"{number_unused_variables(block)} (Fixed):"
-        f"{number_fixed_unused_variables(block)})"
-        f"\n")
-    nv_alias = number_variables_only_in_inequalities
-    nfv_alias = number_fixed_variables_only_in_inequalities
-    ostream.write(
-        f"{tab}No. Variables only in Inequalities:"
-        f" {nv_alias(block)}"
-        f" (Fixed: {nfv_alias(block)}) \n")
-    ostream.write("\n")
-    ostream.write(
-            f"Total No. Constraints: "
-            f"{number_total_constraints(block)} \n")
-    ostream.write(
-        f"{tab}No. Equality Constraints: "
-        f"{number_total_equalities(block)}"
-        f" (Deactivated: "
-        f"{number_deactivated_equalities(block)})"
-        f"\n")
-    ostream.write(
-        f"{tab}No. Inequality Constraints: "
-        f"{number_total_inequalities(block)}"
-        f" (Deactivated: "
-        f"{number_deactivated_inequalities(block)})"
-        f"\n")
-    ostream.write("\n")
-    ostream.write(
-        f"No. Objectives: "
-        f"{number_total_objectives(block)}"
-        f" (Deactivated: "
-        f"{number_deactivated_objectives(block)})"
-        f"\n")
-    ostream.write("\n")
-    ostream.write(
-        f"No. Blocks: {number_total_blocks(block)}"
-        f" (Deactivated: "
-        f"{number_deactivated_blocks(block)}) \n")
-    ostream.write(f"No. Expressions: "
-                  f"{number_expressions(block)} \n")
-    ostream.write(header+"\n")
-    ostream.write("\n")
+    ModelStatistics(block).report_statistics(ostream)
 
 
 # -------------------------------------------------------------------------
@@ -1460,3 +1397,859 @@ def activated_block_component_generator(block, ctype):
                                           active=None,
                                           descend_into=False):
             yield c
+
+
+# -------------------------------------------------------------------------
+# Single-pass statistics
+class ModelStatistics(object):
+    """
+    Snapshot of the structure of a model which answers all the queries in this
+    module from a single traversal of the block tree.
+
+    On construction, the block tree is walked once to collect all Blocks,
+    Constraints, Objectives, Vars, DerivativeVars and Expressions, and an
+    incidence index (Constraint -> Vars in its body) is built for all active
+    Constraints. Structural information (which components exist, which are
+    active and which Vars appear in each Constraint) is fixed at construction,
+    whilst fixed flags, values and bounds are read when a query is made. A new
+    snapshot should be created if the structure of the model is changed.
+
+    Methods have the same names and return the same results as the
+    corresponding functions in this module, but do not take a block argument.
+
+    Args:
+        block : model to be studied
+    """
+    def __init__(self, block):
+        self.block = block
+
+        # Blocks
+        self._total_blocks = [block]
+        self._activated_blocks = []
+        # Constraints and Objectives in activated Blocks, including the local
+        # components of block (see activated_block_component_generator)
+        self._constraints = []
+        self._objectives = []
+        # Components collected with active=True, descend_into=True
+        self._active_constraints = []
+        self._variables = []
+        self._derivative_variables = []
+        self._expressions = []
+
+        self._collect(block)
+
+        self._activated_equalities = []
+        self._activated_inequalities = []
+        for c in self._active_constraints:
+            if _is_equality(c):
+                self._activated_equalities.append(c)
+            else:
+                self._activated_inequalities.append(c)
+
+        self._incidence = ComponentMap()
+        for c in self._active_constraints:
+            self._incidence[c] = list(identify_variables(c.body))
+
+        self._cache = {}
+
+    def _collect(self, block):
+        root_active = block.active
+        if root_active:
+            self._activated_blocks.append(block)
+        self._collect_local(block, root_active, root=True)
+
+        stack = [(block, root_active)]
+        while stack:
+            parent, parent_active = stack.pop()
+            for b in parent.component_data_objects(
+                    ctype=Block, active=None, descend_into=False):
+                self._total_blocks.append(b)
+                b_active = parent_active and b.active
+                if b_active:
+                    self._activated_blocks.append(b)
+                    self._collect_local(b, True)
+                stack.append((b, b_active))
+
+    def _collect_local(self, b, active, root=False):
+        if active or root:
+            for c in b.component_data_objects(
+                    ctype=Constraint, active=None, descend_into=False):
+                self._constraints.append(c)
+                if active and c.active:
+                    self._active_constraints.append(c)
+            self._objectives.extend(b.component_data_objects(
+                    ctype=Objective, active=None, descend_into=False))
+        if active:
+            self._variables.extend(b.component_data_objects(
+                    ctype=Var, active=True, descend_into=False))
+            self._derivative_variables.extend(b.component_data_objects(
+                    ctype=DerivativeVar, active=True, descend_into=False))
+            self._expressions.extend(b.component_data_objects(
+                    ctype=Expression, active=True, descend_into=False))
+
+    def _cached_set(self, key, func):
+        # Structural sets are built on first use and then reused
+        try:
+            return self._cache[key]
+        except KeyError:
+            cs = self._cache[key] = func()
+            return cs
+
+    def variables_in_constraint(self, con):
+        """
+        Return the list of Var components which appear in an active Constraint,
+        as recorded in the incidence index.
+
+        Args:
+            con : active Constraint component in the model
+
+        Returns:
+            A list of Var components which appear in con
+        """
+        return self._incidence[con]
+
+    # ---------------------------------------------------------------------
+    # Block methods
+    def total_blocks_set(self):
+        """See :func:`total_blocks_set`."""
+        return ComponentSet(self._total_blocks)
+
+    def number_total_blocks(self):
+        """See :func:`number_total_blocks`."""
+        return len(self._total_blocks)
+
+    def activated_blocks_set(self):
+        """See :func:`activated_blocks_set`."""
+        return ComponentSet(self._activated_blocks)
+
+    def number_activated_blocks(self):
+        """See :func:`number_activated_blocks`."""
+        return len(self._activated_blocks)
+
+    def deactivated_blocks_set(self):
+        """See :func:`deactivated_blocks_set`."""
+        return self.total_blocks_set() - self.activated_blocks_set()
+
+    def number_deactivated_blocks(self):
+        """See :func:`number_deactivated_blocks`."""
+        return self.number_total_blocks() - self.number_activated_blocks()
+
+    # ---------------------------------------------------------------------
+    # Basic Constraint methods
+    def total_constraints_set(self):
+        """See :func:`total_constraints_set`."""
+        return ComponentSet(self._constraints)
+
+    def number_total_constraints(self):
+        """See :func:`number_total_constraints`."""
+        return len(self._constraints)
+
+    def activated_constraints_generator(self):
+        """See :func:`activated_constraints_generator`."""
+        for c in self._constraints:
+            if c.active:
+                yield c
+
+    def activated_constraints_set(self):
+        """See :func:`activated_constraints_set`."""
+        return ComponentSet(self.activated_constraints_generator())
+
+    def number_activated_constraints(self):
+        """See :func:`number_activated_constraints`."""
+        return sum(1 for c in self.activated_constraints_generator())
+
+    def deactivated_constraints_generator(self):
+        """See :func:`deactivated_constraints_generator`."""
+        for c in self._constraints:
+            if not c.active:
+                yield c
+
+    def deactivated_constraints_set(self):
+        """See :func:`deactivated_constraints_set`."""
+        return ComponentSet(self.deactivated_constraints_generator())
+
+    def number_deactivated_constraints(self):
+        """See :func:`number_deactivated_constraints`."""
+        return sum(1 for c in self.deactivated_constraints_generator())
+
+    # ---------------------------------------------------------------------
+    # Equality Constraints
+    def total_equalities_generator(self):
+        """See :func:`total_equalities_generator`."""
+        for c in self._constraints:
+            if _is_equality(c):
+                yield c
+
+    def total_equalities_set(self):
+        """See :func:`total_equalities_set`."""
+        return ComponentSet(self.total_equalities_generator())
+
+    def number_total_equalities(self):
+        """See :func:`number_total_equalities`."""
+        return sum(1 for c in self.total_equalities_generator())
+
+    def activated_equalities_generator(self):
+        """See :func:`activated_equalities_generator`."""
+        for c in self._activated_equalities:
+            yield c
+
+    def activated_equalities_set(self):
+        """See :func:`activated_equalities_set`."""
+        return ComponentSet(self._activated_equalities)
+
+    def number_activated_equalities(self):
+        """See :func:`number_activated_equalities`."""
+        return len(self._activated_equalities)
+
+    def deactivated_equalities_generator(self):
+        """See :func:`deactivated_equalities_generator`."""
+        for c in self.total_equalities_generator():
+            if not c.active:
+                yield c
+
+    def deactivated_equalities_set(self):
+        """See :func:`deactivated_equalities_set`."""
+        return ComponentSet(self.deactivated_equalities_generator())
+
+    def number_deactivated_equalities(self):
+        """See :func:`number_deactivated_equalities`."""
+        return sum(1 for c in self.deactivated_equalities_generator())
+
+    # ---------------------------------------------------------------------
+    # Inequality Constraints
+    def total_inequalities_generator(self):
+        """See :func:`total_inequalities_generator`."""
+        for c in self._constraints:
+            if not _is_equality(c):
+                yield c
+
+    def total_inequalities_set(self):
+        """See :func:`total_inequalities_set`."""
+        return ComponentSet(self.total_inequalities_generator())
+
+    def number_total_inequalities(self):
+        """See :func:`number_total_inequalities`."""
+        return sum(1 for c in self.total_inequalities_generator())
+
+    def activated_inequalities_generator(self):
+        """See :func:`activated_inequalities_generator`."""
+        for c in self._activated_inequalities:
+            yield c
+
+    def activated_inequalities_set(self):
+        """See :func:`activated_inequalities_set`."""
+        return ComponentSet(self._activated_inequalities)
+
+    def number_activated_inequalities(self):
+        """See :func:`number_activated_inequalities`."""
+        return len(self._activated_inequalities)
+
+    def deactivated_inequalities_generator(self):
+        """See :func:`deactivated_inequalities_generator`."""
+        for c in self.total_inequalities_generator():
+            if not c.active:
+                yield c
+
+    def deactivated_inequalities_set(self):
+        """See :func:`deactivated_inequalities_set`."""
+        return ComponentSet(self.deactivated_inequalities_generator())
+
+    def number_deactivated_inequalities(self):
+        """See :func:`number_deactivated_inequalities`."""
+        return sum(1 for c in self.deactivated_inequalities_generator())
+
+    # ---------------------------------------------------------------------
+    # Basic Variable Methods
+    def variables_set(self):
+        """See :func:`variables_set`."""
+        return self._cached_set(
+            "variables", lambda: ComponentSet(self._variables))
+
+    def number_variables(self):
+        """See :func:`number_variables`."""
+        return len(self.variables_set())
+
+    def fixed_variables_generator(self):
+        """See :func:`fixed_variables_generator`."""
+        for v in self._variables:
+            if v.fixed:
+                yield v
+
+    def fixed_variables_set(self):
+        """See :func:`fixed_variables_set`."""
+        return ComponentSet(v for v in self.variables_set() if v.fixed)
+
+    def number_fixed_variables(self):
+        """See :func:`number_fixed_variables`."""
+        return sum(1 for v in self.variables_set() if v.fixed)
+
+    def unfixed_variables_generator(self):
+        """See :func:`unfixed_variables_generator`."""
+        for v in self._variables:
+            if not v.fixed:
+                yield v
+
+    def unfixed_variables_set(self):
+        """See :func:`unfixed_variables_set`."""
+        return ComponentSet(v for v in self.variables_set() if not v.fixed)
+
+    def number_unfixed_variables(self):
+        """See :func:`number_unfixed_variables`."""
+        return sum(1 for v in self.variables_set() if not v.fixed)
+
+    def variables_near_bounds_generator(self, tol=1e-4):
+        """See :func:`variables_near_bounds_generator`."""
+        for v in self._variables:
+            if _is_near_bounds(v, tol):
+                yield v
+
+    def variables_near_bounds_set(self, tol=1e-4):
+        """See :func:`variables_near_bounds_set`."""
+        return ComponentSet(self.variables_near_bounds_generator(tol))
+
+    def number_variables_near_bounds(self, tol=1e-4):
+        """See :func:`number_variables_near_bounds`."""
+        return len(self.variables_near_bounds_set(tol))
+
+    # ---------------------------------------------------------------------
+    # Variables in Constraints
+    def variables_in_activated_constraints_set(self):
+        """See :func:`variables_in_activated_constraints_set`."""
+        return self._cached_set(
+            "in_constraints",
+            lambda: self._variables_in(self._active_constraints))
+
+    def number_variables_in_activated_constraints(self):
+        """See :func:`number_variables_in_activated_constraints`."""
+        return len(self.variables_in_activated_constraints_set())
+
+    def variables_in_activated_equalities_set(self):
+        """See :func:`variables_in_activated_equalities_set`."""
+        return self._cached_set(
+            "in_equalities",
+            lambda: self._variables_in(self._activated_equalities))
+
+    def number_variables_in_activated_equalities(self):
+        """See :func:`number_variables_in_activated_equalities`."""
+        return len(self.variables_in_activated_equalities_set())
+
+    def variables_in_activated_inequalities_set(self):
+        """See :func:`variables_in_activated_inequalities_set`."""
+        return self._cached_set(
+            "in_inequalities",
+            lambda: self._variables_in(self._activated_inequalities))
+
+    def number_variables_in_activated_inequalities(self):
+        """See :func:`number_variables_in_activated_inequalities`."""
+        return len(self.variables_in_activated_inequalities_set())
+
+    def variables_only_in_inequalities(self):
+        """See :func:`variables_only_in_inequalities`."""
+        return (self.variables_in_activated_inequalities_set() -
+                self.variables_in_activated_equalities_set())
+
+    def number_variables_only_in_inequalities(self):
+        """See :func:`number_variables_only_in_inequalities`."""
+        return len(self.variables_only_in_inequalities())
+
+    # ---------------------------------------------------------------------
+    # Fixed Variables in Constraints
+    def fixed_variables_in_activated_equalities_set(self):
+        """See :func:`fixed_variables_in_activated_equalities_set`."""
+        return ComponentSet(v for v in
+                            self.variables_in_activated_equalities_set()
+                            if v.fixed)
+
+    def number_fixed_variables_in_activated_equalities(self):
+        """See :func:`number_fixed_variables_in_activated_equalities`."""
+        return sum(1 for v in self.variables_in_activated_equalities_set()
+                   if v.fixed)
+
+    def unfixed_variables_in_activated_equalities_set(self):
+        """See :func:`unfixed_variables_in_activated_equalities_set`."""
+        return ComponentSet(v for v in
+                            self.variables_in_activated_equalities_set()
+                            if not v.fixed)
+
+    def number_unfixed_variables_in_activated_equalities(self):
+        """See :func:`number_unfixed_variables_in_activated_equalities`."""
+        return sum(1 for v in self.variables_in_activated_equalities_set()
+                   if not v.fixed)
+
+    def fixed_variables_only_in_inequalities(self):
+        """See :func:`fixed_variables_only_in_inequalities`."""
+        return ComponentSet(v for v in self.variables_only_in_inequalities()
+                            if v.fixed)
+
+    def number_fixed_variables_only_in_inequalities(self):
+        """See :func:`number_fixed_variables_only_in_inequalities`."""
+        return len(self.fixed_variables_only_in_inequalities())
+
+    # ---------------------------------------------------------------------
+    # Unused and un-Transformed Variables
+    def unused_variables_set(self):
+        """See :func:`unused_variables_set`."""
+        return (self.variables_set() -
+                self.variables_in_activated_constraints_set())
+
+    def number_unused_variables(self):
+        """See :func:`number_unused_variables`."""
+        return len(self.unused_variables_set())
+
+    def fixed_unused_variables_set(self):
+        """See :func:`fixed_unused_variables_set`."""
+        return ComponentSet(v for v in self.unused_variables_set()
+                            if v.fixed)
+
+    def number_fixed_unused_variables(self):
+        """See :func:`number_fixed_unused_variables`."""
+        return len(self.fixed_unused_variables_set())
+
+    def derivative_variables_set(self):
+        """See :func:`derivative_variables_set`."""
+        return ComponentSet(self._derivative_variables)
+
+    def number_derivative_variables(self):
+        """See :func:`number_derivative_variables`."""
+        return len(self.derivative_variables_set())
+
+    # ---------------------------------------------------------------------
+    # Objective methods
+    def total_objectives_generator(self):
+        """See :func:`total_objectives_generator`."""
+        for o in self._objectives:
+            yield o
+
+    def total_objectives_set(self):
+        """See :func:`total_objectives_set`."""
+        return ComponentSet(self._objectives)
+
+    def number_total_objectives(self):
+        """See :func:`number_total_objectives`."""
+        return len(self._objectives)
+
+    def activated_objectives_generator(self):
+        """See :func:`activated_objectives_generator`."""
+        for o in self._objectives:
+            if o.active:
+                yield o
+
+    def activated_objectives_set(self):
+        """See :func:`activated_objectives_set`."""
+        return ComponentSet(self.activated_objectives_generator())
+
+    def number_activated_objectives(self):
+        """See :func:`number_activated_objectives`."""
+        return sum(1 for o in self.activated_objectives_generator())
+
+    def deactivated_objectives_generator(self):
+        """See :func:`deactivated_objectives_generator`."""
+        for o in self._objectives:
+            if not o.active:
+                yield o
+
+    def deactivated_objectives_set(self):
+        """See :func:`deactivated_objectives_set`."""
+        return ComponentSet(self.deactivated_objectives_generator())
+
+    def number_deactivated_objectives(self):
+        """See :func:`number_deactivated_objectives`."""
+        return sum(1 for o in self.deactivated_objectives_generator())
+
+    # ---------------------------------------------------------------------
+    # Expression methods
+    def expressions_set(self):
+        """See :func:`expressions_set`."""
+        return ComponentSet(self._expressions)
+
+    def number_expressions(self):
+        """See :func:`number_expressions`."""
+        return len(self.expressions_set())
+
+    # ---------------------------------------------------------------------
+    # Other model statistics
+    def degrees_of_freedom(self):
+        """See :func:`degrees_of_freedom`."""
+        return (self.number_unfixed_variables_in_activated_equalities() -
+                self.number_activated_equalities())
+
+    def large_residuals_set(self, tol=1e-5):
+        """See :func:`large_residuals_set`."""
+        return ComponentSet(c for c in self._active_constraints
+                            if _has_large_residual(c, tol))
+
+    def number_large_residuals(self, tol=1e-5):
+        """See :func:`number_large_residuals`."""
+        return sum(1 for c in self._active_constraints
+                   if _has_large_residual(c, tol))
+
+    def active_variables_in_deactivated_blocks_set(self):
+        """See :func:`active_variables_in_deactivated_blocks_set`."""
+        block_set = self.activated_blocks_set()
+        return ComponentSet(v for v in
+                            self.variables_in_activated_constraints_set()
+                            if v.parent_block() not in block_set)
+
+    def number_active_variables_in_deactivated_blocks(self):
+        """See :func:`number_active_variables_in_deactivated_blocks`."""
+        return len(self.active_variables_in_deactivated_blocks_set())
+
+    # ---------------------------------------------------------------------
+    # Reporting methods
+    def report_statistics(self, ostream=None):
+        """See :func:`report_statistics`."""
+        if ostream is None:
+            ostream = sys.stdout
+
+        tab = " "*4
+        header = '='*72
+
+        if self.block.name == "unknown":
+            name_str = ""
+        else:
+            name_str = f"-  {self.block.name}"
+
+        ostream.write("\n")
+        ostream.write(header+"\n")
+        ostream.write(f"Model Statistics  {name_str} \n")
+        ostream.write("\n")
+        ostream.write(f"Degrees of Freedom: "
+                      f"{self.degrees_of_freedom()} \n")
+        ostream.write("\n")
+        ostream.write(f"Total No. Variables: "
+                      f"{self.number_variables()} \n")
+        ostream.write(f"{tab}No. Fixed Variables: "
+                      f"{self.number_fixed_variables()}"
+                      f"\n")
+        ostream.write(
+            f"{tab}No. Unused Variables: "
+            f"{self.number_unused_variables()} (Fixed):"
+            f"{self.number_fixed_unused_variables()})"
+            f"\n")
+        nv_alias = self.number_variables_only_in_inequalities
+        nfv_alias = self.number_fixed_variables_only_in_inequalities
+        ostream.write(
+            f"{tab}No. Variables only in Inequalities:"
+            f" {nv_alias()}"
+            f" (Fixed: {nfv_alias()}) \n")
+        ostream.write("\n")
+        ostream.write(
+                f"Total No. Constraints: "
+                f"{self.number_total_constraints()} \n")
+        ostream.write(
+            f"{tab}No. Equality Constraints: "
+            f"{self.number_total_equalities()}"
+            f" (Deactivated: "
+            f"{self.number_deactivated_equalities()})"
+            f"\n")
+        ostream.write(
+            f"{tab}No. Inequality Constraints: "
+            f"{self.number_total_inequalities()}"
+            f" (Deactivated: "
+            f"{self.number_deactivated_inequalities()})"
+            f"\n")
+        ostream.write("\n")
+        ostream.write(
+            f"No. Objectives: "
+            f"{self.number_total_objectives()}"
+            f" (Deactivated: "
+            f"{self.number_deactivated_objectives()})"
+            f"\n")
+        ostream.write("\n")
+        ostream.write(
+            f"No. Blocks: {self.number_total_blocks()}"
+            f" (Deactivated: "
+            f"{self.number_deactivated_blocks()}) \n")
+        ostream.write(f"No. Expressions: "
+                      f"{self.number_expressions()} \n")
+        ostream.write(header+"\n")
+        ostream.write("\n")
+
+    def _variables_in(self, constraints):
+        var_set = ComponentSet()
+        for c in constraints:
+            var_set.update(self._incidence[c])
+        return var_set
+
+
+# -------------------------------------------------------------------------
+# Incremental degrees of freedom
+class DegreesOfFreedomTracker(object):
+    """
+    Tracks the degrees of freedom of a model incrementally, so that querying
+    the degrees of freedom does not require a traversal of the model.
+
+    The tracker records the number of unfixed variables which appear in active
+    equality constraints, and the number of active equality constraints, in
+    the same way as :func:`degrees_of_freedom`. These counts are updated when
+    variables are fixed or unfixed, or Constraints or Blocks are activated or
+    deactivated, through the methods of the tracker. Changes made directly to
+    the model are not seen by the tracker, and :meth:`rebuild` should be
+    called after any such changes (including adding new components).
+
+    Args:
+        block : model to be tracked
+        validate : if True, the cached degrees of freedom are checked against
+            :func:`degrees_of_freedom` after every change (default = False).
+            This is expensive, and is intended for debugging.
+    """
+    def __init__(self, block, validate=False):
+        self.block = block
+        self.validate_changes = validate
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Rebuild the tracked counts from a full traversal of the model.
+
+        Returns:
+            None
+        """
+        stats = ModelStatistics(self.block)
+
+        # Incidence of every equality constraint seen so far, Constraints
+        # currently counted and number of counted Constraints each Var is in
+        self._incidence = ComponentMap()
+        self._counted = ComponentSet()
+        self._eq_count = ComponentMap()
+        self._n_unfixed = 0
+
+        for c in stats.activated_equalities_generator():
+            self._add_constraint(c, stats.variables_in_constraint(c))
+
+        self._check()
+
+    def degrees_of_freedom(self):
+        """
+        Return the cached degrees of freedom of the model.
+
+        Returns:
+            Number of degrees of freedom in block.
+        """
+        return self._n_unfixed - len(self._counted)
+
+    def number_activated_equalities(self):
+        """
+        Return the cached number of activated equality Constraints.
+
+        Returns:
+            Number of activated equality Constraints in block
+        """
+        return len(self._counted)
+
+    def number_unfixed_variables_in_activated_equalities(self):
+        """
+        Return the cached number of unfixed Vars which appear within activated
+        equality Constraints.
+
+        Returns:
+            Number of unfixed Var components which appear within activated
+            equality Constraints in block
+        """
+        return self._n_unfixed
+
+    def validate(self):
+        """
+        Check the cached degrees of freedom against a full calculation using
+        :func:`degrees_of_freedom`.
+
+        Returns:
+            None
+
+        Raises:
+            BurntToast if the cached value does not match.
+        """
+        dof = degrees_of_freedom(self.block)
+        if dof != self.degrees_of_freedom():
+            raise BurntToast(
+                "{} cached degrees of freedom ({}) do not match the model "
+                "({}). The model may have been modified without notifying "
+                "the DegreesOfFreedomTracker; call rebuild() after such "
+                "changes.".format(self.block.name,
+                                  self.degrees_of_freedom(),
+                                  dof))
+
+    # ---------------------------------------------------------------------
+    # Events
+    def fix(self, var, val=None):
+        """
+        Fix a Var (or all elements of an indexed Var) and update the tracked
+        degrees of freedom.
+
+        Args:
+            var : Var component to be fixed
+            val : value to fix var at (default = None, use current value)
+
+        Returns:
+            None
+        """
+        for v in _data_objects(var):
+            was_fixed = v.fixed
+            if val is None:
+                v.fix()
+            else:
+                v.fix(val)
+            if not was_fixed and self._eq_count.get(v, 0) > 0:
+                self._n_unfixed -= 1
+        self._check()
+
+    def unfix(self, var):
+        """
+        Unfix a Var (or all elements of an indexed Var) and update the tracked
+        degrees of freedom.
+
+        Args:
+            var : Var component to be unfixed
+
+        Returns:
+            None
+        """
+        for v in _data_objects(var):
+            was_fixed = v.fixed
+            v.unfix()
+            if was_fixed and self._eq_count.get(v, 0) > 0:
+                self._n_unfixed += 1
+        self._check()
+
+    def activate(self, comp):
+        """
+        Activate a Constraint or Block and update the tracked degrees of
+        freedom.
+
+        Args:
+            comp : Constraint or Block component to be activated
+
+        Returns:
+            None
+        """
+        ctype = _ctype(comp)
+        comp.activate()
+        for d in _data_objects(comp):
+            if ctype is Constraint:
+                if (d.active and _is_equality(d) and
+                        self._block_active(d.parent_block())):
+                    self._add_constraint(d)
+            elif self._block_active(d):
+                for c in d.component_data_objects(
+                        Constraint, active=True, descend_into=True):
+                    if _is_equality(c):
+                        self._add_constraint(c)
+        self._check()
+
+    def deactivate(self, comp):
+        """
+        Deactivate a Constraint or Block and update the tracked degrees of
+        freedom.
+
+        Args:
+            comp : Constraint or Block component to be deactivated
+
+        Returns:
+            None
+        """
+        ctype = _ctype(comp)
+        for d in _data_objects(comp):
+            if ctype is Constraint:
+                self._remove_constraint(d)
+            else:
+                for c in d.component_data_objects(
+                        Constraint, active=True, descend_into=True):
+                    self._remove_constraint(c)
+        comp.deactivate()
+        self._check()
+
+    # ---------------------------------------------------------------------
+    # Internal methods
+    def _add_constraint(self, c, var_list=None):
+        if c in self._counted:
+            return
+        if var_list is None:
+            try:
+                var_list = self._incidence[c]
+            except KeyError:
+                var_list = list(identify_variables(c.body))
+        self._incidence[c] = var_list
+        self._counted.add(c)
+
+        for v in var_list:
+            n = self._eq_count.get(v, 0)
+            if n == 0 and not v.fixed:
+                self._n_unfixed += 1
+            self._eq_count[v] = n + 1
+
+    def _remove_constraint(self, c):
+        if c not in self._counted:
+            return
+        self._counted.remove(c)
+
+        for v in self._incidence[c]:
+            n = self._eq_count[v] - 1
+            if n == 0:
+                del self._eq_count[v]
+                if not v.fixed:
+                    self._n_unfixed -= 1
+            else:
+                self._eq_count[v] = n
+
+    def _block_active(self, b):
+        # A Block only contributes if it and all its parents up to the tracked
+        # block are active
+        while b is not None:
+            if not b.active:
+                return False
+            if b is self.block:
+                return True
+            b = b.parent_block()
+        return False
+
+    def _check(self):
+        if self.validate_changes:
+            self.validate()
+
+
+def _data_objects(comp):
+    if comp.is_indexed():
+        return list(comp.values())
+    return [comp]
+
+
+def _ctype(comp):
+    ctype = comp.parent_component().type()
+    if ctype is not Constraint and ctype is not Block:
+        raise TypeError(
+            "{} is not a Constraint or Block, and cannot be activated or "
+            "deactivated by a DegreesOfFreedomTracker.".format(comp.name))
+    return ctype
+
+
+def _is_equality(c):
+    return (c.upper is not None and
+            c.lower is not None and
+            c.upper == c.lower)
+
+
+def _has_large_residual(c, tol):
+    return (value(c.lower - c.body()) > tol or
+            value(c.body() - c.upper) > tol)
+
+
+def _is_near_bounds(v, tol):
+    # To avoid errors, check that v has a value
+    if v.value is None:
+        return False
+
+    # First, determine absolute tolerance to apply to bounds
+    if v.ub is not None and v.lb is not None:
+        # Both upper and lower bounds, apply tol to (upper - lower)
+        atol = value((v.ub - v.lb)*tol)
+    elif v.ub is not None:
+        # Only upper bound, apply tol to bound value
+        atol = abs(value(v.ub*tol))
+    elif v.lb is not None:
+        # Only lower bound, apply tol to bound value
+        atol = abs(value(v.lb*tol))
+    else:
+        return False
+
+    return ((v.ub is not None and value(v.ub - v.value) <= atol) or
+            (v.lb is not None and value(v.value - v.lb) <= atol))
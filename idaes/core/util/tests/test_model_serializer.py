@@ -18,19 +18,22 @@ import unittest
 import os
 
 from pyomo.environ import *
-from idaes.core.util import to_json, from_json, StoreSpec
+from idaes.core.util import (to_json, from_json, to_columnar, from_columnar,
+                             StoreSpec, StateCheckpoint)
 
 __author__ = "John Eslick"
 
 
 class TestModelSerialize(unittest.TestCase):
     fname = "crAzYStuff1010202030.json"
+    fname_npz = "crAzYStuff1010202030.npz"
 
     def tearDown(self):
-        try:
-            os.remove(self.fname)
-        except:
-            pass
+        for f in (self.fname, self.fname_npz):
+            try:
+                os.remove(f)
+            except:
+                pass
 
     def setup_model01(self):
         model = ConcreteModel()
@@ -313,5 +316,173 @@ class TestModelSerialize(unittest.TestCase):
         assert(abs(model.ipopt_zU_out[model.x[1]] - 10) < 1e-5)
         assert(abs(model.ipopt_zU_out[model.x[2]] - 10) < 1e-5)
 
+
+    def test_columnar01(self):
+        """
+        Simple test of load save npz
+        """
+        model = self.setup_model01()
+        a = model.b[1].a
+        b = model.b[1].b
+        to_columnar(model, fname=self.fname_npz)
+        # change variable values
+        a.value = 0.11
+        b.value = 0.11
+        a.unfix()
+        model.b[1].deactivate()
+        b.setlb(2)
+        b.setub(4)
+        # reload values
+        from_columnar(model, fname=self.fname_npz)
+        #make sure they are right
+        assert(a.fixed)
+        assert(model.b[1].active)
+        assert(abs(value(b) - 20) < 1e-4)
+        assert(abs(value(a) - 2) < 1e-4)
+        assert(abs(b.lb - -100) < 1e-4)
+        assert(abs(b.ub - 100) < 1e-4)
+
+    def test_columnar02(self):
+        """Test in-memory dict, None values and unbounded variables"""
+        model = self.setup_model02()
+        model.y = Var([1, 2, 3])
+        model.y[2].value = 4
+        model.y[3].setlb(1)
+        sd = to_columnar(model, return_dict=True)
+        assert sd["x:value"].dtype == float
+        assert sd["x:fixed"].dtype == bool
+        assert len(sd["y:value"]) == 3
+        model.y[1].value = 1
+        model.y[2].value = 1
+        model.y[3].setlb(None)
+        model.y[1].setub(5)
+        model.a.value = 7
+        from_columnar(model, sd=sd)
+        assert(model.y[1].value is None)
+        assert(model.y[2].value == 4)
+        assert(model.y[3].lb == 1)
+        assert(model.y[1].ub is None)
+        assert(value(model.a) == 1)
+
+    def test_columnar03(self):
+        """
+        Like test04, only load fixed variable values and active flags.
+        """
+        model = self.setup_model02()
+        x = model.x
+        x[1].fix(1)
+        wts = StoreSpec.value_isfixed_isactive(only_fixed=True)
+        to_columnar(model, fname=self.fname_npz, wts=wts, compress=True)
+        x[1].unfix()
+        x[1].value = 2
+        x[2].value = 10
+        model.g.deactivate()
+        from_columnar(model, fname=self.fname_npz, wts=wts)
+        assert(x[1].fixed)
+        assert(abs(value(x[1]) - 1) < 1e-5)
+        assert(abs(value(x[2]) - 10) < 1e-5)
+        assert(model.g.active)
+
+    def test_columnar04(self):
+        """Sub-blocks are saved relative to the component"""
+        model = self.setup_model01()
+        sd = to_columnar(model.b[1], return_dict=True, wts=StoreSpec.value())
+        assert "a:value" in sd
+        model2 = self.setup_model01()
+        model2.b[2].a = Var(initialize=3)
+        model2.b[2].b = Var(initialize=4)
+        from_columnar(model2.b[2], sd=sd, wts=StoreSpec.value())
+        assert(abs(value(model2.b[2].a) - 2) < 1e-5)
+        assert(abs(value(model2.b[2].b) - 20) < 1e-5)
+
+    def test_columnar05(self):
+        """Mismatched structure raises an exception"""
+        model = self.setup_model02()
+        sd = to_columnar(model, return_dict=True)
+        model2 = ConcreteModel()
+        model2.x = Var([1, 2, 3])
+        with self.assertRaises(ValueError):
+            from_columnar(model2, sd=sd)
+        wts = StoreSpec(ignore_missing=False)
+        model3 = ConcreteModel()
+        model3.z = Var()
+        with self.assertRaises(KeyError):
+            from_columnar(model3, sd=sd, wts=wts)
+
+    def test_checkpoint01(self):
+        """Checkpoint and restore values, fixed and active in place"""
+        model = self.setup_model01()
+        a = model.b[1].a
+        b = model.b[1].b
+        cp = StateCheckpoint(model)
+        a.value = 0.11
+        b.value = 0.11
+        a.unfix()
+        model.b[1].deactivate()
+        b.setlb(2)
+        cp.restore()
+        assert(a.fixed)
+        assert(model.b[1].active)
+        assert(abs(value(b) - 20) < 1e-4)
+        assert(abs(value(a) - 2) < 1e-4)
+        # bounds are not in the default StoreSpec
+        assert(abs(b.lb - 2) < 1e-4)
+
+    def test_checkpoint02(self):
+        """Only load fixed variable values, as used in initialization"""
+        model = self.setup_model02()
+        x = model.x
+        x[1].fix(1)
+        wts = StoreSpec.value_isfixed_isactive(only_fixed=True)
+        with StateCheckpoint(model, wts=wts):
+            x[1].unfix()
+            x[1].value = 2
+            x[2].value = 10
+            model.g.deactivate()
+        assert(x[1].fixed)
+        assert(abs(value(x[1]) - 1) < 1e-5)
+        assert(abs(value(x[2]) - 10) < 1e-5)
+        assert(model.g.active)
+
+    def test_checkpoint03(self):
+        """Nested checkpoints and restore only on error"""
+        model = self.setup_model02()
+        x = model.x
+        with StateCheckpoint(model) as outer:
+            x[1].value = 3
+            with self.assertRaises(RuntimeError):
+                with StateCheckpoint(model, restore="error"):
+                    x[1].value = 4
+                    x[2].fix(5)
+                    raise RuntimeError("failed step")
+            assert(abs(value(x[1]) - 3) < 1e-5)
+            assert(not x[2].fixed)
+            with StateCheckpoint(model, restore="error"):
+                x[2].value = 6
+            assert(abs(value(x[2]) - 6) < 1e-5)
+        assert(abs(value(x[1]) - 1.5) < 1e-5)
+        assert(abs(value(x[2]) - 2.5) < 1e-5)
+
+    def test_checkpoint04(self):
+        """Diff-only restore only sets changed attributes"""
+        model = self.setup_model01()
+        cp = StateCheckpoint(model)
+        assert cp.restore(diff_only=True) == 0
+        model.b[1].b.value = 3
+        model.b[1].a.unfix()
+        assert cp.restore(diff_only=True) == 2
+        assert(model.b[1].a.fixed)
+        assert(abs(value(model.b[1].b) - 20) < 1e-5)
+        model.b[1].b.value = 3
+        cp.save()
+        model.b[1].b.value = 4
+        cp.restore()
+        assert(abs(value(model.b[1].b) - 3) < 1e-5)
+
+    def test_checkpoint05(self):
+        with self.assertRaises(ValueError):
+            StateCheckpoint(self.setup_model01(), restore="sometimes")
+
+
 if __name__ == '__main__':
     unittest.main()
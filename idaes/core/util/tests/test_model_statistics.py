@@ -14,6 +14,7 @@
 This module contains miscalaneous utility functions for use in IDAES models.
 """
 
+import sys
 import pytest
 
 from pyomo.environ import (Block,
@@ -26,6 +27,10 @@ from pyomo.environ import (Block,
                            TransformationFactory)
 from pyomo.dae import ContinuousSet, DerivativeVar
 
+from pyomo.core.kernel.component_set import ComponentSet
+
+from idaes.core.util.exceptions import BurntToast
+
 from idaes.core.util.model_statistics import *
 
 
@@ -458,3 +463,188 @@ def test_number_active_variables_in_deactivated_blocks(m):
 # Reporting methods
 def test_report_statistics(m):
     report_statistics(m)
+
+
+# -------------------------------------------------------------------------
+# Single-pass statistics
+_queries = [
+    "total_blocks_set", "number_total_blocks",
+    "activated_blocks_set", "number_activated_blocks",
+    "deactivated_blocks_set", "number_deactivated_blocks",
+    "total_constraints_set", "number_total_constraints",
+    "activated_constraints_set", "number_activated_constraints",
+    "deactivated_constraints_set", "number_deactivated_constraints",
+    "total_equalities_set", "number_total_equalities",
+    "activated_equalities_set", "number_activated_equalities",
+    "deactivated_equalities_set", "number_deactivated_equalities",
+    "total_inequalities_set", "number_total_inequalities",
+    "activated_inequalities_set", "number_activated_inequalities",
+    "deactivated_inequalities_set", "number_deactivated_inequalities",
+    "variables_set", "number_variables",
+    "fixed_variables_set", "number_fixed_variables",
+    "unfixed_variables_set", "number_unfixed_variables",
+    "variables_near_bounds_set", "number_variables_near_bounds",
+    "variables_in_activated_constraints_set",
+    "number_variables_in_activated_constraints",
+    "variables_in_activated_equalities_set",
+    "number_variables_in_activated_equalities",
+    "variables_in_activated_inequalities_set",
+    "number_variables_in_activated_inequalities",
+    "variables_only_in_inequalities",
+    "number_variables_only_in_inequalities",
+    "fixed_variables_in_activated_equalities_set",
+    "number_fixed_variables_in_activated_equalities",
+    "unfixed_variables_in_activated_equalities_set",
+    "number_unfixed_variables_in_activated_equalities",
+    "fixed_variables_only_in_inequalities",
+    "number_fixed_variables_only_in_inequalities",
+    "unused_variables_set", "number_unused_variables",
+    "fixed_unused_variables_set", "number_fixed_unused_variables",
+    "derivative_variables_set", "number_derivative_variables",
+    "total_objectives_set", "number_total_objectives",
+    "activated_objectives_set", "number_activated_objectives",
+    "deactivated_objectives_set", "number_deactivated_objectives",
+    "expressions_set", "number_expressions",
+    "active_variables_in_deactivated_blocks_set",
+    "number_active_variables_in_deactivated_blocks"]
+
+
+def _assert_same_statistics(blk):
+    stats = ModelStatistics(blk)
+    mod = sys.modules[ModelStatistics.__module__]
+    for q in _queries:
+        expected = getattr(mod, q)(blk)
+        result = getattr(stats, q)()
+        if isinstance(expected, ComponentSet):
+            assert len(result) == len(expected), q
+            assert all(c in expected for c in result), q
+        else:
+            assert result == expected, q
+
+
+def test_model_statistics_matches_functions(m):
+    # Initialize derivative var values so no errors occur
+    for v in m.dv.keys():
+        m.dv[v] = 0
+    _assert_same_statistics(m)
+
+    stats = ModelStatistics(m)
+    assert stats.degrees_of_freedom() == 10
+    assert stats.number_large_residuals() == number_large_residuals(m)
+    assert len(stats.large_residuals_set()) == 2
+
+
+def test_model_statistics_sub_blocks(m):
+    _assert_same_statistics(m.b1)
+    _assert_same_statistics(m.b1.sb)
+    _assert_same_statistics(m.b2["a"])
+
+
+def test_model_statistics_deactivated_model(m):
+    m.deactivate()
+    _assert_same_statistics(m)
+
+
+def test_model_statistics_fixed_flags_read_at_query(m):
+    stats = ModelStatistics(m)
+    assert stats.degrees_of_freedom() == 10
+
+    m.v[1].fix()
+    assert stats.degrees_of_freedom() == 9
+    assert stats.degrees_of_freedom() == degrees_of_freedom(m)
+
+
+def test_model_statistics_incidence(m):
+    stats = ModelStatistics(m)
+    assert list(stats.variables_in_constraint(m.b2["b"].c1)) == \
+        [m.b2["b"].v1]
+
+
+# -------------------------------------------------------------------------
+# Incremental degrees of freedom
+def test_dof_tracker_build(m):
+    tracker = DegreesOfFreedomTracker(m)
+    assert tracker.degrees_of_freedom() == degrees_of_freedom(m)
+    assert tracker.number_activated_equalities() == \
+        number_activated_equalities(m)
+    assert tracker.number_unfixed_variables_in_activated_equalities() == \
+        number_unfixed_variables_in_activated_equalities(m)
+
+
+def test_dof_tracker_fix_unfix(m):
+    tracker = DegreesOfFreedomTracker(m, validate=True)
+
+    tracker.fix(m.v[1])
+    assert tracker.degrees_of_freedom() == 9
+    # Fixing an already fixed Var changes nothing
+    tracker.fix(m.v[1], 2)
+    assert m.v[1].value == 2
+    assert tracker.degrees_of_freedom() == 9
+
+    # Vars which are not in active equalities do not change DoF
+    tracker.fix(m.b2["b"].v2)
+    assert tracker.degrees_of_freedom() == 9
+
+    tracker.fix(m.v)
+    assert tracker.degrees_of_freedom() == degrees_of_freedom(m)
+
+    tracker.unfix(m.v)
+    tracker.unfix(m.b2["b"].v1)
+    assert tracker.degrees_of_freedom() == 11
+
+
+def test_dof_tracker_constraints(m):
+    tracker = DegreesOfFreedomTracker(m, validate=True)
+
+    tracker.deactivate(m.b2["b"].c1)
+    assert tracker.degrees_of_freedom() == 11
+    tracker.unfix(m.b2["b"].v1)
+    assert tracker.degrees_of_freedom() == 11
+
+    tracker.activate(m.b2["b"].c1)
+    assert tracker.degrees_of_freedom() == 11
+    tracker.activate(m.b2["a"].c1)
+    assert tracker.degrees_of_freedom() == 10
+
+    # Constraints in deactivated Blocks are not counted
+    tracker.activate(m.b1.sb.c1)
+    assert tracker.degrees_of_freedom() == 10
+
+    tracker.deactivate(m.dv_disc_eq)
+    assert tracker.degrees_of_freedom() == degrees_of_freedom(m)
+
+
+def test_dof_tracker_blocks(m):
+    tracker = DegreesOfFreedomTracker(m, validate=True)
+
+    m.b1.v1.unfix()
+    tracker.rebuild()
+    tracker.activate(m.b1)
+    assert tracker.degrees_of_freedom() == degrees_of_freedom(m)
+
+    tracker.deactivate(m.b1.sb)
+    tracker.deactivate(m.b2)
+    assert tracker.degrees_of_freedom() == degrees_of_freedom(m)
+
+    tracker.activate(m.b2["b"])
+    tracker.activate(m.b1.sb)
+    assert tracker.degrees_of_freedom() == degrees_of_freedom(m)
+
+    tracker.deactivate(m)
+    assert tracker.degrees_of_freedom() == 0
+
+
+def test_dof_tracker_validate(m):
+    tracker = DegreesOfFreedomTracker(m)
+    m.v[1].fix()
+    with pytest.raises(BurntToast):
+        tracker.validate()
+
+    tracker.rebuild()
+    tracker.validate()
+
+
+def test_dof_tracker_bad_component(m):
+    tracker = DegreesOfFreedomTracker(m)
+    with pytest.raises(TypeError):
+        tracker.activate(m.e)
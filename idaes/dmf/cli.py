@@ -34,7 +34,7 @@ import humanize
 import pendulum
 
 # package
-from idaes.dmf import DMF, DMFConfig, resource
+from idaes.dmf import DMF, DMFConfig, resource, resourcedb
 from idaes.dmf import errors
 from idaes.dmf.workspace import Fields
 from idaes.dmf import util
@@ -1042,6 +1042,45 @@ def rm(identifier, yes, multiple, list_resources):
     click.echo(s)
 
 
+@click.command(help="Migrate the resource database to SQLite")
+@click.option(
+    "--db-file",
+    default="resourcedb.sqlite",
+    help="New database file name, in the workspace directory. "
+    "(default=resourcedb.sqlite)",
+)
+def migrate(db_file):
+    """Copy all resources from the workspace TinyDB file into a new SQLite
+    database, and switch the workspace to it. The old file is not removed.
+    """
+    try:
+        d = DMF()
+    except errors.WorkspaceError as e:
+        click.echo(f"Workspace error: {e}")
+        sys.exit(Code.WORKSPACE_NOT_FOUND.value)
+
+    def is_sqlite(name):
+        suffix = pathlib.Path(name).suffix.lower()
+        return resourcedb.backends.get(suffix) is resourcedb.SQLiteResourceDB
+
+    if is_sqlite(d.db_file):
+        click.echo(f"Resource database '{d.db_file}' is already SQLite")
+        sys.exit(Code.DMF_OPER.value)
+    if not is_sqlite(db_file):
+        click.echo(f"New database file '{db_file}' must end in one of: "
+                   f"{', '.join(resourcedb.backends)}")
+        sys.exit(Code.INPUT_VALUE.value)
+    source = pathlib.Path(d.root) / d.db_file
+    dest = pathlib.Path(d.root) / db_file
+    try:
+        n = resourcedb.migrate_resource_db(str(source), str(dest))
+    except errors.FileError as err:
+        click.echo(f"Cannot migrate resource database: {err}")
+        sys.exit(Code.DMF_OPER.value)
+    d.db_file = db_file  # saved in the workspace configuration
+    click.echo(f"Migrated {n} resources from '{source.name}' to '{dest.name}'")
+
+
 ######################################################################################
 
 
@@ -1300,6 +1339,7 @@ base_command.add_command(find)
 base_command.add_command(info)
 base_command.add_command(related)
 base_command.add_command(rm)
+base_command.add_command(migrate)
 
 if __name__ == '__main__':
     base_command()
@@ -150,7 +150,8 @@ class DMF(workspace.Workspace, HasTraits):
     :class:`idaes.dmf.workspace.Workspace`.
     """
 
-    db_file = Unicode(help='Database file name')
+    db_file = Unicode(help='Database file name. Files ending in .sqlite, '
+                           '.sqlite3 or .db are SQLite databases.')
     datafile_dir = Unicode(help='Data file directory, ' 'relative to DMF root')
 
     CONF_DB_FILE = 'db_file'
@@ -217,7 +218,7 @@ class DMF(workspace.Workspace, HasTraits):
                 raise errors.WorkspaceError(msg)
         # set up rest of DMF
         path = os.path.join(self.root, self.db_file)
-        self._db = resourcedb.ResourceDB(path)
+        self._db = resourcedb.open_resource_db(path)
         self._datafile_path = os.path.join(self.root, self.datafile_dir)
         if not os.path.exists(self._datafile_path):
             os.mkdir(self._datafile_path, 0o750)
@@ -573,16 +574,7 @@ class DMF(workspace.Workspace, HasTraits):
         Raises:
             NoSuchResourceError: if the starting resource is not found
         """
-        if meta is None:
-            meta = [
-                resource.Resource.ID_FIELD,
-                resource.Resource.TYPE_FIELD,
-                "desc",
-                "version_info",
-            ]
-        else:
-            if resource.Resource.ID_FIELD not in meta:
-                meta.insert(0, resource.Resource.ID_FIELD)
+        meta = self._related_meta(meta)
         try:
             return self._db.find_related(
                 rsrc.id,
@@ -594,6 +586,47 @@ class DMF(workspace.Workspace, HasTraits):
         except KeyError:
             raise errors.NoSuchResourceError(id_=rsrc.id)
 
+    def find_related_many(
+        self, rsrc_list, filter_dict=None, maxdepth=0, meta=None, outgoing=True
+    ):
+        """Find related resources for many starting points at once.
+
+        This is faster than calling :meth:`find_related` for each resource,
+        since relations shared between the searches are looked up only once.
+
+        Args:
+            rsrc_list (List[resource.Resource]): Resource starting points
+            filter_dict (dict): See parameter of same name in :meth:`find`.
+            maxdepth (int): Maximum depth of search (starts at 1)
+            meta (List[str]): Metadata fields to extract for meta part
+            outgoing (bool): See :meth:`find_related`
+        Returns:
+            dict: For each resource identifier, a list of triples
+            (depth, Triple, meta) as generated by :meth:`find_related`.
+        """
+        meta = self._related_meta(meta)
+        return self._db.find_related_many(
+            [rsrc.id for rsrc in rsrc_list],
+            outgoing=outgoing,
+            maxdepth=maxdepth,
+            meta=meta,
+            filter_dict=filter_dict,
+        )
+
+    @staticmethod
+    def _related_meta(meta):
+        if meta is None:
+            meta = [
+                resource.Resource.ID_FIELD,
+                resource.Resource.TYPE_FIELD,
+                "desc",
+                "version_info",
+            ]
+        else:
+            if resource.Resource.ID_FIELD not in meta:
+                meta.insert(0, resource.Resource.ID_FIELD)
+        return meta
+
     def remove(self, identifier=None, filter_dict=None, update_relations=True):
         """Remove one or more resources, from its identifier or a filter.
         Unless told otherwise, this method will scan the DB and remove
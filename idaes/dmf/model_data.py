@@ -20,6 +20,13 @@ __author__ = "John Eslick"
 
 import logging
 import csv
+import functools
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import namedtuple
 import pandas as pd
 import numpy as np
 import pint
@@ -186,6 +193,77 @@ _ignore_units = [
 ]
 
 
+# pint unit registries, keyed by unit system. Creating a registry is slow, so
+# each one is created on first use and then shared.
+_registries = {}
+
+
+def _get_registry(system=None):
+    """Get the shared pint unit registry for a system of units, creating it if
+    needed.
+
+    Args:
+        system (str): unit system, None for the pint default
+
+    Returns:
+        (pint.UnitRegistry): unit registry
+    """
+    ureg = _registries.get(system, None)
+    if ureg is None:
+        ureg = _registries.setdefault(system, pint.UnitRegistry(system=system))
+    return ureg
+
+
+# A unit conversion reduced to y = scale*x + offset (+ ambient_scale*ambient
+# for gauge pressures), where units is the string for the units of y. If the
+# conversion is not of that form, scale and offset are None.
+_ConversionPlan = namedtuple(
+    "_ConversionPlan", ["scale", "offset", "units", "ambient_scale"]
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _conversion_plan(frm, to, system, ambient_pressure_unit):
+    """Work out the conversion from one unit to another, so it can be applied
+    to any number of arrays without going through pint again.
+
+    Args:
+        frm (str): original unit string, which pint should recognize
+        to (str): new unit string, or None to convert to the base units of
+            the system
+        system (str): unit system
+        ambient_pressure_unit (str): unit of ambient pressure to add, for a
+            gauge pressure, otherwise None
+
+    Returns:
+        (_ConversionPlan): The conversion, or None if frm is not defined
+    """
+    ureg = _get_registry(system)
+    try:
+        ureg.parse_expression(frm)
+    except pint.errors.UndefinedUnitError:
+        return None
+    x = np.array([0.0, 1.0, 1000.0])
+    y = _pint_convert(x, frm, to, ureg)
+    scale, offset = y.magnitude[1] - y.magnitude[0], y.magnitude[0]
+    if not np.allclose(scale * x + offset, y.magnitude, rtol=1e-12, atol=0):
+        scale, offset = None, None
+    ambient_scale = None
+    if ambient_pressure_unit is not None:
+        ambient = ureg.Quantity(1.0, ureg.parse_expression(ambient_pressure_unit))
+        ambient_scale = ambient.to(y.units).magnitude
+    return _ConversionPlan(scale, offset, str(y.units), ambient_scale)
+
+
+def _pint_convert(x, frm, to, ureg):
+    """Convert x from unit frm to unit to (or base units, if to is None) with
+    pint, returning a pint quantity."""
+    q = ureg.Quantity(np.array(x), ureg.parse_expression(frm))
+    if to is None:
+        return q.to_base_units()
+    return q.to(to)
+
+
 def unit_convert(
     x,
     frm,
@@ -204,6 +282,9 @@ def unit_convert(
     to pint as-is. This translation of the unit is done so that data can be read
     in with the original provided units.
 
+    The conversion for each combination of units is worked out with pint once,
+    and then applied to the whole array as a scale and offset.
+
     Args:
         x (float, numpy.array, pandas.series): quantity to convert
         frm (str): original unit string
@@ -224,7 +305,6 @@ def unit_convert(
     Returns:
         (tuple): quantity and unit string
     """
-    ureg = pint.UnitRegistry(system=system)
     if frm in unit_string_map:
         frm = unit_string_map[frm]
     elif frm in _unit_strings:
@@ -237,27 +317,113 @@ def unit_convert(
     elif frm in _gauge_pressures:
         gauge = True
         frm = _gauge_pressures[frm]
-    q = ureg.Quantity
     if (frm in _ignore_units) or (frm in ignore_units):
         return (x, frm)
+    plan = _conversion_plan(
+        frm, to, system, ambient_pressure_unit if gauge else None
+    )
+    if plan is None:
+        warnings.warn(
+            "In unit conversion, from unit '{}' is not defined."
+            " No conversion.".format(frm),
+            UserWarning,
+        )
+        return x, frm
+    if plan.scale is None:
+        y = _pint_convert(x, frm, to, _get_registry(system)).magnitude
     else:
-        try:
-            ureg.parse_expression(frm)
-        except pint.errors.UndefinedUnitError:
-            warnings.warn(
-                "In unit conversion, from unit '{}' is not defined."
-                " No conversion.".format(frm),
-                UserWarning,
-            )
-            return x, frm
-    if to is None:
-        y = q(np.array(x), ureg.parse_expression(frm)).to_base_units()
-    else:
-        y = q(np.array(x), ureg.parse_expression(frm)).to(to)
+        y = np.asarray(x) * plan.scale + plan.offset
     if gauge:
         # convert gauge pressure to absolute
-        y = y + ambient_pressure * ureg.parse_expression(ambient_pressure_unit)
-    return (y.magnitude, str(y.units))
+        y = y + np.asarray(ambient_pressure) * plan.ambient_scale
+    return (y, plan.units)
+
+
+def _read_metadata(csv_file_metadata, rename_mapper):
+    """Read the tag metadata csv file described in :func:`read_data`."""
+    metadata = {}
+    if csv_file_metadata:
+        with open(csv_file_metadata, "r") as f:
+            reader = csv.reader(f)
+            for line in reader:
+                tag = line[0].strip()
+                if rename_mapper:
+                    tag = rename_mapper(tag)
+                metadata[tag] = {
+                    "reference_string": line[1].strip(),
+                    "reference": None,
+                    "description": line[2].strip(),
+                    "units": line[3].strip(),
+                }
+    return metadata
+
+
+def _map_model(metadata, model):
+    """Map the tags with a reference string to the model."""
+    for tag, md in metadata.items():
+        if md["reference_string"]:
+            try:
+                md["reference"] = pyo.Reference(
+                    eval(md["reference_string"], {"m": model})
+                )
+            except KeyError:
+                warnings.warn(
+                    "Tag reference {} not found".format(md["reference_string"]),
+                    UserWarning,
+                )
+
+
+def _clean_columns(df, metadata, rename_mapper):
+    """Drop empty columns and columns with no metadata, and rename the rest,
+    in place."""
+    df.drop(df.columns[df.columns.str.contains("Unnamed")], axis=1, inplace=True)
+    df.rename(mapper=_strip, axis="columns", inplace=True)
+    if rename_mapper:
+        # Change tag names in some systematic way with the function rename_mapper
+        df.rename(mapper=rename_mapper, axis="columns", inplace=True)
+    # Drop the columns with no metadata (assuming those are columns to ignore)
+    for tag in df:
+        if tag not in metadata:
+            df.drop(tag, axis=1, inplace=True)
+
+
+def _ambient_pressure(df, ambient_pressure):
+    """Check if a data tag was specified to use as ambient pressure in conversion
+    of gauge pressures.  If so, return the numbers instead of the tag string."""
+    if isinstance(ambient_pressure, str):
+        try:
+            ambient_pressure = np.array(df[ambient_pressure])
+        except KeyError:
+            _log.exception(
+                "Tag '{}' does not exist for ambient pressure".format(ambient_pressure)
+            )
+            raise
+    return ambient_pressure
+
+
+def _convert_units(df, units, unit_system, ambient_pressure, ambient_pressure_unit):
+    """Convert all the columns of df to a system of units, in place.
+
+    Args:
+        df (DataFrame): data
+        units (dict): original unit string for each tag in df
+        unit_system (str): system of units to convert to
+        ambient_pressure (float, numpy.array): see :func:`unit_convert`
+        ambient_pressure_unit (str): see :func:`unit_convert`
+
+    Returns:
+        (dict): new unit string for each tag
+    """
+    new_units = {}
+    for tag in df:
+        df[tag], new_units[tag] = unit_convert(
+            df[tag],
+            units[tag],
+            system=unit_system,
+            ambient_pressure=ambient_pressure,
+            ambient_pressure_unit=ambient_pressure_unit,
+        )
+    return new_units
 
 
 def read_data(
@@ -268,6 +434,8 @@ def read_data(
     unit_system=None,
     ambient_pressure=1.0,
     ambient_pressure_unit="atm",
+    cache_dir=None,
+    chunksize=100000,
 ):
     """
     Read CSV data into a Pandas DataFrame.
@@ -282,6 +450,14 @@ def read_data(
     measure should be something that is recognized by pint, or in the aliases
     defined in this file. Any tags not listed in the metadata will be dropped.
 
+    If a cache directory is given, the converted data are written there the
+    first time the file is read, one file per tag, and later reads of the same
+    data with the same settings return columns memory-mapped from the cache
+    instead of parsing the csv file again. The cache is written with
+    :func:`read_data_chunks`, so the whole file is never held in memory. All
+    data columns must be numeric, and the row labels must be numbers, times or
+    strings, to use the cache.
+
     Args:
         csv_file (str): Path of file to read
         csv_file_metadata (str): Path of csv file to read column metadata from
@@ -293,6 +469,9 @@ def read_data(
             supplied the corresponding data tag is assumed to be ambient pressure
         ambient_pressure_unit (str): Optional ambient pressure unit, should be a
             unit recognized by pint.
+        cache_dir (str): Optional directory for the columnar cache
+        chunksize (int): Number of rows to read at a time when writing the
+            cache
 
     Returns:
         (DataFrame): A Pandas data frame with tags in columns and rows indexed
@@ -300,67 +479,292 @@ def read_data(
         (dict): Column metadata, units of measure, description, and model
             mapping information.
     """
+    if cache_dir is not None:
+        return _read_data_cached(
+            cache_dir,
+            chunksize,
+            csv_file,
+            csv_file_metadata,
+            model=model,
+            rename_mapper=rename_mapper,
+            unit_system=unit_system,
+            ambient_pressure=ambient_pressure,
+            ambient_pressure_unit=ambient_pressure_unit,
+        )
     # read file
     df = pd.read_csv(csv_file, parse_dates=True, index_col=0)
-    # Drop empty columns
-    df.drop(df.columns[df.columns.str.contains("Unnamed")], axis=1, inplace=True)
-    df.rename(mapper=_strip, axis="columns", inplace=True)
-    if rename_mapper:
-        # Change tag names in some systematic way with the function rename_mapper
-        df.rename(mapper=rename_mapper, axis="columns", inplace=True)
-    metadata = {}
-    if csv_file_metadata:
-        with open(csv_file_metadata, "r") as f:
-            reader = csv.reader(f)
-            for line in reader:
-                tag = line[0].strip()
-                if rename_mapper:
-                    tag = rename_mapper(tag)
-                metadata[tag] = {
-                    "reference_string": line[1].strip(),
-                    "reference": None,
-                    "description": line[2].strip(),
-                    "units": line[3].strip(),
-                }
+    metadata = _read_metadata(csv_file_metadata, rename_mapper)
     # If a model was provided, map the tags with a reference string to the model
     if model:
-        for tag, md in metadata.items():
-            if md["reference_string"]:
-                try:
-                    md["reference"] = pyo.Reference(
-                        eval(md["reference_string"], {"m": model})
-                    )
-                except KeyError:
-                    warnings.warn(
-                        "Tag reference {} not found".format(md["reference_string"]),
-                        UserWarning,
-                    )
-    # Drop the columns with no metadata (assuming those are columns to ignore)
-    for tag in df:
-        if tag not in metadata:
-            df.drop(tag, axis=1, inplace=True)
-
-    # Check if a data tag was specified to use as ambient pressure in conversion
-    # of gauge pressures.  If so, get the numbers and replace the tag string
-    if isinstance(ambient_pressure, str):
-        try:
-            ambient_pressure = np.array(df[ambient_pressure])
-        except KeyError:
-            _log.exception(
-                "Tag '{}' does not exist for ambient pressure".format(ambient_pressure)
-            )
-            raise
+        _map_model(metadata, model)
+    _clean_columns(df, metadata, rename_mapper)
+    ambient_pressure = _ambient_pressure(df, ambient_pressure)
 
     # If unit_system is specified bulk convert everything to that system of units
     # also update the meta data
     if unit_system:
-        for tag in df:
-            df[tag], metadata[tag]["units"] = unit_convert(
-                df[tag],
-                metadata[tag]["units"],
-                system=unit_system,
-                ambient_pressure=ambient_pressure,
-                ambient_pressure_unit=ambient_pressure_unit,
-            )
+        units = {tag: metadata[tag]["units"] for tag in df}
+        new_units = _convert_units(
+            df, units, unit_system, ambient_pressure, ambient_pressure_unit
+        )
+        for tag, u in new_units.items():
+            metadata[tag]["units"] = u
+
+    return df, metadata
+
+
+def read_data_chunks(
+    csv_file,
+    csv_file_metadata,
+    model=None,
+    rename_mapper=None,
+    unit_system=None,
+    ambient_pressure=1.0,
+    ambient_pressure_unit="atm",
+    chunksize=100000,
+):
+    """
+    Read CSV data in chunks of rows, for files too large to read into memory at
+    once. The arguments and file formats are the same as for :func:`read_data`,
+    and the chunks put together are the same as the data frame it returns.
+
+    Args:
+        csv_file (str): Path of file to read
+        csv_file_metadata (str): Path of csv file to read column metadata from
+        model (ConcreteModel): Optional model to map tags to
+        rename_mapper (function): Optional function to rename tags
+        unit_system (str): Optional system of units to atempt convert to
+        ambient_pressure (float, numpy.array, pandas.series, str): Optional
+            pressure to use to convert gauge pressure to absolute if a string is
+            supplied the corresponding data tag is assumed to be ambient pressure.
+            An array or series has one value for each row of the file.
+        ambient_pressure_unit (str): Optional ambient pressure unit, should be a
+            unit recognized by pint.
+        chunksize (int): Number of rows in each chunk
+
+    Returns:
+        (generator): Pandas data frames, each with up to chunksize rows, with
+            tags in columns and rows indexed by time.
+        (dict): Column metadata, units of measure, description, and model
+            mapping information.
+    """
+    metadata = _read_metadata(csv_file_metadata, rename_mapper)
+    if model:
+        _map_model(metadata, model)
+    # read the header, to work out the converted units before any data
+    header = pd.read_csv(csv_file, index_col=0, nrows=0)
+    _clean_columns(header, metadata, rename_mapper)
+    header = header.astype(float)
+    units = {tag: metadata[tag]["units"] for tag in header}
+    if isinstance(ambient_pressure, str) or np.ndim(ambient_pressure) == 0:
+        ambient_rows = None
+    else:
+        ambient_rows = np.asarray(ambient_pressure)
+
+    def chunk_ambient_pressure(df, start):
+        """Ambient pressure for the rows of df, which start at row start"""
+        if ambient_rows is None:
+            return _ambient_pressure(df, ambient_pressure)
+        return ambient_rows[start : start + len(df)]
+
+    if unit_system:
+        new_units = _convert_units(
+            header,
+            units,
+            unit_system,
+            chunk_ambient_pressure(header, 0),
+            ambient_pressure_unit,
+        )
+        for tag, u in new_units.items():
+            metadata[tag]["units"] = u
+    else:
+        chunk_ambient_pressure(header, 0)
 
+    def chunks():
+        reader = pd.read_csv(
+            csv_file, parse_dates=True, index_col=0, chunksize=chunksize
+        )
+        start = 0
+        for df in reader:
+            _clean_columns(df, metadata, rename_mapper)
+            if unit_system:
+                # undefined units were already reported for the header
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", UserWarning)
+                    _convert_units(
+                        df,
+                        units,
+                        unit_system,
+                        chunk_ambient_pressure(df, start),
+                        ambient_pressure_unit,
+                    )
+            start += len(df)
+            yield df
+
+    return chunks(), metadata
+
+
+def _read_data_cached(cache_dir, chunksize, csv_file, csv_file_metadata, **kwargs):
+    """Read data for :func:`read_data` from the columnar cache in cache_dir,
+    writing it first if needed.
+
+    Each cache entry is a directory named for a hash of the data file, the
+    metadata file and the settings that change the data. It holds one raw
+    array file per tag, plus one for the index, and a JSON file listing the
+    tags, types and number of rows. Time zone aware times are stored in UTC,
+    with the time zone in the JSON file.
+    """
+    rename_mapper = kwargs["rename_mapper"]
+    header = pd.read_csv(csv_file, index_col=0, nrows=0)
+    # how the columns are renamed is all that matters about rename_mapper
+    columns = {}
+    for c in header.columns:
+        columns[c] = c.strip()
+        if rename_mapper:
+            columns[c] = rename_mapper(columns[c])
+    ambient_pressure = kwargs["ambient_pressure"]
+    if not isinstance(ambient_pressure, (str, int, float)):
+        ambient_pressure = _hash_bytes(np.asarray(ambient_pressure).tobytes())
+    settings = json.dumps(
+        [
+            _hash_file(csv_file),
+            _hash_file(csv_file_metadata) if csv_file_metadata else None,
+            columns,
+            kwargs["unit_system"],
+            ambient_pressure,
+            kwargs["ambient_pressure_unit"],
+        ]
+    )
+    path = os.path.join(cache_dir, _hash_bytes(settings.encode()))
+    manifest_file = os.path.join(path, "manifest.json")
+    if not os.path.exists(manifest_file):
+        _write_cache(
+            path,
+            *read_data_chunks(
+                csv_file, csv_file_metadata, chunksize=chunksize, **kwargs
+            ),
+        )
+    with open(manifest_file, "r") as f:
+        manifest = json.load(f)
+    n = manifest["rows"]
+
+    def load(i, dtype):
+        if n == 0:
+            return np.zeros(0, dtype=dtype)
+        filename = os.path.join(path, "{}.dat".format(i))
+        return np.memmap(filename, dtype=dtype, mode="r", shape=(n,))
+
+    if "index_labels" in manifest:
+        index = pd.Index(manifest["index_labels"], name=manifest["index"])
+    else:
+        index = pd.Index(
+            load("index", manifest["index_dtype"]), name=manifest["index"]
+        )
+        if manifest.get("index_tz") is not None:
+            index = index.tz_localize("UTC").tz_convert(manifest["index_tz"])
+    df = pd.DataFrame(
+        {tag: load(i, "<f8") for i, tag in enumerate(manifest["tags"])},
+        index=index,
+        columns=manifest["tags"],
+        copy=False,
+    )
+    # metadata comes from the files, so model references are up to date
+    metadata = _read_metadata(csv_file_metadata, rename_mapper)
+    if kwargs["model"]:
+        _map_model(metadata, kwargs["model"])
+    for tag, units in manifest["units"].items():
+        metadata[tag]["units"] = units
     return df, metadata
+
+
+def _write_cache(path, chunks, metadata):
+    """Write data chunks to a new cache directory (see _read_data_cached)."""
+    cache_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix=".tmp-", dir=cache_dir)
+    manifest, files, index_dtype, index_tz, labels = None, [], None, None, []
+    try:
+        rows = 0
+        for df in chunks:
+            if manifest is None:
+                tags = list(df.columns)
+                manifest = {
+                    "tags": tags,
+                    "units": {tag: metadata[tag]["units"] for tag in tags},
+                    "index": df.index.name,
+                }
+                files = [
+                    open(os.path.join(tmp_path, "{}.dat".format(i)), "wb")
+                    for i in list(range(len(tags))) + ["index"]
+                ]
+            tz = getattr(df.index, "tz", None)
+            if tz is not None:
+                # time zone aware times are stored in UTC, and converted back
+                # to the time zone when the cache is read
+                index = np.asarray(df.index.tz_convert(None))
+                tz = str(tz)
+            else:
+                index = np.asarray(df.index)
+            if index_dtype is None:
+                index_dtype, index_tz = index.dtype, tz
+            if index_dtype.kind not in "iufM":
+                # labels that can't be stored as an array are kept in the
+                # manifest instead, which only works for strings
+                if not all(isinstance(x, str) for x in index):
+                    raise ValueError(
+                        "Index of type {} can't be cached".format(df.index.dtype)
+                    )
+                labels.extend(index)
+            elif index.dtype == index_dtype and tz == index_tz:
+                files[-1].write(index.tobytes())
+            else:
+                raise ValueError(
+                    "Index type changes from {} to {}, it can't be cached".format(
+                        index_dtype, df.index.dtype
+                    )
+                )
+            for f, tag in zip(files, df.columns):
+                try:
+                    values = df[tag].to_numpy(dtype="<f8")
+                except (TypeError, ValueError):
+                    raise ValueError(
+                        "Tag '{}' is not numeric, it can't be cached".format(tag)
+                    )
+                f.write(values.tobytes())
+            rows += len(df)
+        if manifest is None:
+            manifest = {"tags": [], "units": {}, "index": None}
+        manifest["rows"] = rows
+        if index_dtype is None or index_dtype.kind not in "iufM":
+            manifest["index_labels"] = labels
+        else:
+            manifest["index_dtype"] = index_dtype.str
+            manifest["index_tz"] = index_tz
+        with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+    except Exception:
+        for f in files:
+            f.close()
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    for f in files:
+        f.close()
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # another process wrote the same cache entry first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def _hash_file(filename):
+    """Get the SHA-256 hash of a file's contents, as a hex string."""
+    h = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _hash_bytes(data):
+    """Get the SHA-256 hash of some bytes, as a hex string."""
+    return hashlib.sha256(data).hexdigest()
@@ -12,11 +12,21 @@
 ##############################################################################
 """
 Resource database.
+
+There are two backends, selected by the extension of the database file
+(see :func:`open_resource_db`). :class:`ResourceDB` keeps all resources in
+a TinyDB JSON file, and :class:`SQLiteResourceDB` keeps them in an SQLite
+database with indexes on the commonly searched fields.
 """
 # system
+import abc
+import copy
 from datetime import datetime
+import json
 import logging
+import os
 import re
+import sqlite3
 
 # third party
 import pendulum
@@ -32,39 +42,22 @@ __author__ = 'Dan Gunter <dkgunter@lbl.gov>'
 _log = logging.getLogger(__name__)
 
 
-class ResourceDB(object):
-    """A database interface to all the resources within a given DMF workspace.
-    """
-
-    def __init__(self, dbfile=None, connection=None):
-        """Initialize from DMF and given configuration field.
-
-        Args:
-            dbfile (str): DB location
-            connection: If non-empty, this is an
-                existing connection that should be re-used, instead of
-                trying to connect to the location in `dbfile`.
+class ResourceDBBase(abc.ABC):
+    """Interface for the database of all the resources within a given DMF
+    workspace.
 
-        Raises:
-            ValueError, if dbfile
-             and connection are both None
-        """
-        self._db = None
-        self._gr = None
-
-        if connection is not None:
-            self._db = connection
-        elif dbfile is not None:
-            try:
-                db = TinyDB(dbfile)
-            except IOError:
-                raise errors.FileError('Cannot open resource DB "{}"'.format(dbfile))
-            # turn off caching, otherwise update() does not work properly
-            self._db = db.table('resources', cache_size=0)
+    Searches use the filter syntax described in :meth:`.dmf.DMF.find`.
+    Every backend must give the same results for the same filter,
+    so backends that use their own query language should only use it to
+    narrow the search, and check each candidate with the TinyDB query
+    from :meth:`_create_filter_expr`.
+    """
 
+    @abc.abstractmethod
     def __len__(self):
-        return len(self._db)
+        pass
 
+    @abc.abstractmethod
     def find(self, filter_dict, id_only=False, flags=0):
         """Find and return records based on the provided filter.
 
@@ -78,32 +71,142 @@ class ResourceDB(object):
         Returns:
             generator of int|Resource, depending on the value of `id_only`
         """
+        pass
 
-        def as_resource(_r):
-            _log.debug(f"as_resource: id_={_r['id_']}")
-            rsrc = Resource(value=_r)
-            rsrc.v['doc_id'] = _r.doc_id
-            return rsrc
+    def find_one(self, *args, **kwargs):
+        """Same as `find()`, but returning only first value or None.
+        """
+        result = None
+        for value in self.find(*args, **kwargs):
+            result = value
+            break
+        return result
 
-        # with no filter, do a find-all
-        if not filter_dict:
-            for r in self._db.all():
-                if id_only:
-                    yield r.eid
-                else:
-                    yield as_resource(r)
-            return
-        filter_expr = self._create_filter_expr(filter_dict, flags)
+    def find_related(self, id_, filter_dict=None, outgoing=True, maxdepth=0, meta=None):
+        """Find all resources connected to the identified one.
 
-        # return results for query
-        _log.debug('Find resources matching: {}'.format(filter_expr))
-        results = self._db.search(filter_expr)
-        for r in results:
-            if id_only:
-                yield r.eid
-            else:
-                _log.debug(f"got resource: {r}")
-                yield as_resource(r)
+        Args:
+            id_ (str): Unique ID of target resource.
+            filter_dict (dict): Filter to these resources
+            outgoing:
+            maxdepth:
+            meta (List[str]): Metadata fields to extract
+        Returns:
+            Generator of (depth, relation, metadata)
+        Raises:
+            KeyError if a `meta` field is missing from a related resource.
+        """
+        edges = self._related_edges(filter_dict, outgoing, meta)
+        return self._traverse_related(id_, edges, outgoing, maxdepth)
+
+    def find_related_many(
+        self, ids, filter_dict=None, outgoing=True, maxdepth=0, meta=None
+    ):
+        """Find all resources connected to each of the identified ones.
+
+        This gives the same results as calling :meth:`find_related` for each
+        identifier, but the relations from each resource are looked up only
+        once, however many of the searches pass through it.
+
+        Args:
+            ids (Iterable[str]): Unique IDs of target resources.
+            filter_dict (dict): Filter to these resources
+            outgoing: See :meth:`find_related`
+            maxdepth: See :meth:`find_related`
+            meta (List[str]): Metadata fields to extract
+        Returns:
+            dict: List of (depth, relation, metadata) for each identifier.
+            The metadata dicts may be shared between the lists.
+        Raises:
+            KeyError if a `meta` field is missing from a related resource.
+        """
+        edges = self._related_edges(filter_dict, outgoing, meta)
+        cache = {}
+
+        def cached_edges(key):
+            if key not in cache:
+                cache[key] = edges(key)
+            return cache[key]
+
+        return {
+            id_: list(self._traverse_related(id_, cached_edges, outgoing, maxdepth))
+            for id_ in ids
+        }
+
+    @abc.abstractmethod
+    def _related_edges(self, filter_dict, outgoing, meta):
+        """Get the function used to follow relations in :meth:`find_related`.
+
+        Args:
+            filter_dict (dict): Filter to these resources
+            outgoing (bool): Direction of the search
+            meta (List[str]): Metadata fields to extract
+        Returns:
+            Function of a resource identifier returning a list of
+            (subject, predicate, object, meta) for the relations to follow
+            from that resource, as described in :meth:`_traverse_related`.
+        """
+        pass
+
+    @abc.abstractmethod
+    def get(self, identifier):
+        """Get a resource by identifier.
+
+        Args:
+          identifier: Internal identifier
+
+        Returns:
+            (Resource) A resource or None
+        """
+        pass
+
+    @abc.abstractmethod
+    def put(self, resource):
+        """Put this resource into the database.
+
+        Args:
+            resource (Resource): The resource to add
+
+        Returns:
+            None
+
+        Raises:
+            errors.DuplicateResourceError: If there is already a resource
+                in the database with the same "id".
+        """
+        pass
+
+    @abc.abstractmethod
+    def delete(self, id_=None, idlist=None, filter_dict=None, internal_ids=False):
+        """Delete one or more resources with given identifiers.
+
+        Args:
+            id_ (Union[str,int]): If given, delete this id.
+            idlist (list): If given, delete ids in this list
+            filter_dict (dict): If given, perform a search and
+                           delete ids it finds.
+            internal_ids (bool): If True, treat identifiers as numeric
+                (internal) identifiers. Otherwise treat them as
+                resource (string) indentifiers.
+        Returns:
+            None
+        """
+        pass
+
+    @abc.abstractmethod
+    def update(self, id_, new_dict):
+        """Update the identified resource with new values.
+
+        Args:
+            id_ (int): Identifier of resource to update
+            new_dict (dict): New dictionary of resource values
+        Returns:
+            None
+        Raises:
+            ValueError: If new resource is of wrong type
+            KeyError: If old resource is not found
+        """
+        pass
 
     @classmethod
     def _create_filter_expr(cls, filter_dict, flags=0):
@@ -241,67 +344,29 @@ class ResourceDB(object):
             raise ValueError('Unexpected operator: {}'.format(op))
         return cond
 
-    def find_one(self, *args, **kwargs):
-        """Same as `find()`, but returning only first value or None.
-        """
-        result = None
-        for value in self.find(*args, **kwargs):
-            result = value
-            break
-        return result
-
-    def find_related(self, id_, filter_dict=None, outgoing=True, maxdepth=0, meta=None):
-        """Find all resources connected to the identified one.
+    @staticmethod
+    def _traverse_related(id_, edges, outgoing, maxdepth):
+        """Breadth-first search through relations.
 
         Args:
-            id_ (str): Unique ID of target resource.
-            filter_dict (dict): Filter to these resources
-            outgoing:
-            maxdepth:
-            meta (List[str]): Metadata fields to extract
+            id_ (str): Identifier of the starting resource
+            edges: Function of a resource identifier returning a list of
+                (subject, predicate, object, meta) for the relations to
+                follow from that resource (empty if there are none)
+            outgoing (bool): Direction of the search
+            maxdepth (int): Maximum depth, <= 0 for no limit
         Returns:
             Generator of (depth, relation, metadata)
-        Raises:
-            KeyError if the resource is not found.
         """
         if maxdepth <= 0:
             maxdepth = 9223372036854775807
-        # Get an iterator over all the resources, optionally
-        # filtered by an expression, as for find().
-        if filter_dict:
-            filter_expr = self._create_filter_expr(filter_dict)
-            resource_list = self._db.search(filter_expr)
-        else:
-            resource_list = self._db.all()
-        # build adjacency list representing connections between resources
-        relation_map = {}
-        for rsrc in resource_list:
-            for rrel in rsrc['relations']:
-                uuid = rsrc[Resource.ID_FIELD]
-                rel = triple_from_resource_relations(uuid, rrel)
-                # skip start of edge, get metadata, etc. at end of edge
-                if (outgoing and rel.subject == uuid) or (
-                    not outgoing and rel.object == uuid
-                ):
-                    continue
-                # add entry in map
-                key = rel.subject if outgoing else rel.object
-                meta_info = {k: rsrc[k] for k in meta}
-                value = (rel.subject, rel.predicate, rel.object, meta_info)
-                value_list = relation_map.get(key, None)
-                if value_list is None:
-                    relation_map[key] = [value]
-                else:
-                    value_list.append(value)
-        _log.debug(f"built relation map: {relation_map}")
+        start = edges(id_)
         # stop if there are no connections
-        if id_ not in relation_map:
+        if not start:
             return
-        # Do a depth-first search through the edges, yield-ing
+        # Do a breadth-first search through the edges, yield-ing
         # the relations as we go
-        q, depth, visited = [], 0, set()
-        q.extend(relation_map[id_])
-        visited.add(id_)
+        q, depth, visited = list(start), 0, {id_}
         while len(q) > 0 and depth < maxdepth:
             depth += 1
             # visit all the nodes in the queue
@@ -316,11 +381,208 @@ class ResourceDB(object):
                     # If there are relations, and we haven't already been to
                     # this node, add them at the end of the queue; we will
                     # visit them at the next depth increment.
-                    if next_id in relation_map and next_id not in visited:
-                        q.extend(relation_map[next_id])
-                        visited.add(next_id)
+                    if next_id not in visited:
+                        next_edges = edges(next_id)
+                        if next_edges:
+                            q.extend(next_edges)
+                            visited.add(next_id)
             q = q[n:]  # pop off all the nodes we just visited
 
+
+class _RelationIndex:
+    """In-memory index of the relations between resources, as followed by
+    :meth:`ResourceDBBase.find_related`.
+
+    Each relation is stored in both resources that it connects, and an edge
+    is taken from the copy in the resource at its end: the object for
+    outgoing searches, and the subject for incoming ones. The index maps the
+    start of each edge to the internal identifiers of the resources holding
+    it, and keeps those resources so their metadata can be read without
+    going back to the DB.
+    """
+
+    def __init__(self, docs=()):
+        """Create the index.
+
+        Args:
+            docs: Iterable of (internal identifier, resource dict)
+        """
+        self._docs = {}
+        # edges for [incoming, outgoing] searches:
+        #   start id -> {doc_id: [(subject, predicate, object), ..]}
+        self._edges = ({}, {})
+        for doc_id, value in docs:
+            self.add(doc_id, value)
+
+    def add(self, doc_id, value):
+        """Add (or replace) the relations of one resource."""
+        if doc_id in self._docs:
+            self.remove(doc_id)
+        self._docs[doc_id] = value
+        uuid = value.get(Resource.ID_FIELD, None)
+        for rrel in value.get('relations', []):
+            rel = triple_from_resource_relations(uuid, rrel)
+            edge = (rel.subject, rel.predicate, rel.object)
+            if rel.subject != uuid:
+                self._edges[True].setdefault(rel.subject, {}).setdefault(
+                    doc_id, []).append(edge)
+            if rel.object != uuid:
+                self._edges[False].setdefault(rel.object, {}).setdefault(
+                    doc_id, []).append(edge)
+
+    def remove(self, doc_id):
+        """Remove the relations of one resource, if present."""
+        value = self._docs.pop(doc_id, None)
+        if value is None:
+            return
+        uuid = value.get(Resource.ID_FIELD, None)
+        for rrel in value.get('relations', []):
+            rel = triple_from_resource_relations(uuid, rrel)
+            for outgoing, key in ((True, rel.subject), (False, rel.object)):
+                by_doc = self._edges[outgoing].get(key, None)
+                if by_doc is not None and by_doc.pop(doc_id, None) is not None:
+                    if not by_doc:
+                        del self._edges[outgoing][key]
+
+    def edges(self, key, outgoing, filter_expr, meta):
+        """Get the relations to follow from a resource.
+
+        Args:
+            key (str): Unique ID of the resource
+            outgoing (bool): Direction of the search
+            filter_expr: TinyDB query that resources at the end of each
+                relation must match, or None
+            meta (List[str]): Metadata fields to extract
+        Returns:
+            List of (subject, predicate, object, meta), in the order the
+            resources at the end of the relations were added to the DB.
+        """
+        result = []
+        by_doc = self._edges[outgoing].get(key, {})
+        for doc_id in sorted(by_doc):
+            rsrc = self._docs[doc_id]
+            if filter_expr is not None and not filter_expr(rsrc):
+                continue
+            meta_info = {k: copy.deepcopy(rsrc[k]) for k in meta}
+            for subj, pred, obj in by_doc[doc_id]:
+                result.append((subj, pred, obj, meta_info))
+        return result
+
+
+class ResourceDB(ResourceDBBase):
+    """A database interface to all the resources within a given DMF workspace,
+    stored in a TinyDB JSON file.
+    """
+
+    def __init__(self, dbfile=None, connection=None):
+        """Initialize from DMF and given configuration field.
+
+        Args:
+            dbfile (str): DB location
+            connection: If non-empty, this is an
+                existing connection that should be re-used, instead of
+                trying to connect to the location in `dbfile`.
+
+        Raises:
+            ValueError, if dbfile
+             and connection are both None
+        """
+        self._db = None
+        self._gr = None
+        self._dbfile = None
+        self._rel_index, self._rel_stamp = None, None
+
+        if connection is not None:
+            self._db = connection
+        elif dbfile is not None:
+            self._dbfile = dbfile
+            try:
+                db = TinyDB(dbfile)
+            except IOError:
+                raise errors.FileError('Cannot open resource DB "{}"'.format(dbfile))
+            # turn off caching, otherwise update() does not work properly
+            self._db = db.table('resources', cache_size=0)
+
+    def __len__(self):
+        return len(self._db)
+
+    def find(self, filter_dict, id_only=False, flags=0):
+        """Find and return records based on the provided filter.
+
+        Args:
+            filter_dict (dict): Search filter. For syntax, see docs in
+                                :meth:`.dmf.DMF.find`.
+            id_only (bool): If true, return only the identifier of each
+                resource; otherwise a Resource object is returned.
+            flags (int): Flag values for, e.g., regex searches
+
+        Returns:
+            generator of int|Resource, depending on the value of `id_only`
+        """
+
+        def as_resource(_r):
+            _log.debug(f"as_resource: id_={_r['id_']}")
+            rsrc = Resource(value=_r)
+            rsrc.v['doc_id'] = _r.doc_id
+            return rsrc
+
+        # with no filter, do a find-all
+        if not filter_dict:
+            for r in self._db.all():
+                if id_only:
+                    yield r.eid
+                else:
+                    yield as_resource(r)
+            return
+        filter_expr = self._create_filter_expr(filter_dict, flags)
+
+        # return results for query
+        _log.debug('Find resources matching: {}'.format(filter_expr))
+        results = self._db.search(filter_expr)
+        for r in results:
+            if id_only:
+                yield r.eid
+            else:
+                _log.debug(f"got resource: {r}")
+                yield as_resource(r)
+
+    def _related_edges(self, filter_dict, outgoing, meta):
+        filter_expr = None
+        if filter_dict:
+            filter_expr = self._create_filter_expr(filter_dict)
+        index = self._relation_index()
+        return lambda key: index.edges(key, outgoing, filter_expr, meta)
+
+    def _relation_index(self):
+        """Get the relation index, building it from all resources when
+        it does not exist, or the DB file was changed by someone else.
+        """
+        if self._rel_index is None or self._rel_stamp != self._file_stamp():
+            _log.debug("build relation index")
+            self._rel_index = _RelationIndex(
+                (r.doc_id, r) for r in self._db.all()
+            )
+            self._rel_stamp = self._file_stamp()
+        return self._rel_index
+
+    def _changed_relation_index(self):
+        """Get the relation index to update for a change to the DB,
+        or None if there is no index or it is out of date.
+        """
+        if self._rel_index is not None and self._rel_stamp != self._file_stamp():
+            self._rel_index = None
+        return self._rel_index
+
+    def _file_stamp(self):
+        """Modification time and size of the DB file, or None if unknown."""
+        if self._dbfile is None:
+            return None
+        try:
+            st = os.stat(self._dbfile)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
     def get(self, identifier):
         """Get a resource by identifier.
 
@@ -360,7 +622,12 @@ class ResourceDB(object):
         if self._db.contains(qry.id_ == resource.id):
             raise errors.DuplicateResourceError("put", resource.id)
         # add resource
-        self._db.insert(resource.v)
+        index = self._changed_relation_index()
+        doc_id = self._db.insert(resource.v)
+        if index is not None:
+            # index the resource as it will be read back from the DB
+            index.add(doc_id, json.loads(json.dumps(resource.v)))
+            self._rel_stamp = self._file_stamp()
 
     def delete(self, id_=None, idlist=None, filter_dict=None, internal_ids=False):
         """Delete one or more resources with given identifiers.
@@ -376,6 +643,7 @@ class ResourceDB(object):
         Returns:
             (list[str]) Identifiers
         """
+        index = self._changed_relation_index()
         if internal_ids:
             doc_ids = idlist if idlist else [id_]
             self._db.remove(doc_ids=doc_ids)
@@ -389,7 +657,11 @@ class ResourceDB(object):
                 cond = self._create_filter_expr({ID: [idlist]})
             else:
                 return
-            self._db.remove(cond=cond)
+            doc_ids = self._db.remove(cond=cond)
+        if index is not None:
+            for doc_id in doc_ids:
+                index.remove(doc_id)
+            self._rel_stamp = self._file_stamp()
 
     def update(self, id_, new_dict):
         """Update the identified resource with new values.
@@ -422,4 +694,435 @@ class ResourceDB(object):
             elif old.v[k] != v:
                 changed[k] = v
         _log.debug(f"update resource {id_} with new values: {changed}")
-        self._db.update(changed, self._create_filter_expr(id_cond))
+        index = self._changed_relation_index()
+        doc_ids = self._db.update(changed, self._create_filter_expr(id_cond))
+        if index is not None:
+            for doc_id in doc_ids:
+                index.add(doc_id, self._db.get(doc_id=doc_id))
+            self._rel_stamp = self._file_stamp()
+
+
+class SQLiteResourceDB(ResourceDBBase):
+    """A database interface to all the resources within a given DMF workspace,
+    stored in an SQLite database.
+
+    Each resource is stored as a JSON document, along with indexed columns for
+    the identifier, type, name, created and modified fields, and indexed
+    tables of the aliases and relations of each resource. Searches on these
+    fields use the indexes to find the candidate resources, which are then
+    checked against the full filter, so the results are always the same as
+    for :class:`ResourceDB`.
+    """
+
+    #: Resource fields with indexed columns, and the type of values stored.
+    #: Values of other types are stored as NULL.
+    COLUMNS = {
+        Resource.ID_FIELD: ("id", str),
+        Resource.TYPE_FIELD: ("type", str),
+        "name": ("name", str),
+        "created": ("created", (int, float)),
+        "modified": ("modified", (int, float)),
+    }
+
+    _schema = (
+        "CREATE TABLE IF NOT EXISTS resources ("
+        " doc_id INTEGER PRIMARY KEY, id TEXT UNIQUE, type TEXT, name TEXT,"
+        " created REAL, modified REAL, doc TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS resources_id_nocase"
+        " ON resources (id COLLATE NOCASE)",
+        "CREATE INDEX IF NOT EXISTS resources_type ON resources (type)",
+        "CREATE INDEX IF NOT EXISTS resources_name ON resources (name)",
+        "CREATE INDEX IF NOT EXISTS resources_created ON resources (created)",
+        "CREATE INDEX IF NOT EXISTS resources_modified ON resources (modified)",
+        "CREATE TABLE IF NOT EXISTS aliases (doc_id INTEGER, alias TEXT)",
+        "CREATE INDEX IF NOT EXISTS aliases_alias ON aliases (alias)",
+        "CREATE INDEX IF NOT EXISTS aliases_doc_id ON aliases (doc_id)",
+        "CREATE TABLE IF NOT EXISTS relations ("
+        " doc_id INTEGER, pos INTEGER, subject TEXT, predicate TEXT,"
+        " object TEXT)",
+        "CREATE INDEX IF NOT EXISTS relations_subject ON relations (subject)",
+        "CREATE INDEX IF NOT EXISTS relations_object ON relations (object)",
+        "CREATE INDEX IF NOT EXISTS relations_doc_id ON relations (doc_id)",
+    )
+
+    _sql_ops = {'$gt': '>', '$ge': '>=', '$lt': '<', '$le': '<='}
+
+    def __init__(self, dbfile=None, connection=None):
+        """Initialize from DMF and given configuration field.
+
+        Args:
+            dbfile (str): DB location
+            connection (sqlite3.Connection): If non-empty, this is an
+                existing connection that should be re-used, instead of
+                trying to connect to the location in `dbfile`.
+
+        Raises:
+            ValueError, if dbfile and connection are both None
+            errors.FileError, if the database cannot be opened
+        """
+        if connection is not None:
+            self._conn = connection
+        elif dbfile is not None:
+            try:
+                self._conn = sqlite3.connect(dbfile, timeout=30)
+                # Write-ahead logging without a sync on every commit keeps
+                # each put/update well under a millisecond, and is still
+                # safe from corruption (a crash may lose the last commits).
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                with self._conn:
+                    for stmt in self._schema:
+                        self._conn.execute(stmt)
+            except sqlite3.Error as err:
+                raise errors.FileError(
+                    'Cannot open resource DB "{}": {}'.format(dbfile, err)
+                )
+        else:
+            raise ValueError("One of dbfile or connection is required")
+
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM resources").fetchone()[0]
+
+    @staticmethod
+    def _as_resource(doc_id, doc):
+        rsrc = Resource(value=json.loads(doc))
+        rsrc.v['doc_id'] = doc_id
+        return rsrc
+
+    def find(self, filter_dict, id_only=False, flags=0):
+        """Find and return records based on the provided filter.
+
+        Args:
+            filter_dict (dict): Search filter. For syntax, see docs in
+                                :meth:`.dmf.DMF.find`.
+            id_only (bool): If true, return only the identifier of each
+                resource; otherwise a Resource object is returned.
+            flags (int): Flag values for, e.g., regex searches
+
+        Returns:
+            generator of int|Resource, depending on the value of `id_only`
+        """
+        for doc_id, doc in self._search(filter_dict, flags):
+            if id_only:
+                yield doc_id
+            else:
+                yield self._as_resource(doc_id, doc)
+
+    def _search(self, filter_dict, flags=0):
+        """Get (doc_id, JSON document) of all resources matching the filter,
+        in the order they were added.
+        """
+        if not filter_dict:
+            return self._conn.execute(
+                "SELECT doc_id, doc FROM resources ORDER BY doc_id"
+            ).fetchall()
+        where, params = self._sql_filter(filter_dict, flags)
+        sql = "SELECT doc_id, doc FROM resources"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        _log.debug(f"Find candidate resources: {sql} {params}")
+        # fetch all rows first, so callers can modify the DB as they go
+        rows = self._conn.execute(sql + " ORDER BY doc_id", params).fetchall()
+        filter_expr = self._create_filter_expr(filter_dict, flags)
+        return [r for r in rows if filter_expr(json.loads(r[1]))]
+
+    @classmethod
+    def _sql_filter(cls, filter_dict, flags=0):
+        """Get SQL conditions that select a superset of the resources
+        matching the filter, using the indexed columns and tables.
+
+        Returns:
+            (list of SQL conditions, list of parameters)
+        """
+        where, params = [], []
+        for k, v in filter_dict.items():
+            if isinstance(v, list):
+                qry_all = k.endswith('!')
+                if qry_all:
+                    k = k[:-1]
+                if k != 'aliases' or not v or isinstance(v[0], dict):
+                    continue
+                sub = "doc_id IN (SELECT doc_id FROM aliases WHERE alias IN ({}))"
+                if qry_all:
+                    for alias in v:
+                        where.append(sub.format("?"))
+                        params.append(alias)
+                else:
+                    where.append(sub.format(", ".join(["?"] * len(v))))
+                    params.extend(v)
+            elif k in cls.COLUMNS:
+                column, types = cls.COLUMNS[k]
+                if isinstance(v, dict):
+                    for op_key, op_value in v.items():
+                        tv = cls._value_transform(op_value)
+                        if op_key in cls._sql_ops and _is_type(tv, types):
+                            where.append(f"{column} {cls._sql_ops[op_key]} ?")
+                            params.append(tv)
+                    continue
+                tv = cls._value_transform(v)
+                if v is True or tv is False:
+                    continue
+                elif hasattr(tv, "match"):
+                    cond = cls._regex_prefix_cond(column, tv.pattern, flags)
+                    if cond is not None:
+                        where.append(cond[0])
+                        params.extend(cond[1])
+                elif _is_type(tv, types):
+                    where.append(f"{column} = ?")
+                    params.append(tv)
+        return where, params
+
+    @staticmethod
+    def _regex_prefix_cond(column, pattern, flags):
+        """Get an SQL condition for the literal prefix of a regular
+        expression (as used with re.match), or None if there is none.
+        """
+        if flags not in (0, re.IGNORECASE) or '|' in pattern:
+            return None
+        if pattern.startswith('^'):
+            pattern = pattern[1:]
+        prefix = ''
+        for i, c in enumerate(pattern):
+            if c in '.^$*+?{}[]\\|()':
+                # a quantifier makes the previous character optional
+                if c in '*?{' and prefix:
+                    prefix = prefix[:-1]
+                break
+            prefix += c
+        if not prefix:
+            return None
+        if flags == re.IGNORECASE:
+            # LIKE is case-insensitive only for ASCII characters
+            if not all(ord(c) < 128 for c in prefix):
+                return None
+            escaped = re.sub(r'([\\%_])', r'\\\1', prefix)
+            return f"{column} LIKE ? ESCAPE '\\'", [escaped + '%']
+        last = ord(prefix[-1])
+        if last >= 0x10FFFF:
+            return None
+        upper = prefix[:-1] + chr(last + 1)
+        return f"{column} >= ? AND {column} < ?", [prefix, upper]
+
+    def _related_edges(self, filter_dict, outgoing, meta):
+        filter_expr = None
+        if filter_dict:
+            filter_expr = self._create_filter_expr(filter_dict)
+        # relations are stored in both resources; follow the copy in the
+        # resource at the end of the edge
+        start, end = ("subject", "object") if outgoing else ("object", "subject")
+        sql = (
+            f"SELECT r.subject, r.predicate, r.object, d.doc FROM relations r"
+            f" JOIN resources d ON r.doc_id = d.doc_id"
+            f" WHERE r.{start} = ? AND d.id = r.{end} AND d.id != r.{start}"
+            f" ORDER BY r.doc_id, r.pos"
+        )
+
+        def edges(key):
+            result = []
+            for subj, pred, obj, doc in self._conn.execute(sql, (key,)).fetchall():
+                rsrc = json.loads(doc)
+                if filter_expr is not None and not filter_expr(rsrc):
+                    continue
+                meta_info = {k: rsrc[k] for k in meta}
+                result.append((subj, pred, obj, meta_info))
+            return result
+
+        return edges
+
+    def get(self, identifier):
+        """Get a resource by identifier.
+
+        Args:
+          identifier: Internal identifier
+
+        Returns:
+            (Resource) A resource or None
+        """
+        row = self._conn.execute(
+            "SELECT doc_id, doc FROM resources WHERE doc_id = ?", (identifier,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._as_resource(*row)
+
+    def put(self, resource):
+        """Put this resource into the database.
+
+        Args:
+            resource (Resource): The resource to add
+
+        Returns:
+            None
+
+        Raises:
+            errors.DuplicateResourceError: If there is already a resource
+                in the database with the same "id".
+        """
+        _log.debug(f"put resource id={resource.id}")
+        try:
+            with self._conn:
+                self._insert(resource.v)
+        except sqlite3.IntegrityError:
+            raise errors.DuplicateResourceError("put", resource.id)
+
+    def _insert(self, value, doc_id=None):
+        """Insert one resource, without committing."""
+        value = {k: v for k, v in value.items() if k != 'doc_id'}
+        row = [value[k] if _is_type(value.get(k), t) else None
+               for k, (_, t) in self.COLUMNS.items()]
+        cur = self._conn.execute(
+            "INSERT INTO resources (doc_id, id, type, name, created, modified, doc)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [doc_id] + row + [json.dumps(value)],
+        )
+        self._index(cur.lastrowid, value)
+        return cur.lastrowid
+
+    def _index(self, doc_id, value):
+        """Add the aliases and relations of one resource to their tables."""
+        aliases = value.get('aliases', None)
+        if isinstance(aliases, list):
+            self._conn.executemany(
+                "INSERT INTO aliases (doc_id, alias) VALUES (?, ?)",
+                [(doc_id, a) for a in aliases if isinstance(a, str)],
+            )
+        uuid = value.get(Resource.ID_FIELD, None)
+        rows = []
+        for pos, rrel in enumerate(value.get('relations', [])):
+            rel = triple_from_resource_relations(uuid, rrel)
+            rows.append((doc_id, pos, rel.subject, rel.predicate, rel.object))
+        self._conn.executemany(
+            "INSERT INTO relations (doc_id, pos, subject, predicate, object)"
+            " VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def _remove(self, doc_ids):
+        """Remove resources by internal identifier, without committing."""
+        params = [(i,) for i in doc_ids]
+        for table in ("resources", "aliases", "relations"):
+            self._conn.executemany(f"DELETE FROM {table} WHERE doc_id = ?", params)
+
+    def delete(self, id_=None, idlist=None, filter_dict=None, internal_ids=False):
+        """Delete one or more resources with given identifiers.
+
+        Args:
+            id_ (Union[str,int]): If given, delete this id.
+            idlist (list): If given, delete ids in this list
+            filter_dict (dict): If given, perform a search and
+                           delete ids it finds.
+            internal_ids (bool): If True, treat identifiers as numeric
+                (internal) identifiers. Otherwise treat them as
+                resource (string) indentifiers.
+        Returns:
+            None
+        """
+        if internal_ids:
+            doc_ids = idlist if idlist else [id_]
+        else:
+            ID = Resource.ID_FIELD
+            if filter_dict:
+                cond = filter_dict
+            elif id_:
+                cond = {ID: id_}
+            elif idlist:
+                cond = {ID: [idlist]}
+            else:
+                return
+            doc_ids = [r[0] for r in self._search(cond)]
+        with self._conn:
+            self._remove(doc_ids)
+
+    def update(self, id_, new_dict):
+        """Update the identified resource with new values.
+
+        Args:
+            id_ (int): Identifier of resource to update
+            new_dict (dict): New dictionary of resource values
+        Returns:
+            None
+        Raises:
+            ValueError: If new resource is of wrong type
+            KeyError: If old resource is not found
+        """
+        _log.debug("update.start")
+        row = self._conn.execute(
+            "SELECT doc_id, doc FROM resources WHERE id = ?", (id_,)
+        ).fetchone()
+        if row is None:
+            raise KeyError('Cannot find resource id={}'.format(id_))
+        doc_id, old = row[0], json.loads(row[1])
+        T = Resource.TYPE_FIELD
+        if old[T] != new_dict[T]:
+            raise ValueError(
+                'New resource type="{}" does not '
+                'match current resource type "{}"'.format(new_dict[T], old[T])
+            )
+        # round-trip through JSON, so values compare as stored
+        new = json.loads(json.dumps(new_dict))
+        if all(k in old and old[k] == v for k, v in new.items() if k != 'doc_id'):
+            return
+        old.update(new)
+        _log.debug(f"update resource {id_}")
+        with self._conn:
+            self._remove([doc_id])
+            self._insert(old, doc_id=doc_id)
+
+
+def _is_type(value, types):
+    """Check the type of a value for an indexed column (bools are not numbers).
+    """
+    return isinstance(value, types) and not isinstance(value, bool)
+
+
+#: Resource DB classes, by database file extension
+backends = {
+    ".sqlite": SQLiteResourceDB,
+    ".sqlite3": SQLiteResourceDB,
+    ".db": SQLiteResourceDB,
+}
+
+
+def open_resource_db(dbfile):
+    """Open the resource DB in a file, using the backend registered in
+    :data:`backends` for the file extension, or :class:`ResourceDB` (TinyDB)
+    for other extensions.
+
+    Args:
+        dbfile (str): DB location
+    Returns:
+        ResourceDBBase: The resource DB
+    """
+    ext = os.path.splitext(dbfile)[1].lower()
+    return backends.get(ext, ResourceDB)(dbfile)
+
+
+def migrate_resource_db(source, dest):
+    """Copy all resources from a TinyDB resource DB file into a new SQLite
+    resource DB file. Internal (numeric) identifiers are preserved.
+
+    Args:
+        source (str): TinyDB resource DB file
+        dest (str): SQLite resource DB file, which must not exist
+    Returns:
+        int: Number of resources copied
+    Raises:
+        errors.FileError: if the source does not exist or the destination does
+    """
+    if not os.path.exists(source):
+        raise errors.FileError('Resource DB "{}" not found'.format(source))
+    if os.path.exists(dest):
+        raise errors.FileError('Resource DB "{}" already exists'.format(dest))
+    src = ResourceDB(source)
+    dst = SQLiteResourceDB(dest)
+    n = 0
+    with dst._conn:
+        for doc in src._db.all():
+            dst._insert(doc, doc_id=doc.doc_id)
+            n += 1
+    dst.close()
+    return n
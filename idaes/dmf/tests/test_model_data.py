@@ -164,3 +164,104 @@ def test_unit_coversion():
 
     assert p_psi[0] == pytest.approx(14.7, rel=1e-1)
     assert unit == "MYPRESSURE"
+
+
+def test_unit_convert_cached():
+    # registries and conversions are created once and reused
+    assert da._get_registry("mks") is da._get_registry("mks")
+    t_f = np.array([32, 212, -40])
+    t_k, unit = da.unit_convert(t_f, "DEG F", system="mks")
+    assert unit == "kelvin"
+    assert t_k == pytest.approx([273.15, 373.15, 233.15], rel=1e-8)
+    plan = da._conversion_plan("degF", None, "mks", None)
+    assert plan.scale == pytest.approx(5 / 9)
+    t_k2, _ = da.unit_convert(t_f * 2, "DEG F", system="mks")
+    assert t_k2 == pytest.approx(plan.scale * t_f * 2 + plan.offset)
+    assert da._conversion_plan.cache_info().hits > 0
+
+
+def test_read_data_chunks():
+    data1 = os.path.join(_data_dir, "data1.csv")
+    data1_meta = os.path.join(_data_dir, "data1_meta.csv")
+
+    def retag(tag):
+        return tag.replace(".junk", "")
+
+    kwargs = dict(
+        rename_mapper=retag,
+        unit_system="mks",
+        ambient_pressure="Pamb",
+        ambient_pressure_unit="psi",
+    )
+    df, df_meta = da.read_data(data1, data1_meta, **kwargs)
+    chunks, chunks_meta = da.read_data_chunks(data1, data1_meta, chunksize=2, **kwargs)
+    # units in the metadata are known before reading any data
+    assert chunks_meta == df_meta
+    chunks = list(chunks)
+    assert len(chunks) == (len(df) + 1) // 2
+    assert list(chunks[0].columns) == list(df.columns)
+    assert np.concatenate([c["P"].values for c in chunks]) == pytest.approx(
+        df["P"].values
+    )
+
+
+def test_read_data_chunks_ambient_pressure_array(tmpdir):
+    data1 = os.path.join(_data_dir, "data1.csv")
+    data1_meta = os.path.join(_data_dir, "data1_meta.csv")
+    # one ambient pressure per row, not per chunk
+    ambient = np.array([14.0, 14.1, 14.2, 14.3, 14.4])
+    kwargs = dict(
+        unit_system="mks", ambient_pressure=ambient, ambient_pressure_unit="psi"
+    )
+    df, df_meta = da.read_data(data1, data1_meta, **kwargs)
+    chunks, chunks_meta = da.read_data_chunks(data1, data1_meta, chunksize=2, **kwargs)
+    assert np.concatenate([c["P.junk"].values for c in chunks]) == pytest.approx(
+        df["P.junk"].values
+    )
+    cache_dir = os.path.join(str(tmpdir), "cache")
+    cdf, cdf_meta = da.read_data(
+        data1, data1_meta, cache_dir=cache_dir, chunksize=2, **kwargs
+    )
+    assert cdf["P.junk"].values == pytest.approx(df["P.junk"].values)
+
+
+def test_read_data_cache(tmpdir):
+    data1 = os.path.join(_data_dir, "data1.csv")
+    data1_meta = os.path.join(_data_dir, "data1_meta.csv")
+    cache_dir = os.path.join(str(tmpdir), "cache")
+    df, df_meta = da.read_data(data1, data1_meta, unit_system="mks")
+    for i in range(2):
+        cdf, cdf_meta = da.read_data(
+            data1, data1_meta, unit_system="mks", cache_dir=cache_dir, chunksize=2
+        )
+        assert len(os.listdir(cache_dir)) == 1
+        assert cdf_meta == df_meta
+        assert list(cdf.columns) == list(df.columns)
+        assert list(cdf.index) == list(df.index)
+        for tag in df:
+            assert isinstance(cdf[tag].values, np.memmap)
+            assert cdf[tag].values == pytest.approx(df[tag].values)
+    # different settings are cached separately
+    da.read_data(data1, data1_meta, cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_read_data_cache_time_zone(tmpdir):
+    data1_meta = os.path.join(_data_dir, "data1_meta.csv")
+    data_tz = os.path.join(str(tmpdir), "data_tz.csv")
+    with open(data_tz, "w") as f:
+        f.write("time, P.junk, T.junk\n")
+        f.write("2020-03-08 01:00:00-05:00, 1.0, 20.0\n")
+        f.write("2020-03-08 02:00:00-05:00, 2.0, 21.0\n")
+        f.write("2020-03-08 03:00:00-05:00, 3.0, 22.0\n")
+    df, df_meta = da.read_data(data_tz, data1_meta)
+    assert df.index.tz is not None
+    cache_dir = os.path.join(str(tmpdir), "cache")
+    for i in range(2):
+        cdf, cdf_meta = da.read_data(
+            data_tz, data1_meta, cache_dir=cache_dir, chunksize=2
+        )
+        # times come back from the cache in the same time zone
+        assert cdf.index.equals(df.index)
+        assert str(cdf.index.tz) == str(df.index.tz)
+        assert cdf["P.junk"].values == pytest.approx(df["P.junk"].values)
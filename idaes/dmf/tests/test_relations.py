@@ -111,6 +111,11 @@ def test_find_related(tmp_dmf):
         names.append(m["name"])
     names.sort()
     assert names == ["r0", "r1", "r2"]
+    # all at once
+    related = tmp_dmf.find_related_many(r, meta=["name"])
+    assert sorted(related) == sorted(rr.id for rr in r)
+    for rr in r:
+        assert related[rr.id] == list(tmp_dmf.find_related(rr, meta=["name"]))
 
 
 def test_circular(tmp_dmf):
@@ -0,0 +1,238 @@
+##############################################################################
+# Institute for the Design of Advanced Energy Systems Process Systems
+# Engineering Framework (IDAES PSE Framework) Copyright (c) 2018-2019, by the
+# software owners: The Regents of the University of California, through
+# Lawrence Berkeley National Laboratory,  National Technology & Engineering
+# Solutions of Sandia, LLC, Carnegie Mellon University, West Virginia
+# University Research Corporation, et al. All rights reserved.
+#
+# Please see the files COPYRIGHT.txt and LICENSE.txt for full copyright and
+# license information, respectively. Both files are also available online
+# at the URL "https://github.com/IDAES/idaes-pse".
+##############################################################################
+"""
+Tests for idaes.dmf.resourcedb module, comparing the SQLite backend to
+the TinyDB backend.
+"""
+# stdlib
+import os
+import re
+import sys
+
+# third-party
+from click.testing import CliRunner
+import pytest
+
+# package
+from idaes.dmf import cli, errors, resource, resourcedb
+from idaes.dmf.dmfbase import DMF, DMFConfig
+
+if sys.platform.startswith("win"):
+    pytest.skip("skipping DMF tests on Windows", allow_module_level=True)
+
+
+def make_resources():
+    r = []
+    for i in range(6):
+        rsrc = resource.Resource(
+            {"name": "r{}".format(i), "aliases": ["a{}".format(i), "all"],
+             "data": {"x": i}, "created": 1000.0 + i},
+            type_=resource.TY_DATA if i % 2 else resource.TY_CODE,
+        )
+        r.append(rsrc)
+    r[0].v["aliases"] = []
+    r[1].v["tags"] = ["one", "two"]
+    # r0 --uses--> r1 --derived--> r2 --derived--> r3, r4
+    cr = resource.create_relation_args
+    cr(r[0], resource.PR_USES, r[1])
+    cr(r[1], resource.PR_DERIVED, r[2])
+    cr(r[2], resource.PR_DERIVED, r[3])
+    cr(r[2], resource.PR_DERIVED, r[4])
+    return r
+
+
+@pytest.fixture
+def dbs(tmpdir):
+    """The same resources in TinyDB and SQLite resource DBs."""
+    tiny = resourcedb.ResourceDB(os.path.join(str(tmpdir), "r.json"))
+    lite = resourcedb.SQLiteResourceDB(os.path.join(str(tmpdir), "r.sqlite"))
+    rlist = make_resources()
+    for rsrc in rlist:
+        tiny.put(rsrc)
+        lite.put(rsrc)
+    yield tiny, lite, rlist
+    lite.close()
+
+
+def names(results):
+    return [r.v["name"] for r in results]
+
+
+@pytest.mark.parametrize(
+    "filter_dict,flags",
+    [
+        ({}, 0),
+        ({"type": resource.TY_DATA}, 0),
+        ({"name": "r3"}, 0),
+        ({"name": "~r[2-4]"}, 0),
+        ({"name": "~R[2-4]"}, re.IGNORECASE),
+        ({"name": "~.*3"}, 0),
+        ({"aliases": ["a2", "a4"]}, 0),
+        ({"aliases!": ["a2", "all"]}, 0),
+        ({"aliases": ["all"], "type": resource.TY_CODE}, 0),
+        ({"created": {"$ge": 1002, "$lt": 1004.5}}, 0),
+        ({"created": {"$ne": 1002}}, 0),
+        ({"created": 1003}, 0),
+        ({"data.x": {"$gt": 3}}, 0),
+        ({"tags": True}, 0),
+        ({"tags": ["two"]}, 0),
+        ({"relations": [{"predicate": "derived", "role": "object"}]}, 0),
+        ({"name": "missing"}, 0),
+    ],
+)
+def test_find(dbs, filter_dict, flags):
+    tiny, lite, _ = dbs
+    expected = list(tiny.find(filter_dict, flags=flags))
+    result = list(lite.find(filter_dict, flags=flags))
+    assert names(result) == names(expected)
+    assert [r.v["doc_id"] for r in result] == [r.v["doc_id"] for r in expected]
+    assert list(lite.find(filter_dict, id_only=True, flags=flags)) == list(
+        tiny.find(filter_dict, id_only=True, flags=flags)
+    )
+
+
+def test_find_by_id_prefix(dbs):
+    tiny, lite, rlist = dbs
+    prefix = rlist[3].id[:4]
+    for flags in (0, re.IGNORECASE):
+        f = {resource.Resource.ID_FIELD: "~" + prefix.upper() + "[a-z]*"}
+        assert names(lite.find(f, flags=flags)) == names(tiny.find(f, flags=flags))
+    assert lite.find_one({resource.Resource.ID_FIELD: rlist[3].id}).v["name"] == "r3"
+
+
+@pytest.mark.parametrize("outgoing", [True, False])
+@pytest.mark.parametrize("maxdepth", [0, 1, 2])
+def test_find_related(dbs, outgoing, maxdepth):
+    tiny, lite, rlist = dbs
+    start = rlist[0] if outgoing else rlist[4]
+    kwargs = dict(outgoing=outgoing, maxdepth=maxdepth, meta=["name"])
+    expected = list(tiny.find_related(start.id, **kwargs))
+    assert list(lite.find_related(start.id, **kwargs)) == expected
+    assert len(expected) > 0
+    # filtered
+    f = {"type": resource.TY_DATA}
+    assert list(lite.find_related(start.id, filter_dict=f, **kwargs)) == list(
+        tiny.find_related(start.id, filter_dict=f, **kwargs)
+    )
+
+
+@pytest.mark.parametrize("outgoing", [True, False])
+def test_find_related_many(dbs, outgoing):
+    tiny, lite, rlist = dbs
+    ids = [r.id for r in rlist]
+    kwargs = dict(outgoing=outgoing, meta=["name"])
+    expected = {id_: list(tiny.find_related(id_, **kwargs)) for id_ in ids}
+    assert tiny.find_related_many(ids, **kwargs) == expected
+    assert lite.find_related_many(ids, **kwargs) == expected
+    f = {"type": resource.TY_DATA}
+    assert tiny.find_related_many(ids, filter_dict=f, **kwargs) == {
+        id_: list(tiny.find_related(id_, filter_dict=f, **kwargs)) for id_ in ids
+    }
+
+
+def test_relation_index_changes(dbs, tmpdir):
+    tiny, _, rlist = dbs
+    kwargs = dict(meta=["name"])
+    ids = [r.id for r in rlist]
+    # build the index, then change the DB
+    tiny.find_related_many(ids, **kwargs)
+    rsrc = tiny.find_one({"name": "r2"})
+    rsrc.v["relations"] = rsrc.v["relations"][:2]
+    tiny.update(rsrc.id, rsrc.v)
+    tiny.delete(filter_dict={"name": "r3"})
+    extra = resource.Resource({"name": "r6"})
+    resource.create_relation_args(rlist[4], resource.PR_USES, extra)
+    tiny.put(extra)
+    ids.append(extra.id)
+    # same results as for a new index
+    fresh = resourcedb.ResourceDB(os.path.join(str(tmpdir), "r.json"))
+    for outgoing in True, False:
+        kwargs["outgoing"] = outgoing
+        expected = fresh.find_related_many(ids, **kwargs)
+        assert tiny.find_related_many(ids, **kwargs) == expected
+    # changes by another DB object are picked up
+    kwargs["outgoing"] = True
+    fresh.delete(filter_dict={"name": "r1"})
+    assert list(tiny.find_related(rlist[0].id, **kwargs)) == list(
+        fresh.find_related(rlist[0].id, **kwargs)
+    )
+
+
+def test_put_duplicate(dbs):
+    _, lite, rlist = dbs
+    with pytest.raises(errors.DuplicateResourceError):
+        lite.put(rlist[0])
+    assert len(lite) == len(rlist)
+
+
+def test_update_delete(dbs):
+    tiny, lite, rlist = dbs
+    for db in tiny, lite:
+        rsrc = db.find_one({"name": "r1"})
+        rsrc.v["aliases"] = ["renamed"]
+        rsrc.v["relations"] = []
+        db.update(rsrc.id, rsrc.v)
+        bad = db.find_one({"name": "r2"})
+        bad.v["type"] = resource.TY_NOTEBOOK
+        with pytest.raises(ValueError):
+            db.update(bad.id, bad.v)
+        with pytest.raises(KeyError):
+            db.update("0" * 32, rsrc.v)
+        db.delete(filter_dict={"name": "r4"})
+        db.delete(idlist=[db.find_one({"name": "r5"}, id_only=True)],
+                  internal_ids=True)
+    assert names(lite.find({"aliases": ["renamed"]})) == ["r1"]
+    assert names(lite.find({})) == names(tiny.find({}))
+    assert len(lite) == len(tiny) == 4
+    # relations of r1 are no longer indexed
+    kwargs = dict(meta=["name"])
+    assert list(lite.find_related(rlist[0].id, **kwargs)) == list(
+        tiny.find_related(rlist[0].id, **kwargs)
+    )
+    assert lite.get(lite.find_one({"name": "r2"}, id_only=True)).v["name"] == "r2"
+    assert lite.get(12345) is None
+
+
+def test_migrate(dbs, tmpdir):
+    tiny, _, rlist = dbs
+    src = os.path.join(str(tmpdir), "r.json")
+    dest = os.path.join(str(tmpdir), "migrated.sqlite")
+    assert resourcedb.migrate_resource_db(src, dest) == len(rlist)
+    with pytest.raises(errors.FileError):
+        resourcedb.migrate_resource_db(src, dest)
+    migrated = resourcedb.open_resource_db(dest)
+    assert isinstance(migrated, resourcedb.SQLiteResourceDB)
+    assert list(migrated.find({}, id_only=True)) == list(tiny.find({}, id_only=True))
+    assert names(migrated.find({"type": resource.TY_DATA})) == ["r1", "r3", "r5"]
+    migrated.close()
+
+
+def test_cli_migrate(tmpdir, monkeypatch):
+    # don't change the user's global configuration
+    monkeypatch.setattr(DMFConfig, "_filename", os.path.join(str(tmpdir), ".dmf"))
+    path = os.path.join(str(tmpdir), "ws")
+    dmf = DMF(path=path, create=True, save_path=True)
+    for rsrc in make_resources():
+        dmf.add(rsrc)
+    runner = CliRunner()
+    result = runner.invoke(cli.migrate, ["--db-file", "r.json"])
+    assert result.exit_code == cli.Code.INPUT_VALUE.value
+    result = runner.invoke(cli.migrate, [])
+    assert result.exit_code == 0
+    assert "Migrated 6 resources" in result.output
+    dmf = DMF(path=path)
+    assert dmf.db_file == "resourcedb.sqlite"
+    assert dmf.count() == 6
+    assert dmf.find_one(name="a3").v["name"] == "r3"
+    result = runner.invoke(cli.migrate, [])
+    assert result.exit_code == cli.Code.DMF_OPER.value
@@ -115,6 +115,11 @@ class Workspace(object):
             Full path to the location of the built (not source) Sphinx HTML
             documentation for the `idaes_dmf` package. See
             DMF Help Configuration for more details.
+        db_file
+            Name of the resource database file, in the workspace directory.
+            The default is "resourcedb.json", which uses TinyDB. Names ending
+            in ".sqlite" use an indexed SQLite database, which is much faster
+            for large workspaces (see ``dmf migrate``).
 
     There are many different possible "styles" of formatting a list of values
     in YAML, but we prefer the simple block-indented style, where the key is
@@ -16,6 +16,8 @@ Framework for generic property packages
 # Import Python libraries
 import types
 
+import numpy as np
+
 # Import Pyomo libraries
 from pyomo.environ import (Constraint,
                            Expression,
@@ -24,6 +26,10 @@ from pyomo.environ import (Constraint,
                            value,
                            Var)
 from pyomo.common.config import ConfigValue
+from pyomo.core.expr.numeric_expr import UnaryFunctionExpression
+from pyomo.core.expr.numvalue import native_types
+from pyomo.core.expr.visitor import (identify_variables,
+                                     StreamBasedExpressionVisitor)
 
 # Import IDAES cores
 from idaes.core import (declare_process_block_class,
@@ -60,6 +66,163 @@ class GenericPropertyPackageError(PropertyPackageError):
                f"in the property parameter configuration."
 
 
+class _ArrayEvaluationVisitor(StreamBasedExpressionVisitor):
+    """
+    Expression visitor which evaluates an expression for an array of values
+    of one of its variables, with all other leaves at their current values.
+    """
+    def __init__(self, var, array):
+        super().__init__()
+        self.var = var
+        self.array = array
+
+    def initializeWalker(self, expr):
+        descend, result = self.beforeChild(None, expr, 0)
+        if not descend:
+            return False, result
+        return True, None
+
+    def beforeChild(self, node, child, child_idx):
+        if child is self.var:
+            return False, self.array
+        if type(child) in native_types or not child.is_expression_type():
+            return False, value(child)
+        return True, None
+
+    def exitNode(self, node, data):
+        if isinstance(node, UnaryFunctionExpression):
+            fcn = getattr(np, node.getname(), None)
+            if fcn is not None:
+                return fcn(data[0])
+            return np.vectorize(
+                lambda v: node._apply_operation([v]), otypes=[float])(data[0])
+        return node._apply_operation(data)
+
+
+def _is_component_of(c, b):
+    """
+    Return whether component c is declared on block b or one of its
+    sub-blocks.
+    """
+    parent = c.parent_block()
+    while parent is not None:
+        if parent is b:
+            return True
+        parent = parent.parent_block()
+    return False
+
+
+def _pressure_sat_comp_arrays(b):
+    """
+    Build a function which evaluates the saturation pressure of each
+    component of state block b, and its derivative with temperature, for an
+    array of temperatures. The saturation pressure expressions are built once
+    with a placeholder temperature, and returned as arrays with one column
+    per component.
+
+    Also returns whether the expressions depend on no variable of b other
+    than temperature, in which case the function applies to every state block
+    sharing the parameter block of b. Parameter Vars, fixed or not, live
+    outside b and are read when the function is called, so they do not
+    prevent sharing; state Vars of b do, even while fixed for initialization.
+    """
+    T = Var()
+    T.construct()
+    psat = b._params.config.pressure_sat_comp
+    exprs = [(psat.pressure_sat_comp(b, j, T),
+              psat.pressure_sat_comp_dT(b, j, T))
+             for j in b._params.component_list]
+    shared = not any(v is not T and _is_component_of(v, b)
+                     for e in exprs for ex in e
+                     for v in identify_variables(ex))
+
+    def evaluate(Ts):
+        visitor = _ArrayEvaluationVisitor(T, Ts)
+        Psat, dPsat = ([np.broadcast_to(visitor.walk_expression(e[i]),
+                                        Ts.shape) for e in exprs]
+                       for i in (0, 1))
+        return np.column_stack(Psat), np.column_stack(dPsat)
+
+    return evaluate, shared
+
+
+def _init_temperature_bubble_dew(blk, keys, dew):
+    """
+    Initialize the bubble (or dew) temperature of the state blocks blk[k] for
+    k in keys, and the vapor (or liquid) mole fractions at that temperature,
+    using Raoult's law.
+
+    The temperatures are found by Newton's method with a positive step limit
+    of 50 K, applied to all state blocks sharing a parameter block at once:
+    the states are read into arrays with one row per state block, and each
+    row stops once its step is below 1e-1 K (or after 30 iterations).
+    """
+    groups = []
+    shared_groups = {}
+    for k in keys:
+        params = blk[k]._params
+        if id(params) in shared_groups:
+            shared_groups[id(params)][0].append(k)
+            continue
+        evaluate, shared = _pressure_sat_comp_arrays(blk[k])
+        group = ([k], evaluate)
+        groups.append(group)
+        if shared:
+            shared_groups[id(params)] = group
+
+    for group, pressure_sat_comp in groups:
+        params = blk[group[0]]._params
+        comps = list(params.component_list)
+        x = np.array([[value(blk[k].mole_frac_comp[j]) for j in comps]
+                      for k in group])
+        P = np.array([value(blk[k].pressure) for k in group])
+
+        # Use lowest component critical temperature as starting point
+        # Starting high and moving down generally works better,
+        # as it under-predicts next step due to exponential form of
+        # Psat.
+        # Subtract 1 to avoid potential singularities at Tcrit
+        Tcrit = min(value(params.temperature_crit_comp[j])
+                    for j in comps) - 1
+        if dew:
+            # If Tbub has been calculated, use this as the starting point
+            T = np.array([blk[k].temperature_bubble.value
+                          if hasattr(blk[k], "_mole_frac_tbub") else Tcrit
+                          for k in group], dtype=float)
+        else:
+            T = np.full(len(group), Tcrit, dtype=float)
+
+        active = np.ones(len(group), dtype=bool)
+        counter = 0
+        while active.any() and counter < 30:
+            i = np.flatnonzero(active)
+            Psat, dPsat = pressure_sat_comp(T[i])
+            if dew:
+                f = P[i]*np.sum(x[i]/Psat, axis=1) - 1
+                df = -P[i]*np.sum(x[i]/Psat**2*dPsat, axis=1)
+            else:
+                f = np.sum(Psat*x[i], axis=1) - P[i]
+                df = np.sum(x[i]*dPsat, axis=1)
+
+            # Limit temperature step to avoid excessive overshoot
+            # Only limit positive steps due to non-linearity
+            T1 = T[i] - np.maximum(f/df, -50)
+            active[i] = np.abs(T1 - T[i]) > 1e-1
+            T[i] = T1
+            counter += 1
+
+        mole_frac = x*P[:, np.newaxis]/pressure_sat_comp(T)[0]
+        for n, k in enumerate(group):
+            if dew:
+                blk[k].temperature_dew.value = float(T[n])
+                mole_frac_var = blk[k]._mole_frac_tdew
+            else:
+                blk[k].temperature_bubble.value = float(T[n])
+                mole_frac_var = blk[k]._mole_frac_tbub
+            for m, j in enumerate(comps):
+                mole_frac_var[j].value = float(mole_frac[n, m])
+
+
 def get_method(self, config_arg):
     """
     Method to inspect configuration argument and return the user-defined
@@ -550,107 +713,14 @@ class _GenericStateBlock(StateBlock):
 
         # ---------------------------------------------------------------------
         # If present, initialize bubble and dew point calculations
-        for k in blk.keys():
-            # Bubble temperature initialization
-            if hasattr(blk[k], "_mole_frac_tbub"):
-                # Use lowest component critical temperature as starting point
-                # Starting high and moving down generally works better,
-                # as it under-predicts next step due to exponential form of
-                # Psat.
-                # Subtract 1 to avoid potential singularities at Tcrit
-                Tbub0 = min(blk[k]._params.temperature_crit_comp[j]
-                            for j in blk[k]._params.component_list) - 1
-
-                err = 1
-                counter = 0
-
-                # Newton solver with step limiter to prevent overshoot
-                # Tolerance only needs to be ~1e-1
-                # Iteration limit of 30
-                while err > 1e-1 and counter < 30:
-                    f = value(sum(blk[k]._params.config.pressure_sat_comp
-                                  .pressure_sat_comp(blk[k], j, Tbub0) *
-                                  blk[k].mole_frac_comp[j]
-                                  for j in blk[k]._params.component_list) -
-                              blk[k].pressure)
-                    df = value(sum(
-                           blk[k].mole_frac_comp[j]*blk[k]._params.config
-                           .pressure_sat_comp.pressure_sat_comp_dT(
-                                   blk[k], j, Tbub0)
-                           for j in blk[k]._params.component_list))
-
-                    # Limit temperature step to avoid excessive overshoot
-                    # Only limit positive steps due to non-linearity
-                    if f/df < -50:
-                        Tbub1 = Tbub0 + 50
-                    else:
-                        Tbub1 = Tbub0 - f/df
-
-                    err = abs(Tbub1 - Tbub0)
-                    Tbub0 = Tbub1
-                    counter += 1
-
-                blk[k].temperature_bubble.value = Tbub0
-
-                for j in blk[k]._params.component_list:
-                    blk[k]._mole_frac_tbub[j].value = value(
-                            blk[k].mole_frac_comp[j]*blk[k].pressure /
-                            blk[k]._params.config.pressure_sat_comp
-                                  .pressure_sat_comp(blk[k], j, Tbub0))
-
-            # Bubble temperature initialization
-            if hasattr(blk[k], "_mole_frac_tdew"):
-                if hasattr(blk[k], "_mole_frac_tbub"):
-                    # If Tbub has been calculated above, use this as the
-                    # starting point
-                    Tdew0 = blk[k].temperature_bubble.value
-                else:
-                    # Otherwise, use lowest component critical temperature as
-                    # starting point
-                    # Subtract 1 to avoid potential singularities at Tcrit
-                    Tdew0 = min(blk[k]._params.temperature_crit_comp[j]
-                                for j in blk[k]._params.component_list) - 1
-
-                err = 1
-                counter = 0
-
-                # Newton solver with step limiter to prevent overshoot
-                # Tolerance only needs to be ~1e-1
-                # Iteration limit of 30
-                while err > 1e-1 and counter < 30:
-                    f = value(blk[k].pressure *
-                              sum(blk[k].mole_frac_comp[j] /
-                                  blk[k]._params.config.pressure_sat_comp
-                                  .pressure_sat_comp(blk[k], j, Tdew0)
-                                  for j in blk[k]._params.component_list) - 1)
-                    df = -value(
-                            blk[k].pressure *
-                            sum(blk[k].mole_frac_comp[j] /
-                                blk[k]._params.config.pressure_sat_comp
-                                  .pressure_sat_comp(blk[k], j, Tdew0)**2 *
-                                blk[k]._params.config
-                                .pressure_sat_comp.pressure_sat_comp_dT(
-                                        blk[k], j, Tdew0)
-                                for j in blk[k]._params.component_list))
-
-                    # Limit temperature step to avoid excessive overshoot
-                    if f/df < -50:
-                        Tdew1 = Tdew0 + 50
-                    else:
-                        Tdew1 = Tdew0 - f/df
-
-                    err = abs(Tdew1 - Tdew0)
-                    Tdew0 = Tdew1
-                    counter += 1
-
-                blk[k].temperature_dew.value = Tdew0
-
-                for j in blk[k]._params.component_list:
-                    blk[k]._mole_frac_tdew[j].value = value(
-                            blk[k].mole_frac_comp[j]*blk[k].pressure /
-                            blk[k]._params.config.pressure_sat_comp
-                                  .pressure_sat_comp(blk[k], j, Tdew0))
+        _init_temperature_bubble_dew(
+                blk, [k for k in blk.keys()
+                      if hasattr(blk[k], "_mole_frac_tbub")], dew=False)
+        _init_temperature_bubble_dew(
+                blk, [k for k in blk.keys()
+                      if hasattr(blk[k], "_mole_frac_tdew")], dew=True)
 
+        for k in blk.keys():
             # Bubble pressure initialization
             if hasattr(blk[k], "_mole_frac_pbub"):
                 blk[k].pressure_bubble.value = value(
@@ -16,15 +16,21 @@ Tests for generic property package core code
 Author: Andrew Lee
 """
 import pytest
+import numpy as np
+from math import atan
 from sys import modules
 
-from pyomo.environ import Block, ConcreteModel, Expression, Param, Set, Var
+from pyomo.environ import (Block, ConcreteModel, exp, Expression, Param, Set,
+                           value, Var)
 from pyomo.common.config import ConfigBlock, ConfigValue
+from pyomo.core.expr.numeric_expr import UnaryFunctionExpression
 
 from idaes.generic_models.properties.core.generic.generic_property import (
         GenericPropertyPackageError,
         get_method,
-        GenericParameterData)
+        GenericParameterData,
+        _init_temperature_bubble_dew,
+        _pressure_sat_comp_arrays)
 from idaes.generic_models.properties.core.generic.tests import dummy_eos
 
 from idaes.core import declare_process_block_class
@@ -831,3 +837,171 @@ class TestGenericStateBlock(object):
             assert j in frame.params.component_list
             assert str(frame.props[1].pressure_sat_comp[j].expr) == \
                 str(frame.props[1].pressure)
+
+
+# -----------------------------------------------------------------------------
+# Saturation pressure methods for testing bubble and dew point initialization
+class ParameterPsat(object):
+    # Depends on temperature and fixed parameter Vars only
+    @staticmethod
+    def pressure_sat_comp(b, j, T):
+        return 1e5*exp(b._params.psat_A[j] - b._params.psat_B[j]/T)
+
+    @staticmethod
+    def pressure_sat_comp_dT(b, j, T):
+        return (ParameterPsat.pressure_sat_comp(b, j, T) *
+                b._params.psat_B[j]/T**2)
+
+
+def _factor(T):
+    # Applied through a UnaryFunctionExpression with no NumPy equivalent
+    return UnaryFunctionExpression((T,), "psat_factor",
+                                   lambda v: 1 + 0.1*atan(v/500))
+
+
+def _factor_dT(T):
+    return 0.1/(500*(1 + (T/500)**2))
+
+
+class StatePsat(object):
+    # Depends on a state variable of the state block
+    @staticmethod
+    def pressure_sat_comp(b, j, T):
+        return (ParameterPsat.pressure_sat_comp(b, j, T) *
+                b.flow_mol/10*_factor(T))
+
+    @staticmethod
+    def pressure_sat_comp_dT(b, j, T):
+        return (ParameterPsat.pressure_sat_comp_dT(b, j, T) *
+                b.flow_mol/10*_factor(T) +
+                ParameterPsat.pressure_sat_comp(b, j, T) *
+                b.flow_mol/10*_factor_dT(T))
+
+
+def _scalar_temperature(b, dew, T):
+    # Reference scalar Newton iteration for a single state block
+    psat = b._params.config.pressure_sat_comp
+    comps = list(b._params.component_list)
+    x = {j: value(b.mole_frac_comp[j]) for j in comps}
+    P = value(b.pressure)
+    for counter in range(30):
+        Psat = {j: value(psat.pressure_sat_comp(b, j, T)) for j in comps}
+        dPsat = {j: value(psat.pressure_sat_comp_dT(b, j, T)) for j in comps}
+        if dew:
+            f = P*sum(x[j]/Psat[j] for j in comps) - 1
+            df = -P*sum(x[j]/Psat[j]**2*dPsat[j] for j in comps)
+        else:
+            f = sum(Psat[j]*x[j] for j in comps) - P
+            df = sum(x[j]*dPsat[j] for j in comps)
+        T1 = T - max(f/df, -50)
+        converged = abs(T1 - T) <= 1e-1
+        T = T1
+        if converged:
+            break
+    mole_frac = {j: x[j]*P/value(psat.pressure_sat_comp(b, j, T))
+                 for j in comps}
+    return T, mole_frac
+
+
+class TestInitTemperatureBubbleDew(object):
+    def _frame(self, psat):
+        m = ConcreteModel()
+        m.params = DummyParameterBlock(default={
+                "component_list": ["a", "b", "c"],
+                "phase_list": [1, 2],
+                "state_definition": modules[__name__],
+                "equation_of_state": {1: dummy_eos,
+                                      2: dummy_eos},
+                "temperature_bubble": dummy_call,
+                "temperature_dew": dummy_call,
+                "pressure_sat_comp": psat})
+
+        m.params.temperature_crit_comp = Param(
+                m.params.component_list,
+                initialize={"a": 562.2, "b": 591.8, "c": 617.2})
+        m.params.psat_A = Var(m.params.component_list,
+                              initialize={"a": 10.5, "b": 10.9, "c": 11.2})
+        m.params.psat_B = Var(m.params.component_list,
+                              initialize={"a": 3500, "b": 4000, "c": 4400})
+        m.params.psat_A.fix()
+        m.params.psat_B.fix()
+
+        m.props = m.params.state_block_class([1, 2, 3],
+                                             default={"defined_state": False,
+                                                      "parameters": m.params})
+
+        states = {1: (1e5, 10, {"a": 0.5, "b": 0.3, "c": 0.2}),
+                  2: (2e5, 12, {"a": 0.2, "b": 0.5, "c": 0.3}),
+                  3: (5e5, 8, {"a": 0.1, "b": 0.2, "c": 0.7})}
+        for k, (P, F, x) in states.items():
+            m.props[k].pressure = Var(initialize=P)
+            m.props[k].temperature = Var(initialize=400, bounds=(200, 700))
+            m.props[k].flow_mol = Var(initialize=F)
+            m.props[k].mole_frac_comp = Var(m.params.component_list,
+                                            initialize=x)
+            m.props[k].flow_mol.fix()
+
+            # Construct bubble and dew point variables
+            m.props[k].temperature_bubble
+            m.props[k].temperature_dew
+
+        return m
+
+    def _check(self, m):
+        keys = list(m.props.keys())
+        Tcrit = min(value(m.params.temperature_crit_comp[j])
+                    for j in m.params.component_list) - 1
+
+        _init_temperature_bubble_dew(m.props, keys, dew=False)
+        for k in keys:
+            T, y = _scalar_temperature(m.props[k], False, Tcrit)
+            assert m.props[k].temperature_bubble.value == \
+                pytest.approx(T, rel=1e-8)
+            for j in m.params.component_list:
+                assert m.props[k]._mole_frac_tbub[j].value == \
+                    pytest.approx(y[j], rel=1e-8)
+
+        _init_temperature_bubble_dew(m.props, keys, dew=True)
+        for k in keys:
+            T, x = _scalar_temperature(
+                m.props[k], True, m.props[k].temperature_bubble.value)
+            assert m.props[k].temperature_dew.value == \
+                pytest.approx(T, rel=1e-8)
+            assert m.props[k].temperature_dew.value > \
+                m.props[k].temperature_bubble.value
+            for j in m.params.component_list:
+                assert m.props[k]._mole_frac_tdew[j].value == \
+                    pytest.approx(x[j], rel=1e-8)
+
+    def test_shared(self):
+        m = self._frame(ParameterPsat)
+
+        # Fixed parameter Vars do not prevent sharing the evaluator
+        evaluate, shared = _pressure_sat_comp_arrays(m.props[1])
+        assert shared
+
+        self._check(m)
+
+    def test_per_block(self):
+        m = self._frame(StatePsat)
+
+        # State variables prevent sharing, even while fixed
+        evaluate, shared = _pressure_sat_comp_arrays(m.props[1])
+        assert not shared
+
+        self._check(m)
+
+    def test_pressure_sat_comp_arrays(self):
+        m = self._frame(StatePsat)
+        evaluate, shared = _pressure_sat_comp_arrays(m.props[2])
+
+        Ts = [350.0, 400.0, 450.0]
+        Psat, dPsat = evaluate(np.array(Ts))
+        assert Psat.shape == dPsat.shape == (3, 3)
+        for n, T in enumerate(Ts):
+            for i, j in enumerate(m.params.component_list):
+                assert Psat[n, i] == pytest.approx(value(
+                    StatePsat.pressure_sat_comp(m.props[2], j, T)), rel=1e-12)
+                assert dPsat[n, i] == pytest.approx(value(
+                    StatePsat.pressure_sat_comp_dT(m.props[2], j, T)),
+                    rel=1e-12)
@@ -32,6 +32,8 @@ import math
 import os
 from enum import Enum
 
+import numpy as np
+
 # Import Pyomo libraries
 from pyomo.environ import (Constraint,
                            exp,
@@ -82,6 +84,66 @@ def cubic_roots_available():
     return os.path.isfile(_so)
 
 
+def _init_temperature_bubble_dew(blk, keys, dew):
+    """
+    Initialize the bubble (or dew) temperature of the state blocks blk[k] for
+    k in keys, and the vapor (or liquid) mole fractions at that temperature,
+    using Raoult's law and the Antoine equation.
+
+    The temperatures are found by Newton's method with a step limit of 20 K,
+    applied to all state blocks sharing a parameter block at once: the
+    parameters and states are read into arrays with one row per state block,
+    and each row stops once its step is below 1e-2 K (or after 100
+    iterations).
+    """
+    groups = {}
+    for k in keys:
+        groups.setdefault(id(blk[k]._params), []).append(k)
+
+    for group in groups.values():
+        params = blk[group[0]]._params
+        comps = list(params.component_list)
+        A, B, C = (np.array([value(params.antoine[j, i]) for j in comps])
+                   for i in ('1', '2', '3'))
+        x = np.array([[value(blk[k].mole_frac_comp[j]) for j in comps]
+                      for k in group])
+        P = np.array([value(blk[k].pressure) for k in group])
+
+        def antoine_P(T):
+            return 1e5*10**(A - B/(T[:, np.newaxis] + C))
+
+        T = np.sum(x*(B/(A - np.log10(P*1e-5)[:, np.newaxis]) - C), axis=1)
+        active = np.ones(len(group), dtype=bool)
+        counter = 0
+        while active.any() and counter < 100:
+            i = np.flatnonzero(active)
+            Ti = T[i][:, np.newaxis]
+            Psat = antoine_P(T[i])
+            if dew:
+                f = P[i]*np.sum(x[i]/Psat, axis=1) - 1
+                df = -P[i]*math.log(10)*np.sum(
+                        x[i]*B/((Ti + C)**2*Psat), axis=1)
+            else:
+                f = np.sum(Psat*x[i], axis=1) - P[i]
+                df = np.sum(x[i]*B*math.log(10)*Psat/(Ti + C)**2, axis=1)
+
+            T1 = T[i] - np.clip(f/df, -20, 20)
+            active[i] = np.abs(T1 - T[i]) > 1e-2
+            T[i] = T1
+            counter += 1
+
+        mole_frac = x*P[:, np.newaxis]/antoine_P(T)
+        for n, k in enumerate(group):
+            if dew:
+                blk[k].temperature_dew.value = float(T[n])
+                mole_frac_var = blk[k]._mole_frac_tdew
+            else:
+                blk[k].temperature_bubble.value = float(T[n])
+                mole_frac_var = blk[k]._mole_frac_tbub
+            for m, j in enumerate(comps):
+                mole_frac_var[j].value = float(mole_frac[n, m])
+
+
 class CubicEoS(Enum):
     PR = 0
     SRK = 1
@@ -265,96 +327,13 @@ class _CubicStateBlock(StateBlock):
                             b._params.antoine[j, '2'] /
                             (T + b._params.antoine[j, '3']))
 
-        # Bubble temperature initialization
-        for k in blk.keys():
-            if hasattr(blk[k], "_mole_frac_tbub"):
-                Tbub0 = 0
-                for j in blk[k]._params.component_list:
-                    Tbub0 += value(
-                            blk[k].mole_frac_comp[j] *
-                            (blk[k]._params.antoine[j, '2'] /
-                             (blk[k]._params.antoine[j, '1'] -
-                              math.log10(value(blk[k].pressure*1e-5))) -
-                             blk[k]._params.antoine[j, '3']))
-
-                err = 1
-                counter = 0
-
-                while err > 1e-2 and counter < 100:
-                    f = value(sum(antoine_P(blk[k], j, Tbub0) *
-                                  blk[k].mole_frac_comp[j]
-                                  for j in blk[k]._params.component_list) -
-                              blk[k].pressure)
-                    df = value(sum(
-                            blk[k].mole_frac_comp[j] *
-                            blk[k]._params.antoine[j, '2'] *
-                            math.log(10)*antoine_P(blk[k], j, Tbub0) /
-                            (Tbub0 + blk[k]._params.antoine[j, '3'])**2
-                            for j in blk[k]._params.component_list))
-
-                    if f/df > 20:
-                        Tbub1 = Tbub0 - 20
-                    elif f/df < -20:
-                        Tbub1 = Tbub0 + 20
-                    else:
-                        Tbub1 = Tbub0 - f/df
-
-                    err = abs(Tbub1 - Tbub0)
-                    Tbub0 = Tbub1
-                    counter += 1
-
-                blk[k].temperature_bubble.value = Tbub0
-
-                for j in blk[k]._params.component_list:
-                    blk[k]._mole_frac_tbub[j].value = value(
-                            blk[k].mole_frac_comp[j]*blk[k].pressure /
-                            antoine_P(blk[k], j, Tbub0))
-
-        # Dew temperature initialization
-        for k in blk.keys():
-            if hasattr(blk[k], "_mole_frac_tdew"):
-                Tdew0 = 0
-                for j in blk[k]._params.component_list:
-                    Tdew0 += value(
-                            blk[k].mole_frac_comp[j] *
-                            (blk[k]._params.antoine[j, '2'] /
-                             (blk[k]._params.antoine[j, '1'] -
-                              math.log10(value(blk[k].pressure*1e-5))) -
-                             blk[k]._params.antoine[j, '3']))
-
-                err = 1
-                counter = 0
-
-                while err > 1e-2 and counter < 100:
-                    f = value(blk[k].pressure *
-                              sum(blk[k].mole_frac_comp[j] /
-                                  antoine_P(blk[k], j, Tdew0)
-                                  for j in blk[k]._params.component_list) - 1)
-                    df = -value(blk[k].pressure*math.log(10) *
-                                sum(blk[k].mole_frac_comp[j] *
-                                    blk[k]._params.antoine[j, '2'] /
-                                    ((Tdew0 +
-                                      blk[k]._params.antoine[j, '3'])**2 *
-                                    antoine_P(blk[k], j, Tdew0))
-                                    for j in blk[k]._params.component_list))
-
-                    if f/df > 20:
-                        Tdew1 = Tdew0 - 20
-                    elif f/df < -20:
-                        Tdew1 = Tdew0 + 20
-                    else:
-                        Tdew1 = Tdew0 - f/df
-
-                    err = abs(Tdew1 - Tdew0)
-                    Tdew0 = Tdew1
-                    counter += 1
-
-                blk[k].temperature_dew.value = Tdew0
-
-                for j in blk[k]._params.component_list:
-                    blk[k]._mole_frac_tdew[j].value = value(
-                            blk[k].mole_frac_comp[j]*blk[k].pressure /
-                            antoine_P(blk[k], j, Tdew0))
+        # Bubble and dew temperature initialization
+        _init_temperature_bubble_dew(
+                blk, [k for k in blk.keys()
+                      if hasattr(blk[k], "_mole_frac_tbub")], dew=False)
+        _init_temperature_bubble_dew(
+                blk, [k for k in blk.keys()
+                      if hasattr(blk[k], "_mole_frac_tdew")], dew=True)
 
         # Bubble pressure initialization
         for k in blk.keys():
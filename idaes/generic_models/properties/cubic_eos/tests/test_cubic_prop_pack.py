@@ -10,6 +10,8 @@
 # license information, respectively. Both files are also available online
 # at the URL "https://github.com/IDAES/idaes-pse".
 ##############################################################################
+import math
+
 import pytest
 
 from pyomo.environ import (ConcreteModel,
@@ -19,6 +21,7 @@ from pyomo.environ import (ConcreteModel,
                            Param,
                            Set,
                            sqrt,
+                           value,
                            Var)
 
 from idaes.core import FlowsheetBlock
@@ -27,7 +30,8 @@ from idaes.generic_models.properties.cubic_eos.cubic_prop_pack import \
      CubicParameterBlock,
      CubicStateBlock,
      CubicEoS,
-     EoS_param)
+     EoS_param,
+     _init_temperature_bubble_dew)
 
 
 # Set module level pyest marker
@@ -876,3 +880,104 @@ class TestStateBlock_V_SRK(object):
         assert isinstance(model.fs.props[1].proc_Z_vap, ExternalFunction)
         assert isinstance(model.fs.props[1].proc_Z_liq_x, ExternalFunction)
         assert isinstance(model.fs.props[1].proc_Z_vap_x, ExternalFunction)
+
+
+def _scalar_temperature(b, dew):
+    # Reference scalar Newton iteration for a single state block
+    def antoine_P(j, T):
+        return value(1e5*10**(b._params.antoine[j, '1'] -
+                              b._params.antoine[j, '2'] /
+                              (T + b._params.antoine[j, '3'])))
+
+    comps = list(b._params.component_list)
+    x = {j: value(b.mole_frac_comp[j]) for j in comps}
+    P = value(b.pressure)
+    A, B, C = ({j: value(b._params.antoine[j, i]) for j in comps}
+               for i in ('1', '2', '3'))
+
+    T = sum(x[j]*(B[j]/(A[j] - math.log10(P*1e-5)) - C[j]) for j in comps)
+    err = 1
+    counter = 0
+    while err > 1e-2 and counter < 100:
+        if dew:
+            f = P*sum(x[j]/antoine_P(j, T) for j in comps) - 1
+            df = -P*math.log(10)*sum(x[j]*B[j]/((T + C[j])**2*antoine_P(j, T))
+                                     for j in comps)
+        else:
+            f = sum(antoine_P(j, T)*x[j] for j in comps) - P
+            df = sum(x[j]*B[j]*math.log(10)*antoine_P(j, T)/(T + C[j])**2
+                     for j in comps)
+        T1 = T - min(max(f/df, -20), 20)
+        err = abs(T1 - T)
+        T = T1
+        counter += 1
+
+    return T, {j: x[j]*P/antoine_P(j, T) for j in comps}
+
+
+class TestInitTemperatureBubbleDew(object):
+    @pytest.fixture()
+    def model(self):
+        m = ConcreteModel()
+
+        m.fs = FlowsheetBlock(default={"dynamic": False})
+
+        m.fs.params = CubicParameterBlock()
+        m.fs.params.component_list = Set(initialize=["a", "b"])
+        m.fs.params.cubic_type = CubicEoS.PR
+
+        m.fs.params.gas_const = Param(default=8.314462618)
+
+        m.fs.params.pressure_crit = Param(
+                m.fs.params.component_list,
+                initialize={'a': 48.9e5, 'b': 41e5})
+        m.fs.params.temperature_crit = Param(
+                m.fs.params.component_list,
+                initialize={"a": 562.2, "b": 591.8})
+
+        m.fs.params.omega = Param(
+                m.fs.params.component_list,
+                initialize={"a": 0.212, "b": 0.263})
+
+        m.fs.params.kappa = Param(
+            m.fs.params.component_list,
+            m.fs.params.component_list,
+            initialize={('a', 'a'): 0.0, ('a', 'b'): 0.0,
+                        ('b', 'a'): 0.0, ('b', 'b'): 0.0})
+
+        m.fs.params.antoine = Param(
+            m.fs.params.component_list,
+            ['1', '2', '3'],
+            initialize={('a', '1'): 4.202, ('a', '2'): 1322,
+                        ('a', '3'): -38.56, ('b', '1'): 4.216,
+                        ('b', '2'): 1435, ('b', '3'): -43.33})
+
+        m.fs.props = m.fs.params.state_block_class(
+                [1, 2, 3], default={"parameters": m.fs.params})
+
+        states = {1: (1e5, 0.5), 2: (2e5, 0.2), 3: (5e5, 0.9)}
+        for k, (P, xa) in states.items():
+            m.fs.props[k].pressure.value = P
+            m.fs.props[k].mole_frac_comp['a'].value = xa
+            m.fs.props[k].mole_frac_comp['b'].value = 1 - xa
+
+        return m
+
+    def test_bubble_dew(self, model):
+        keys = list(model.fs.props.keys())
+        for dew in (False, True):
+            _init_temperature_bubble_dew(model.fs.props, keys, dew=dew)
+
+        for k in keys:
+            b = model.fs.props[k]
+            Tbub, y = _scalar_temperature(b, False)
+            Tdew, x = _scalar_temperature(b, True)
+
+            assert b.temperature_bubble.value == pytest.approx(Tbub, rel=1e-8)
+            assert b.temperature_dew.value == pytest.approx(Tdew, rel=1e-8)
+            assert b.temperature_dew.value > b.temperature_bubble.value
+            for j in model.fs.params.component_list:
+                assert b._mole_frac_tbub[j].value == \
+                    pytest.approx(y[j], rel=1e-8)
+                assert b._mole_frac_tdew[j].value == \
+                    pytest.approx(x[j], rel=1e-8)
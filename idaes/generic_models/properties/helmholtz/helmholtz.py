@@ -17,9 +17,13 @@ __author__ = "John Eslick"
 # Import Python libraries
 import os
 import enum
+from ctypes import byref
+
+import numpy as np
 
 # Import Pyomo libraries
 from pyomo.environ import (
+    Block,
     Constraint,
     Expression,
     Param,
@@ -31,10 +35,17 @@ from pyomo.environ import (
     NonNegativeReals,
     exp,
     sqrt,
-    ConcreteModel,
     Suffix,
 )
 from pyomo.environ import ExternalFunction as EF
+from pyomo.core.base.external import AMPLExternalFunction
+from pyomo.version import version as pyomo_version
+
+try:
+    # Private Pyomo structure, only needed by HelmholtzFunctions
+    from pyomo.core.base.external import _ARGLIST
+except ImportError:
+    _ARGLIST = None
 from pyomo.core.kernel.component_set import ComponentSet
 from pyomo.common.config import ConfigValue, In
 
@@ -83,55 +94,288 @@ class PhaseType(enum.Enum):
     G = 4  # Assume only vapor is pressent
 
 
-def _htpx(T, Tmin, Tmax, prop=None, P=None, x=None):
-    """
-    Convenience function to calculate enthalpy from temperature and either
-    pressure or vapor fraction. This function can be used for inlet streams and
-    initialization where temperature is known instead of enthalpy.
+# Compiled functions already registered, keyed by (process id, library path),
+# so each process loads a shared library only once.
+_library_cache = {}
+
 
-    User must provide values for one (and only one) of arguments P and x.
+def _library_functions(library):
+    """Load a compiled Helmholtz EOS library, and return a dictionary mapping
+    the registered function names to ctypes function pointers. The library is
+    loaded at most once per process.
+    """
+    key = (os.getpid(), library)
+    if key not in _library_cache:
+        if not _available(library):
+            raise ConfigurationError(
+                "Library file '{}' not found. Was it installed?".format(library)
+            )
+        # Let Pyomo do the AMPL function registration, and keep the external
+        # function around so the library handle stays referenced.
+        ef = AMPLExternalFunction(library=library, function=None)
+        try:
+            ef.load_library()
+            if _ARGLIST is None:
+                raise AttributeError("_ARGLIST")
+            functions = {k: v[0] for k, v in ef._known_functions.items()}
+        except (AttributeError, TypeError, IndexError) as e:
+            raise RuntimeError(
+                "HelmholtzFunctions relies on private Pyomo internals "
+                "(pyomo.core.base.external._ARGLIST and "
+                "AMPLExternalFunction._known_functions), which are not "
+                "compatible with the installed Pyomo {}. It was written "
+                "against the IDAES Pyomo fork listed in requirements.txt; "
+                "install that version, or evaluate the functions through a "
+                "Pyomo model instead.".format(pyomo_version)
+            ) from e
+        _library_cache[key] = (ef, functions)
+    return _library_cache[key][1]
+
+
+class HelmholtzFunctions(object):
+    """Evaluate the compiled Helmholtz EOS functions element-wise on NumPy
+    arrays without building a Pyomo model. This is useful for generating
+    property tables or initial guesses for many points at once. Arguments are
+    broadcast against each other, and results have the broadcast shape.
 
     Args:
-        T: Temperature [K] (between Tmin and Tmax)
-        Tmin: Lower bound on allowed temperatures
-        Tmax: Upper bound on allowed temperatures
-        prop: Property block to use for the enthalpy calcuations
-        P: Pressure [Pa] (between 1 and 1e9), None if saturated
-        x: Vapor fraction [mol vapor/mol total] (between 0 and 1), None if
-        superheated or subcooled
-
-    Returns:
-        Total molar enthalpy [J/mol].
+        library: path to the compiled Helmholtz EOS library
+        mw: molecular weight [kg/mol]
+        temperature_crit: critical temperature [K]
+        pressure_crit: critical pressure [Pa]
+        dens_mass_crit: critical density [kg/m^3]
+        Tmin: lower bound on allowed temperatures [K]
+        Tmax: upper bound on allowed temperatures [K]
     """
-    if not (P is None) ^ (x is None):
-        raise ConfigurationError(
-            "htpx must be provided with one (and only one) of arguments P and x."
-        )
-    if not Tmin <= T <= Tmax:
-        raise ConfigurationError("T out of range. Must be between 2e2 and 3e3")
-    if P is not None and not 1 <= P <= 1e9:
-        raise ConfigurationError("P out of range. Must be between 1 and 1e9")
-    if x is not None and not 0 <= x <= 1:
-        raise ConfigurationError("x must be between 0 and 1")
-
-    model = ConcreteModel()
-    model.param = prop.config.parameters
-    model.prop = prop
-    Tc = model.param.temperature_crit
-    Pc = model.param.pressure_crit
-
-    if x is None:
-        Tsat = Tc / value(prop.func_tau_sat(P / 1000))
-        if value(T) < Tsat or value(P) > Pc:  # liquid
-            return value(prop.func_hlpt(P / 1000, Tc / T) * prop.mw * 1000.0)
-        else:  # vapor
-            return value(prop.func_hvpt(P / 1000, Tc / T) * prop.mw * 1000.0)
-    if P is None:
-        Psat = value(prop.func_p_sat(Tc / T))  # kPa
+
+    def __init__(
+        self,
+        library,
+        mw,
+        temperature_crit,
+        pressure_crit,
+        dens_mass_crit,
+        Tmin=200,
+        Tmax=3e3,
+    ):
+        self.library = library
+        self.mw = mw
+        self.temperature_crit = temperature_crit
+        self.pressure_crit = pressure_crit
+        self.dens_mass_crit = dens_mass_crit
+        self.Tmin = Tmin
+        self.Tmax = Tmax
+
+    def __call__(self, name, *args):
+        """Evaluate a compiled function for each element of the (broadcast)
+        arguments. Arguments and results are in the units the compiled
+        library uses (kPa, kJ/kg, reduced density, tau = Tc/T).
+
+        Args:
+            name: name of the compiled function (e.g. "tau", "hlpt")
+            args: arguments, scalars or array-like
+
+        Returns:
+            numpy array of function values
+        """
+        fcn = _library_functions(self.library)[name]
+        args = np.broadcast_arrays(*[np.asarray(a, dtype=float) for a in args])
+        out = np.empty(args[0].shape)
+        flat = out.reshape(-1)
+        arglist = _ARGLIST([0.0] * len(args))
+        ra = arglist.ra
+        ref = byref(arglist)
+        for i, row in enumerate(zip(*[a.ravel().tolist() for a in args])):
+            for j, v in enumerate(row):
+                ra[j] = v
+            flat[i] = fcn(ref)
+        return out
+
+    def _check_tpx(self, T, P, x):
+        if not (P is None) ^ (x is None):
+            raise ConfigurationError(
+                "htpx must be provided with one (and only one) of arguments P "
+                "and x."
+            )
+        if not np.all((self.Tmin <= T) & (T <= self.Tmax)):
+            raise ConfigurationError(
+                "T out of range. Must be between {} and {}".format(
+                    self.Tmin, self.Tmax
+                )
+            )
+        if P is not None and not np.all((1 <= P) & (P <= 1e9)):
+            raise ConfigurationError("P out of range. Must be between 1 and 1e9")
+        if x is not None and not np.all((0 <= x) & (x <= 1)):
+            raise ConfigurationError("x must be between 0 and 1")
+
+    def htpx(self, T, P=None, x=None):
+        """Vectorized version of the htpx convenience function. Calculate
+        enthalpy from temperature and either pressure or vapor fraction.
+
+        Args:
+            T: Temperature [K] (between Tmin and Tmax)
+            P: Pressure [Pa] (between 1 and 1e9), None if saturated
+            x: Vapor fraction [mol vapor/mol total] (between 0 and 1), None if
+                superheated or subcooled
+
+        Returns:
+            Total molar enthalpy [J/mol] array
+        """
+        T = np.asarray(T, dtype=float)
+        P = None if P is None else np.asarray(P, dtype=float)
+        x = None if x is None else np.asarray(x, dtype=float)
+        self._check_tpx(T, P, x)
+        tau = self.temperature_crit / T
+        c = self.mw * 1000.0
+        if x is None:
+            P = P / 1000.0  # kPa
+            Tsat = self.temperature_crit / self("tau_sat", P)
+            liq = (T < Tsat) | (P * 1000.0 > self.pressure_crit)
+            return np.where(
+                liq, self("hlpt", P, tau) * c, self("hvpt", P, tau) * c
+            )
+        Psat = self("p_sat", tau)  # kPa
         return (
-            value(prop.func_hlpt(Psat, Tc / T) * prop.mw * 1000.0) * (1 - x)
-            + value(prop.func_hvpt(Psat, Tc / T) * prop.mw * 1000.0) * x
+            self("hlpt", Psat, tau) * c * (1 - x) + self("hvpt", Psat, tau) * c * x
+        )
+
+    def properties_tpx(self, T, P=None, x=None):
+        """Calculate properties from temperature and either pressure
+        (subcooled or superheated) or vapor fraction (saturated).
+
+        Args:
+            T: Temperature [K] (between Tmin and Tmax)
+            P: Pressure [Pa] (between 1 and 1e9), None if saturated
+            x: Vapor fraction [mol vapor/mol total] (between 0 and 1), None if
+                superheated or subcooled
+
+        Returns:
+            dict of property arrays, see :meth:`properties_ph`
+        """
+        T = np.asarray(T, dtype=float)
+        P = None if P is None else np.asarray(P, dtype=float)
+        x = None if x is None else np.asarray(x, dtype=float)
+        self._check_tpx(T, P, x)
+        tau = self.temperature_crit / T
+        if x is None:
+            Tsat = self.temperature_crit / self("tau_sat", P / 1000.0)
+            liq = (T < Tsat) | (P > self.pressure_crit)
+            vf = np.where(liq, 0.0, 1.0)
+        else:
+            P = self("p_sat", tau) * 1000.0
+            vf = x
+        return self._properties(tau, P, vf)
+
+    def properties_ph(self, h, P):
+        """Calculate properties from enthalpy and pressure.
+
+        Args:
+            h: Total molar enthalpy [J/mol]
+            P: Pressure [Pa]
+
+        Returns:
+            dict of property arrays with the keys "temperature", "pressure",
+            "vapor_frac", "temperature_sat", "pressure_sat", "enth_mol",
+            "entr_mol", "energy_internal_mol", "dens_mass", "dens_mol", and
+            the phase properties "dens_mass_phase", "enth_mol_phase",
+            "entr_mol_phase" and "energy_internal_mol_phase", which are dicts
+            of arrays keyed by "Liq" and "Vap". SI units, as the state block.
+        """
+        h_mass = np.asarray(h, dtype=float) / self.mw / 1000.0  # kJ/kg
+        P = np.asarray(P, dtype=float)
+        tau = self("tau", h_mass, P / 1000.0)
+        vf = self("vf", h_mass, P / 1000.0)
+        return self._properties(tau, P, vf)
+
+    def _properties(self, tau, P, vf):
+        """Evaluate the properties the state block calculates given tau,
+        pressure [Pa] and vapor fraction."""
+        tau, P, vf = np.broadcast_arrays(tau, P, vf)
+        Pk = P / 1000.0
+        c = self.mw * 1000.0
+        delta = {"Liq": self("delta_liq", Pk, tau), "Vap": self("delta_vap", Pk, tau)}
+        frac = {"Liq": 1.0 - vf, "Vap": vf}
+        props = {
+            "temperature": self.temperature_crit / tau,
+            "pressure": P.copy(),
+            "vapor_frac": vf.copy(),
+            "temperature_sat": self.temperature_crit / self("tau_sat", Pk),
+            "pressure_sat": self("p_sat", tau) * 1000.0,
+            "dens_mass_phase": {p: self.dens_mass_crit * d for p, d in delta.items()},
+            "enth_mol_phase": {p: c * self("h", d, tau) for p, d in delta.items()},
+            "entr_mol_phase": {p: c * self("s", d, tau) for p, d in delta.items()},
+            "energy_internal_mol_phase": {
+                p: c * self("u", d, tau) for p, d in delta.items()
+            },
+        }
+        for n in ("enth_mol", "entr_mol", "energy_internal_mol"):
+            props[n] = sum(frac[p] * props[n + "_phase"][p] for p in delta)
+        props["dens_mass"] = 1.0 / sum(
+            frac[p] / props["dens_mass_phase"][p] for p in delta
         )
+        props["dens_mol"] = props["dens_mass"] / self.mw
+        return props
+
+
+# Names of the compiled Helmholtz EOS functions, state blocks have a func_<name>
+# attribute for each one.  This includes some external functions that are not
+# usually used for testing purposes.
+_external_function_names = (
+    "p",
+    "u",
+    "s",
+    "h",
+    "hvpt",
+    "hlpt",
+    "tau",
+    "vf",
+    "g",
+    "f",
+    "cv",
+    "cp",
+    "w",
+    "delta_liq",
+    "delta_vap",
+    "delta_sat_l",
+    "delta_sat_v",
+    "p_sat",
+    "tau_sat",
+    "phi0",
+    "phi0_delta",
+    "phi0_delta2",
+    "phi0_tau",
+    "phi0_tau2",
+    "phir",
+    "phir_delta",
+    "phir_delta2",
+    "phir_tau",
+    "phir_tau2",
+    "phir_delta_tau",
+)
+
+
+def _external_function_block(blk):
+    """Get the block holding the ExternalFunction components for the state
+    block data object blk, creating it the first time it is needed.
+
+    The functions are shared by all state blocks with the same parent block
+    and library, rather than created on every state block data object. They
+    are not put on the parameter block, because the NL writer only writes
+    ExternalFunction components declared in the block being solved, and unit
+    models are initialized by solving the unit block alone.
+    """
+    plib = blk.config.parameters.plib
+    parent = blk.parent_block()
+    if parent is None:
+        parent = blk
+    name = "{}_functions".format(os.path.splitext(os.path.basename(plib))[0])
+    fblk = parent.component(name)
+    if fblk is None:
+        fblk = Block(concrete=True)
+        parent.add_component(name, fblk)
+        for f in _external_function_names:
+            setattr(fblk, "func_" + f, EF(library=plib, function=f))
+    return fblk
 
 
 class HelmholtzParameterBlockData(PhysicalParameterBlock):
@@ -429,39 +673,9 @@ class HelmholtzStateBlockData(StateBlockData):
         pass
 
     def _external_functions(self):
-        """Create ExternalFunction components.  This includes some external
-        functions that are not usually used for testing purposes."""
-        plib = self.config.parameters.plib
-        self.func_p = EF(library=plib, function="p")
-        self.func_u = EF(library=plib, function="u")
-        self.func_s = EF(library=plib, function="s")
-        self.func_h = EF(library=plib, function="h")
-        self.func_hvpt = EF(library=plib, function="hvpt")
-        self.func_hlpt = EF(library=plib, function="hlpt")
-        self.func_tau = EF(library=plib, function="tau")
-        self.func_vf = EF(library=plib, function="vf")
-        self.func_g = EF(library=plib, function="g")
-        self.func_f = EF(library=plib, function="f")
-        self.func_cv = EF(library=plib, function="cv")
-        self.func_cp = EF(library=plib, function="cp")
-        self.func_w = EF(library=plib, function="w")
-        self.func_delta_liq = EF(library=plib, function="delta_liq")
-        self.func_delta_vap = EF(library=plib, function="delta_vap")
-        self.func_delta_sat_l = EF(library=plib, function="delta_sat_l")
-        self.func_delta_sat_v = EF(library=plib, function="delta_sat_v")
-        self.func_p_sat = EF(library=plib, function="p_sat")
-        self.func_tau_sat = EF(library=plib, function="tau_sat")
-        self.func_phi0 = EF(library=plib, function="phi0")
-        self.func_phi0_delta = EF(library=plib, function="phi0_delta")
-        self.func_phi0_delta2 = EF(library=plib, function="phi0_delta2")
-        self.func_phi0_tau = EF(library=plib, function="phi0_tau")
-        self.func_phi0_tau2 = EF(library=plib, function="phi0_tau2")
-        self.func_phir = EF(library=plib, function="phir")
-        self.func_phir_delta = EF(library=plib, function="phir_delta")
-        self.func_phir_delta2 = EF(library=plib, function="phir_delta2")
-        self.func_phir_tau = EF(library=plib, function="phir_tau")
-        self.func_phir_tau2 = EF(library=plib, function="phir_tau2")
-        self.func_phir_delta_tau = EF(library=plib, function="phir_delta_tau")
+        """Find or create the block with the ExternalFunction components for
+        this state block. The func_* attributes refer to its components."""
+        _external_function_block(self)
 
     def _state_vars(self):
         """ Create the state variables
@@ -611,7 +825,7 @@ class HelmholtzStateBlockData(StateBlockData):
         self.available = self.config.parameters.available
         if not self.available:
             _log.error("Library file '{}' not found. Was it installed?".format(
-                    self.config.parameter.plib
+                    self.config.parameters.plib
                 )
             )
 
@@ -1032,3 +1246,14 @@ class HelmholtzStateBlockData(StateBlockData):
 
     def model_check(self):
         pass
+
+
+def _shared_function(name):
+    return property(
+        lambda self: getattr(_external_function_block(self), name),
+        doc="Shared ExternalFunction for the compiled {} function".format(name[5:]),
+    )
+
+
+for _f in _external_function_names:
+    setattr(HelmholtzStateBlockData, "func_" + _f, _shared_function("func_" + _f))
@@ -65,7 +65,7 @@ import idaes
 import idaes.logger as idaeslog
 from idaes.generic_models.properties.helmholtz.helmholtz import (
     _available,
-    _htpx,
+    HelmholtzFunctions,
     HelmholtzParameterBlockData,
     HelmholtzStateBlockData,
     PhaseType,
@@ -77,6 +77,13 @@ from idaes.generic_models.properties.helmholtz.helmholtz import (
 _log = idaeslog.getLogger(__name__)
 _so = os.path.join(idaes.lib_directory, "iapws95_external.so")
 
+# Parameters, these should match what's in the C code
+_mw = 0.01801528  # kg/mol
+_temperature_crit = 647.096  # K
+_pressure_crit = 2.2064e7  # Pa
+_dens_mass_crit = 322  # kg/m3
+_gas_const = 8.3144598  # J/mol/K
+
 
 def iapws95_available():
     """Make sure the compiled IAPWS-95 functions are available. Yes, in Windows
@@ -102,8 +109,61 @@ def htpx(T, P=None, x=None):
     Returns:
         Total molar enthalpy [J/mol].
     """
-    prop = Iapws95StateBlock(default={"parameters": Iapws95ParameterBlock()})
-    return _htpx(T=T, Tmin=200, Tmax=3e3, P=P, x=x, prop=prop)
+    h = iapws95_functions().htpx(T=T, P=P, x=x)
+    return float(h) if h.ndim == 0 else h
+
+
+def iapws95_functions():
+    """Get a :class:`HelmholtzFunctions` object that evaluates the IAPWS-95
+    functions directly on NumPy arrays.
+    """
+    return HelmholtzFunctions(
+        library=_so,
+        mw=_mw,
+        temperature_crit=_temperature_crit,
+        pressure_crit=_pressure_crit,
+        dens_mass_crit=_dens_mass_crit,
+        Tmin=200,
+        Tmax=3e3,
+    )
+
+
+def properties_tpx(T, P=None, x=None):
+    """
+    Calculate steam properties for arrays of temperature and either pressure
+    or vapor fraction, without building a Pyomo model.
+
+    User must provided values for one (and only one) of arguments P and x.
+
+    Args:
+        T: Temperature [K] (between 200 and 3000)
+        P: Pressure [Pa] (between 1 and 1e9), None if saturated steam
+        x: Vapor fraction [mol vapor/mol total] (between 0 and 1), None if
+        superheated or subcooled
+
+    Returns:
+        dict of property arrays, see :func:`properties_ph`
+    """
+    return iapws95_functions().properties_tpx(T=T, P=P, x=x)
+
+
+def properties_ph(h, P):
+    """
+    Calculate steam properties for arrays of enthalpy and pressure, without
+    building a Pyomo model.
+
+    Args:
+        h: Total molar enthalpy [J/mol]
+        P: Pressure [Pa]
+
+    Returns:
+        dict of property arrays keyed by property name (temperature,
+        pressure, vapor_frac, temperature_sat, pressure_sat, enth_mol,
+        entr_mol, energy_internal_mol, dens_mass, dens_mol). Phase properties
+        (dens_mass_phase, enth_mol_phase, entr_mol_phase,
+        energy_internal_mol_phase) are dicts of arrays keyed by phase.
+    """
+    return iapws95_functions().properties_ph(h=h, P=P)
 
 
 @declare_process_block_class("Iapws95ParameterBlock")
@@ -117,11 +177,17 @@ class Iapws95ParameterBlockData(HelmholtzParameterBlockData):
             component_list=Set(initialize=["H2O"]),
             phase_equilibrium_idx=Set(initialize=[1]),
             phase_equilibrium_list={1: ["H2O", ("Vap", "Liq")]},
-            mw=Param(initialize=0.01801528, doc="Molecular weight [kg/mol]"),
-            temperature_crit=Param(initialize=647.096, doc="Critical temperature [K]"),
-            pressure_crit=Param(initialize=2.2064e7, doc="Critical pressure [Pa]"),
-            dens_mass_crit=Param(initialize=322, doc="Critical density [kg/m3]"),
-            gas_const=Param(initialize=8.3144598, doc="Gas Constant [J/mol/K]"),
+            mw=Param(initialize=_mw, doc="Molecular weight [kg/mol]"),
+            temperature_crit=Param(
+                initialize=_temperature_crit, doc="Critical temperature [K]"
+            ),
+            pressure_crit=Param(
+                initialize=_pressure_crit, doc="Critical pressure [Pa]"
+            ),
+            dens_mass_crit=Param(
+                initialize=_dens_mass_crit, doc="Critical density [kg/m3]"
+            ),
+            gas_const=Param(initialize=_gas_const, doc="Gas Constant [J/mol/K]"),
         )
         super().build()
         # Thermal conductivity parameters.
@@ -12,12 +12,14 @@
 ##############################################################################
 
 import pytest
-from pyomo.environ import ConcreteModel, value, Var
+from pyomo.environ import ConcreteModel, ExternalFunction, value, Var
 from pyomo.core.kernel.component_set import ComponentSet
 from pyomo.common.fileutils import this_file_dir
 from idaes.generic_models.properties import iapws95
+from idaes.generic_models.properties.helmholtz import helmholtz
 import csv
 import os
+import numpy as np
 
 from idaes.core import MaterialBalanceType, EnergyBalanceType
 from idaes.core.util.exceptions import ConfigurationError
@@ -81,6 +83,92 @@ def test_htpx():
     assert iapws95.htpx(400, P=101325) == pytest.approx(2.72979e06 * mw + offset, 1e-5)
 
 
+def test_htpx_array_invalid_args():
+    with pytest.raises(ConfigurationError):
+        iapws95.htpx([300, 400], P=[101325, 101325], x=[0.5, 0.5])
+
+    with pytest.raises(ConfigurationError):
+        iapws95.properties_tpx([300, 100], x=0.5)
+
+    with pytest.raises(ConfigurationError):
+        iapws95.properties_tpx([300, 400], P=[101325, 1e10])
+
+    with pytest.raises(ConfigurationError):
+        iapws95.properties_tpx(300, x=[0.5, 2])
+
+
+@pytest.mark.skipif(not prop_available, reason="IAPWS not available")
+def test_htpx_array():
+    T = np.array([300, 500, 550, 600, 400])
+    x = np.array([0, 0, 0.5, 1, 1])
+    h = iapws95.htpx(T, x=x)
+    assert h.shape == (5,)
+    for i in range(5):
+        assert h[i] == pytest.approx(iapws95.htpx(T[i], x=x[i]), 1e-10)
+
+    h = iapws95.htpx(T, P=101325)
+    for i in range(5):
+        assert h[i] == pytest.approx(iapws95.htpx(T[i], P=101325), 1e-10)
+
+
+@pytest.mark.skipif(not prop_available, reason="IAPWS not available")
+def test_properties_array():
+    model = ConcreteModel()
+    model.params = iapws95.Iapws95ParameterBlock()
+    model.prop = iapws95.Iapws95StateBlock(default={"parameters": model.params})
+
+    P = np.array([[1e5, 1e6], [1e7, 3e7]])
+    h = np.array([[2000, 50000], [4000, 60000]])
+    props = iapws95.properties_ph(h, P)
+    assert props["enth_mol"].shape == (2, 2)
+    for i in range(2):
+        for j in range(2):
+            model.prop.pressure.value = P[i, j]
+            model.prop.enth_mol.value = h[i, j]
+            for n in ("temperature", "vapor_frac", "temperature_sat",
+                      "pressure_sat", "enth_mol", "entr_mol",
+                      "energy_internal_mol", "dens_mass", "dens_mol"):
+                assert props[n][i, j] == pytest.approx(
+                    value(getattr(model.prop, n)), 1e-8)
+            for p in ("Liq", "Vap"):
+                assert props["dens_mass_phase"][p][i, j] == pytest.approx(
+                    value(model.prop.dens_mass_phase[p]), 1e-8)
+
+    # Round trip through T, P and T, x
+    props2 = iapws95.properties_tpx(props["temperature"][0, 0], x=[0, 0.5, 1])
+    props3 = iapws95.properties_ph(props2["enth_mol"], props2["pressure"])
+    assert props3["vapor_frac"] == pytest.approx(np.array([0, 0.5, 1]), abs=1e-6)
+    props2 = iapws95.properties_tpx([300, 800], P=1e5)
+    assert props2["vapor_frac"] == pytest.approx(np.array([0, 1]))
+    props3 = iapws95.properties_ph(props2["enth_mol"], 1e5)
+    assert props3["temperature"] == pytest.approx(np.array([300, 800]), 1e-6)
+
+
+@pytest.mark.skipif(not prop_available, reason="IAPWS not available")
+def test_functions_unsupported_pyomo(monkeypatch):
+    # Simulate a Pyomo version without the private structures used to call
+    # the compiled functions directly
+    monkeypatch.setattr(helmholtz, "_library_cache", {})
+    monkeypatch.setattr(helmholtz, "_ARGLIST", None)
+    with pytest.raises(RuntimeError, match="private Pyomo internals"):
+        iapws95.htpx(300, P=101325)
+
+
+def test_shared_external_functions():
+    model = ConcreteModel()
+    model.params = iapws95.Iapws95ParameterBlock()
+    model.prop = iapws95.Iapws95StateBlock(
+        [1, 2, 3], default={"parameters": model.params}
+    )
+    model.prop2 = iapws95.Iapws95StateBlock(default={"parameters": model.params})
+
+    assert model.prop[1].func_p is model.prop[3].func_p
+    assert model.prop[1].func_tau_sat is model.prop2.func_tau_sat
+    assert model.prop[1].func_p.parent_block() is \
+        model.iapws95_external_functions
+    assert len(list(model.component_objects(ExternalFunction))) == 30
+
+
 def test_PhaseType():
     assert len(iapws95.PhaseType) == 4
 
@@ -39,7 +39,7 @@ from idaes.core import (
 )
 from idaes.generic_models.unit_models.heat_exchanger import HeatExchangerData
 from idaes.generic_models.unit_models import Mixer, MomentumMixingType, HeatExchanger
-from idaes.core.util import from_json, to_json, StoreSpec
+from idaes.core.util import StateCheckpoint, StoreSpec
 from idaes.core.util.model_statistics import degrees_of_freedom
 from idaes.core import useDefault
 from idaes.core.util.config import is_physical_parameter_block
@@ -177,7 +177,7 @@ class FWHCondensing0DData(HeatExchangerData):
         solve_log = idaeslog.getSolveLogger(self.name, outlvl, tag="unit")
 
         sp = StoreSpec.value_isfixed_isactive(only_fixed=True)
-        istate = to_json(self, return_dict=True, wts=sp)
+        istate = StateCheckpoint(self, wts=sp)
 
         self.extraction_rate_constraint.deactivate()
         self.area.fix()
@@ -203,7 +203,7 @@ class FWHCondensing0DData(HeatExchangerData):
             )
         )
 
-        from_json(self, sd=istate, wts=sp)
+        istate.restore()
 
 
 @declare_process_block_class(
@@ -298,7 +298,7 @@ class FWH0DData(UnitModelBlockData):
 
         config = self.config  # shorter ref to config for less line splitting
         sp = StoreSpec.value_isfixed_isactive(only_fixed=True)
-        istate = to_json(self, return_dict=True, wts=sp)
+        istate = StateCheckpoint(self, wts=sp)
 
         # the initialization here isn't straight forward since the heat exchanger
         # may have 3 stages and they are countercurrent.  For simplicity each
@@ -378,4 +378,4 @@ class FWH0DData(UnitModelBlockData):
             "Initialization Complete: {}".format(idaeslog.condition(res))
         )
 
-        from_json(self, sd=istate, wts=sp)
+        istate.restore()
@@ -28,7 +28,7 @@ from idaes.generic_models.unit_models.pressure_changer import (
     PressureChangerData,
     ThermodynamicAssumption,
 )
-from idaes.core.util import from_json, to_json, StoreSpec
+from idaes.core.util import StateCheckpoint, StoreSpec
 from idaes.core.util.model_statistics import degrees_of_freedom
 import idaes.logger as idaeslog
 
@@ -189,7 +189,7 @@ class TurbineInletStageData(PressureChangerData):
         #   values, this makes sure original problem spec is same but initializes
         #   the values of free vars
         sp = StoreSpec.value_isfixed_isactive(only_fixed=True)
-        istate = to_json(self, return_dict=True, wts=sp)
+        istate = StateCheckpoint(self, wts=sp)
         # Deactivate special constraints
         self.inlet_flow_constraint.deactivate()
         self.isentropic_enthalpy.deactivate()
@@ -274,4 +274,4 @@ class TurbineInletStageData(PressureChangerData):
         )
 
         # reload original spec
-        from_json(self, sd=istate, wts=sp)
+        istate.restore()
@@ -52,7 +52,7 @@ from idaes.power_generation.unit_models import (
     SteamValve,
 )
 from idaes.core.util.config import is_physical_parameter_block
-from idaes.core.util import from_json, to_json, StoreSpec
+from idaes.core.util import StateCheckpoint, StoreSpec
 from idaes.core.util.misc import copy_port_values as _set_port
 from pyomo.common.config import ConfigBlock, ConfigValue, In, ConfigList
 from idaes.core.util.config import is_physical_parameter_block
@@ -617,7 +617,7 @@ class TurbineMultistageData(UnitModelBlockData):
         solve_log = idaeslog.getSolveLogger(self.name, outlvl, tag="unit")
 
         sp = StoreSpec.value_isfixed_isactive(only_fixed=True)
-        istate = to_json(self, return_dict=True, wts=sp)
+        istate = StateCheckpoint(self, wts=sp)
         ni = self.config.num_parallel_inlet_stages
         flow_guess = self.inlet_split.inlet.flow_mol[0].value
 
@@ -720,4 +720,4 @@ class TurbineMultistageData(UnitModelBlockData):
         )
         init_log.info("Initialization Complete: {}".format(idaeslog.condition(res)))
 
-        from_json(self, sd=istate, wts=sp)
+        istate.restore()
@@ -31,7 +31,7 @@ from idaes.generic_models.unit_models.pressure_changer import (
     PressureChangerData,
     ThermodynamicAssumption,
 )
-from idaes.core.util import from_json, to_json, StoreSpec
+from idaes.core.util import StateCheckpoint, StoreSpec
 from idaes.core.util.model_statistics import degrees_of_freedom
 import idaes.logger as idaeslog
 
@@ -108,7 +108,7 @@ class TurbineStageData(PressureChangerData):
         #   values, this makes sure original problem spec is same but initializes
         #   the values of free vars
         sp = StoreSpec.value_isfixed_isactive(only_fixed=True)
-        istate = to_json(self, return_dict=True, wts=sp)
+        istate = StateCheckpoint(self, wts=sp)
 
         # fix inlet and free outlet
         for t in self.flowsheet().config.time:
@@ -163,4 +163,4 @@ class TurbineStageData(PressureChangerData):
         )
 
         # reload original spec
-        from_json(self, sd=istate, wts=sp)
+        istate.restore()
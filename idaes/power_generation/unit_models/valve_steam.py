@@ -29,7 +29,7 @@ from idaes.generic_models.unit_models.pressure_changer import (
     ThermodynamicAssumption,
     MaterialBalanceType,
 )
-from idaes.core.util import from_json, to_json, StoreSpec
+from idaes.core.util import StateCheckpoint, StoreSpec
 from idaes.core.util.model_statistics import degrees_of_freedom
 import idaes.logger as idaeslog
 
@@ -209,7 +209,7 @@ class SteamValveData(PressureChangerData):
         init_log = idaeslog.getInitLogger(self.name, outlvl, tag="unit")
 
         sp = StoreSpec.value_isfixed_isactive(only_fixed=True)
-        istate = to_json(self, return_dict=True, wts=sp)
+        istate = StateCheckpoint(self, wts=sp)
 
         self.deltaP[:].unfix()
         self.ratioP[:].unfix()
@@ -253,7 +253,7 @@ class SteamValveData(PressureChangerData):
         )
 
         # reload original spec
-        from_json(self, sd=istate, wts=sp)
+        istate.restore()
 
     def _get_performance_contents(self, time_point=0):
         pc = super()._get_performance_contents(time_point=time_point)
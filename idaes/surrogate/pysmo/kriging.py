@@ -10,12 +10,16 @@
 # license information, respectively. Both files are also available online
 # at the URL "https://github.com/IDAES/idaes-pse".
 ##############################################################################
+from concurrent.futures import ProcessPoolExecutor
+import itertools
 import numpy as np
 from scipy.optimize import basinhopping
 import scipy.optimize as opt
+from scipy.linalg import cho_solve, lapack
 import pandas as pd
 from pyomo.core import Param, exp
 from idaes.surrogate.pysmo.sampling import FeatureScaling as fs
+from idaes.surrogate.pysmo.utils import scaled_variable_expressions, squared_distance_expressions
 
 
 class ResultReport:
@@ -58,7 +62,7 @@ class ResultReport:
         self.x_min = x_data_min
         self.x_max = x_data_max
 
-    def kriging_generate_expression(self, variable_list):
+    def kriging_generate_expression(self, variable_list, compact=False):
         """
         The ``kriging_generate_expression`` method returns the Pyomo expression for the Kriging model trained.
 
@@ -67,17 +71,33 @@ class ResultReport:
         Args:
             variable_list(list)           : List of input variables to be used in generating expression. This can be the a list generated from the output of ``get_feature_vector``.  The user can also choose to supply a new list of the appropriate length.
 
+        Keyword Args:
+            compact(bool)                 : When True, the weighted squared distances in the correlation terms are expanded: their quadratic part is a named Pyomo Expression shared by all the training points,
+                                            and each training point only adds a linear expression of the inputs. With two inputs, this halves the size of the expression and of the NL file written for it.
+                                            When the exponent optimal_p is not 2, only the scaled inputs are shared. Default is False.
+
         Returns:
             Pyomo Expression              : Pyomo expression of the Kriging model based on the variables provided in **variable_list**
 
         """
         t1 = np.array([variable_list])
+        scale = self.x_max[0, :] - self.x_min[0, :]
+        scale[scale == 0.0] = 1.0
         phi_var = []
-        for i in range(0, self.x_data.shape[0]):
-            curr_term = sum(self.optimal_weights[j] * ( ((t1[0, j] - self.x_min[0, j])/(self.x_max[0, j] - self.x_min[0, j])) - self.scaled_x[i, j]) ** self.optimal_p for j in range(0, self.x_data.shape[1]))
+        if compact:
+            scaled_variables = scaled_variable_expressions(variable_list, self.x_min[0, :], self.x_max[0, :])
+            if self.optimal_p == 2:
+                phi_var = [exp(-d) for d in squared_distance_expressions(scaled_variables, self.scaled_x, self.optimal_weights)]
+            else:
+                for i in range(0, self.x_data.shape[0]):
+                    curr_term = sum(self.optimal_weights[j] * (scaled_variables[j] - self.scaled_x[i, j]) ** self.optimal_p for j in range(0, self.x_data.shape[1]))
+                    phi_var.append(exp(-curr_term))
+        else:
+            for i in range(0, self.x_data.shape[0]):
+                curr_term = sum(self.optimal_weights[j] * ( ((t1[0, j] - self.x_min[0, j])/scale[j]) - self.scaled_x[i, j]) ** self.optimal_p for j in range(0, self.x_data.shape[1]))
 
-            curr_term = exp(-curr_term)
-            phi_var.append(curr_term)
+                curr_term = exp(-curr_term)
+                phi_var.append(curr_term)
         phi_var_array = np.asarray(phi_var)
 
         phi_inv_times_y_mu = np.matmul(self.covariance_matrix_inverse, self.optimal_y_mu)
@@ -117,7 +137,7 @@ class KrigingModel:
     .. code-block:: python
     
         # Initialize the class 
-        >>> d = KrigingModel(training_data, numerical_gradients=True, regularization=True))
+        >>> d = KrigingModel(training_data, numerical_gradients=True, regularization=True)
         >>> p = d.get_feature_vector()
         
         # Train Kriging model and predict output for an test data x_test
@@ -131,7 +151,10 @@ class KrigingModel:
 
     """
 
-    def __init__(self, XY_data, numerical_gradients=True, regularization=True):
+    # Maximum number of co-variance matrix entries evaluated at a time in batch predictions
+    max_prediction_block = 2 ** 22
+
+    def __init__(self, XY_data, numerical_gradients=True, regularization=True, number_of_restarts=0, number_of_processes=1):
         """
         Initialization of **KrigingModel** class.
 
@@ -139,15 +162,19 @@ class KrigingModel:
             XY_data (NumPy Array or Pandas Dataframe)   : The dataset for Kriging training. **XY_data** is expected to contain feature and output data, with the output values (y) in the last column.
 
         Keyword Args:
-            numerical_gradients(bool)               : Whether or not numerical gradients should be used in training. This choice determines the algorithm used to solve the problem.
+            numerical_gradients(bool)               : Whether or not a gradient-based algorithm should be used in training. This choice determines the algorithm used to solve the problem.
 
-                                                            - numerical_gradients = True: The problem is solved with BFGS using central differencing with a step size of :math:`10^{-6}` to evaluate numerical gradients.
+                                                            - numerical_gradients = True: The problem is solved with L-BFGS-B, using the analytic gradients of the concentrated likelihood function.
                                                             - numerical_gradients = False: The problem is solved with Basinhopping, a stochastic optimization algorithm.
 
             regularization(bool)                    :  This option determines whether or not regularization is considered during Kriging training. Default is True.
 
                                                             - When regularization is turned off, the model generates an interpolating kriging model.
 
+            number_of_restarts(int)                 :  Number of additional random starting points for L-BFGS-B (numerical_gradients = True). The best solution found is kept. Default is 0.
+
+            number_of_processes(int)                :  Number of processes used to run the L-BFGS-B optimizations from the different starting points in parallel. Default is 1.
+
         Returns:
             self object with the input information and settings.
 
@@ -158,6 +185,8 @@ class KrigingModel:
 
             Exception:  - regularization is not boolean
 
+            Exception:  - number_of_restarts is not a non-negative integer, or number_of_processes is not a positive integer
+
         **Example:**
     
         .. code-block:: python
@@ -193,6 +222,13 @@ class KrigingModel:
         else:
             raise Exception('Choice of regularization must be boolean.')
 
+        if not isinstance(number_of_restarts, int) or isinstance(number_of_restarts, bool) or number_of_restarts < 0:
+            raise Exception('number_of_restarts must be a non-negative integer.')
+        self.number_of_restarts = number_of_restarts
+
+        if not isinstance(number_of_processes, int) or isinstance(number_of_processes, bool) or number_of_processes <= 0:
+            raise Exception('number_of_processes must be a positive, non-zero integer.')
+        self.number_of_processes = number_of_processes
 
     @staticmethod
     def covariance_matrix_generator(x, theta, reg_param, p):
@@ -209,13 +245,31 @@ class KrigingModel:
             cov_matrix              : Regularized co-variance matrix
 
         """
-        distance_matrix = np.zeros((x.shape[0], x.shape[0]))
-        for i in range(0, x.shape[0]):
-            distance_matrix[i, :] = (np.matmul(((np.abs(x[i, :] - x)) ** p), theta)).transpose()
+        distance_matrix = KrigingModel.weighted_distance_matrix(x, x, theta, p)
         cov_matrix = np.exp(-1 * distance_matrix)
         cov_matrix = cov_matrix + reg_param * np.eye(cov_matrix.shape[0])  # Regularization parameter addition, see Forrester book
         return cov_matrix
 
+    @staticmethod
+    def weighted_distance_matrix(x1, x2, theta, p):
+        """
+        The weighted_distance_matrix method calculates the weighted distances :math:`\sum_{k}\theta_{k}\left|x1_{ik} - x2_{jk}\right|^{p}` between every pair of points in x1 and x2.
+
+        Args:
+            x1, x2                  : scaled features data
+            theta                   : Kriging weights
+            p                       : Kriging exponent
+
+        Returns:
+            distance_matrix         : Matrix of the weighted distances, size (x1 rows) x (x2 rows)
+
+        """
+        theta = np.asarray(theta).reshape(-1, )
+        distance_matrix = np.zeros((x1.shape[0], x2.shape[0]))
+        for k in range(0, x1.shape[1]):
+            distance_matrix += theta[k] * (np.abs(x1[:, k].reshape(-1, 1) - x2[:, k]) ** p)
+        return distance_matrix
+
     @staticmethod
     def covariance_inverse_generator(x):
         """
@@ -234,6 +288,22 @@ class KrigingModel:
             inverse_x = np.linalg.pinv(x)
         return inverse_x
 
+    @staticmethod
+    def cholesky_inverse(L):
+        """
+        The cholesky_inverse method generates the inverse of a co-variance matrix from its lower Cholesky factor L.
+
+        Args:
+            L                       : Lower Cholesky factor of the regularized co-variance matrix
+
+        Returns:
+            inverse_x               : Inverse of the regularized co-variance matrix
+
+        """
+        inverse_lower, _ = lapack.dpotri(L, lower=1)
+        inverse_x = np.tril(inverse_lower) + np.tril(inverse_lower, -1).transpose()
+        return inverse_x
+
     @staticmethod
     def kriging_mean(cov_inv, y):
         """
@@ -309,25 +379,63 @@ class KrigingModel:
             [1] Forrester et al.'s book "Engineering Design via Surrogate Modelling: A Practical Guide",
                 https://onlinelibrary.wiley.com/doi/pdf/10.1002/9780470770801
 
+        """
+        return self.concentrated_likelihood(var_vector, x, y, p, self.regularization)
+
+    @staticmethod
+    def concentrated_likelihood(var_vector, x, y, p, regularization=True, gradient=False):
+        """
+        The concentrated_likelihood method calculates the concentrated likelihood function (see objective_function) and, optionally, its analytic gradients.
+
+        The co-variance matrix R is factorized as R = L.L' (Cholesky) and all the products with the inverse of R are evaluated with triangular solves.
+        With :math:`\alpha = R^{-1}(y - \mu)` and :math:`W = R^{-1} - \alpha\alpha^{T}/\sigma^{2}`, the gradients are:
+
+            - d(likelihood)/d(log(theta_k)) = -0.5 * ln(10) * theta_k * sum(W * (R - reg_param * I) * abs(x_ik - x_jk)^p)
+            - d(likelihood)/d(reg_param) = 0.5 * trace(W)
+
+        since the derivatives with respect to the MLE estimates of the mean and variance are zero.
+
+        Args:
+            var_vector(NumPy Array)        : Numpy array containing the Kriging paramaters (log of Kriging weights and regularization parameter)
+            x(NumPy Array)                 : Scaled version of input features/variables
+            y(NumPy Array)                 : Output variable y (unscaled)
+            p(float)                      : Kriging model exponent (fixed to 2) to ensure model smoothness
+            regularization(bool)          : Whether or not the regularization parameter is optimized. When False, its gradient is zero.
+            gradient(bool)                : Whether or not the gradients should be returned
+
+        Returns:
+            conc_log_like(float)          : Concentrated likelihood value. Function incurs a large penalty (10000) when co-variance matrix is non-positive definite
+            grad_vec(NumPy Array)         : Array of the gradients of the variables in var_vector, only returned when gradient is True. Zero when the co-variance matrix is non-positive definite.
+
         """
         theta = var_vector[:-1]
         reg_param = var_vector[-1]
         theta = 10 ** theta  # Assumes log(theta) provided
         ns = y.shape[0]
-        cov_mat = self.covariance_matrix_generator(x, theta, reg_param, p)
+        cov_mat = KrigingModel.covariance_matrix_generator(x, theta, reg_param, p)
         try:  # Check Cholesky factorization
             L = np.linalg.cholesky(cov_mat)
-            lndetcov = 2 * np.sum(np.log(np.abs(np.diag(L))))  # Approximation to 2nd term from Forrester book, making use of the Ch. factorization
-            cov_inv = self.covariance_inverse_generator(cov_mat)
-            km = self.kriging_mean(cov_inv, y)
-            y_mu = self.y_mu_calculation(y, km)
-            ssd = self.kriging_sd(cov_inv, y_mu, ns)
-            # log_like = (0.5 * ns * np.log(ssd)) + (0.5 * np.log(np.abs(np.linalg.det(cov_mat))))
-            log_like = (0.5 * ns * np.log(ssd)) + (0.5 * lndetcov)
-            conc_log_like = log_like[0, 0]
-        except:  # When Cholesky fails - non-positive definite covariance matrix
-            conc_log_like = 1e4
-        return conc_log_like
+        except np.linalg.LinAlgError:  # When Cholesky fails - non-positive definite covariance matrix
+            return (1e4, np.zeros(len(var_vector), )) if gradient else 1e4
+        lndetcov = 2 * np.sum(np.log(np.abs(np.diag(L))))  # Approximation to 2nd term from Forrester book, making use of the Ch. factorization
+        ones_vec = np.ones((ns, 1))
+        cov_inv_y, cov_inv_ones = np.hsplit(cho_solve((L, True), np.hstack((y, ones_vec))), 2)
+        km = np.matmul(ones_vec.transpose(), cov_inv_y) / np.matmul(ones_vec.transpose(), cov_inv_ones)
+        y_mu = KrigingModel.y_mu_calculation(y, km)
+        alpha = cov_inv_y - km * cov_inv_ones
+        ssd = np.matmul(y_mu.transpose(), alpha)[0, 0] / ns
+        conc_log_like = (0.5 * ns * np.log(ssd)) + (0.5 * lndetcov)
+        if not gradient:
+            return conc_log_like
+
+        w = KrigingModel.cholesky_inverse(L) - np.matmul(alpha, alpha.transpose()) / ssd
+        w_cov = w * (cov_mat - reg_param * np.eye(ns))
+        grad_vec = np.zeros(len(var_vector), )
+        for k in range(0, x.shape[1]):
+            grad_vec[k] = -0.5 * np.log(10) * theta[k] * np.sum(w_cov * (np.abs(x[:, k].reshape(-1, 1) - x[:, k]) ** p))
+        if regularization is True:
+            grad_vec[-1] = 0.5 * np.trace(w)
+        return conc_log_like, grad_vec
 
     def numerical_gradient(self, var_vector, x, y, p):
         """
@@ -361,16 +469,23 @@ class KrigingModel:
             grad_vec[-1, ] = 0
         return grad_vec
 
+    @staticmethod
+    def local_optimization(initial_value, x, y, p, regularization, bounds):
+        """
+        Minimizes the concentrated likelihood function with L-BFGS-B and analytic gradients from a single starting point.
+        """
+        return opt.minimize(KrigingModel.concentrated_likelihood, initial_value, args=(x, y, p, regularization, True), method='L-BFGS-B', jac=True, bounds=bounds, options={'gtol': 1e-7})
+
     def parameter_optimization(self, p):
         """
         Parameter (theta) optimization using BFGS or Basinhopping algorithm. This is the core of the Kriging Class.
         Algorithm used will depend on whether the numerical_gradients was set to True or False.
+        With BFGS, the optimization is repeated from **number_of_restarts** additional random starting points and the best solution is returned.
         """
         initial_value_list = np.random.randn(self.num_vars - 1, )
         initial_value_list = initial_value_list.tolist()
         initial_value_list.append(1e-4)
         initial_value = np.array(initial_value_list)
-        initial_value = initial_value.reshape(initial_value.shape[0], 1)
         # Create bounds for variables. All logthetas btw (-4, 4), reg param between (1e-9, 0.1)
         bounds = []
         for i in range(0, len(initial_value_list)):
@@ -385,14 +500,22 @@ class KrigingModel:
 
         if self.num_grads:
             print('Optimizing kriging parameters using L-BFGS-B algorithm...')
-            other_args = (self.x_data_scaled, self.y_data, p)
-            opt_results = opt.minimize(self.objective_function, initial_value, args=other_args, method='L-BFGS-B', jac=self.numerical_gradient, bounds=bounds, options={'gtol': 1e-7}) #, 'disp': True})
+            initial_values = [initial_value]
+            for i in range(0, self.number_of_restarts):
+                initial_values.append(np.append(np.random.randn(self.num_vars - 1, ), 1e-4))
+            other_args = (itertools.repeat(self.x_data_scaled), itertools.repeat(self.y_data), itertools.repeat(p), itertools.repeat(self.regularization), itertools.repeat(bounds))
+            if self.number_of_processes > 1 and len(initial_values) > 1:
+                with ProcessPoolExecutor(min(self.number_of_processes, len(initial_values))) as executor:
+                    all_results = list(executor.map(self.local_optimization, initial_values, *other_args))
+            else:
+                all_results = list(map(self.local_optimization, initial_values, *other_args))
+            opt_results = min(all_results, key=lambda result: result.fun)
         else:
             print('Optimizing Kriging parameters using Basinhopping algorithm...')
-            other_args = {"args": (self.x_data_scaled, self.y_data, p), 'bounds': bounds}
+            other_args = {"args": (self.x_data_scaled, self.y_data, p, self.regularization, True), 'bounds': bounds, 'method': 'L-BFGS-B', 'jac': True}
             # other_args = {"args": (self.x_data, self.y_data, p)}
             mybounds = MyBounds()  # Bounds on regularization parameter
-            opt_results = basinhopping(self.objective_function, initial_value_list, minimizer_kwargs=other_args, niter=250, disp=True, accept_test=mybounds) # , interval=5)
+            opt_results = basinhopping(self.concentrated_likelihood, initial_value_list, minimizer_kwargs=other_args, niter=250, disp=True, accept_test=mybounds) # , interval=5)
         return opt_results
 
     def optimal_parameter_evaluation(self, var_vector, p):
@@ -401,7 +524,7 @@ class KrigingModel:
         For an input set of Kriging parameters var_vector and p, it:
 
             (1) Generates the covariance matrix by calling covariance_matrix_generator
-            (2) Finds the co-variance matrix inverse
+            (2) Finds the co-variance matrix inverse from its Cholesky factorization, or by calling covariance_inverse_generator when the matrix is not positive definite
             (3) Evaluates the Kriging mean and variance
             (4) Evaluates the deviation of each training point from the Kriging mean
 
@@ -424,7 +547,10 @@ class KrigingModel:
         theta = 10 ** theta  # Assumes log(theta) provided. Ensures that theta is always positive
         ns = self.y_data.shape[0]
         cov_mat = self.covariance_matrix_generator(self.x_data_scaled, theta, reg_param, p)
-        cov_inv = self.covariance_inverse_generator(cov_mat)
+        try:
+            cov_inv = self.cholesky_inverse(np.linalg.cholesky(cov_mat))
+        except np.linalg.LinAlgError:
+            cov_inv = self.covariance_inverse_generator(cov_mat)
         mean = self.kriging_mean(cov_inv, self.y_data)
         y_mu = self.y_mu_calculation(self.y_data, mean)
         variance = self.kriging_sd(cov_inv, y_mu, ns)
@@ -453,15 +579,36 @@ class KrigingModel:
             y_prediction    : Predicted values of y
 
         """
-        y_prediction = np.zeros((x.shape[0], 1))
-        for i in range(0, x.shape[0]):
-            cmt = (np.matmul(((np.abs(x[i, :] - x)) ** p), theta)).transpose()
-            cov_matrix_tests = np.exp(-1 * cmt)
-            y_prediction[i, 0] = mean + np.matmul(np.matmul(cov_matrix_tests.transpose(), cov_inv), y_mu)
+        y_prediction = KrigingModel.batch_prediction(x, x, theta, p, mean, np.matmul(cov_inv, y_mu))
         ss_error = (1 / y_data.shape[0]) * (np.sum((y_data - y_prediction) ** 2))
         rmse_error = np.sqrt(ss_error)
         return ss_error, rmse_error, y_prediction
 
+    @staticmethod
+    def batch_prediction(x_pred, x, theta, p, mean, cov_inv_y_mu):
+        """
+        The batch_prediction method evaluates the Kriging predictions for all the points in x_pred together.
+        The co-variances between x_pred and the training points are evaluated in blocks of at most **max_prediction_block** entries.
+
+        Args:
+            x_pred          : Scaled input data of the points to be predicted
+            x               : Scaled training input data
+            theta           : Kriging weights
+            p               : Kriging exponents
+            mean            : MLE estimate of the Kriging mean
+            cov_inv_y_mu    : Product of the inverse of the co-variance matrix and the deviations of y values from the mean estimate
+
+        Returns:
+            y_prediction    : Predicted values of y
+
+        """
+        y_prediction = np.zeros((x_pred.shape[0], 1))
+        block_rows = max(1, KrigingModel.max_prediction_block // max(1, x.shape[0]))
+        for start in range(0, x_pred.shape[0], block_rows):
+            cov_matrix_tests = np.exp(-1 * KrigingModel.weighted_distance_matrix(x_pred[start:start + block_rows, :], x, theta, p))
+            y_prediction[start:start + block_rows, :] = mean + np.matmul(cov_matrix_tests, cov_inv_y_mu)
+        return y_prediction
+
     @staticmethod
     def r2_calculation(y_true, y_predicted):
         """
@@ -495,15 +642,14 @@ class KrigingModel:
              NumPy Array                    : Output variable predictions based on the Kriging model.
 
         """
-        x_pred_scaled = ((x_pred - self.x_data_min) / (self.x_data_max - self.x_data_min))
+        scale = self.x_data_max - self.x_data_min
+        scale[scale == 0.0] = 1.0
+        x_pred_scaled = ((x_pred - self.x_data_min) / scale)
         x_pred = x_pred_scaled.reshape(x_pred.shape)
         if x_pred.ndim == 1:
             x_pred = x_pred.reshape(1, len(x_pred))
-        y_pred = np.zeros((x_pred.shape[0], 1))
-        for i in range(0, x_pred.shape[0]):
-            cmt = (np.matmul(((np.abs(x_pred[i, :] - self.x_data_scaled)) ** kriging_params.optimal_p), kriging_params.optimal_weights)).transpose()
-            cov_matrix_tests = np.exp(-1 * cmt)
-            y_pred[i, 0] = kriging_params.optimal_mean + np.matmul(np.matmul(cov_matrix_tests.transpose(), kriging_params.covariance_matrix_inverse), kriging_params.optimal_y_mu)
+        cov_inv_y_mu = np.matmul(kriging_params.covariance_matrix_inverse, kriging_params.optimal_y_mu)
+        y_pred = self.batch_prediction(x_pred, self.x_data_scaled, kriging_params.optimal_weights, kriging_params.optimal_p, kriging_params.optimal_mean, cov_inv_y_mu)
         return y_pred
 
     def kriging_training(self):
@@ -17,6 +17,7 @@ from six import string_types
 import random
 import warnings
 #from builtins import int, str
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import pandas as pd
@@ -242,7 +243,8 @@ class PolynomialRegression:
     """
 
     def __init__(self, original_data_input, regression_data_input, maximum_polynomial_order, number_of_crossvalidations=None,
-                 no_adaptive_samples=None, training_split=None, max_fraction_training_samples=None, max_iter=None, solution_method=None, multinomials=None):
+                 no_adaptive_samples=None, training_split=None, max_fraction_training_samples=None, max_iter=None, solution_method=None, multinomials=None,
+                 number_of_processes=1):
         """
         Initialization of PolynomialRegression class.
 
@@ -264,6 +266,8 @@ class PolynomialRegression:
 
             multinomials(bool):  This option determines whether or not multinomial terms are considered during polynomial fitting. Takes 0 for No and 1 for Yes. Default = 1.
 
+            number_of_processes(int): Number of processes used to fit the polynomials of the different orders to the cross-validation training sets in parallel. Default = 1.
+
         Returns:
             **self** object containing all the input information.
 
@@ -287,6 +291,8 @@ class PolynomialRegression:
                 - **no_adaptive_samples** is not a positive, non-zero integer
             Exception:
                 - **max_iter** is not a positive, non-zero integer
+            Exception:
+                - **number_of_processes** is not a positive, non-zero integer
 
             warnings.warn:
                 - When the number of cross-validations is too high, i.e. number_of_crossvalidations > 10
@@ -401,9 +407,45 @@ class PolynomialRegression:
         else:
             raise Exception('Multinomial must be binary: input "1" for "Yes" and "0" for "No". ')
 
+        if not isinstance(number_of_processes, int) or isinstance(number_of_processes, bool) or number_of_processes <= 0:
+            raise Exception('number_of_processes must be a positive, non-zero integer.')
+        self.number_of_processes = number_of_processes
+
         self.feature_list = []
         self.additional_term_expressions = []
 
+    def training_test_indices(self, seed=True):
+        """
+
+        The training_test_indices method returns the row indices of regression_data in the training and test data sets of each cross-validation.
+
+        The number of training samples is num_training = int(training_split x total number of samples). For each cross-validation, the row indices are shuffled
+        and the top num_training indices are taken as the training set, while the rest are taken as the test set.
+
+        Keyword Args:
+            seed(bool): When True, the random number generator is seeded with the cross-validation number before the rows are shuffled. Default is True.
+
+        Returns:
+            - training_indices: List of number_of_crossvalidations arrays containing the row indices of the training sets.
+            - test_indices: List of number_of_crossvalidations arrays containing the row indices of the test sets.
+
+        """
+        num_training = int(np.around(self.number_of_samples * self.fraction_training))
+        if num_training == 0:
+            raise Exception('The inputted of fraction_training is too low.')
+        elif num_training == self.number_of_samples:
+            raise Exception('The inputted of fraction_training is too high.')
+        training_indices = []
+        test_indices = []
+        for i in range(1, self.number_of_crossvalidations + 1):
+            if seed:
+                np.random.seed(i)
+            # Shuffles the row indices randomly, consuming the same random numbers as shuffling the rows of the data
+            shuffled_indices = np.random.permutation(self.regression_data.shape[0])
+            training_indices.append(shuffled_indices[0:num_training])
+            test_indices.append(shuffled_indices[num_training:])
+        return training_indices, test_indices
+
     def training_test_data_creation(self, additional_features=None):
 
         """
@@ -433,28 +475,21 @@ class PolynomialRegression:
         """
         training_data = {}
         cross_val_data = {}
-        num_training = int(np.around(self.number_of_samples * self.fraction_training))
-        if num_training == 0:
-            raise Exception('The inputted of fraction_training is too low.')
-        elif num_training == self.number_of_samples:
-            raise Exception('The inputted of fraction_training is too high.')
+        training_indices, test_indices = self.training_test_indices(seed=additional_features is None)
         for i in range(1, self.number_of_crossvalidations + 1):
             if additional_features is None:
-                np.random.seed(i)
                 A = np.zeros((self.regression_data.shape[0], self.regression_data.shape[1]))
                 A[:, :] = self.regression_data
-                np.random.shuffle(A)  # Shuffles the rows of the regression data randomly
-                training_data["training_set_" + str(i)] = A[0:num_training, :]
-                cross_val_data["test_set_" + str(i)] = A[num_training:, :]
+                training_data["training_set_" + str(i)] = A[training_indices[i - 1], :]
+                cross_val_data["test_set_" + str(i)] = A[test_indices[i - 1], :]
             elif additional_features is not None:
                 A = np.zeros((self.regression_data.shape[0], self.regression_data.shape[1] + additional_features.shape[1]))
                 A[:, 0:self.regression_data.shape[1]] = self.regression_data
                 A[:, self.regression_data.shape[1]:] = additional_features
-                np.random.shuffle(A)  # Shuffles the rows of the regression data randomly
-                training_data["training_set_" + str(i)] = A[0:num_training, :self.regression_data.shape[1]]
-                training_data["training_extras_" + str(i)] = A[0:num_training, self.regression_data.shape[1]:]
-                cross_val_data["test_set_" + str(i)] = A[num_training:, :self.regression_data.shape[1]]
-                cross_val_data["test_extras_" + str(i)] = A[num_training:, self.regression_data.shape[1]:]
+                training_data["training_set_" + str(i)] = A[training_indices[i - 1], :self.regression_data.shape[1]]
+                training_data["training_extras_" + str(i)] = A[training_indices[i - 1], self.regression_data.shape[1]:]
+                cross_val_data["test_set_" + str(i)] = A[test_indices[i - 1], :self.regression_data.shape[1]]
+                cross_val_data["test_extras_" + str(i)] = A[test_indices[i - 1], self.regression_data.shape[1]:]
         return training_data, cross_val_data
 
     @classmethod
@@ -566,7 +601,8 @@ class PolynomialRegression:
         grad_values = grad_values.reshape(theta.size, )
         return grad_values
 
-    def bfgs_parameter_optimization(self, x, y):
+    @classmethod
+    def bfgs_parameter_optimization(cls, x, y):
         """
         This function performs parameter optimization using scipy's BFGS algorithm.
         It takes in the functions pre-defined functions cost_function and gradient_function as the cost and gradient functions.
@@ -587,7 +623,7 @@ class PolynomialRegression:
         init_theta = np.zeros((x.shape[1], 1))
         reg_parameter = 0.0
         other_args = (x, y, reg_parameter)
-        theta = opt.fmin_bfgs(self.cost_function, init_theta, fprime=self.gradient_function, args=other_args)
+        theta = opt.fmin_bfgs(cls.cost_function, init_theta, fprime=cls.gradient_function, args=other_args)
         return theta
 
     @staticmethod
@@ -728,20 +764,55 @@ class PolynomialRegression:
         x_test_data = test_data[:, :-1]
         y_test_data = test_data[:, -1]
         x_polynomial_data = self.polygeneration(poly_order, self.multinomials, x_training_data, additional_x_training_data)
+        x_polynomial_data_test = self.polygeneration(poly_order, self.multinomials, x_test_data, additional_x_test_data)
+
+        return self.least_squares_fit(self.solver(), x_polynomial_data, y_training_data.reshape(y_training_data.shape[0], 1),
+                                      x_polynomial_data_test, y_test_data.reshape(y_test_data.shape[0], 1))
+
+    def solver(self):
+        """
+        Returns the method that solves the least squares problem for the selected solution method: MLE_estimate, bfgs_parameter_optimization or pyomo_optimization.
+        """
+        if self.solution_method == "mle":
+            return self.MLE_estimate
+        elif self.solution_method == "bfgs":
+            return self.bfgs_parameter_optimization
+        elif self.solution_method == "pyomo":
+            return self.pyomo_optimization
+
+    @staticmethod
+    def least_squares_fit(solver, x_polynomial_data, y_training_data, x_polynomial_data_test, y_test_data, ls_factors=None):
+        """
+
+        Function that solves the least squares problem for a polynomial fit and calculates the training and cross-validation errors of the fit.
+
+        Args:
+            solver                      : The function that solves the least squares problem, returned by ``solver``
+            x_polynomial_data           : Array of training features, (m x n) in size
+            y_training_data             : Training output vector, (m x 1) in size
+            x_polynomial_data_test      : Array of cross-validation features
+            y_test_data                 : Cross-validation output vector
+
+        Keyword Args:
+            ls_factors(tuple)           : Tuple (R, c) with x_polynomial_data = Q.R for some Q with orthonormal columns, and c = Q'.y_training_data.
+                                          When supplied, the maximum likelihood estimate pinv(R).c = pinv(x_polynomial_data).y_training_data is returned instead of calling solver.
 
+        Returns:
+            phi_vector                  : the optimal weight vector, returns Inf when the problem is underspecified, i.e number of features > number of training samples.
+            training_error              : the average SSE estimate in the training dataset, returns Inf when number of features > number of training samples (DoF < 0).
+            crossval_error              : the average SSE estimate on the cross-validation dataset, returns Inf when number of features > number of training samples (DoF < 0).
+
+        """
         # Check that the problem has more samples than features - necessary for fitting. If not, return Infinity.
         if x_polynomial_data.shape[0] >= x_polynomial_data.shape[1]:
-            if self.solution_method == "mle":
-                phi_vector = self.MLE_estimate(x_polynomial_data, y_training_data.reshape(y_training_data.shape[0], 1))
-            elif self.solution_method == "bfgs":
-                phi_vector = self.bfgs_parameter_optimization(x_polynomial_data, y_training_data)
-            elif self.solution_method == "pyomo":
-                phi_vector = self.pyomo_optimization(x_polynomial_data, y_training_data)
+            if ls_factors is not None:
+                phi_vector = np.matmul(np.linalg.pinv(ls_factors[0]), ls_factors[1])
+            else:
+                phi_vector = solver(x_polynomial_data, y_training_data)
             phi_vector = phi_vector.reshape(phi_vector.shape[0], 1)  # Pseudo-inverse approach
 
-            x_polynomial_data_test = self.polygeneration(poly_order, self.multinomials, x_test_data, additional_x_test_data)
-            training_error = self.cross_validation_error_calculation(phi_vector, x_polynomial_data, y_training_data.reshape(y_training_data.shape[0], 1))
-            crossval_error = self.cross_validation_error_calculation(phi_vector, x_polynomial_data_test, y_test_data.reshape(y_test_data.shape[0], 1))
+            training_error = PolynomialRegression.cross_validation_error_calculation(phi_vector, x_polynomial_data, y_training_data)
+            crossval_error = PolynomialRegression.cross_validation_error_calculation(phi_vector, x_polynomial_data_test, y_test_data)
 
         else:
             phi_vector = np.zeros((x_polynomial_data.shape[1], 1))
@@ -749,10 +820,86 @@ class PolynomialRegression:
             training_error = np.Inf
             crossval_error = np.Inf
 
-        # print(poly_order, x_polynomial_data.shape[0], x_polynomial_data.shape[1], training_error, crossval_error)
-
         return phi_vector, training_error, crossval_error
 
+    def cross_validation_fitting(self, additional_features_array=None):
+        """
+
+        Function that fits polynomials of all orders up to max_polynomial_order to the training set of each cross-validation, and selects the fit with the lowest cross-validation error.
+
+        The feature array of the maximum polynomial order is generated once for all the samples in regression_data; the features of each polynomial order are a subset of its columns,
+        and the training and test sets of each cross-validation are subsets of its rows (see ``training_test_indices``). With the "mle" solution method, one QR factorization of the
+        training features of each cross-validation, with the columns ordered so that the features of every polynomial order come first, is shared by the fits of all the polynomial orders.
+
+        The (polynomial order, cross-validation) fits are distributed between **number_of_processes** processes; the results are the same for any number of processes.
+
+        Keyword Args:
+            additional_features_array(NumPy Array) : Array of additional features based on the additional_features list supplied by the user, with the same number of rows as regression_data.
+
+        Returns:
+            phi_best                    : the optimal weight vector of the best fit
+            order_best                  : the polynomial order of the best fit
+            train_error_fit             : the average SSE estimate of the best fit in the training dataset
+            best_error                  : the average SSE estimate of the best fit in the cross-validation dataset
+
+        """
+        training_indices, test_indices = self.training_test_indices(seed=additional_features_array is None)
+        x_data = np.zeros((self.regression_data.shape[0], self.regression_data.shape[1] - 1))
+        x_data[:, :] = self.regression_data[:, :-1]
+        y_data = np.zeros((self.regression_data.shape[0], 1))
+        y_data[:, 0] = self.regression_data[:, -1]
+        additional_x_data = None
+        if additional_features_array is not None:
+            additional_x_data = np.zeros(additional_features_array.shape)
+            additional_x_data[:, :] = additional_features_array
+        x_polynomial_data = self.polygeneration(self.max_polynomial_order, self.multinomials, x_data, additional_x_data)
+
+        # Columns of the features: the constant term, the pure powers x^1 ... x^max_polynomial_order, and the multinomial and additional terms
+        number_of_powers = self.max_polynomial_order * x_data.shape[1]
+        other_columns = list(range(number_of_powers + 1, x_polynomial_data.shape[1]))
+        # Column order in which the features of each polynomial order are the first columns
+        nested_columns = [0] + other_columns + list(range(1, number_of_powers + 1))
+        nested_position = np.zeros(x_polynomial_data.shape[1], dtype=int)
+        nested_position[nested_columns] = np.arange(len(nested_columns))
+
+        ls_factors = [None] * self.number_of_crossvalidations
+        if self.solution_method == "mle":
+            for cv_number in range(0, self.number_of_crossvalidations):
+                q, r = np.linalg.qr(x_polynomial_data[np.ix_(training_indices[cv_number], nested_columns)])
+                ls_factors[cv_number] = (r, np.matmul(q.transpose(), y_data[training_indices[cv_number], :]))
+
+        def fit_arguments():
+            for poly_order in range(1, self.max_polynomial_order + 1):
+                columns = [0] + list(range(1, poly_order * x_data.shape[1] + 1)) + other_columns
+                for cv_number in range(0, self.number_of_crossvalidations):
+                    order_factors = None
+                    if ls_factors[cv_number] is not None and len(columns) <= ls_factors[cv_number][0].shape[0]:
+                        r, qty = ls_factors[cv_number]
+                        order_factors = (r[:len(columns), nested_position[columns]], qty[:len(columns), :])
+                    yield (self.solver(),
+                           x_polynomial_data[np.ix_(training_indices[cv_number], columns)], y_data[training_indices[cv_number], :],
+                           x_polynomial_data[np.ix_(test_indices[cv_number], columns)], y_data[test_indices[cv_number], :],
+                           order_factors)
+
+        if self.number_of_processes > 1:
+            with ProcessPoolExecutor(self.number_of_processes) as executor:
+                futures = [executor.submit(self.least_squares_fit, *arguments) for arguments in fit_arguments()]
+                fits = [future.result() for future in futures]
+        else:
+            fits = [self.least_squares_fit(*arguments) for arguments in fit_arguments()]
+
+        best_error = 1e20
+        train_error_fit = 1e20
+        phi_best = 0
+        order_best = 0
+        for fit_number, (phi, train_error, cv_error) in enumerate(fits):
+            if cv_error < best_error:
+                best_error = cv_error
+                phi_best = phi
+                order_best = fit_number // self.number_of_crossvalidations + 1
+                train_error_fit = train_error
+        return phi_best, order_best, train_error_fit, best_error
+
     def surrogate_performance(self, phi_best, order_best, additional_features_array=None):
         """
 
@@ -921,9 +1068,7 @@ class PolynomialRegression:
 		
         For each polynomial order, it
 		 - calls the function user_defined_terms to generate the array of additional features (when required),
-		 - calls the function training_test_data_creation to generate the training and test data sets,
-		 - calls the function polyregression to determine the optimal weight vector and the fitting errors,
-		 - determines whether the new fit improves is the best so far by the crossvalidation error of the current fit to the previous best,
+		 - calls the function cross_validation_fitting to fit the polynomials to the training and test data sets and determine the fit with the lowest cross-validation error,
 		 - calls the function surrogate_performance to calculate the errors and R-values of the current fit, and
 		 - returns results to user.
 
@@ -950,28 +1095,12 @@ class PolynomialRegression:
                                                         See information on ResultReport class for details on contents.
 
         """
-        # Parameters that represent the best solution found at each iteration based on the cross-validation error
-        best_error = 1e20
-        train_error_fit = 1e20
-        phi_best = 0
-        order_best = 0
-
         if (additional_regression_features is None) or (len(additional_regression_features) == 0):
             print('max_fraction_training_samples set at ', self.max_fraction_training_samples)
             print('Number of adaptive samples (no_adaptive_samples) set at ', self.no_adaptive_samples)
             print('Maximum number of iterations (Max_iter) set at: ', self.max_iter)
 
-            training_data, cross_val_data = self.training_test_data_creation()
-            for poly_order in range(1, self.max_polynomial_order + 1):
-                for cv_number in range(1, self.number_of_crossvalidations + 1):
-                    phi, train_error, cv_error = self.polyregression(poly_order,
-                                                                     training_data["training_set_" + str(cv_number)],
-                                                                     cross_val_data["test_set_" + str(cv_number)])
-                    if cv_error < best_error:
-                        best_error = cv_error
-                        phi_best = phi
-                        order_best = poly_order
-                        train_error_fit = train_error
+            phi_best, order_best, train_error_fit, best_error = self.cross_validation_fitting()
             print('\nInitial surrogate model is of order', order_best, ' with a cross-val error of %4f' % best_error)
             # Next, Calculate and report errors.
             sorted_comparison_vector, mae_error, mse_error, r_square, r_square_adj = self.surrogate_performance(phi_best, order_best)
@@ -991,8 +1120,6 @@ class PolynomialRegression:
                     r_square < eps_pos) and (iteration_number < self.max_iter) and (self.regression_data.shape[0] + self.no_adaptive_samples < self.original_data.shape[0]):
                 print('\n-------------------------------------------------')
                 print('\nIteration ', iteration_number)
-                best_error = 1e20
-
                 # Select n_adaptive_samples worst fitting points to be added to the dataset used in the previous evaluation.
                 scv_input_data = sorted_comparison_vector[:, :-2]
                 sorted_comparison_vector_unique = scv_input_data[
@@ -1004,18 +1131,7 @@ class PolynomialRegression:
                       " additional points added to training data. New number of training samples: ",
                       self.regression_data.shape[0])
 
-                training_data, cross_val_data = self.training_test_data_creation()
-
-                for poly_order in range(1, self.max_polynomial_order + 1):
-                    for cv_number in range(1, self.number_of_crossvalidations + 1):
-                        phi, train_error, cv_error = self.polyregression(poly_order,
-                                                                         training_data["training_set_" + str(cv_number)],
-                                                                         cross_val_data["test_set_" + str(cv_number)])
-                        if cv_error < best_error:
-                            best_error = cv_error
-                            phi_best = phi
-                            order_best = poly_order
-                            train_error_fit = train_error
+                phi_best, order_best, train_error_fit, best_error = self.cross_validation_fitting()
                 print('\nThe best regression model is of order', order_best, ' with a cross-val error of %4f' % best_error)
 
                 sorted_comparison_vector, mae_error, mse_error, r_square, r_square_adj = self.surrogate_performance(phi_best, order_best)
@@ -1067,15 +1183,7 @@ class PolynomialRegression:
             number_additional_features = len(additional_regression_features)
             additional_features_array = self.user_defined_terms(additional_regression_features)
 
-            training_data, cross_val_data = self.training_test_data_creation(additional_features_array)
-            for poly_order in range(1, self.max_polynomial_order + 1):
-                for cv_number in range(1, self.number_of_crossvalidations + 1):
-                    phi, train_error, cv_error = self.polyregression(poly_order, training_data["training_set_" + str(cv_number)], cross_val_data["test_set_" + str(cv_number)], training_data["training_extras_" + str(cv_number)], cross_val_data["test_extras_" + str(cv_number)])
-                    if cv_error < best_error:
-                        best_error = cv_error
-                        phi_best = phi
-                        order_best = poly_order
-                        train_error_fit = train_error
+            phi_best, order_best, train_error_fit, best_error = self.cross_validation_fitting(additional_features_array)
             print('\nBest surrogate model is of order', order_best, ' with a cross-val S.S. Error  of %4f' % best_error)
 
             # KEY: Modification of self variable outside initialization. Required to make @surrogate_performance work here.
@@ -1198,18 +1306,19 @@ class PolynomialRegression:
         Returns:
              Numpy Array    : Output variable predictions based on the polynomial fit.
 
+        The polynomial features of all the points are generated together by calling ``polygeneration``, and the user-specified terms are evaluated with NumPy.
+
         """
-        nf = x_data.shape[1]
-        x_list = [i for i in range(0, nf)]
-        import pyomo.environ as aml
-        m = aml.ConcreteModel()
-        i = aml.Set(initialize=x_list)
-        m.xx = aml.Var(i)
-        m.o2 = aml.Objective(expr=results_vector.generate_expression([m.xx[i] for i in x_list]))
-        y_eq = np.zeros((x_data.shape[0], 1))
-        for j in range(0, x_data.shape[0]):
-            for i in x_list:
-                m.xx[i] = x_data[j, i]
-            y_eq[j, 0] = aml.value(m.o2([m.xx[i] for i in x_list]))
+        additional_x_data = None
+        if len(results_vector.extra_terms_expressions) > 0:
+            cMap = ComponentMap()
+            for i, feature in enumerate(results_vector.extra_terms_feature_vector):
+                cMap[feature] = x_data[:, i]
+            npe = NumpyEvaluator(cMap)
+            additional_x_data = np.column_stack([
+                np.broadcast_to(npe.walk_expression(term), (x_data.shape[0], )) for term in results_vector.extra_terms_expressions
+            ])
+        x_features = self.polygeneration(results_vector.polynomial_order, results_vector.multinomials, x_data, additional_x_data)
+        y_eq = np.matmul(x_features, results_vector.optimal_weights_array.reshape(-1, 1))
         return y_eq
 
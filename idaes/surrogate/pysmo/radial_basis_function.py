@@ -15,6 +15,7 @@ from six import string_types
 
 import random
 from builtins import int, str
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
 from pyomo.environ import *
@@ -22,6 +23,7 @@ import scipy.optimize as opt
 import warnings
 import itertools
 from idaes.surrogate.pysmo.sampling import FeatureScaling as fs
+from idaes.surrogate.pysmo.utils import scaled_variable_expressions, squared_distance_expressions
 
 
 """
@@ -71,7 +73,7 @@ class ResultReport:
             warnings.warn('The parameter matrix A in A.x=B is ill-conditioned (condition number > 1e10). The solution returned may be inaccurate or unstable - inspect rmse error. Regularization (if not already done) may improve solution')
             self.solution_status = 'unstable solution'
 
-    def rbf_generate_expression(self, variable_list):
+    def rbf_generate_expression(self, variable_list, compact=False):
         """
         The ``rbf_generate_expression`` method returns the Pyomo expression for the RBF model trained.
 
@@ -80,17 +82,26 @@ class ResultReport:
         Args:
             variable_list(list)           : List of input variables to be used in generating expression. This can be the a list generated from the output of ``get_feature_vector``. The user can also choose to supply a new list of the appropriate length.
 
+        Keyword Args:
+            compact(bool)                 : When True, the bases use the squared distances directly, and each scaled input variable is a named Pyomo Expression shared by the terms of all the centres.
+                                            For the parametric bases (Gaussian, Multiquadric, Inverse multiquadric), the squared distances are expanded: their quadratic part is a named Pyomo Expression
+                                            shared by all the centres, and each centre only adds a linear expression of the inputs, which makes the expression and the NL file written for it smaller. Default is False.
+
         Returns:
             Pyomo Expression              : Pyomo expression of the RBF model based on the variables provided in **variable_list**
 
         """
+        if compact:
+            return self._compact_expression(variable_list)
         t1 = np.array([variable_list])
+        scale = self.x_data_max[0, :] - self.x_data_min[0, :]
+        scale[scale == 0.0] = 1.0
         basis_vector = []
         # Calculate distances from centres
         for i in range(0, self.centres.shape[0]):
             ans = 0
             for j in range(0, self.centres.shape[1]):
-                ans += (((t1[0, j] - self.x_data_min[0, j])/(self.x_data_max[0, j]- self.x_data_min[0, j])) - self.centres[i, j]) ** 2
+                ans += (((t1[0, j] - self.x_data_min[0, j])/scale[j]) - self.centres[i, j]) ** 2
             eucl_d = ans ** 0.5
             basis_vector.append(eucl_d)
         rbf_terms_list = []
@@ -121,6 +132,35 @@ class ResultReport:
         ))
         return rbf_expr
 
+    def _compact_expression(self, variable_list):
+        """
+        Compact form of the RBF model expression, see ``rbf_generate_expression``.
+        """
+        scaled_variables = scaled_variable_expressions(variable_list, self.x_data_min[0, :], self.x_data_max[0, :])
+        if self.basis_function in ['gaussian', 'mq', 'imq']:
+            squared_distances = squared_distance_expressions(scaled_variables, self.centres, np.ones(self.centres.shape[1]))
+        else:
+            # The expanded squared distances can be slightly negative near a centre, which the square root and logarithm do not allow
+            squared_distances = [sum((scaled_variables[j] - float(self.centres[i, j])) ** 2 for j in range(0, self.centres.shape[1]))
+                                 for i in range(0, self.centres.shape[0])]
+        rbf_terms_list = []
+        for squared_distance in squared_distances:
+            if self.basis_function == 'linear':
+                rbf_terms_list.append(squared_distance ** 0.5)
+            elif self.basis_function == 'cubic':
+                rbf_terms_list.append(squared_distance ** 1.5)
+            elif self.basis_function == 'gaussian':
+                rbf_terms_list.append(exp(-1 * (self.sigma ** 2) * squared_distance))
+            elif self.basis_function == 'mq':
+                rbf_terms_list.append(((self.sigma ** 2) * squared_distance + 1) ** 0.5)
+            elif self.basis_function == 'imq':
+                rbf_terms_list.append(1 / (((self.sigma ** 2) * squared_distance + 1) ** 0.5))
+            elif self.basis_function == 'spline':
+                rbf_terms_list.append(0.5 * squared_distance * log(squared_distance))
+        rbf_expr = self.y_data_min[0]
+        rbf_expr += (self.y_data_max[0] - self.y_data_min[0]) * sum(float(w) * t for w, t in zip(self.weights.reshape(-1, ), rbf_terms_list))
+        return rbf_expr
+
 
 class FeatureScaling:
     """
@@ -257,7 +297,10 @@ class RadialBasisFunctions:
 
     """
 
-    def __init__(self, XY_data, basis_function=None, solution_method=None, regularization=None):
+    # Maximum number of basis function values evaluated at a time in batch predictions
+    max_prediction_block = 2 ** 22
+
+    def __init__(self, XY_data, basis_function=None, solution_method=None, regularization=None, number_of_processes=1):
         """
 
         Initialization of **RadialBasisFunctions** class.
@@ -289,6 +332,8 @@ class RadialBasisFunctions:
 
             regularization(bool): This option determines whether or not the regularization parameter :math:`\lambda` is considered during RBF fitting. Default setting is True.
 
+            number_of_processes(int): Number of processes used to evaluate the LOOCV errors of different shape parameters :math:`\sigma` in parallel. Only used with the 'algebraic' solution method. Default is 1.
+
 
         Returns:
             **self** object with the input information
@@ -302,6 +347,8 @@ class RadialBasisFunctions:
                 * **solution_method** is not 'algebraic', 'pyomo' or 'bfgs'.
             Exception:
                 - :math:`\lambda` is not boolean.
+            Exception:
+                - **number_of_processes** is not a positive integer.
 
         **Example:**
         
@@ -367,6 +414,10 @@ class RadialBasisFunctions:
             self.regularization = regularization
         print('Regularization done: ', self.regularization)
 
+        if not isinstance(number_of_processes, int) or isinstance(number_of_processes, bool) or number_of_processes <= 0:
+            raise Exception('number_of_processes must be a positive, non-zero integer.')
+        self.number_of_processes = number_of_processes
+
     def r2_distance(self, c):
         """
         The function r2_distance calculates Euclidean distance from the point or array c.
@@ -564,22 +615,37 @@ class RadialBasisFunctions:
         basis_functions = np.zeros((self.x_data.shape[0], self.centres.shape[0]))
         for i in range(0, self.centres.shape[0]):
             basis_functions[:, i] = self.r2_distance(self.centres[i, :])
+        return self.basis_transformation(basis_functions, self.basis_function, r)
 
-        # Initialization of x_transformed
-        x_transformed = np.zeros((basis_functions.shape[0], basis_functions.shape[1]))
+    @staticmethod
+    def basis_transformation(distances, basis_function, r):
+        """
+        The function basis_transformation transforms a matrix of distances from the RBF centres to the basis **basis_function**.
 
-        if self.basis_function == 'gaussian':
-            x_transformed = self.gaussian_basis_transformation(basis_functions, r)
-        elif self.basis_function == 'linear':
-            x_transformed = self.linear_transformation(basis_functions)
-        elif self.basis_function == 'cubic':
-            x_transformed = self.cubic_transformation(basis_functions)
-        elif self.basis_function == 'mq':
-            x_transformed = self.multiquadric_basis_transformation(basis_functions, r)
-        elif self.basis_function == 'imq':
-            x_transformed = self.inverse_multiquadric_basis_transformation(basis_functions, r)
-        elif self.basis_function == 'spline':
-            x_transformed = self.thin_plate_spline_transformation(basis_functions)
+        Args:
+            distances(NumPy Array)  : Euclidean distances of the points from the RBF centres
+            basis_function(str)     : Name of the basis transformation, see ``__init__``
+            r(float)                : The shape parameter required for the Gaussian, Multiquadric and Inverse multiquadric transformations.
+
+        Returns:
+            x_transformed(NumPy Array): Array of transformed data
+
+        """
+        # Initialization of x_transformed
+        x_transformed = np.zeros((distances.shape[0], distances.shape[1]))
+
+        if basis_function == 'gaussian':
+            x_transformed = RadialBasisFunctions.gaussian_basis_transformation(distances, r)
+        elif basis_function == 'linear':
+            x_transformed = RadialBasisFunctions.linear_transformation(distances)
+        elif basis_function == 'cubic':
+            x_transformed = RadialBasisFunctions.cubic_transformation(distances)
+        elif basis_function == 'mq':
+            x_transformed = RadialBasisFunctions.multiquadric_basis_transformation(distances, r)
+        elif basis_function == 'imq':
+            x_transformed = RadialBasisFunctions.inverse_multiquadric_basis_transformation(distances, r)
+        elif basis_function == 'spline':
+            x_transformed = RadialBasisFunctions.thin_plate_spline_transformation(distances)
         return x_transformed
 
     @staticmethod
@@ -851,11 +917,71 @@ class RadialBasisFunctions:
         loo_error_estimate = np.linalg.norm(error_vector)
         return condition_number_pure, condition_number_regularized, loo_error_estimate
 
+    @staticmethod
+    def loo_errors_with_eigendecomposition(x_data, y_data, basis_function, sigma, reg_parameter, condition_number_limit=1e8):
+        """
+        The function loo_errors_with_eigendecomposition evaluates the Rippa LOOCV errors of the explicit algebraic solution (see loo_error_estimation_with_rippa_method)
+        for one shape parameter and a list of regularization parameters.
+
+        The training points are the RBF centres, so the transformed matrix A is symmetric and has an eigendecomposition A = V.diag(w).V'.
+        The eigendecomposition is computed once, and for every regularization parameter :math:`\lambda`:
+            - inv(A + :math:`\lambda` I) = V.diag(1 / (w + :math:`\lambda`)).V', which gives the radial weights and the diagonal of the inverse in :math:`O(n^{2})`, and
+            - the condition number of A + :math:`\lambda` I is max(abs(w + :math:`\lambda`)) / min(abs(w + :math:`\lambda`)).
+
+        The eigenvalues do not resolve the inverse of a (nearly) singular matrix, e.g. with repeated training points and no regularization. When the condition number
+        of A + :math:`\lambda` I is above **condition_number_limit**, the error is evaluated from the regularized matrix as in ``loo_error_estimation_with_rippa_method`` instead.
+
+        The function is static so that it can be evaluated in other processes.
+
+        Args:
+            x_data(NumPy Array)           : scaled input data, which are also the RBF centres
+            y_data(NumPy Array)           : scaled output data
+            basis_function(str)           : name of the basis transformation
+            sigma(float)                  : shape parameter for the parametric bases (Gaussian, Multiquadric, Inverse multiquadric)
+            reg_parameter(list)           : regularization parameters
+            condition_number_limit(float) : largest condition number for which the errors are evaluated from the eigendecomposition
+
+        Returns:
+            condition_number_pure           : condition number of transformed matrix generated from the input data before regularization
+            condition_numbers_regularized   : list of the condition numbers of the transformed matrix after regularization, for each regularization parameter
+            loo_error_estimates             : list of the norms of the leave-one-out cross-validation errors, for each regularization parameter
+
+        """
+        distances = np.zeros((x_data.shape[0], x_data.shape[0]))
+        for i in range(0, x_data.shape[0]):
+            distances[:, i] = np.sqrt(np.sum(((x_data - x_data[i, :]) ** 2), axis=1))
+        x_transformed = RadialBasisFunctions.basis_transformation(distances, basis_function, sigma)
+        eigenvalues, eigenvectors = np.linalg.eigh(x_transformed)
+        eigenvectors_squared = eigenvectors ** 2
+        y_train = y_data.reshape(y_data.shape[0], 1)
+        projected_y = np.matmul(eigenvectors.T, y_train[:, 0])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            condition_number_pure = np.max(np.abs(eigenvalues)) / np.min(np.abs(eigenvalues))
+            condition_numbers_regularized = []
+            loo_error_estimates = []
+            for lambda_reg in reg_parameter:
+                shifted_eigenvalues = eigenvalues + lambda_reg
+                singular_values = np.abs(shifted_eigenvalues)
+                condition_number_regularized = np.max(singular_values) / np.min(singular_values)
+                condition_numbers_regularized.append(condition_number_regularized)
+                if condition_number_regularized > condition_number_limit:
+                    x_regularized = x_transformed + (lambda_reg * np.eye(x_transformed.shape[0], x_transformed.shape[1]))
+                    radial_weights = RadialBasisFunctions.explicit_linear_algebra_solution(x_regularized, y_train)[:, 0]
+                    inverse_matrix = np.diag(np.linalg.pinv(x_regularized))
+                else:
+                    radial_weights = np.matmul(eigenvectors, projected_y / shifted_eigenvalues)
+                    inverse_matrix = np.matmul(eigenvectors_squared, 1 / shifted_eigenvalues)
+                loo_error_estimates.append(np.linalg.norm(radial_weights / inverse_matrix))
+        return condition_number_pure, condition_numbers_regularized, loo_error_estimates
+
     def leave_one_out_crossvalidation(self):
         """
         The function leave_one_out_crossvalidation determines the best hyperparameters (shape and regularization parameters) for a given RBF fitting problem.
         The function cycles through a set of predefined sets to determine the shape parameter and regularization parameter combination which yields the lowest LOOCV error.
-        The LOOCV error for each (shape_parameter, regulkarization parameter) pair is evaluated by calling the function loo_error_estimation_with_rippa_method
+        The LOOCV error for each (shape_parameter, regulkarization parameter) pair is evaluated by calling the function loo_error_estimation_with_rippa_method.
+        For the explicit algebraic solution, the errors for all the regularization parameters of a shape parameter are evaluated together from one eigendecomposition
+        by calling loo_errors_with_eigendecomposition, with the shape parameters shared between **number_of_processes** processes.
         The pre-defined shape parameter set considers 24 irregularly spaced values ranging between 0.001 - 1000, while the regularization parameter set considers 21 values ranging between 0.00001 - 1.
 
         Args:
@@ -883,14 +1009,28 @@ class RadialBasisFunctions:
 
         machine_precision = np.finfo(float).eps
 
+        if self.solution_method == 'algebraic':
+            if self.number_of_processes > 1 and len(r_set) > 1:
+                with ProcessPoolExecutor(min(self.number_of_processes, len(r_set))) as executor:
+                    sigma_results = list(executor.map(self.loo_errors_with_eigendecomposition, itertools.repeat(self.x_data), itertools.repeat(self.y_data),
+                                                      itertools.repeat(self.basis_function), r_set, itertools.repeat(reg_parameter)))
+            else:
+                sigma_results = [self.loo_errors_with_eigendecomposition(self.x_data, self.y_data, self.basis_function, sigma, reg_parameter) for sigma in r_set]
+        else:
+            sigma_results = []
+            for sigma in r_set:
+                pair_results = [self.loo_error_estimation_with_rippa_method(sigma, lambda_reg) for lambda_reg in reg_parameter]
+                sigma_results.append((pair_results[0][0], [result[1] for result in pair_results], [result[2] for result in pair_results]))
+
         error_vector = np.zeros((len(r_set) * len(reg_parameter), 3))
         counter = 0
         print('===========================================================================================================')
         for i in range(0, len(r_set)):
             sigma = r_set[i]
+            cond_no_pure, cond_nos_reg, cv_errors = sigma_results[i]
             for j in range(0, len(reg_parameter)):
                 lambda_reg = reg_parameter[j]
-                cond_no_pure, cond_no_reg, cv_error = self.loo_error_estimation_with_rippa_method(sigma, lambda_reg)
+                cond_no_reg, cv_error = cond_nos_reg[j], cv_errors[j]
                 error_vector[counter, :] = [sigma, lambda_reg, cv_error]
                 counter += 1
                 print(sigma, '   |    ', lambda_reg, '   |    ', cv_error, '   |    ', cond_no_pure, '   |    ',  cond_no_pure * machine_precision, '   |    ', cond_no_reg, '   |    ', cond_no_reg * machine_precision)
@@ -898,6 +1038,9 @@ class RadialBasisFunctions:
         r_best = error_vector[minimum_value_column, 0]
         lambda_best = error_vector[minimum_value_column, 1]
         error_best = error_vector[minimum_value_column, 2]
+        if self.solution_method == 'algebraic':
+            # Report the error of the selected pair as evaluated by the direct solution
+            _, _, error_best = self.loo_error_estimation_with_rippa_method(r_best, lambda_best)
         return r_best, lambda_best, error_best
 
     def rbf_training(self):
@@ -970,31 +1113,19 @@ class RadialBasisFunctions:
         x_pred_scaled = (x_data - results_vector.x_data_min)/scale
         x_data = x_pred_scaled.reshape(x_data.shape)
 
-        basis_vector = np.zeros((x_data.shape[0], centres_matrix.shape[0]))
-        # Calculate distances from centres
-        for i in range(0, centres_matrix.shape[0]):
-            basis_vector[:, i] = np.sqrt(np.sum(((x_data - centres_matrix[i, :]) ** 2), axis=1))
-        # Initialization of x_transformed
-        x_transformed = np.zeros((basis_vector.shape[0], basis_vector.shape[1]))
-
-        # Transform X
-        if self.basis_function == 'gaussian':
-            x_transformed = RadialBasisFunctions.gaussian_basis_transformation(basis_vector, r)
-        elif self.basis_function == 'linear':
-            x_transformed = RadialBasisFunctions.linear_transformation(basis_vector)
-        elif self.basis_function == 'cubic':
-            x_transformed = RadialBasisFunctions.cubic_transformation(basis_vector)
-        elif self.basis_function == 'mq':
-            x_transformed = RadialBasisFunctions.multiquadric_basis_transformation(basis_vector, r)
-        elif self.basis_function == 'imq':
-            x_transformed = RadialBasisFunctions.inverse_multiquadric_basis_transformation(basis_vector, r)
-        elif self.basis_function == 'spline':
-            x_transformed = RadialBasisFunctions.thin_plate_spline_transformation(basis_vector)
-
-        # Add regularization shifting?
-        x_transformed = x_transformed + (0 * np.eye(x_transformed.shape[0], x_transformed.shape[1]))
-        # x_transformed = x_transformed + (lambda_reg * np.eye(x_transformed.shape[0], x_transformed.shape[1]))
-        y_prediction_scaled = np.matmul(x_transformed, radial_weights)
+        # Predictions are evaluated for blocks of points, with at most max_prediction_block basis function values at a time
+        y_prediction_scaled = np.zeros((x_data.shape[0], radial_weights.shape[1]))
+        block_rows = max(1, self.max_prediction_block // max(1, centres_matrix.shape[0]))
+        for start in range(0, x_data.shape[0], block_rows):
+            x_block = x_data[start:start + block_rows, :]
+            # Calculate distances from centres
+            basis_vector = np.zeros((x_block.shape[0], centres_matrix.shape[0]))
+            for j in range(0, centres_matrix.shape[1]):
+                basis_vector += (x_block[:, j].reshape(-1, 1) - centres_matrix[:, j]) ** 2
+            basis_vector = np.sqrt(basis_vector)
+            # Transform X
+            x_transformed = self.basis_transformation(basis_vector, self.basis_function, r)
+            y_prediction_scaled[start:start + block_rows, :] = np.matmul(x_transformed, radial_weights)
         y_prediction_unscaled = results_vector.y_data_min + y_prediction_scaled * (results_vector.y_data_max - results_vector.y_data_min)
         return y_prediction_unscaled
 
@@ -16,6 +16,8 @@ import random
 # from builtins import int, str
 import numpy as np
 import pandas as pd
+from scipy.spatial import cKDTree
+from concurrent.futures import ThreadPoolExecutor
 import warnings
 import itertools
 
@@ -114,6 +116,13 @@ class FeatureScaling:
 
 class SamplingMethods:
 
+    # Whether the points chosen in "selection" sampling must all be different
+    unique_selection = False
+    # Largest number of data features for which a KD-tree is used to find nearest neighbours
+    kdtree_max_features = 16
+    # Largest distance matrix (number of entries) computed at once when a KD-tree is not used
+    max_distance_block = 2 ** 23
+
     def nearest_neighbour(self, full_data, a):
         """
         Function determines the closest point to a in data_input (user provided data).
@@ -135,36 +144,96 @@ class SamplingMethods:
 
         dist = full_data[:, :-1] - a
         l2_norm = np.sqrt(np.sum((dist ** 2), axis=1))
-        l2_norm = l2_norm.reshape(l2_norm.shape[0], 1)
-        distances = np.append(full_data, l2_norm, 1)
-        sorted_distances = distances[distances[:, -1].argsort()]
-        closest_point = sorted_distances[0, :-1]
+        closest_point = full_data[np.argmin(l2_norm), :]
         return closest_point
 
-    def points_selection(self, full_data, generated_sample_points):
+    def points_selection(self, full_data, generated_sample_points, unique=False):
         """
-        Uses L2-distance evaluation (implemented in nearest_neighbour) to find closest available points in original data to those generated by the sampling technique.
-        Calls the nearest_neighbour function for each row in the input data.
+        Uses L2-distance evaluation to find closest available points in original data to those generated by the sampling technique.
+        All the sample points are looked up at once, with a KD-tree of the input data when it has at most kdtree_max_features features,
+        and otherwise by computing the distance matrix in blocks of at most max_distance_block entries.
 
         Args:
             full_data: refers to the input dataset supplied by the user.
             generated_sample_points(NumPy Array): The vector of points (number_of_sample rows) for which the closest points in the original data are to be found. Each row represents a sample point.
+            unique(bool): If True, no row of the input data is selected more than once. The sample points are matched in order, each to the closest row not yet selected.
 
         Returns:
             equivalent_points: Array containing the points (in rows) most similar to those in generated_sample_points
-        """
 
-        equivalent_points = np.zeros((generated_sample_points.shape[0], generated_sample_points.shape[1] + 1))
-        for i in range(0, generated_sample_points.shape[0]):
-            closest_point = self.nearest_neighbour(full_data, generated_sample_points[i, :])
-            equivalent_points[i, :] = closest_point
+        Raises:
+            ValueError: When the sample points do not have one less column than the input data, or when unique selection is requested for more points than there are rows of input data.
+        """
+        x_data = full_data[:, :-1]
+        points = np.asarray(generated_sample_points, dtype=float)
+        if points.ndim != 2 or points.shape[1] != x_data.shape[1]:
+            raise ValueError('Dimensionality problems with data for nearest neighbour selection.')
+        if unique and points.shape[0] > x_data.shape[0]:
+            raise ValueError('Unique selection of more sample points than there are rows in the input data is not possible.')
+        if 0 < x_data.shape[1] <= self.kdtree_max_features:
+            tree = cKDTree(x_data)
+            _, closest = tree.query(points)
+        else:
+            tree = None
+            closest = self._closest_rows(x_data, points)
+        if unique:
+            closest = self._unique_closest_rows(x_data, points, closest, tree)
+        equivalent_points = full_data[closest, :]
         return equivalent_points
 
+    def _closest_rows(self, x_data, points):
+        """
+        Finds the index of the closest row of x_data to each of the points, computing the distances in blocks of rows of points.
+        Ties go to the first row.
+        """
+        closest = np.zeros(points.shape[0], dtype=int)
+        if x_data.shape[1] == 0:
+            return closest
+        x_norms = np.sum(x_data ** 2, axis=1)
+        block = max(1, self.max_distance_block // x_data.shape[0])
+        for i in range(0, points.shape[0], block):
+            # |x - a|^2 without the |a|^2 term, which does not change the ranking
+            dist = x_norms - 2 * (points[i:i + block, :] @ x_data.T)
+            closest[i:i + block] = np.argmin(dist, axis=1)
+        return closest
+
+    @staticmethod
+    def _unique_closest_rows(x_data, points, closest, tree):
+        """
+        Replaces repeated rows in closest (the index of the closest row of x_data to each point), so that each point in turn gets the
+        closest row not already selected for an earlier point. Rows with the same values count as one row.
+        """
+        _, first_row, row_group = np.unique(x_data, axis=0, return_index=True, return_inverse=True)
+        row_group = row_group.ravel()
+        if points.shape[0] > first_row.shape[0]:
+            raise ValueError('Unique selection of more sample points than there are distinct rows in the input data is not possible.')
+        taken = np.zeros(first_row.shape[0], dtype=bool)
+        for i in range(points.shape[0]):
+            if taken[row_group[closest[i]]]:
+                if tree is not None:
+                    # look at more and more neighbours until one is free
+                    k = 2
+                    while True:
+                        k = min(k, x_data.shape[0])
+                        _, candidates = tree.query(points[i, :], k=k)
+                        candidates = np.atleast_1d(candidates)
+                        free = candidates[~taken[row_group[candidates]]]
+                        if free.size > 0 or k == x_data.shape[0]:
+                            break
+                        k *= 2
+                    closest[i] = free[0]
+                else:
+                    dist = np.sum((x_data - points[i, :]) ** 2, axis=1)
+                    dist[taken[row_group]] = np.inf
+                    closest[i] = np.argmin(dist)
+            taken[row_group[closest[i]]] = True
+        return closest
+
     def sample_point_selection(self, full_data, sample_points, sampling_type):
         if sampling_type == 'selection':
             sd = FeatureScaling()
             scaled_data, data_min, data_max = sd.data_scaling_minmax(full_data)
-            points_closest_scaled = self.points_selection(scaled_data, sample_points)
+            points_closest_scaled = self.points_selection(scaled_data, sample_points, unique=self.unique_selection)
             points_closest_unscaled = sd.data_unscaling_minmax(points_closest_scaled, data_min, data_max)
 
             unique_sample_points = np.unique(points_closest_unscaled, axis=0)
@@ -331,7 +400,7 @@ class LatinHypercubeSampling(SamplingMethods):
 
     """
 
-    def __init__(self, data_input, number_of_samples=None, sampling_type=None):
+    def __init__(self, data_input, number_of_samples=None, sampling_type=None, unique_selection=False):
         """
         Initialization of **LatinHypercubeSampling** class. Two inputs are required.
 
@@ -343,6 +412,7 @@ class LatinHypercubeSampling(SamplingMethods):
 
             number_of_samples (int): The number of samples to be generated. Should be a positive integer less than or equal to the number of entries (rows) in **data_input**.
             sampling_type (str) : Option which determines whether the algorithm selects samples from an existing dataset ("selection") or attempts to generate sample from a supplied range ("creation"). Default is "creation".
+            unique_selection(bool) : Option for "selection" sampling. When True, each sample is a different point of the input data set, so exactly the requested number of samples is returned. Default is False, where two samples may select the same point.
 
         Returns:
             **self** function containing the input information
@@ -367,6 +437,10 @@ class LatinHypercubeSampling(SamplingMethods):
                 'Invalid sampling type requirement entered. Enter "creation" for sampling from a range or "selection" for selecting samples from a dataset.')
         print('Sampling type: ', self.sampling_type, '\n')
 
+        if not isinstance(unique_selection, bool):
+            raise Exception('unique_selection must be boolean.')
+        self.unique_selection = unique_selection
+
         if self.sampling_type == 'selection':
             if isinstance(data_input, pd.DataFrame):
                 data = data_input.values
@@ -530,7 +604,7 @@ class UniformSampling(SamplingMethods):
 
     """
 
-    def __init__(self, data_input, list_of_samples_per_variable, sampling_type=None, edges=None):
+    def __init__(self, data_input, list_of_samples_per_variable, sampling_type=None, edges=None, unique_selection=False):
         """
         Initialization of UniformSampling class. Three inputs are required.
 
@@ -542,6 +616,7 @@ class UniformSampling(SamplingMethods):
 
             list_of_samples_per_variable (list): The list containing the number of subdivisions for each variable. Each dimension (variable) must be represented by a positive integer variable greater than 1.
             sampling_type (str) : Option which determines whether the algorithm selects samples from an existing dataset ("selection") or attempts to generate sample from a supplied range ("creation"). Default is "creation".
+            unique_selection(bool) : Option for "selection" sampling. When True, each sample is a different point of the input data set, so exactly the requested number of samples is returned. Default is False, where two samples may select the same point.
 
         Keyword Args:
             edges(bool): Boolean variable representing bow the points should be selected. A value of True (default) indicates the points should be equally spaced edge to edge, otherwise they will be in the centres of the bins filling the unit cube
@@ -571,6 +646,10 @@ class UniformSampling(SamplingMethods):
                 'Invalid sampling type requirement entered. Enter "creation" for sampling from a range or "selection" for selecting samples from a dataset.')
         print('Sampling type: ', self.sampling_type, '\n')
 
+        if not isinstance(unique_selection, bool):
+            raise Exception('unique_selection must be boolean.')
+        self.unique_selection = unique_selection
+
         if self.sampling_type == 'selection':
             if isinstance(data_input, pd.DataFrame):
                 data = data_input.values
@@ -679,7 +758,7 @@ class HaltonSampling(SamplingMethods):
 
     """
 
-    def __init__(self, data_input, number_of_samples=None, sampling_type=None):
+    def __init__(self, data_input, number_of_samples=None, sampling_type=None, unique_selection=False):
         """
 
         Initialization of **HaltonSampling** class. Two inputs are required.
@@ -692,6 +771,7 @@ class HaltonSampling(SamplingMethods):
             
             number_of_samples(int): The number of samples to be generated. Should be a positive integer less than or equal to the number of entries (rows) in **data_input**.
             sampling_type(str) : Option which determines whether the algorithm selects samples from an existing dataset ("selection") or attempts to generate sample from a supplied range ("creation"). Default is "creation".
+            unique_selection(bool) : Option for "selection" sampling. When True, each sample is a different point of the input data set, so exactly the requested number of samples is returned. Default is False, where two samples may select the same point.
 
         Returns:
             **self** function containing the input information.
@@ -716,6 +796,10 @@ class HaltonSampling(SamplingMethods):
                 'Invalid sampling type requirement entered. Enter "creation" for sampling from a range or "selection" for selecting samples from a dataset.')
         print('Sampling type: ', self.sampling_type, '\n')
 
+        if not isinstance(unique_selection, bool):
+            raise Exception('unique_selection must be boolean.')
+        self.unique_selection = unique_selection
+
         if self.sampling_type == 'selection':
             if isinstance(data_input, pd.DataFrame):
                 data = data_input.values
@@ -825,7 +909,7 @@ class HammersleySampling(SamplingMethods):
 
     """
 
-    def __init__(self, data_input, number_of_samples=None, sampling_type=None):
+    def __init__(self, data_input, number_of_samples=None, sampling_type=None, unique_selection=False):
         """
         Initialization of **HammersleySampling** class. Two inputs are required.
 
@@ -837,6 +921,7 @@ class HammersleySampling(SamplingMethods):
 
             number_of_samples(int): The number of samples to be generated. Should be a positive integer less than or equal to the number of entries (rows) in **data_input**.
             sampling_type(str) : Option which determines whether the algorithm selects samples from an existing dataset ("selection") or attempts to generate sample from a supplied range ("creation"). Default is "creation".
+            unique_selection(bool) : Option for "selection" sampling. When True, each sample is a different point of the input data set, so exactly the requested number of samples is returned. Default is False, where two samples may select the same point.
 
             Returns:
                 **self** function containing the input information.
@@ -861,6 +946,10 @@ class HammersleySampling(SamplingMethods):
                 'Invalid sampling type requirement entered. Enter "creation" for sampling from a range or "selection" for selecting samples from a dataset.')
         print('Sampling type: ', self.sampling_type, '\n')
 
+        if not isinstance(unique_selection, bool):
+            raise Exception('unique_selection must be boolean.')
+        self.unique_selection = unique_selection
+
         if self.sampling_type == 'selection':
             if isinstance(data_input, pd.DataFrame):
                 data = data_input.values
@@ -969,7 +1058,8 @@ class CVTSampling(SamplingMethods):
 
     """
 
-    def __init__(self, data_input, number_of_samples=None, tolerance=None, sampling_type=None):
+    def __init__(self, data_input, number_of_samples=None, tolerance=None, sampling_type=None, unique_selection=False,
+                 random_seed=None, points_per_centre=1000, max_memory=2 ** 28, number_of_threads=1):
         """
         Initialization of CVTSampling class. Two inputs are required, while an optional option to control the solution accuracy may be specified.
 
@@ -981,12 +1071,18 @@ class CVTSampling(SamplingMethods):
 
             number_of_samples(int): The number of samples to be generated. Should be a positive integer less than or equal to the number of entries (rows) in **data_input**.
             sampling_type(str) : Option which determines whether the algorithm selects samples from an existing dataset ("selection") or attempts to generate sample from a supplied range ("creation"). Default is "creation".
+            unique_selection(bool) : Option for "selection" sampling. When True, each sample is a different point of the input data set, so exactly the requested number of samples is returned. Default is False, where two samples may select the same point.
 
         Keyword Args:
             tolerance(float): Maximum allowable Euclidean distance between centres from consectutive iterations of the algorithm. Termination condition for algorithm.
 
                 - The smaller the value of tolerance, the better the solution but the longer the algorithm requires to converge. Default value is :math:`10^{-7}`.
 
+            random_seed(int): Seed for the random points used by the algorithm, so that the same samples are generated every time. Default is None, which uses NumPy's global random state.
+            points_per_centre(int): Number of random points generated per centre at each iteration. Fewer points make each iteration faster but the centres less accurate. Default is 1000.
+            max_memory(int): Approximate limit on the memory, in bytes, used for random points and distances at a time. The random points of each iteration are processed in blocks small enough to stay within the limit. Default is :math:`2^{28}` (256 MB).
+            number_of_threads(int): Number of threads used to assign random points to their closest centres. Default is 1.
+
         Returns:
                 **self** function containing the input information.
 
@@ -998,6 +1094,8 @@ class CVTSampling(SamplingMethods):
 
                 Exception: When the tolerance specified is too loose (tolerance > 0.1) or invalid
 
+                Exception: When **points_per_centre**, **max_memory** or **number_of_threads** is not a positive integer
+
                 warnings.warn: when the tolerance specified by the user is too tight (tolerance < :math:`10^{-9}`)
 
         """
@@ -1015,6 +1113,10 @@ class CVTSampling(SamplingMethods):
                 'Invalid sampling type requirement entered. Enter "creation" for sampling from a range or "selection" for selecting samples from a dataset.')
         print('Sampling type: ', self.sampling_type, '\n')
 
+        if not isinstance(unique_selection, bool):
+            raise Exception('unique_selection must be boolean.')
+        self.unique_selection = unique_selection
+
         if self.sampling_type == 'selection':
             if isinstance(data_input, pd.DataFrame):
                 data = data_input.values
@@ -1095,6 +1197,15 @@ class CVTSampling(SamplingMethods):
             raise Exception('Invalid tolerance input')
         self.eps = tolerance
 
+        for name, value in [('points_per_centre', points_per_centre), ('max_memory', max_memory),
+                            ('number_of_threads', number_of_threads)]:
+            if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+                raise Exception(name + ' must be a positive, non-zero integer.')
+        self.points_per_centre = points_per_centre
+        self.max_memory = max_memory
+        self.number_of_threads = number_of_threads
+        self.random_seed = random_seed
+
     @staticmethod
     def random_sample_selection(no_samples, no_features):
         """
@@ -1157,20 +1268,75 @@ class CVTSampling(SamplingMethods):
         (3) Create the new centres as the weighted average of the current centres (initial_centres) and the mean data calculated in the second step. The weighting is done based on the number of iterations (counter).
 
         """
-        centres = np.zeros((initial_centres.shape[0], initial_centres.shape[1]))
-        current_centres = current_centres.reshape(current_centres.shape[0], 1)
-        for i in range(0, initial_centres.shape[0]):
-            data_matrix = current_random_points[current_centres[:, 0] == i]
-            m_prime, n_prime = data_matrix.shape
-            if m_prime == 0:
-                centres[i, :] = np.mean(initial_centres, axis=0)
-            else:
-                centres[i, :] = np.mean(data_matrix, axis=0)
+        sums, counts = CVTSampling.class_sums(current_random_points, current_centres.ravel(), initial_centres.shape[0])
+        return CVTSampling.update_centres(initial_centres, sums, counts, counter)
+
+    @staticmethod
+    def class_sums(points, classes, no_centres):
+        """
+        The function class_sums evaluates the sum of the points in each class, and the number of points in each class.
+
+            Args:
+                points(NumPy Array): A 2-D array of points, size m x no_features.
+                classes(NumPy Array): A 1-D array containing the class (index number of the closest centre) of each point.
+                no_centres(int): Number of classes.
+
+            Returns:
+                sums(NumPy Array): A 2-D array containing the sum of the points in each class, size no_centres x no_features.
+                counts(NumPy Array): A 1-D array containing the number of points in each class.
+
+        """
+        counts = np.bincount(classes, minlength=no_centres)
+        sums = np.zeros((no_centres, points.shape[1]))
+        for j in range(points.shape[1]):
+            sums[:, j] = np.bincount(classes, weights=points[:, j], minlength=no_centres)
+        return sums, counts
+
+    @staticmethod
+    def update_centres(initial_centres, sums, counts, counter):
+        """
+        The function update_centres evaluates new mass centroids from the sums and numbers of the points in each class (see create_centres).
+        Centres with no points are moved towards the mean of all the current centres.
+
+            Args:
+                initial_centres(NumPy Array): A 2-D array containing the current mass centroids, size no_samples x no_features.
+                sums(NumPy Array): A 2-D array containing the sum of the points in each class, size no_samples x no_features.
+                counts(NumPy Array): A 1-D array containing the number of points in each class.
+                counter(int): current iteration number
+
+            Returns:
+                centres(NumPy Array): A 2-D array containing the new mass centroids, size no_samples x no_features.
+
+        """
+        empty = counts == 0
+        centres = sums / np.where(empty, 1, counts)[:, np.newaxis]
+        centres[empty, :] = np.mean(initial_centres, axis=0)
 
         # Weighted average based on previous number of iterations
         centres = ((counter * initial_centres) + centres) / (counter + 1)
         return centres
 
+    def closest_centres(self, points, centres, tree=None):
+        """
+        The function closest_centres finds the index number of the closest centre to each point.
+        The distances are found with a KD-tree of the centres, when given, and otherwise from a distance matrix computed with BLAS.
+
+            Args:
+                points(NumPy Array): A 2-D array of points, size m x no_features.
+                centres(NumPy Array): A 2-D array containing the centres, size no_samples x no_features.
+                tree(cKDTree): Optional KD-tree of the centres.
+
+            Returns:
+                classes(NumPy Array): A 1-D array containing the index number of the closest centre to each point.
+
+        """
+        if tree is not None:
+            _, classes = tree.query(points)
+            return classes
+        # |x - c|^2 without the |x|^2 term, which does not change the ranking
+        distances = np.sum(centres ** 2, axis=1) - 2 * (points @ centres.T)
+        return np.argmin(distances, axis=1)
+
     def sample_points(self):
         """
         The ``sample_points`` method determines the best/optimal centre points (centroids) for a data set based on the minimization of the total distance between points and centres.
@@ -1183,35 +1349,52 @@ class CVTSampling(SamplingMethods):
 
         """
         _, n = self.x_data.shape
-        size_multiple = 1000
-        initial_centres = self.random_sample_selection(self.number_of_centres, n)
-        # Iterative optimization process
-        cost_old = 0
-        cost_new = 0
-        cost_change = float('Inf')
-        counter = 1
-        while (cost_change > self.eps) and (counter <= 1000):
-            cost_old = cost_new
-            current_random_points = self.random_sample_selection(self.number_of_centres * size_multiple, n)
-            distance_matrix = np.zeros(
-                (current_random_points.shape[0], initial_centres.shape[0]))  # Vector to store distances from centroids
-            current_centres = np.zeros(
-                (current_random_points.shape[0], 1))  # Vector containing the centroid each point belongs to
-
-            # Calculate distance between random points and centres, sort and estimate new centres
-            for i in range(0, self.number_of_centres):
-                distance_matrix[:, i] = self.eucl_distance(current_random_points, initial_centres[i, :])
-            current_centres = (np.argmin(distance_matrix, axis=1))
-            new_centres = self.create_centres(initial_centres, current_random_points, current_centres, counter)
-
-            # Estimate distance between new and old centres
-            distance_btw_centres = self.eucl_distance(new_centres, initial_centres)
-            cost_new = np.sqrt(np.sum(distance_btw_centres ** 2))
-            cost_change = np.abs(cost_old - cost_new)
-            counter += 1
-            # print(counter, cost_change)
-            if cost_change >= self.eps:
-                initial_centres = new_centres
+        k = self.number_of_centres
+        rng = np.random if self.random_seed is None else np.random.RandomState(self.random_seed)
+        initial_centres = rng.rand(k, n)
+        # The random points of each iteration are generated and classified in blocks, and only the sums of the points in
+        # each class are kept. Each thread works on one block at a time: a block row holds the point and its distances.
+        total_points = k * self.points_per_centre
+        block_size = max(1, self.max_memory // (self.number_of_threads * 8 * (n + 2 * k)))
+        block_size = min(block_size, total_points)
+
+        def block_sums(points, centres, tree):
+            return self.class_sums(points, self.closest_centres(points, centres, tree), k)
+
+        with ThreadPoolExecutor(self.number_of_threads) as pool:
+            # Iterative optimization process
+            cost_old = 0
+            cost_new = 0
+            cost_change = float('Inf')
+            counter = 1
+            while (cost_change > self.eps) and (counter <= 1000):
+                cost_old = cost_new
+                tree = cKDTree(initial_centres) if 0 < n <= self.kdtree_max_features else None
+                sums, counts = np.zeros((k, n)), np.zeros(k, dtype=int)
+                start = 0
+                while start < total_points:
+                    # one block per thread
+                    blocks = []
+                    while start < total_points and len(blocks) < self.number_of_threads:
+                        blocks.append(rng.rand(min(block_size, total_points - start), n))
+                        start += blocks[-1].shape[0]
+                    if self.number_of_threads == 1:
+                        results = [block_sums(blocks[0], initial_centres, tree)]
+                    else:
+                        results = pool.map(block_sums, blocks, [initial_centres] * len(blocks), [tree] * len(blocks))
+                    for block_sum, block_count in results:
+                        sums += block_sum
+                        counts += block_count
+                new_centres = self.update_centres(initial_centres, sums, counts, counter)
+
+                # Estimate distance between new and old centres
+                distance_btw_centres = self.eucl_distance(new_centres, initial_centres)
+                cost_new = np.sqrt(np.sum(distance_btw_centres ** 2))
+                cost_change = np.abs(cost_old - cost_new)
+                counter += 1
+                # print(counter, cost_change)
+                if cost_change >= self.eps:
+                    initial_centres = new_centres
 
         sample_points = new_centres
 
@@ -13,6 +13,7 @@
 import sys
 import os
 import io
+import tempfile
 sys.path.append(os.path.abspath('..')) # current folder is ~/tests
 
 
@@ -26,6 +27,7 @@ import scipy.optimize as opt
 import scipy.stats as stats
 # from sklearn.metrics import mean_squared_error
 import pytest
+from pyomo.environ import value, ConcreteModel, Var, Constraint, Objective
 
 '''
 coverage run test_kriging.py
@@ -72,6 +74,7 @@ class KrigingModelTestCases(unittest.TestCase):
 
     test_kriging_predict_output_01: Test behavior of kriging_predict_output, check the output dimension
     test_kriging_predict_output_02: Test behavior of kriging_predict_output with singe input
+    test_kriging_predict_output_03: Test behavior of kriging_predict_output against point-by-point predictions, also in blocks of one point
     
     test_kriging_training: Test behaviour of kriging_training, 
         all functions in this funtion already covered: optimal_parameter_evaluation, error_calculation, r2_calculation already covered
@@ -84,6 +87,8 @@ class KrigingModelTestCases(unittest.TestCase):
             - 2: The (key, val) dictionary obtained from the generated IndexParam matches is numerically consistent with that of the input array when a numpy array is supplied. 
     
     test_kriging_generate_expression: test only while it is running or not (not compared values)
+    test_kriging_generate_expression_compact: Test that the compact expression has the same values as the default one
+    test_kriging_generate_expression_compact_nl_size: Test that the compact expression gives a smaller NL file than the default one
     ''' 
 
     def setUp(self):
@@ -133,6 +138,16 @@ class KrigingModelTestCases(unittest.TestCase):
     def test__init__05(self):
         with pytest.raises(Exception):
             KrigingClass = KrigingModel(self.test_data_numpy,regularization=1)
+
+    def test__init__06(self):
+        for value in [-1, 1.5, True]:
+            with pytest.raises(Exception):
+                KrigingClass = KrigingModel(self.test_data_numpy,number_of_restarts=value)
+
+    def test__init__07(self):
+        for value in [0, -1, 2.0]:
+            with pytest.raises(Exception):
+                KrigingClass = KrigingModel(self.test_data_numpy,number_of_processes=value)
     
     
     def test_covariance_matrix_generator(self):
@@ -149,6 +164,25 @@ class KrigingModelTestCases(unittest.TestCase):
         np.testing.assert_array_equal(np.round(cov_matrix,7), np.round(cov_matrix_exp,7))
     
     
+    def test_weighted_distance_matrix(self):
+        np.random.seed(0)
+        x1 = np.random.rand(6, 3)
+        x2 = np.random.rand(4, 3)
+        theta = np.array([0.5, 2, 10])
+        for p in [1, 2]:
+            distance_matrix_exp = np.zeros((x1.shape[0], x2.shape[0]))
+            for i in range(0, x1.shape[0]):
+                distance_matrix_exp[i, :] = np.matmul(np.abs(x1[i, :] - x2) ** p, theta)
+            distance_matrix = KrigingModel.weighted_distance_matrix(x1, x2, theta, p)
+            np.testing.assert_array_almost_equal(distance_matrix, distance_matrix_exp, decimal=12)
+
+    def test_cholesky_inverse(self):
+        cov_matrix = np.array([[1.000001,   0.60653066, 0.13533528],
+                                   [0.60653066, 1.000001,   0.60653066],
+                                   [0.13533528, 0.60653066, 1.000001  ]])
+        inverse_x = KrigingModel.cholesky_inverse(np.linalg.cholesky(cov_matrix))
+        np.testing.assert_array_almost_equal(inverse_x, np.linalg.inv(cov_matrix), decimal=10)
+
     def test_covariance_inverse_generator_01(self):
         KrigingClass = KrigingModel(self.training_data[0:3,:],regularization=True)
         cov_matrix = np.array([[1.000001,   0.60653066, 0.13533528],
@@ -239,6 +273,43 @@ class KrigingModelTestCases(unittest.TestCase):
         np.testing.assert_array_equal(np.round(grad_vec,5), np.round(grad_vec_exp,5))
 
 
+    def test_concentrated_likelihood_01(self):
+        np.random.seed(1)
+        x = np.random.rand(30, 2)
+        KrigingClass = KrigingModel(np.column_stack([x, np.sin(3 * x).sum(axis=1)]), regularization=True)
+        p = 2
+        for var_vector in [np.array([0.3, -0.5, 1e-3]), np.array([-1, 0.2, 0.05])]:
+            conc_log_like, grad_vec = KrigingClass.concentrated_likelihood(var_vector, KrigingClass.x_data_scaled, KrigingClass.y_data, p, gradient=True)
+            conc_log_like_exp = KrigingClass.objective_function(var_vector, KrigingClass.x_data_scaled, KrigingClass.y_data, p)
+            grad_vec_exp = KrigingClass.numerical_gradient(var_vector, KrigingClass.x_data_scaled, KrigingClass.y_data, p)
+            assert conc_log_like == conc_log_like_exp
+            np.testing.assert_allclose(grad_vec, grad_vec_exp, rtol=1e-5, atol=1e-5)
+
+    def test_concentrated_likelihood_02(self):
+        KrigingClass = KrigingModel(self.training_data[0:3], regularization=False)
+        p = 2
+        var_vector = np.array([1, 2, 1e-6])
+        conc_log_like, grad_vec = KrigingClass.concentrated_likelihood(var_vector, KrigingClass.x_data_scaled, KrigingClass.y_data, p, regularization=False, gradient=True)
+        assert grad_vec[-1] == 0
+        # Non-positive definite co-variance matrix
+        var_vector = np.array([-3, -3, -1e-2])
+        conc_log_like, grad_vec = KrigingClass.concentrated_likelihood(var_vector, KrigingClass.x_data_scaled, KrigingClass.y_data, p, gradient=True)
+        assert conc_log_like == 1e4
+        np.testing.assert_array_equal(grad_vec, np.zeros(3))
+
+    def test_parameter_optimization_restarts(self):
+        np.random.seed(1)
+        x = np.random.rand(30, 2)
+        data = np.column_stack([x, np.sin(3 * x).sum(axis=1)])
+        np.random.seed(0)
+        opt_results_1 = KrigingModel(data, number_of_restarts=3).parameter_optimization(2)
+        np.random.seed(0)
+        opt_results_2 = KrigingModel(data, number_of_restarts=3, number_of_processes=2).parameter_optimization(2)
+        np.random.seed(0)
+        opt_results_3 = KrigingModel(data).parameter_optimization(2)
+        np.testing.assert_array_equal(opt_results_1.x, opt_results_2.x)
+        assert opt_results_1.fun <= opt_results_3.fun
+
     def test_parameter_optimization_01(self):
         KrigingClass = KrigingModel(self.training_data[0:3])
         p= 2
@@ -278,9 +349,9 @@ class KrigingModelTestCases(unittest.TestCase):
         
         ss_error, rmse_error, y_prediction = KrigingClass.error_calculation(theta, p, mean, cov_inv, y_mu,KrigingClass.x_data_scaled, KrigingClass.y_data)
         
-        np.testing.assert_array_equal(y_prediction, y_prediction_exp)
-        assert np.sum((KrigingClass.y_data-y_prediction_exp)**2)/KrigingClass.x_data_scaled.shape[0] == ss_error
-        assert np.sqrt(np.sum((KrigingClass.y_data-y_prediction_exp)**2)/KrigingClass.x_data_scaled.shape[0]) == rmse_error
+        np.testing.assert_allclose(y_prediction, y_prediction_exp, rtol=1e-10)
+        assert np.sum((KrigingClass.y_data-y_prediction_exp)**2)/KrigingClass.x_data_scaled.shape[0] == pytest.approx(ss_error, rel=1e-8, abs=1e-12)
+        assert np.sqrt(np.sum((KrigingClass.y_data-y_prediction_exp)**2)/KrigingClass.x_data_scaled.shape[0]) == pytest.approx(rmse_error, rel=1e-8, abs=1e-12)
         # self.assertEqual(np.sum((KrigingClass.y_data-y_prediction_exp)**2)/KrigingClass.x_data_scaled.shape[0],ss_error)
         # self.assertEqual(np.sqrt(np.sum((KrigingClass.y_data-y_prediction_exp)**2)/KrigingClass.x_data_scaled.shape[0]),rmse_error)
 
@@ -310,7 +381,24 @@ class KrigingModelTestCases(unittest.TestCase):
         results = KrigingClass.kriging_training()
         y_pred = KrigingClass.kriging_predict_output(results, np.array([0.1, 0.2]))
         assert y_pred.shape[0] == 1
-        
+
+    def test_kriging_predict_output_03(self):
+        np.random.seed(0)
+        KrigingClass = KrigingModel(self.training_data)
+        results = KrigingClass.kriging_training()
+        x_test = np.array([[0.5, 7.5], [2.5, 2.5], [10, 0], [3.3, 9.1], [6, 4]])
+        y_pred_exp = np.zeros((x_test.shape[0], 1))
+        x_test_scaled = (x_test - results.x_min) / (results.x_max - results.x_min)
+        for i in range(0, x_test.shape[0]):
+            cmt = np.matmul((np.abs(x_test_scaled[i, :] - results.scaled_x)) ** results.optimal_p, results.optimal_weights)
+            y_pred_exp[i, 0] = results.optimal_mean.item() + np.matmul(np.matmul(np.exp(-1 * cmt), results.covariance_matrix_inverse), results.optimal_y_mu).item()
+        y_pred = KrigingClass.kriging_predict_output(results, x_test)
+        np.testing.assert_allclose(y_pred, y_pred_exp, rtol=1e-8)
+        # Evaluation in blocks of one point gives the same predictions
+        with patch.object(KrigingModel, 'max_prediction_block', 1):
+            y_pred_blocks = KrigingClass.kriging_predict_output(results, x_test)
+        np.testing.assert_allclose(y_pred_blocks, y_pred, rtol=1e-10)
+
     
     def test_kriging_training(self):
         KrigingClass = KrigingModel(self.training_data[0:3],regularization=False)
@@ -365,6 +453,38 @@ class KrigingModelTestCases(unittest.TestCase):
         for i in p.keys():
             lv.append(p[i])
         rbf_expr = results.kriging_generate_expression((lv))
+
+    def test_kriging_generate_expression_compact(self):
+        np.random.seed(0)
+        KrigingClass = KrigingModel(self.training_data, regularization=False)
+        results = KrigingClass.kriging_training()
+        p = KrigingClass.get_feature_vector()
+        lv = [p[i] for i in p.keys()]
+        expr = results.kriging_generate_expression(lv)
+        expr_compact = results.kriging_generate_expression(lv, compact=True)
+        for x_test in [[0.5, 7.5], [2.5, 2.5], [10, 0]]:
+            for j in range(0, len(lv)):
+                p[j] = x_test[j]
+            assert value(expr_compact) == pytest.approx(value(expr), rel=1e-8)
+
+    def test_kriging_generate_expression_compact_nl_size(self):
+        np.random.seed(0)
+        x = np.random.rand(100, 2) * 10
+        training_data = np.column_stack([x, (x[:, 0] + 1) ** 2 + (x[:, 1] + 1) ** 2])
+        KrigingClass = KrigingModel(training_data, regularization=False)
+        results = KrigingClass.kriging_training()
+        nl_sizes = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for compact in [False, True]:
+                m = ConcreteModel()
+                m.x = Var([0, 1], initialize=1)
+                m.y = Var()
+                m.c = Constraint(expr=m.y == results.kriging_generate_expression([m.x[0], m.x[1]], compact=compact))
+                m.obj = Objective(expr=0)
+                nl_file = os.path.join(tmpdir, 'kriging_%s.nl' % compact)
+                m.write(nl_file, format='nl')
+                nl_sizes.append(os.path.getsize(nl_file))
+        assert nl_sizes[1] < 0.8 * nl_sizes[0]
         
         
 if __name__ == '__main__':
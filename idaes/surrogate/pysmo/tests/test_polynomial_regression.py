@@ -19,6 +19,7 @@ import pandas as pd
 import pyutilib.th as unittest
 from unittest.mock import patch
 import pytest
+from pyomo.environ import sin, exp, value
 
 '''
 coverage run test_polynomial_regression.py
@@ -268,6 +269,7 @@ class PolynomialRegressionTestCases(unittest.TestCase):
     test__init__30: Test behaviour raise Exception with number_of_crossvalidations< 0
     test__init__31: Test behaviour raise Exception with no_adaptive_samples< 0
     test__init__32: Test behaviour raise Exception with max_iter< 0
+    test__init__33: Test behaviour raise Exception with number_of_processes not a positive integer
 
     test_training_test_data_creation_01: Test behaviour raise Exception with num_training = 0,training_split=0.01
     test_training_test_data_creation_02: Test behaviour raise Exception with num_training == self.number_of_samples, training_split=0.99
@@ -275,6 +277,8 @@ class PolynomialRegressionTestCases(unittest.TestCase):
     test_training_test_data_creation_04: Check 1. splited training / test size = cross validation size, 2. size of each train / test, 3. each train / test are correctly splitted with manual class values
     test_training_test_data_creation_05: Check with additional data, 1. splited training / test size = 2*cross validation size, 2. size of each train, train_extra / test, test_extra, 3. ach train, train_extra / test, test_extra are correctly splitted with default class values
 
+    test_training_test_indices: Check that the training and test indices split the rows of the regression data, and select the rows of the sets from training_test_data_creation
+
     test_polygeneration_01:
     test_polygeneration_02:
     test_polygeneration_03:
@@ -350,6 +354,14 @@ class PolynomialRegressionTestCases(unittest.TestCase):
            - 3: No optimization problem is solved when the problem is underspecified - all the outputs default to np.Inf.
            For the tests, the relevant optimization method in each case was replaced by a mock function.
 
+    test_least_squares_fit: Check that the weights found from the QR factors of the training features match MLE_estimate
+
+    test_cross_validation_fitting_01:
+    test_cross_validation_fitting_02:
+       Tests: : Unit tests for the cross_validation_fitting function. We verify that:
+           - 1: The best fit matches the best fit from polyregression for all polynomial orders and training / test sets, with additional features and the 'mle' and 'bfgs' solution methods.
+           - 2: The results with several processes are identical to the results with one process.
+
     test_surrogate_performance_01:
     test_surrogate_performance_02:
     test_surrogate_performance_03:
@@ -401,6 +413,8 @@ class PolynomialRegressionTestCases(unittest.TestCase):
     test_poly_training_01: checking the status is 'ok', R2 > 0.95, by running polynomial_regression_fitting, ResultReport class is covered here
 
     test_generate_expression:   test only while it is running or not (not compared values)
+
+    test_poly_predict_output: Test that the predictions for several points, with additional terms, match the values of the expression from generate_expression
     '''
     def setUp(self):
         # Data generated from the expression (x_1 + 1)^2 + (x_2 + 1) ^ 2 between 0 and 10 for x_1 and x_2
@@ -719,6 +733,17 @@ class PolynomialRegressionTestCases(unittest.TestCase):
                                             maximum_polynomial_order=3,
                                             max_iter=-3)
 
+    def test__init__33(self):
+        original_data_input= self.test_data_numpy
+        regression_data_input = self.sample_points_numpy
+        PolyClass = PolynomialRegression(original_data_input, regression_data_input, maximum_polynomial_order=3)
+        assert PolyClass.number_of_processes == 1
+        for value in [0, -2, 1.5, True]:
+            with pytest.raises(Exception):
+                PolyClass = PolynomialRegression(original_data_input, regression_data_input,
+                                                maximum_polynomial_order=3,
+                                                number_of_processes=value)
+
         
     def test_training_test_data_creation_01(self):       
         original_data_input= self.test_data_numpy
@@ -834,6 +859,18 @@ class PolynomialRegressionTestCases(unittest.TestCase):
             concat_02_sorted = concat_02[np.lexsort((concat_02[:, 3],concat_02[:, 2], concat_02[:, 1], concat_02[:, 0]))]
             np.testing.assert_equal(additional_data_sorted, concat_02_sorted)
 
+    def test_training_test_indices(self):
+        PolyClass = PolynomialRegression(self.full_data, self.training_data, maximum_polynomial_order=5)
+        training_indices, test_indices = PolyClass.training_test_indices()
+        training_data, cross_val_data = PolyClass.training_test_data_creation()
+        expected_training_size = int(np.around(PolyClass.number_of_samples * PolyClass.fraction_training))
+        assert len(training_indices) == len(test_indices) == PolyClass.number_of_crossvalidations
+        for i in range(1, PolyClass.number_of_crossvalidations + 1):
+            assert training_indices[i - 1].shape[0] == expected_training_size
+            np.testing.assert_array_equal(np.sort(np.concatenate((training_indices[i - 1], test_indices[i - 1]))), np.arange(PolyClass.number_of_samples))
+            np.testing.assert_array_equal(PolyClass.regression_data[training_indices[i - 1], :], training_data["training_set_" + str(i)])
+            np.testing.assert_array_equal(PolyClass.regression_data[test_indices[i - 1], :], cross_val_data["test_set_" + str(i)])
+
 
     def test_polygeneration_01(self):
         data_feed = PolynomialRegression(self.full_data, self.training_data, maximum_polynomial_order=1)
@@ -1249,6 +1286,51 @@ class PolynomialRegressionTestCases(unittest.TestCase):
         np.testing.assert_array_equal(expected_output, output_2)
         np.testing.assert_array_equal(expected_output, output_3)
 
+    def test_least_squares_fit(self):
+        x = self.full_data.values[:, :-1]
+        y = self.full_data.values[:, -1].reshape(-1, 1)
+        x_polynomial_data = PolynomialRegression.polygeneration(4, 1, x)
+        q, r = np.linalg.qr(x_polynomial_data)
+        phi_1, training_error_1, crossval_error_1 = PolynomialRegression.least_squares_fit(PolynomialRegression.MLE_estimate, x_polynomial_data, y, x_polynomial_data, y)
+        phi_2, training_error_2, crossval_error_2 = PolynomialRegression.least_squares_fit(None, x_polynomial_data, y, x_polynomial_data, y, ls_factors=(r, np.matmul(q.transpose(), y)))
+        np.testing.assert_allclose(phi_1, phi_2, rtol=1e-6, atol=1e-8)
+        assert training_error_1 == pytest.approx(training_error_2, abs=1e-12)
+        assert crossval_error_1 == pytest.approx(crossval_error_2, abs=1e-12)
+
+    def test_cross_validation_fitting_01(self):
+        additional_features = np.column_stack((np.sin(self.full_data.values[:, 0]), np.exp(self.full_data.values[:, 1] / 10)))
+        for solution_method, features in [('mle', None), ('mle', additional_features), ('bfgs', None)]:
+            data_feed = PolynomialRegression(self.full_data, self.full_data, maximum_polynomial_order=4, solution_method=solution_method)
+            np.random.seed(0)
+            if features is None:
+                training_data, cross_val_data = data_feed.training_test_data_creation()
+            else:
+                training_data, cross_val_data = data_feed.training_test_data_creation(features)
+            best_error, phi_best, order_best = 1e20, 0, 0
+            for poly_order in range(1, data_feed.max_polynomial_order + 1):
+                for i in range(1, data_feed.number_of_crossvalidations + 1):
+                    if features is None:
+                        phi, _, cv_error = data_feed.polyregression(poly_order, training_data["training_set_" + str(i)], cross_val_data["test_set_" + str(i)])
+                    else:
+                        phi, _, cv_error = data_feed.polyregression(poly_order, training_data["training_set_" + str(i)], cross_val_data["test_set_" + str(i)],
+                                                                    training_data["training_extras_" + str(i)], cross_val_data["test_extras_" + str(i)])
+                    if cv_error < best_error:
+                        best_error, phi_best, order_best = cv_error, phi, poly_order
+            np.random.seed(0)
+            phi, order, _, cv_error = data_feed.cross_validation_fitting(features)
+            assert order == order_best
+            np.testing.assert_allclose(phi, phi_best, rtol=1e-6, atol=1e-8)
+            assert cv_error == pytest.approx(best_error, rel=1e-6)
+
+    def test_cross_validation_fitting_02(self):
+        for solution_method in ['mle', 'bfgs']:
+            data_feed_1 = PolynomialRegression(self.full_data, self.full_data, maximum_polynomial_order=4, solution_method=solution_method)
+            data_feed_2 = PolynomialRegression(self.full_data, self.full_data, maximum_polynomial_order=4, solution_method=solution_method, number_of_processes=2)
+            output_1 = data_feed_1.cross_validation_fitting()
+            output_2 = data_feed_2.cross_validation_fitting()
+            np.testing.assert_array_equal(output_1[0], output_2[0])
+            assert output_1[1:] == output_2[1:]
+
 
     def test_surrogate_performance_01(self):
         # Create x vector for ax2 + bx + c: x data supplied in x_vector
@@ -1500,7 +1582,23 @@ class PolynomialRegressionTestCases(unittest.TestCase):
         for i in p.keys():
             lv.append(p[i])
         poly_expr = results.generate_expression((lv))
-        
+
+    def test_poly_predict_output(self):
+        data_feed = PolynomialRegression(self.full_data, self.training_data, maximum_polynomial_order=2, multinomials=1, solution_method='mle')
+        p = data_feed.get_feature_vector()
+        data_feed.set_additional_terms([sin(p['x1']) * p['x2'], exp(p['x2'] / 10)])
+        results = data_feed.poly_training()
+        x_test = np.array([[2.2, 7.1], [3.3, 1.2], [9, 4.4], [5.1, 9.5]])
+        y_pred = data_feed.poly_predict_output(results, x_test)
+        lv = [p[i] for i in p.keys()]
+        poly_expr = results.generate_expression(lv)
+        y_pred_exp = np.zeros((x_test.shape[0], 1))
+        for i in range(0, x_test.shape[0]):
+            p['x1'] = x_test[i, 0]
+            p['x2'] = x_test[i, 1]
+            y_pred_exp[i, 0] = value(poly_expr)
+        np.testing.assert_allclose(y_pred, y_pred_exp, rtol=1e-10)
+
         
 
 if __name__ == '__main__':
@@ -21,6 +21,7 @@ import pyutilib.th as unittest
 from unittest.mock import patch
 from scipy.spatial import distance
 import pytest
+from pyomo.environ import value
 
 '''
 coverage run test_radial_basis_function.py
@@ -354,6 +355,7 @@ class RadialBasisFunctionTestCases(unittest.TestCase):
     test_rbf_predict_output_04:
     test_rbf_predict_output_05:
     test_rbf_predict_output_06:
+    test_rbf_predict_output_07: Test that predictions for several points, also in blocks of one point, match the predictions for one point at a time
         Tests: : Unit tests for rbf_predict_output, a function that generates predictions for a test dataset. 
              For a small dataset, we verify that the current predictions are produced for each transformation type.
 
@@ -369,6 +371,7 @@ class RadialBasisFunctionTestCases(unittest.TestCase):
     test_rbf_generate_expression_04: test only while it is running with self.basis_function == 'mq' or not (not compared values)
     test_rbf_generate_expression_05: test only while it is running with self.basis_function == 'imq' or not (not compared values)
     test_rbf_generate_expression_06: test only while it is running with self.basis_function == 'spline' or not (not compared values)
+    test_rbf_generate_expression_07: Test that the compact expressions have the same values as the default ones for all basis functions
     ''' 
 
     def setUp(self):
@@ -439,6 +442,10 @@ class RadialBasisFunctionTestCases(unittest.TestCase):
         with pytest.raises(Exception):
             RbfClass = RadialBasisFunctions(self.test_data_numpy, basis_function=None, solution_method=None, regularization=1)
 
+    def test__init__10(self):
+        for value in [0, -1, 2.0, True]:
+            with pytest.raises(Exception):
+                RbfClass = RadialBasisFunctions(self.test_data_numpy, number_of_processes=value)
     
     def test_r2_distance(self):
         u = np.array([[0.1, 0.9]])
@@ -1091,6 +1098,35 @@ class RadialBasisFunctionTestCases(unittest.TestCase):
         assert error_best == expected_errors
 
 
+    def test_loo_errors_with_eigendecomposition(self):
+        reg_parameter = [0.00001, 0.001, 0.1, 1]
+        for basis_function in ['gaussian', 'linear', 'cubic', 'mq', 'imq', 'spline']:
+            data_feed = RadialBasisFunctions(self.training_data, basis_function=basis_function, solution_method='algebraic', regularization=True)
+            for sigma in [0.5, 2.0]:
+                cond_pure, cond_reg, errors = data_feed.loo_errors_with_eigendecomposition(data_feed.x_data, data_feed.y_data, basis_function, sigma, reg_parameter)
+                for j in range(0, len(reg_parameter)):
+                    expected_cond_pure, expected_cond_reg, expected_errors = data_feed.loo_error_estimation_with_rippa_method(sigma, reg_parameter[j])
+                    if expected_cond_reg < 1e8:
+                        np.testing.assert_allclose(cond_reg[j], expected_cond_reg, rtol=1e-6)
+                        np.testing.assert_allclose(errors[j], expected_errors, rtol=1e-6)
+
+    def test_leave_one_out_crossvalidation_repeated_points(self):
+        # Repeated training points make the basis matrix singular without regularization
+        training_data = np.vstack([self.training_data, self.training_data[:5, :]])
+        data_feed = RadialBasisFunctions(training_data, basis_function='gaussian', solution_method='algebraic', regularization=False)
+        r_best, lambda_best, error_best = data_feed.leave_one_out_crossvalidation()
+        r_set = [0.001, 0.002, 0.005, 0.0075, 0.01, 0.02, 0.05, 0.075, 0.1, 0.2, 0.5, 0.75, 1.0, 2.0, 5.0, 7.5, 10.0, 20.0, 50.0, 75.0, 100.0, 200.0, 500.0, 1000.0]
+        expected_errors = [data_feed.loo_error_estimation_with_rippa_method(sigma, 0)[2] for sigma in r_set]
+        assert r_best == r_set[np.argmin(expected_errors)]
+        assert lambda_best == 0
+        np.testing.assert_allclose(error_best, np.min(expected_errors))
+
+    def test_leave_one_out_crossvalidation_processes(self):
+        data_feed = RadialBasisFunctions(self.training_data, basis_function='gaussian', solution_method='algebraic', regularization=True)
+        expected_output = data_feed.leave_one_out_crossvalidation()
+        data_feed = RadialBasisFunctions(self.training_data, basis_function='gaussian', solution_method='algebraic', regularization=True, number_of_processes=2)
+        assert data_feed.leave_one_out_crossvalidation() == expected_output
+
     def test_rbf_training_01(self):
         data_feed = RadialBasisFunctions(self.test_data_numpy,basis_function=None,solution_method='algebraic', regularization=False)
         results = data_feed.rbf_training()
@@ -1253,6 +1289,19 @@ class RadialBasisFunctionTestCases(unittest.TestCase):
         expected_output = results.y_data_min + expected_output * (results.y_data_max - results.y_data_min)
         assert expected_output == output
 
+    def test_rbf_predict_output_07(self):
+        for basis_function in ['linear', 'cubic', 'gaussian', 'mq', 'imq', 'spline']:
+            data_feed = RadialBasisFunctions(self.training_data, basis_function=basis_function, regularization=True)
+            results = data_feed.rbf_training()
+            x_test = np.array([[2.2, 7.1], [3.3, 1.2], [9, 4.4], [5.1, 9.5], [1, 2.2]])
+            output = data_feed.rbf_predict_output(results, x_test)
+            expected_output = np.concatenate([data_feed.rbf_predict_output(results, x_test[i:i + 1, :]) for i in range(0, x_test.shape[0])])
+            np.testing.assert_allclose(output, expected_output, rtol=1e-10)
+            # Evaluation in blocks of one point gives the same predictions
+            with patch.object(RadialBasisFunctions, 'max_prediction_block', 1):
+                output_blocks = data_feed.rbf_predict_output(results, x_test)
+            np.testing.assert_allclose(output_blocks, output, rtol=1e-10)
+
 
     def test_get_feature_vector_01(self):
         data_feed = RadialBasisFunctions(self.full_data, basis_function='linear')
@@ -1320,6 +1369,19 @@ class RadialBasisFunctionTestCases(unittest.TestCase):
         for i in p.keys():
             lv.append(p[i])
         rbf_expr = results.rbf_generate_expression((lv))
+
+    def test_rbf_generate_expression_07(self):
+        for basis_function in ['linear', 'cubic', 'gaussian', 'mq', 'imq', 'spline']:
+            data_feed = RadialBasisFunctions(self.training_data, basis_function=basis_function, solution_method=None, regularization=True)
+            p = data_feed.get_feature_vector()
+            results = data_feed.rbf_training()
+            lv = [p[i] for i in p.keys()]
+            rbf_expr = results.rbf_generate_expression(lv)
+            rbf_expr_compact = results.rbf_generate_expression(lv, compact=True)
+            for x_test in [[2.2, 7.1], [3.3, 1.2], [9, 4.4]]:
+                for j in range(0, len(lv)):
+                    p[j] = x_test[j]
+                assert value(rbf_expr_compact) == pytest.approx(value(rbf_expr), rel=1e-10)
     
     
 if __name__ == '__main__':
@@ -18,6 +18,7 @@ import numpy as np
 import pandas as pd
 import pyutilib.th as unittest
 import pytest
+from scipy.spatial import cKDTree
 
 '''
 coverage run test_sampling.py
@@ -444,6 +445,46 @@ class SamplingMethodsTestCases(unittest.TestCase):
         with pytest.raises(IndexError):
             unique_sample_points = SamplingClass.sample_point_selection(input_array, generated_sample_points,sampling_type = 'creation')
 
+    def test_points_selection_unique_01(self):
+        input_array = self.test_data_numpy_3d
+        generated_sample_points = np.array([[-0.5, 10], [-0.4, 10], [-0.3, 10]])
+        SamplingClass = SamplingMethods()
+        equivalent_points = SamplingClass.points_selection(input_array, generated_sample_points)
+        np.testing.assert_array_equal(equivalent_points, input_array[[0, 0, 0], :])
+        equivalent_points = SamplingClass.points_selection(input_array, generated_sample_points, unique=True)
+        np.testing.assert_array_equal(equivalent_points, input_array[[0, 1, 2], :])
+
+    def test_points_selection_unique_02(self):
+        input_array = self.test_data_numpy_3d
+        generated_sample_points = np.zeros((11, 2))
+        SamplingClass = SamplingMethods()
+        with pytest.raises(ValueError):
+            equivalent_points = SamplingClass.points_selection(input_array, generated_sample_points, unique=True)
+
+    def test_points_selection_blocks(self):
+        # nearest neighbours found without a KD-tree, in blocks of rows, are the same
+        np.random.seed(0)
+        input_array = np.random.rand(200, 4)
+        generated_sample_points = np.random.rand(50, 3)
+        SamplingClass = SamplingMethods()
+        expected = SamplingClass.points_selection(input_array, generated_sample_points)
+        expected_unique = SamplingClass.points_selection(input_array, generated_sample_points, unique=True)
+        SamplingClass.kdtree_max_features = 0
+        SamplingClass.max_distance_block = 1000
+        np.testing.assert_array_equal(SamplingClass.points_selection(input_array, generated_sample_points), expected)
+        np.testing.assert_array_equal(
+            SamplingClass.points_selection(input_array, generated_sample_points, unique=True), expected_unique)
+        assert np.unique(expected_unique, axis=0).shape[0] == 50
+
+    def test_sample_point_selection_unique(self):
+        input_array = self.test_data_numpy_3d
+        generated_sample_points = np.array([[0, 0], [0.01, 0.01], [1, 1]])
+        SamplingClass = SamplingMethods()
+        SamplingClass.unique_selection = True
+        unique_sample_points = SamplingClass.sample_point_selection(input_array, generated_sample_points, sampling_type='selection')
+        np.testing.assert_array_equal(unique_sample_points, input_array[[0, 1, 9], :])
+
+
 
     def test_prime_number_generator_01(self):
         prime_list = SamplingMethods.prime_number_generator(self, 3)
@@ -747,6 +788,14 @@ class LatinHypercubeSamplingTestCases(unittest.TestCase):
             np.testing.assert_array_equal(np.unique(unique_sample_points, axis=0),unique_sample_points)
             np.testing.assert_array_equal(expected_testing,out_testing)
 
+    def test_sample_points_unique_selection(self):
+        input_array = self.test_data_numpy
+        LHSClass = LatinHypercubeSampling(input_array, number_of_samples=10, sampling_type="selection", unique_selection=True)
+        unique_sample_points = LHSClass.sample_points()
+        np.testing.assert_array_equal(np.unique(input_array, axis=0), unique_sample_points)
+        with pytest.raises(Exception):
+            LHSClass = LatinHypercubeSampling(input_array, number_of_samples=10, sampling_type="selection", unique_selection=1)
+
     def test_sample_points_02(self):
         for num_samples in [None,10,1]:
             input_array = self.test_data_list
@@ -1870,6 +1919,65 @@ class CVTSamplingTestCases(unittest.TestCase):
                 assert (unique_sample_points[:,i]>=var_range[0]).all() and (unique_sample_points[:,i]<=var_range[1]).all()
             np.testing.assert_array_equal(np.unique(unique_sample_points, axis=0).shape,unique_sample_points.shape)
 
+    def test__init__points_per_centre_fail(self):
+        for value in [0, -5, 1.5, True, 'one']:
+            with pytest.raises(Exception):
+                CVTClass = CVTSampling(self.test_data_list, number_of_samples=5, sampling_type="creation", points_per_centre=value)
+
+    def test__init__max_memory_fail(self):
+        for value in [0, -1, 1e6]:
+            with pytest.raises(Exception):
+                CVTClass = CVTSampling(self.test_data_list, number_of_samples=5, sampling_type="creation", max_memory=value)
+
+    def test__init__number_of_threads_fail(self):
+        for value in [0, -2, 2.0]:
+            with pytest.raises(Exception):
+                CVTClass = CVTSampling(self.test_data_list, number_of_samples=5, sampling_type="creation", number_of_threads=value)
+
+    def test_class_sums(self):
+        points = np.array([[0.1, 0.2], [0.3, 0.4], [0.5, 0.6]])
+        classes = np.array([2, 0, 2])
+        sums, counts = CVTSampling.class_sums(points, classes, 4)
+        np.testing.assert_array_almost_equal(sums, np.array([[0.3, 0.4], [0, 0], [0.6, 0.8], [0, 0]]))
+        np.testing.assert_array_equal(counts, np.array([1, 0, 2, 0]))
+
+    def test_closest_centres(self):
+        np.random.seed(3)
+        points = np.random.rand(200, 3)
+        centres = np.random.rand(7, 3)
+        expected_output = np.argmin(((points[:, np.newaxis, :] - centres) ** 2).sum(axis=2), axis=1)
+        CVTClass = CVTSampling(self.test_data_list, number_of_samples=7, sampling_type="creation")
+        np.testing.assert_array_equal(CVTClass.closest_centres(points, centres), expected_output)
+        np.testing.assert_array_equal(CVTClass.closest_centres(points, centres, cKDTree(centres)), expected_output)
+
+    def test_sample_points_random_seed(self):
+        input_array = self.test_data_list
+        outputs = []
+        for i in range(2):
+            CVTClass = CVTSampling(input_array, number_of_samples=6, sampling_type="creation", random_seed=11, points_per_centre=100)
+            outputs.append(CVTClass.sample_points())
+        np.testing.assert_array_equal(outputs[0], outputs[1])
+        CVTClass = CVTSampling(input_array, number_of_samples=6, sampling_type="creation", random_seed=12, points_per_centre=100)
+        assert not np.array_equal(outputs[0], CVTClass.sample_points())
+
+    def test_sample_points_blocks_and_threads(self):
+        # Small blocks and several threads draw the same random points, so give the same samples
+        input_array = self.test_data_list
+        CVTClass = CVTSampling(input_array, number_of_samples=6, sampling_type="creation", random_seed=5, points_per_centre=100)
+        expected_output = CVTClass.sample_points()
+        for max_memory, threads in [(2000, 1), (2000, 3), (2 ** 28, 2)]:
+            CVTClass = CVTSampling(input_array, number_of_samples=6, sampling_type="creation", random_seed=5, points_per_centre=100,
+                                   max_memory=max_memory, number_of_threads=threads)
+            np.testing.assert_array_almost_equal(expected_output, CVTClass.sample_points(), decimal=12)
+
+    def test_sample_points_many_features(self):
+        # More features than SamplingMethods.kdtree_max_features: distances are computed without the KD-tree
+        input_array = [[0] * 20, [1] * 20]
+        CVTClass = CVTSampling(input_array, number_of_samples=5, sampling_type="creation", random_seed=0, points_per_centre=50)
+        unique_sample_points = CVTClass.sample_points()
+        assert unique_sample_points.shape == (5, 20)
+        assert (unique_sample_points >= 0).all() and (unique_sample_points <= 1).all()
+
 if __name__ == '__main__':
     unittest.main()
     
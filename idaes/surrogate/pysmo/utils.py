@@ -22,6 +22,7 @@
 
 from pyomo.core.expr import current as EXPR, native_types
 from pyomo.core.expr.numvalue import value
+from pyomo.core.base.expression import Expression
 from pyomo.core.kernel.component_map import ComponentMap
 
 _numpy_available = True
@@ -87,3 +88,33 @@ class NumpyEvaluator(EXPR.StreamBasedExpressionVisitor):
         # Assume everything else is a constant...
         #
         return False, value(child)
+
+
+def scaled_variable_expressions(variable_list, x_min, x_max):
+    """
+    Returns a list of named Pyomo Expressions for the min-max scaled variables (variable_list[j] - x_min[j]) / (x_max[j] - x_min[j]),
+    to be shared between the terms of a surrogate expression. As in the training data scaling, a zero range is replaced by 1.
+    """
+    scaled_variables = []
+    for j in range(0, len(variable_list)):
+        scale = x_max[j] - x_min[j]
+        e = Expression(expr=(variable_list[j] - float(x_min[j])) / float(scale if scale != 0 else 1.0))
+        e.construct()
+        scaled_variables.append(e)
+    return scaled_variables
+
+
+def squared_distance_expressions(scaled_variables, points, weights):
+    """
+    Returns a list of Pyomo expressions for the weighted squared distances sum_j weights[j] * (scaled_variables[j] - points[i, j]) ** 2
+    between the scaled variables and each row of points. The squares are expanded: the quadratic part sum_j weights[j] * scaled_variables[j] ** 2
+    is a named Pyomo Expression shared by all the points, and each point only adds a linear expression of the scaled variables.
+    """
+    points = numpy.asarray(points, dtype=float)
+    weights = numpy.asarray(weights, dtype=float).reshape(-1, )
+    quadratic = Expression(expr=sum(float(weights[j]) * scaled_variables[j] ** 2 for j in range(0, len(scaled_variables))))
+    quadratic.construct()
+    coefficients = -2 * points * weights
+    constants = numpy.sum(weights * points ** 2, axis=1)
+    return [quadratic + sum(float(coefficients[i, j]) * scaled_variables[j] for j in range(0, len(scaled_variables))) + float(constants[i])
+            for i in range(0, points.shape[0])]